@@ -0,0 +1,403 @@
+/**
+ * Compare the "spreadsheet" and "sheets-api" storage engines of
+ * script/google-apps-script.js against local stubs of SpreadsheetApp and the
+ * Advanced Sheets service.
+ *
+ * Every stubbed service call adds a simulated round-trip latency, so the report
+ * shows how many calls each engine makes and what they would roughly cost.
+ *
+ * Usage: node bench_storage_engines.js [rows] [latencyMs]
+ */
+const fs = require("fs");
+const path = require("path");
+const vm = require("vm");
+
+const ROWS = parseInt(process.argv[2]) || 2000;
+const LATENCY_MS = parseFloat(process.argv[3]) || 50;
+const SCRIPT_PATH = path.join(__dirname, "script", "google-apps-script.js");
+
+// ==================== STUBS ====================
+
+let stats;
+function resetStats() {
+  stats = { calls: 0, cells: 0 };
+}
+function recordCall(cells) {
+  stats.calls++;
+  stats.cells += cells;
+}
+
+class StubRange {
+  constructor(sheet, row, column, numRows, numColumns) {
+    this.sheet = sheet;
+    this.row = row;
+    this.column = column;
+    this.numRows = numRows || 1;
+    this.numColumns = numColumns || 1;
+  }
+
+  getValues() {
+    recordCall(this.numRows * this.numColumns);
+    return this.sheet.readBlock(
+      this.row,
+      this.column,
+      this.numRows,
+      this.numColumns,
+    );
+  }
+
+  getValue() {
+    return this.getValues()[0][0];
+  }
+
+  getNumberFormats() {
+    recordCall(this.numColumns);
+    const formats = [];
+    for (let c = 0; c < this.numColumns; c++) {
+      formats.push(this.column + c === 1 ? "dd/MM/yyyy" : "General");
+    }
+    return [formats];
+  }
+
+  setValues(values) {
+    recordCall(values.length * values[0].length);
+    this.sheet.writeBlock(this.row, this.column, values);
+    return this;
+  }
+
+  setValue(value) {
+    return this.setValues([[value]]);
+  }
+}
+
+class StubSheet {
+  constructor(name, rows) {
+    this.name = name;
+    this.rows = rows;
+  }
+
+  getName() {
+    return this.name;
+  }
+
+  getLastRow() {
+    recordCall(0);
+    return this.rows.length;
+  }
+
+  getLastColumn() {
+    recordCall(0);
+    return this.rows.reduce((max, row) => Math.max(max, row.length), 0);
+  }
+
+  getRange(row, column, numRows, numColumns) {
+    return new StubRange(this, row, column, numRows, numColumns);
+  }
+
+  readBlock(row, column, numRows, numColumns) {
+    const out = [];
+    for (let r = 0; r < numRows; r++) {
+      const source = this.rows[row - 1 + r] || [];
+      const line = [];
+      for (let c = 0; c < numColumns; c++) {
+        const value = source[column - 1 + c];
+        line.push(value === undefined ? "" : value);
+      }
+      out.push(line);
+    }
+    return out;
+  }
+
+  writeBlock(row, column, values) {
+    values.forEach((line, r) => {
+      while (this.rows.length < row + r) this.rows.push([]);
+      line.forEach((value, c) => {
+        this.rows[row - 1 + r][column - 1 + c] = value;
+      });
+    });
+  }
+}
+
+class StubSpreadsheet {
+  constructor(sheets) {
+    this.sheets = sheets;
+  }
+
+  getId() {
+    return "stub";
+  }
+
+  getSheetByName(name) {
+    return this.sheets.find((sheet) => sheet.name === name) || null;
+  }
+
+  getSpreadsheetTimeZone() {
+    return "Asia/Jakarta";
+  }
+}
+
+function letterToColumn(letters) {
+  return letters
+    .split("")
+    .reduce((n, ch) => n * 26 + ch.charCodeAt(0) - 64, 0);
+}
+
+/**
+ * Parse the A1 forms produced by toA1Range: 'S', 'S'!6:10, 'S'!B6:D, 'S'!B6:D9
+ */
+function parseA1(ss, a1) {
+  const match = a1.match(/^'((?:[^']|'')+)'(?:!(.*))?$/);
+  const sheet = ss.getSheetByName(match[1].replace(/''/g, "'"));
+  const lastRow = sheet.rows.length;
+  const lastColumn = sheet.rows.reduce((m, row) => Math.max(m, row.length), 0);
+  if (!match[2]) {
+    return { sheet, row: 1, column: 1, numRows: lastRow, numColumns: lastColumn };
+  }
+
+  const rows = match[2].match(/^(\d+):(\d+)$/);
+  if (rows) {
+    const row = parseInt(rows[1]);
+    return {
+      sheet,
+      row,
+      column: 1,
+      numRows: parseInt(rows[2]) - row + 1,
+      numColumns: lastColumn,
+    };
+  }
+
+  const cells = match[2].match(/^([A-Z]+)(\d+):([A-Z]+)(\d*)$/);
+  const row = parseInt(cells[2]);
+  const column = letterToColumn(cells[1]);
+  const endRow = cells[4] ? parseInt(cells[4]) : lastRow;
+  return {
+    sheet,
+    row,
+    column,
+    numRows: endRow - row + 1,
+    numColumns: letterToColumn(cells[3]) - column + 1,
+  };
+}
+
+function toSerial(value) {
+  if (!(value instanceof Date)) return value;
+  const wallTime = Date.UTC(
+    value.getFullYear(),
+    value.getMonth(),
+    value.getDate(),
+    value.getHours(),
+    value.getMinutes(),
+    value.getSeconds(),
+  );
+  return wallTime / 86400000 + 25569;
+}
+
+function createSheetsStub(ss) {
+  return {
+    Spreadsheets: {
+      Values: {
+        batchGet(spreadsheetId, options) {
+          let cells = 0;
+          const valueRanges = options.ranges.map((a1) => {
+            const range = parseA1(ss, a1);
+            const values = range.sheet
+              .readBlock(range.row, range.column, range.numRows, range.numColumns)
+              .map((row) => row.map(toSerial));
+            cells += range.numRows * range.numColumns;
+            return { range: a1, values };
+          });
+          recordCall(cells);
+          return { valueRanges };
+        },
+
+        batchUpdate(request, spreadsheetId) {
+          let cells = 0;
+          request.data.forEach((entry) => {
+            const range = parseA1(ss, entry.range);
+            range.sheet.writeBlock(range.row, range.column, entry.values);
+            cells += entry.values.length * entry.values[0].length;
+          });
+          recordCall(cells);
+          return { totalUpdatedCells: cells };
+        },
+      },
+    },
+  };
+}
+
+// ==================== FIXTURES ====================
+
+function buildFixtures() {
+  const produk = [
+    ["SKU", "KATEGORI", "PRODUK", "SATUAN", "TERJUAL", "RESTOCK", "STOK"],
+  ];
+  for (let i = 0; i < ROWS; i++) {
+    produk.push([`SKU${i}`, "ATK", `Produk ${i}`, "pcs", i % 7, 0, 100]);
+  }
+
+  const kostumer = [
+    ["NO", "NAMA PELANGGAN", "NO HP", "KOTA", "JUMLAH TRANSAKSI"],
+  ];
+  for (let i = 0; i < ROWS; i++) {
+    kostumer.push([i + 1, `Pelanggan ${i}`, `0812${i}`, "Jakarta", 1]);
+  }
+
+  const income = [
+    ["LAPORAN PENJUALAN"],
+    [],
+    [],
+    [],
+    [],
+    ["DATE", "CASHIER", "NO INVOICE", "NAME", "QTY", "GRAND TOTAL"],
+  ];
+  for (let i = 0; i < ROWS; i++) {
+    income.push([new Date(2025, 0, 1 + (i % 28)), "Kasir", `INV-${i}`, "A", 1, 1000]);
+  }
+
+  return new StubSpreadsheet([
+    new StubSheet("PERSEDIAAN BARANG", produk),
+    new StubSheet("KOSTUMER", kostumer),
+    new StubSheet("INCOME", income),
+  ]);
+}
+
+function loadScript(ss) {
+  const cache = {};
+  const props = {};
+  const context = {
+    console: { log() {}, warn() {}, error() {} },
+    SpreadsheetApp: { openById: () => ss, flush() {} },
+    Sheets: createSheetsStub(ss),
+    ContentService: {
+      MimeType: { JSON: "application/json" },
+      createTextOutput: (content) => ({
+        getContent: () => content,
+        setMimeType() {
+          return this;
+        },
+      }),
+    },
+    CacheService: {
+      getScriptCache: () => ({
+        get: (key) => (key in cache ? cache[key] : null),
+        put: (key, value) => {
+          cache[key] = value;
+        },
+        remove: (key) => {
+          delete cache[key];
+        },
+      }),
+    },
+    PropertiesService: {
+      getScriptProperties: () => ({
+        getProperty: (key) => (key in props ? props[key] : null),
+        setProperty: (key, value) => {
+          props[key] = String(value);
+        },
+        getProperties: () => ({ ...props }),
+      }),
+    },
+    LockService: {
+      getScriptLock: () => ({ waitLock() {}, releaseLock() {} }),
+    },
+    Utilities: {
+      formatDate: (date) => date.toISOString().replace("T", " ").slice(0, 19),
+    },
+  };
+  vm.createContext(context);
+  vm.runInContext(
+    fs.readFileSync(SCRIPT_PATH, "utf8").replace(/^﻿/, ""),
+    context,
+  );
+  return context;
+}
+
+// ==================== BENCHMARK ====================
+
+function runScenario(engineName, scenario) {
+  const ss = buildFixtures();
+  const gas = loadScript(ss);
+  // SHEET_CONFIG is a top-level const, so it is only reachable from script code
+  vm.runInContext(
+    `SHEET_CONFIG[${JSON.stringify(scenario.sheet)}].engine = ${JSON.stringify(engineName)}`,
+    gas,
+  );
+
+  resetStats();
+  const start = process.hrtime.bigint();
+  const result = scenario.run(gas);
+  // End of the request: runPostAction sends the writes the engine queued
+  gas.commitStorageWrites();
+  const cpuMs = Number(process.hrtime.bigint() - start) / 1e6;
+
+  if (result && result.error) {
+    throw new Error(`${engineName}/${scenario.name}: ${result.error}`);
+  }
+  return {
+    calls: stats.calls,
+    cells: stats.cells,
+    estimatedMs: Math.round(stats.calls * LATENCY_MS + cpuMs),
+    check: scenario.check(ss),
+  };
+}
+
+let readOutput = "";
+const scenarios = [
+  {
+    name: "readSheet INCOME",
+    sheet: "INCOME",
+    run: (gas) => {
+      readOutput = gas.readSheet("INCOME").getContent();
+    },
+    check: () => readOutput,
+  },
+  {
+    name: "updateRow INCOME",
+    sheet: "INCOME",
+    run: (gas) =>
+      gas.updateRow("INCOME", 16, { NAME: "B", QTY: 3, "GRAND TOTAL": 3000 }),
+    check: (ss) => JSON.stringify(ss.getSheetByName("INCOME").rows[15].slice(3)),
+  },
+  {
+    name: "increment-product-sold (20 SKUs)",
+    sheet: "PERSEDIAAN BARANG",
+    run: (gas) =>
+      gas.updateProductCounter(
+        Array.from({ length: 20 }, (_, i) => ({ sku: `SKU${i * 3}`, jumlah: 2 })),
+        "TERJUAL",
+      ),
+    check: (ss) =>
+      ss
+        .getSheetByName("PERSEDIAAN BARANG")
+        .rows.slice(1, 7)
+        .map((row) => row[4])
+        .join(","),
+  },
+  {
+    name: "increment-transaction",
+    sheet: "KOSTUMER",
+    run: (gas) => gas.incrementCustomerTransaction(`0812${ROWS - 1}`),
+    check: (ss) => String(ss.getSheetByName("KOSTUMER").rows[ROWS][4]),
+  },
+];
+
+console.log(
+  `Storage engine benchmark: ${ROWS} rows, ${LATENCY_MS} ms simulated latency per call\n`,
+);
+const report = scenarios.map((scenario) => {
+  const spreadsheet = runScenario("spreadsheet", scenario);
+  const sheetsApi = runScenario("sheets-api", scenario);
+  if (spreadsheet.check !== sheetsApi.check) {
+    throw new Error(
+      `${scenario.name}: engines disagree (${spreadsheet.check} vs ${sheetsApi.check})`,
+    );
+  }
+  return {
+    scenario: scenario.name,
+    "spreadsheet calls": spreadsheet.calls,
+    "spreadsheet ms": spreadsheet.estimatedMs,
+    "sheets-api calls": sheetsApi.calls,
+    "sheets-api ms": sheetsApi.estimatedMs,
+  };
+});
+console.table(report);
@@ -12,6 +12,15 @@
   document.head.appendChild(style);
 })();
 
+// Serve pages, scripts and styles from the app shell cache (sw.js)
+if ("serviceWorker" in navigator) {
+  window.addEventListener("load", () => {
+    navigator.serviceWorker.register("sw.js").catch((error) => {
+      console.warn("Service worker registration failed:", error);
+    });
+  });
+}
+
 // Use centralized API URL from config.js
 const AUTH_API_URL = API_URL;
 
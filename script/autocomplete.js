@@ -0,0 +1,201 @@
+/**
+ * Autocomplete
+ * One suggestion dropdown for the customer, product and vendor inputs. The
+ * page supplies the search (search-index.js or any function returning rows)
+ * and how a row is shown and selected. Items come from a fixed pool of nodes
+ * created once and refilled with textContent, so a keystroke never rebuilds
+ * the list; results are capped, stale searches are cancelled, and the arrow,
+ * Enter and Escape keys work the same on every page.
+ */
+
+const AUTOCOMPLETE_LIMIT = 20;
+
+/**
+ * Attach an autocomplete to an input and its .suggestion-list element
+ * @param {Object} config
+ * @param {HTMLInputElement} config.input
+ * @param {HTMLElement} config.list
+ * @param {Function} config.search - (query, {signal, limit}) => rows, or a
+ *   Promise of rows; a newer query aborts `signal` and drops the result
+ * @param {Function} config.describe - (row) => {title, subtitle}
+ * @param {Function} config.onSelect - (row) => void
+ * @param {number} [config.minLength] - Shortest query that searches
+ * @param {number} [config.limit] - Most items shown (size of the node pool)
+ * @param {number} [config.delay] - Debounce in ms
+ * @param {string} [config.emptyMessage] - Shown when nothing matches; the
+ *   list is hidden instead when empty
+ * @param {boolean} [config.searchOnFocus] - Search again when focused
+ * @returns {Object} Controller with update, hide and isOpen
+ */
+function createAutocomplete(config) {
+  const {
+    input,
+    list,
+    search,
+    describe,
+    onSelect,
+    minLength = 1,
+    limit = AUTOCOMPLETE_LIMIT,
+    delay = 0,
+    emptyMessage = "",
+    searchOnFocus = false,
+  } = config;
+
+  const pool = []; // {item, title, subtitle}, created on first use
+  let rows = []; // rows behind the visible items
+  let active = -1;
+  let timer = null;
+  let controller = null;
+  let sequence = 0;
+
+  const emptyItem = document.createElement("div");
+  emptyItem.className = "suggestion-item no-result";
+  emptyItem.textContent = emptyMessage;
+
+  function poolItem(index) {
+    if (!pool[index]) {
+      const item = document.createElement("div");
+      item.className = "suggestion-item";
+      item.dataset.index = index;
+      const title = document.createElement("div");
+      title.className = "phone";
+      const subtitle = document.createElement("div");
+      subtitle.className = "name";
+      item.append(title, subtitle);
+      pool[index] = { item, title, subtitle };
+    }
+    return pool[index];
+  }
+
+  function setActive(index) {
+    if (pool[active]) pool[active].item.classList.remove("active");
+    active = index;
+    if (!pool[active]) return;
+    pool[active].item.classList.add("active");
+    pool[active].item.scrollIntoView({ block: "nearest" });
+  }
+
+  /**
+   * Show rows in the pooled items; unused items are detached, not destroyed
+   * @param {Object[]} matches
+   */
+  function render(matches) {
+    rows = matches.slice(0, limit);
+    setActive(-1);
+
+    rows.forEach((row, index) => {
+      const { item, title, subtitle } = poolItem(index);
+      const text = describe(row);
+      if (title.textContent !== text.title) title.textContent = text.title;
+      if (subtitle.textContent !== text.subtitle) {
+        subtitle.textContent = text.subtitle;
+      }
+      if (item.parentNode !== list) list.appendChild(item);
+    });
+    for (let i = rows.length; i < pool.length; i++) pool[i].item.remove();
+
+    if (rows.length > 0) {
+      emptyItem.remove();
+    } else if (emptyMessage) {
+      list.appendChild(emptyItem);
+    } else {
+      hide();
+      return;
+    }
+    list.classList.add("show");
+  }
+
+  function cancel() {
+    clearTimeout(timer);
+    if (controller) controller.abort();
+    controller = null;
+    sequence++;
+  }
+
+  async function run(query) {
+    const current = ++sequence;
+    controller =
+      typeof AbortController === "function" ? new AbortController() : null;
+    try {
+      const matches = await search(query, {
+        signal: controller ? controller.signal : null,
+        limit,
+      });
+      if (current === sequence) render(matches || []);
+    } catch (error) {
+      if (current !== sequence || error.name === "AbortError") return;
+      console.error("Autocomplete search failed:", error);
+      hide();
+    }
+  }
+
+  /**
+   * Search for a query (debounced); short queries hide the list
+   * @param {string} value
+   */
+  function update(value) {
+    cancel();
+    const query = String(value || "").trim();
+    if (query.length < minLength) {
+      hide();
+      return;
+    }
+    if (delay > 0) timer = setTimeout(() => run(query), delay);
+    else run(query);
+  }
+
+  function hide() {
+    setActive(-1);
+    list.classList.remove("show");
+  }
+
+  function isOpen() {
+    return list.classList.contains("show");
+  }
+
+  function select(index) {
+    const row = rows[index];
+    if (!row) return;
+    cancel();
+    hide();
+    onSelect(row);
+  }
+
+  input.addEventListener("input", () => update(input.value));
+
+  if (searchOnFocus) {
+    input.addEventListener("focus", () => update(input.value));
+  }
+
+  input.addEventListener("keydown", (e) => {
+    if (!isOpen() || rows.length === 0) return;
+
+    if (e.key === "ArrowDown") {
+      e.preventDefault();
+      setActive(active + 1 < rows.length ? active + 1 : 0);
+    } else if (e.key === "ArrowUp") {
+      e.preventDefault();
+      setActive(active > 0 ? active - 1 : rows.length - 1);
+    } else if (e.key === "Enter") {
+      if (active > -1) {
+        e.preventDefault();
+        select(active);
+      }
+    } else if (e.key === "Escape") {
+      hide();
+    }
+  });
+
+  list.addEventListener("click", (e) => {
+    const item = e.target.closest(".suggestion-item");
+    if (item && item.dataset.index !== undefined) {
+      select(Number(item.dataset.index));
+    }
+  });
+
+  document.addEventListener("click", (e) => {
+    if (!input.contains(e.target) && !list.contains(e.target)) hide();
+  });
+
+  return { update, hide, isOpen };
+}
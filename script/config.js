@@ -6,3 +6,43 @@
 // Google Apps Script Web App URL
 const API_URL =
   "https://script.google.com/macros/s/AKfycbzjUzC_A6HWi8wsjpqlYWbc5rE7uQBrq7EDYkrSZDZPZmDZYkt4udGyzFOAT7DUUoQx1Q/exec";
+
+// Daftar outlet. Setiap outlet memakai spreadsheet sendiri (OUTLETS di
+// google-apps-script.js dengan id yang sama). Isi `apiUrl` hanya jika outlet
+// memakai deployment Apps Script lain; default-nya API_URL.
+const OUTLETS = [{ id: "larosa", name: "Larosa Pot" }];
+const ACTIVE_OUTLET_KEY = "larosapot_active_outlet";
+
+/**
+ * Outlet whose data this page reads and writes
+ * @returns {string}
+ */
+function getActiveOutletId() {
+  const saved = localStorage.getItem(ACTIVE_OUTLET_KEY);
+  return OUTLETS.some((outlet) => outlet.id === saved) ? saved : OUTLETS[0].id;
+}
+
+/**
+ * Switch the active outlet
+ * Caches kept in localStorage are not per outlet, so they are dropped
+ * @param {string} outletId
+ */
+function setActiveOutlet(outletId) {
+  if (!OUTLETS.some((outlet) => outlet.id === outletId)) {
+    throw new Error("Unknown outlet: " + outletId);
+  }
+  localStorage.setItem(ACTIVE_OUTLET_KEY, outletId);
+  Object.keys(localStorage)
+    .filter((key) => key.includes("cache"))
+    .forEach((key) => localStorage.removeItem(key));
+}
+
+/**
+ * Apps Script URL that serves an outlet
+ * @param {string} [outletId] - Defaults to the active outlet
+ * @returns {string}
+ */
+function getOutletApiUrl(outletId = getActiveOutletId()) {
+  const outlet = OUTLETS.find((entry) => entry.id === outletId);
+  return (outlet && outlet.apiUrl) || API_URL;
+}
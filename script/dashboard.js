@@ -13,10 +13,13 @@ let rawData = {
   vendors: [],
 };
 let currentChartType = "omsetHarian";
+// Outlet shown on the dashboard; "all" = consolidated view of every outlet
+let dashboardOutlet = getActiveOutletId();
 
 // Initialize
 document.addEventListener("DOMContentLoaded", () => {
   setupFilterListeners();
+  setupOutletFilter();
   loadDashboardData();
 });
 
@@ -28,41 +31,114 @@ function setupFilterListeners() {
   if (filterMonth) filterMonth.addEventListener("change", refreshCurrentChart);
 }
 
+/**
+ * Outlet selector (only shown when there is more than one outlet)
+ */
+function setupOutletFilter() {
+  const filterOutlet = document.getElementById("filterOutlet");
+  if (!filterOutlet || OUTLETS.length < 2) return;
+
+  filterOutlet.innerHTML = '<option value="all">Semua Outlet</option>';
+  OUTLETS.forEach((outlet) => {
+    const opt = document.createElement("option");
+    opt.value = outlet.id;
+    opt.textContent = outlet.name;
+    filterOutlet.appendChild(opt);
+  });
+  filterOutlet.value = dashboardOutlet;
+  filterOutlet.hidden = false;
+
+  filterOutlet.addEventListener("change", () => {
+    dashboardOutlet = filterOutlet.value;
+    loadDashboardData();
+  });
+}
+
 /**
  * Load all dashboard data with caching
  */
 async function loadDashboardData() {
+  const sheets = [
+    "KOSTUMER",
+    "PERSEDIAAN BARANG",
+    "INVOICE",
+    "DP/Pelunasan",
+    "VENDOR",
+  ];
+
+  // Consolidated view: the same reads fan out to every outlet in parallel
+  const consolidated = dashboardOutlet === "all";
+  const outletIds = consolidated
+    ? OUTLETS.map((outlet) => outlet.id)
+    : [dashboardOutlet];
+  const cacheKey = consolidated
+    ? "dashboard_data_cache_all"
+    : "dashboard_data_cache";
+  const cacheOutlet = consolidated ? undefined : dashboardOutlet;
+
   // Step 1: Try to show cached data immediately
-  const cached = await window.IDBCache?.get("dashboard_data_cache");
+  const cached = await window.IDBCache?.get(cacheKey, cacheOutlet);
   if (cached && cached.data) {
     rawData = cached.data;
     updateDashboardUI();
-    if (cached.valid) return;
+  }
+
+  // Skip the refetch when none of the dashboard sheets changed in any outlet
+  const manifests = await Promise.all(
+    outletIds.map((outletId) => fetchDataManifest(sheets, outletId)),
+  );
+  const hasAllVersions = (manifest) =>
+    manifest && manifest.versions && sheets.every((s) => manifest.versions[s]);
+  const dashboardVersion = manifests.every(hasAllVersions)
+    ? manifests
+        .map((manifest) => sheets.map((s) => manifest.versions[s]).join("|"))
+        .join("#")
+    : null;
+  if (cached && cached.data && dashboardVersion) {
+    if (cached.version === dashboardVersion) return;
+  } else if (cached && cached.valid) {
+    return;
   }
 
   // Step 2: Fetch fresh data
   try {
-    const sheets = [
-      "KOSTUMER",
-      "PERSEDIAAN BARANG",
-      "INVOICE",
-      "DP/Pelunasan",
-      "VENDOR",
-    ];
     const results = await Promise.all(
-      sheets.map((s) => fetchSheetData(s).catch(() => ({ data: [] }))),
+      outletIds.map((outletId) =>
+        Promise.all(
+          sheets.map((s) =>
+            fetchSheetData(s, outletId).catch(() => ({ data: [] })),
+          ),
+        ),
+      ),
+    );
+
+    // Merge per sheet; rows of a consolidated view remember their outlet
+    const merged = sheets.map((s, i) =>
+      results.flatMap((outletResults, o) =>
+        consolidated
+          ? outletResults[i].data.map((row) => ({
+              ...row,
+              _outlet: outletIds[o],
+            }))
+          : outletResults[i].data,
+      ),
     );
 
     rawData = {
-      customers: results[0].data,
-      products: results[1].data,
-      invoices: results[2].data,
-      pelunasan: results[3].data,
-      vendors: results[4].data,
+      customers: merged[0],
+      products: merged[1],
+      invoices: merged[2],
+      pelunasan: merged[3],
+      vendors: merged[4],
     };
 
     // Save to cache
-    await window.IDBCache?.set("dashboard_data_cache", rawData);
+    await window.IDBCache?.set(
+      cacheKey,
+      rawData,
+      dashboardVersion,
+      cacheOutlet,
+    );
 
     updateDashboardUI();
     console.log("Dashboard data refreshed from server");
@@ -520,7 +596,8 @@ function groupByInvoice(data) {
     }
 
     if (key) {
-      currentKey = key;
+      // Invoice numbers are only unique within an outlet
+      currentKey = row._outlet ? `${row._outlet}:${key}` : key;
       if (!groups[currentKey]) groups[currentKey] = [];
     }
     if (currentKey) groups[currentKey].push(row);
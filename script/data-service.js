@@ -3,6 +3,101 @@
  * Provides a unified interface for loading data from Google Sheets with IndexedDB caching
  */
 
+// ==================== DATA WORKER ====================
+
+// Grouped loads run in data-worker.js; if it cannot start, everything falls
+// back to the main thread for the rest of the page
+let dataWorker = null;
+let dataWorkerUnavailable = typeof Worker !== "function";
+let dataWorkerRequestId = 0;
+const dataWorkerRequests = {}; // request id -> {resolve, reject}
+
+/**
+ * Error for requests the worker could not take; callers run them here instead
+ * @returns {Error}
+ */
+function dataWorkerUnavailableError() {
+  const error = new Error("Data worker unavailable");
+  error.workerUnavailable = true;
+  return error;
+}
+
+/**
+ * The shared data worker, started on first use
+ * @returns {Worker|null}
+ */
+function getDataWorker() {
+  if (dataWorkerUnavailable) return null;
+  if (dataWorker) return dataWorker;
+
+  try {
+    dataWorker = new Worker("script/data-worker.js");
+  } catch (error) {
+    console.warn("Data worker could not start:", error);
+    dataWorkerUnavailable = true;
+    return null;
+  }
+  dataWorker.onmessage = (event) => {
+    const { id, packed, empty, error } = event.data;
+    const waiter = dataWorkerRequests[id];
+    if (!waiter) return;
+    delete dataWorkerRequests[id];
+    if (error) waiter.reject(new Error(error));
+    else waiter.resolve(empty ? null : unpackGroups(packed));
+  };
+  dataWorker.onerror = (event) => {
+    console.warn("Data worker failed, using the main thread:", event.message);
+    dataWorkerUnavailable = true;
+    dataWorker.terminate();
+    dataWorker = null;
+    Object.keys(dataWorkerRequests).forEach((id) => {
+      dataWorkerRequests[id].reject(dataWorkerUnavailableError());
+      delete dataWorkerRequests[id];
+    });
+  };
+  return dataWorker;
+}
+
+/**
+ * Fetch, group and cache a sheet in the data worker
+ * @param {Object} request - {sheetName, outletId, cacheKey, groupBy, version,
+ *   records}
+ * @returns {Promise<Object|null>} Grouped data, or null when the sheet is empty;
+ *   rejects with `workerUnavailable` when the worker cannot run it
+ */
+function runInDataWorker(request) {
+  const worker = getDataWorker();
+  if (!worker) return Promise.reject(dataWorkerUnavailableError());
+
+  const id = ++dataWorkerRequestId;
+  return new Promise((resolve, reject) => {
+    dataWorkerRequests[id] = { resolve, reject };
+    worker.postMessage({ id, ...request });
+  });
+}
+
+/**
+ * Rebuild {map, order} from the worker's columnar result (see packGroups)
+ * @param {Object} packed - {headers, columns, rowIndex, order, offsets}
+ * @returns {{map: Object<string, Object[]>, order: string[]}}
+ */
+function unpackGroups(packed) {
+  const { headers, columns, rowIndex, order, offsets } = packed;
+  const map = {};
+  order.forEach((key, g) => {
+    const rows = [];
+    for (let r = offsets[g]; r < offsets[g + 1]; r++) {
+      const row = { _rowIndex: rowIndex[r] };
+      for (let c = 0; c < headers.length; c++) {
+        row[headers[c]] = columns[c][r];
+      }
+      rows.push(row);
+    }
+    map[key] = rows;
+  });
+  return { map, order };
+}
+
 /**
  * Create a data service for a specific sheet
  * @param {Object} config - Configuration object
@@ -11,6 +106,11 @@
  * @param {number} [config.colSpan=8] - Column span for empty/error messages
  * @param {string} [config.emptyMessage="Tidak ada data"] - Message when no data
  * @param {string} [config.errorMessage="Gagal memuat data"] - Message on error
+ * @param {boolean} [config.records=false] - Cache rows in the sheet's record
+ *   store (IDBRecords) instead of one blob, so single rows can be updated;
+ *   grouped services keep their blob and also fill the store, for findGroup
+ * @param {string} [config.groupBy] - DATA_GROUPERS entry (grouping.js) used
+ *   by loadGroupedData
  */
 function createDataService(config) {
   const {
@@ -19,10 +119,81 @@ function createDataService(config) {
     colSpan = 8,
     emptyMessage = "Tidak ada data",
     errorMessage = "Gagal memuat data",
+    records = false,
+    groupBy,
   } = config;
 
   const indicatorId = `${cacheKey}_refreshIndicator`;
 
+  function usesRecords() {
+    return records && Boolean(window.IDBRecords?.has(sheetName));
+  }
+
+  /**
+   * Fetch the sheet with canonical field names (normalizeSheetRows, schema.js)
+   * @returns {Promise<Array>} Rows; empty when the sheet has none
+   */
+  async function fetchRows() {
+    const result = await fetchSheetData(sheetName);
+    return normalizeSheetRows(sheetName, result.data || [], result.headers);
+  }
+
+  /**
+   * Read the cached rows
+   * Record-backed services keep only a marker ({records: count}) under the
+   * cache key; its version and timestamp describe the stored records.
+   * @returns {Promise<Object|null>} Same shape as IDBCache.get
+   */
+  async function readCache() {
+    if (!usesRecords()) return await window.IDBCache?.get(cacheKey);
+    try {
+      const marker = await window.IDBCache.get(cacheKey);
+      if (!marker || !marker.data || marker.data.records === undefined) {
+        return null;
+      }
+      const rows = await window.IDBRecords.query(sheetName);
+      return { ...marker, data: rows };
+    } catch (error) {
+      console.error(`Error reading ${cacheKey} records:`, error);
+      return null;
+    }
+  }
+
+  /**
+   * Replace the cached rows
+   * @param {Array|Object} data - Rows (or grouped data for grouped services)
+   * @param {string} [version] - Server data version of the rows
+   */
+  async function writeCache(data, version = null) {
+    if (!usesRecords() || !Array.isArray(data)) {
+      return await window.IDBCache?.set(cacheKey, data, version);
+    }
+    try {
+      await window.IDBRecords.replaceAll(sheetName, data);
+      return await window.IDBCache.set(
+        cacheKey,
+        { records: data.length },
+        version,
+      );
+    } catch (error) {
+      console.error(`Error saving ${cacheKey} records:`, error);
+      await window.IDBCache.clear(cacheKey);
+      return false;
+    }
+  }
+
+  /**
+   * Get the server's current data version for this sheet
+   * @returns {Promise<string|null>} null when the manifest is unavailable
+   */
+  async function getServerVersion() {
+    if (typeof fetchDataManifest !== "function") return null;
+    const manifest = await fetchDataManifest();
+    return (
+      (manifest && manifest.versions && manifest.versions[sheetName]) || null
+    );
+  }
+
   /**
    * Load data with cache-first strategy
    * @param {Object} options - Load options
@@ -35,7 +206,7 @@ function createDataService(config) {
     const { onRender, tbody, onDataReady } = options;
 
     // Step 1: Immediately show cached data if available (Stale-While-Revalidate)
-    const cached = await window.IDBCache?.get(cacheKey);
+    const cached = await readCache();
     const hasCache = cached && cached.data && cached.data.length > 0;
 
     if (hasCache) {
@@ -50,18 +221,25 @@ function createDataService(config) {
     // Optional: You might want to be subtle if cache was shown, but user asked for "updates", so showing activity is good.
     showRefreshIndicator(indicatorId);
 
-    // Step 2: Fetch fresh data in background (Always)
+    // Step 2: Fetch fresh data in background, unless the manifest says nothing changed
     try {
-      const result = await fetchSheetData(sheetName);
+      const serverVersion = await getServerVersion();
+      if (hasCache && serverVersion && cached.version === serverVersion) {
+        console.log(`${cacheKey} is up to date (version ${serverVersion})`);
+        if (onDataReady) onDataReady(cached.data);
+        return cached.data;
+      }
+
+      const rows = await fetchRows();
 
-      if (result.data && result.data.length > 0) {
+      if (rows.length > 0) {
         // Save to IndexedDB
-        await window.IDBCache?.set(cacheKey, result.data);
+        await writeCache(rows, serverVersion);
         // Render fresh data
-        onRender(result.data);
+        onRender(rows);
         console.log(`${cacheKey} data refreshed from server`);
-        if (onDataReady) onDataReady(result.data);
-        return result.data;
+        if (onDataReady) onDataReady(rows);
+        return rows;
       } else if (!cached || !cached.data || cached.data.length === 0) {
         // Only show empty message if we have NO cache and NO new data
         if (tbody) {
@@ -89,16 +267,68 @@ function createDataService(config) {
     return cached && cached.data ? cached.data : [];
   }
 
+  /**
+   * Fetch, group and cache the sheet
+   * Runs in the data worker when the browser has one, otherwise here.
+   * @param {string|null} version - Server data version to store with the cache
+   * @returns {Promise<Object|null>} Grouped data, or null when the sheet is empty
+   */
+  async function fetchGroupedData(version) {
+    const request = {
+      sheetName,
+      outletId: getActiveOutletId(),
+      cacheKey,
+      groupBy,
+      version,
+      records: usesRecords(),
+    };
+    try {
+      return await runInDataWorker(request);
+    } catch (error) {
+      if (!error.workerUnavailable) throw error;
+    }
+
+    const rows = await fetchRows();
+    if (rows.length === 0) return null;
+    const groupedData = DATA_GROUPERS[groupBy](rows);
+    await window.IDBCache?.set(cacheKey, groupedData, version);
+    if (request.records) {
+      await window.IDBRecords.replaceAll(sheetName, rows).catch((error) => {
+        console.error(`Error saving ${cacheKey} records:`, error);
+      });
+    }
+    return groupedData;
+  }
+
+  /**
+   * Rows of one group (grouped services), read through the "invoice" index
+   * of the record store instead of the whole cached blob
+   * @param {string} key - Invoice number
+   * @returns {Promise<Array|null>} Rows, or null when the store has none
+   */
+  async function findGroup(key) {
+    if (!usesRecords()) return null;
+    try {
+      const rows = await window.IDBRecords.query(sheetName, {
+        index: "invoice",
+        equals: key,
+      });
+      return DATA_GROUPERS[groupBy](rows).map[key] || null;
+    } catch (error) {
+      console.error(`Error reading ${cacheKey} records:`, error);
+      return null;
+    }
+  }
+
   /**
    * Load grouped data (for invoice-like records)
    * @param {Object} options - Load options
    * @param {Function} options.onRender - Callback to render grouped data
-   * @param {Function} options.groupFn - Function to group raw data
    * @param {HTMLElement} [options.tbody] - Table body element for messages
    * @returns {Promise<Object>} Grouped data { map, order }
    */
   async function loadGroupedData(options) {
-    const { onRender, groupFn, tbody } = options;
+    const { onRender, tbody } = options;
 
     // Step 1: Show cached data immediately
     const cached = await window.IDBCache?.get(cacheKey);
@@ -118,11 +348,17 @@ function createDataService(config) {
     // Show refresh indicator
     showRefreshIndicator(indicatorId);
 
-    // Step 2: Fetch fresh data
+    // Step 2: Fetch fresh data, unless the manifest says nothing changed
     try {
-      const result = await fetchSheetData(sheetName);
+      const serverVersion = await getServerVersion();
+      if (hasCache && serverVersion && cached.version === serverVersion) {
+        console.log(`${cacheKey} is up to date (version ${serverVersion})`);
+        return cached.data;
+      }
 
-      if (!result.data || result.data.length === 0) {
+      const groupedData = await fetchGroupedData(serverVersion);
+
+      if (!groupedData) {
         if (!cached || !cached.data || !cached.data.map) {
           if (tbody) {
             showTableMessage(tbody, emptyMessage, colSpan);
@@ -131,9 +367,6 @@ function createDataService(config) {
         return { map: {}, order: [] };
       }
 
-      // Group data
-      const groupedData = groupFn(result.data);
-      await window.IDBCache?.set(cacheKey, groupedData);
       onRender(groupedData);
       console.log(`${cacheKey} data refreshed from server`);
       return groupedData;
@@ -155,19 +388,93 @@ function createDataService(config) {
     }
   }
 
+  /**
+   * Fetch the current rows and store them in the cache, for pages that keep the
+   * whole list in memory (autocomplete, dropdowns)
+   * Nothing is downloaded when the cached version matches the server's.
+   * @returns {Promise<Array>} Current rows
+   */
+  async function refresh() {
+    const [cached, serverVersion] = await Promise.all([
+      readCache(),
+      getServerVersion(),
+    ]);
+    const hasCache =
+      cached && Array.isArray(cached.data) && cached.data.length > 0;
+    if (hasCache && serverVersion && cached.version === serverVersion) {
+      return cached.data;
+    }
+
+    const rows = await fetchRows();
+    if (rows.length === 0) {
+      return hasCache ? cached.data : [];
+    }
+    await writeCache(rows, serverVersion);
+    return rows;
+  }
+
   /**
    * Clear cached data
    */
   async function clearCache() {
     await window.IDBCache?.clear(cacheKey);
+    if (usesRecords()) {
+      await window.IDBRecords.clear(sheetName).catch((error) => {
+        console.error(`Error clearing ${cacheKey} records:`, error);
+      });
+    }
   }
 
   /**
    * Update cache with new data
    * @param {Array|Object} data - Data to cache
+   * @param {string} [version] - Server data version the data matches
+   */
+  async function updateCache(data, version = null) {
+    await writeCache(data, version);
+  }
+
+  /**
+   * Apply a single-row change to the record store
+   * A failed change drops the cache marker, so the next load fetches again
+   * instead of showing rows that are out of step.
+   * @param {Function} change - Returns the IDBRecords promise
+   */
+  async function changeRecords(change) {
+    if (!usesRecords()) throw new Error(`${cacheKey} has no record store`);
+    try {
+      await change();
+    } catch (error) {
+      console.error(`Error updating ${cacheKey} records:`, error);
+      await window.IDBCache.clear(cacheKey);
+    }
+  }
+
+  /**
+   * Insert or update single cached rows (record-backed services)
+   * The rest of the cache is left untouched.
+   * @param {Object|Object[]} rows - Rows or partial rows with _rowIndex
+   */
+  async function putRecord(rows) {
+    await changeRecords(() => window.IDBRecords.put(sheetName, rows));
+  }
+
+  /**
+   * Remove single cached rows (record-backed services)
+   * @param {number|number[]} rowIndexes
    */
-  async function updateCache(data) {
-    await window.IDBCache?.set(cacheKey, data);
+  async function deleteRecord(rowIndexes) {
+    await changeRecords(() => window.IDBRecords.delete(sheetName, rowIndexes));
+  }
+
+  /**
+   * Query cached rows through an index (see IDBRecords.query)
+   * @param {Object} [query] - e.g. { index: "phone", equals: "0812..." }
+   * @returns {Promise<Array>} Matching rows
+   */
+  async function queryRecords(query) {
+    if (!usesRecords()) throw new Error(`${cacheKey} has no record store`);
+    return await window.IDBRecords.query(sheetName, query);
   }
 
   /**
@@ -175,14 +482,19 @@ function createDataService(config) {
    * @returns {Promise<Object|null>} Cached data or null
    */
   async function getCached() {
-    return await window.IDBCache?.get(cacheKey);
+    return await readCache();
   }
 
   return {
     loadData,
     loadGroupedData,
+    refresh,
     clearCache,
     updateCache,
+    putRecord,
+    deleteRecord,
+    queryRecords,
+    findGroup,
     getCached,
     sheetName,
     cacheKey,
@@ -193,70 +505,83 @@ function createDataService(config) {
 const DataServices = {
   vendor: createDataService({
     sheetName: "VENDOR",
-    cacheKey: "vendor_data_cache_v2",
+    cacheKey: "vendor_data_cache_v3",
     colSpan: 9,
     emptyMessage: "Tidak ada data vendor",
   }),
 
   customer: createDataService({
     sheetName: "KOSTUMER",
-    cacheKey: "kustomer_data_cache_v2",
+    cacheKey: "kustomer_data_cache_v3",
     colSpan: 8,
     emptyMessage: "Tidak ada data pelanggan",
+    records: true,
   }),
 
   product: createDataService({
     sheetName: "PERSEDIAAN BARANG",
-    cacheKey: "produk_data_cache_v2",
+    cacheKey: "produk_data_cache_v3",
     colSpan: 15,
     emptyMessage: "Tidak ada data produk",
+    records: true,
   }),
 
   invoice: createDataService({
     sheetName: "INCOME",
-    cacheKey: "riwayat_data_cache_v2",
+    cacheKey: "riwayat_data_cache_v3",
     colSpan: 5,
     emptyMessage: "Belum ada riwayat transaksi",
+    groupBy: "invoice",
+    records: true,
   }),
 
   pelunasan: createDataService({
     sheetName: "INCOME",
-    cacheKey: "pelunasan_data_cache_v2",
+    cacheKey: "pelunasan_data_cache_v3",
     colSpan: 6,
     emptyMessage: "Tidak ada data pelunasan",
+    groupBy: "pelunasan",
+    records: true,
   }),
 
   quotation: createDataService({
     sheetName: "QUOTATION",
-    cacheKey: "quotation_data_cache_v2",
+    cacheKey: "quotation_data_cache_v3",
     colSpan: 5,
     emptyMessage: "Belum ada data quotation",
+    groupBy: "quotation",
   }),
 
   restock: createDataService({
     sheetName: "RESTOCK",
-    cacheKey: "restock_data_cache_v2",
+    cacheKey: "restock_data_cache_v3",
     colSpan: 5,
     emptyMessage: "Belum ada riwayat restock",
+    groupBy: "restock",
+    records: true,
+  }),
+
+  users: createDataService({
+    sheetName: "USERS",
+    cacheKey: "users_data_cache_v2",
   }),
 
   /**
-   * Fetch the next sequential ID from the server
+   * Allocate the next sequential ID on the server (increments the counter)
+   * Sent through the outbox (postSheetAction): a retry with the same
+   * idempotency key gets the ID already allocated instead of a new one.
    * @param {string} type - 'INV' or 'QT'
    * @param {string} date - YYYY-MM-DD format
+   * @param {string} [idempotencyKey] - Reuse it when retrying the same save
    */
-  async getNextId(type, date) {
+  async getNextId(type, date, idempotencyKey) {
     try {
-      const response = await fetch(API_URL, {
-        method: "POST",
-        body: JSON.stringify({
-          action: "get-next-id",
-          type: type,
-          date: date,
-        }),
+      return await postSheetAction({
+        action: "get-next-id",
+        type: type,
+        date: date,
+        idempotencyKey: idempotencyKey,
       });
-      const result = await response.json();
-      return result;
     } catch (e) {
       console.error("Error fetching next ID:", e);
       return { error: e.toString() };
@@ -270,10 +595,11 @@ const DataServices = {
    */
   async peekNextId(type, date) {
     try {
-      const response = await fetch(API_URL, {
+      const response = await fetch(getOutletApiUrl(), {
         method: "POST",
         body: JSON.stringify({
           action: "peek-next-id",
+          outlet: getActiveOutletId(),
           type: type,
           date: date,
         }),
@@ -287,6 +613,18 @@ const DataServices = {
   },
 };
 
+// Copies that pages used to keep in localStorage; the lists now live in IndexedDB
+const LEGACY_LOCAL_CACHE_KEYS = [
+  "larosapot_customer_cache",
+  "larosapot_product_cache",
+  "larosapot_users_cache",
+  "kustomer_data_cache",
+  "quotation_data_cache",
+  "quotation_cache_timestamp",
+  "restock_data_cache",
+];
+LEGACY_LOCAL_CACHE_KEYS.forEach((key) => localStorage.removeItem(key));
+
 // Export for global use
 window.DataServices = DataServices;
 window.createDataService = createDataService;
@@ -0,0 +1,94 @@
+/**
+ * Data Worker
+ * Fetches, decodes, normalizes (schema.js), groups and caches a transaction
+ * sheet off the main thread (see DataServices.loadGroupedData). The grouped
+ * rows are posted back in columnar form: numeric columns and row positions
+ * travel as transferable typed arrays instead of one cloned object per row.
+ *
+ * Request:  {id, sheetName, outletId, cacheKey, groupBy, version, records}
+ * Response: {id, packed} | {id, empty: true} | {id, error}
+ */
+
+// idb-cache.js exports through `window`; in a worker the global scope is `self`
+self.window = self;
+importScripts(
+  "config.js",
+  "sheet-reader.js",
+  "idb-cache.js",
+  "schema.js",
+  "grouping.js",
+);
+
+self.onmessage = async (event) => {
+  const { id, sheetName, outletId, cacheKey, groupBy, version, records } =
+    event.data;
+  try {
+    const response = await fetch(sheetReadUrl(sheetName, outletId));
+    const result = await parseReadResponse(response);
+    if (result.error) throw new Error(result.error);
+
+    const decoded =
+      result.format === "columnar" ? decodeColumnarResult(result) : result;
+    if (!decoded.data || decoded.data.length === 0) {
+      self.postMessage({ id, empty: true });
+      return;
+    }
+
+    const rows = normalizeSheetRows(sheetName, decoded.data, decoded.headers);
+    const fields =
+      getSchemaFields(sheetName, decoded.headers) || decoded.headers;
+    const grouped = DATA_GROUPERS[groupBy](rows);
+    await self.IDBCache.set(cacheKey, grouped, version, outletId);
+    if (records) {
+      await self.IDBRecords.replaceAll(sheetName, rows, outletId).catch(
+        (error) => console.error(`Error saving ${cacheKey} records:`, error),
+      );
+    }
+
+    const packed = packGroups(fields, grouped);
+    self.postMessage({ id, packed }, transferablesOf(packed));
+  } catch (error) {
+    self.postMessage({ id, error: error.message });
+  }
+};
+
+/**
+ * Columnar copy of grouped rows, in group order
+ * Group g holds rows offsets[g] .. offsets[g + 1] - 1. A column whose values
+ * are all numbers becomes a Float64Array.
+ * @param {string[]} headers
+ * @param {{map: Object<string, object[]>, order: string[]}} grouped
+ * @returns {object} {headers, columns, rowIndex, order, offsets}
+ */
+function packGroups(headers, grouped) {
+  const rows = [];
+  const offsets = new Uint32Array(grouped.order.length + 1);
+  grouped.order.forEach((key, g) => {
+    grouped.map[key].forEach((row) => rows.push(row));
+    offsets[g + 1] = rows.length;
+  });
+
+  const rowIndex = new Float64Array(rows.length);
+  rows.forEach((row, r) => {
+    rowIndex[r] = row._rowIndex;
+  });
+  const columns = headers.map((header) => {
+    const values = rows.map((row) => row[header]);
+    return values.every((value) => typeof value === "number")
+      ? Float64Array.from(values)
+      : values;
+  });
+
+  return { headers, columns, rowIndex, order: grouped.order, offsets };
+}
+
+/**
+ * Buffers of a packed result that can be transferred instead of copied
+ * @param {object} packed
+ * @returns {ArrayBuffer[]}
+ */
+function transferablesOf(packed) {
+  return [packed.offsets, packed.rowIndex, ...packed.columns]
+    .filter((column) => ArrayBuffer.isView(column))
+    .map((column) => column.buffer);
+}
@@ -1,6 +1,4 @@
 const QUOTATION_SHEET_NAME = "QUOTATION";
-const QUOTATION_CACHE_KEY = "quotation_data_cache";
-const QUOTATION_CACHE_TIMESTAMP_KEY = "quotation_cache_timestamp";
 
 let groupedQuotations = {};
 
@@ -39,48 +37,9 @@ async function loadQuotationData() {
   groupedQuotations = await quotationService.loadGroupedData({
     tbody: tableBody,
     onRender: renderTable,
-    groupFn: groupDataByOrder,
   });
 }
 
-function groupDataByOrder(data) {
-  const groups = {};
-  const orderedGroups = [];
-  let currentOrderNo = null;
-
-  data.forEach((row) => {
-    let noPesanan =
-      row["NO PESANAN"] || row["NO'PESANAN"] || row["INVOICE"] || null;
-
-    // Fuzzy search if direct key not found
-    if (!noPesanan) {
-      for (const key in row) {
-        if (
-          key.toUpperCase().includes("PESANAN") ||
-          key.toUpperCase().includes("INVOICE")
-        ) {
-          noPesanan = row[key];
-          break;
-        }
-      }
-    }
-
-    if (noPesanan) {
-      currentOrderNo = noPesanan;
-      if (!groups[currentOrderNo]) {
-        groups[currentOrderNo] = [];
-        orderedGroups.push(currentOrderNo);
-      }
-    }
-
-    if (currentOrderNo) {
-      groups[currentOrderNo].push(row);
-    }
-  });
-
-  return { map: groups, order: orderedGroups };
-}
-
 function setupSearch() {
   const searchInput = document.getElementById("searchInput");
   if (!searchInput) return;
@@ -99,12 +58,8 @@ function setupSearch() {
     const filteredOrder = groupedQuotations.order.filter((noPesanan) => {
       const rows = groupedQuotations.map[noPesanan];
       const mainRow = rows[0];
-      const nama = (
-        mainRow["PELANGGAN"] ||
-        mainRow["NAMA PELANGGAN"] ||
-        ""
-      ).toLowerCase();
-      const kota = (mainRow["KOTA"] || mainRow["Kota"] || "").toLowerCase();
+      const nama = String(mainRow["PELANGGAN"] || "").toLowerCase();
+      const kota = String(mainRow["KOTA"] || "").toLowerCase();
       const searchSource = `${noPesanan.toLowerCase()} ${nama} ${kota}`;
 
       return keywords.every((kw) => searchSource.includes(kw));
@@ -114,50 +69,69 @@ function setupSearch() {
   });
 }
 
+// Windowed renderer for the quotation list (virtual-table.js)
+const quotationTable = createVirtualTable({
+  tbody: document.getElementById("riwayatTableBody"),
+  colSpan: 5,
+  keyOf: (entry) => entry.noPesanan,
+  renderRow: (entry, index) =>
+    renderQuotationRow(entry.noPesanan, entry.rows, index),
+});
+
 function renderTable(groupedData) {
-  const tableBody = document.querySelector("tbody");
-  tableBody.innerHTML = "";
   const { map, order } = groupedData;
+  quotationTable.setItems(
+    order.map((noPesanan) => ({ noPesanan, rows: map[noPesanan] })),
+  );
+}
 
-  order.forEach((noPesanan, index) => {
-    const rows = map[noPesanan];
-    const mainRow = rows[0];
-    const tanggal = mainRow["TANGGAL"];
-    const nama = mainRow["PELANGGAN"] || mainRow["NAMA PELANGGAN"];
-    const itemsCount = rows.length;
-    const totalTagihan = mainRow["TOTAL TAGIHAN"] || 0;
-    const formattedTotal = parseFloat(totalTagihan).toLocaleString("id-ID");
-
-    const tr = document.createElement("tr");
-    tr.innerHTML = `
-      <td>${index + 1}.</td>
-      <td>${noPesanan}</td>
-      <td>
-        <div style="font-weight:bold;">${nama}</div>
-        <div style="font-size: 0.8em; color: gray;">${formatDisplayDate(
-          tanggal,
-        )}</div>
-      </td>
-      <td>
-         <div style="font-weight:bold;">Rp${formattedTotal}</div>
-         <div style="font-size: 0.8em; color: gray;">${itemsCount} Items</div>
-      </td>
-      <td>
-        <div class="action-buttons">
-          <button class="btn-lihat" onclick="viewQuotation('${noPesanan}')">Lihat</button>
-          <button class="btn-edit" onclick="editQuotationAction('${noPesanan}')">Edit</button>
-          <button class="btn-checkout" onclick="checkoutQuotation('${noPesanan}')">Checkout</button>
-          <button class="btn-hapus" onclick="deleteQuotationAction('${noPesanan}')">Hapus</button>
-        </div>
-      </td>
-    `;
-    tableBody.appendChild(tr);
-  });
+/**
+ * Cells of one quotation
+ * @param {string} noPesanan
+ * @param {Object[]} rows - Item rows
+ * @param {number} index - Position in the list
+ * @returns {string} HTML
+ */
+function renderQuotationRow(noPesanan, rows, index) {
+  const mainRow = rows[0];
+  const tanggal = mainRow["TANGGAL"];
+  const nama = mainRow["PELANGGAN"] || "";
+  const itemsCount = rows.length;
+  const totalTagihan = mainRow["TOTAL TAGIHAN"] || 0;
+  const formattedTotal = parseFloat(totalTagihan).toLocaleString("id-ID");
+
+  return `
+    <td>${index + 1}.</td>
+    <td>${noPesanan}</td>
+    <td>
+      <div style="font-weight:bold;">${nama}</div>
+      <div style="font-size: 0.8em; color: gray;">${formatDisplayDate(
+        tanggal,
+      )}</div>
+    </td>
+    <td>
+       <div style="font-weight:bold;">Rp${formattedTotal}</div>
+       <div style="font-size: 0.8em; color: gray;">${itemsCount} Items</div>
+    </td>
+    <td>
+      <div class="action-buttons">
+        <button class="btn-lihat" onclick="viewQuotation('${noPesanan}')">Lihat</button>
+        <button class="btn-edit" onclick="editQuotationAction('${noPesanan}')">Edit</button>
+        <button class="btn-checkout" onclick="checkoutQuotation('${noPesanan}')">Checkout</button>
+        <button class="btn-hapus" onclick="deleteQuotationAction('${noPesanan}')">Hapus</button>
+      </div>
+    </td>
+  `;
 }
 
-function checkoutQuotation(noPesanan) {
+/**
+ * Quotation data in the shape kasir.js and invoice.js expect
+ * @param {string} noPesanan - Quotation number
+ * @returns {object|null}
+ */
+function buildCheckoutData(noPesanan) {
   const rows = groupedQuotations.map[noPesanan];
-  if (!rows) return;
+  if (!rows) return null;
   const mainRow = rows[0];
 
   const checkoutData = {
@@ -194,8 +168,113 @@ function checkoutQuotation(noPesanan) {
     },
   };
 
-  sessionStorage.setItem("checkoutQuotationData", JSON.stringify(checkoutData));
-  window.location.href = "kasir.html?mode=checkout";
+  return checkoutData;
+}
+
+/**
+ * Ask for the payment, then convert the quotation on the server
+ */
+function checkoutQuotation(noPesanan) {
+  const checkoutData = buildCheckoutData(noPesanan);
+  if (!checkoutData) return;
+
+  const total = checkoutData.summary.totalTagihan;
+  const payment = checkoutData.info.payment || "Transfer";
+  const modalHTML = `
+    <div id="checkoutModal" class="checkout-modal">
+      <div class="checkout-modal-content">
+        <h2>Checkout ${noPesanan}</h2>
+        <p>Total Tagihan: <strong>Rp${total.toLocaleString("id-ID")}</strong></p>
+        <label>Status
+          <select id="checkoutStatus">
+            <option value="LUNAS" selected>Lunas</option>
+            <option value="DP">DP</option>
+          </select>
+        </label>
+        <label id="checkoutPaidLabel" hidden>Nominal DP
+          <input type="number" id="checkoutPaid" min="0" value="0" />
+        </label>
+        <label>Payment
+          <select id="checkoutPayment">
+            <option value="Transfer" ${payment === "Transfer" ? "selected" : ""}>Transfer</option>
+            <option value="Tunai" ${payment === "Tunai" ? "selected" : ""}>Tunai</option>
+          </select>
+        </label>
+        <div class="checkout-modal-buttons">
+          <button type="button" class="btn-checkout" id="btnConfirmCheckout">Checkout</button>
+          <button type="button" class="btn-edit" id="btnCheckoutKasir">Edit di Kasir</button>
+          <button type="button" class="btn-hapus" onclick="closeModalById('checkoutModal')">Batal</button>
+        </div>
+      </div>
+    </div>
+  `;
+  document.body.insertAdjacentHTML("beforeend", modalHTML);
+
+  document.getElementById("checkoutStatus").addEventListener("change", (e) => {
+    document.getElementById("checkoutPaidLabel").hidden =
+      e.target.value !== "DP";
+  });
+  document.getElementById("btnCheckoutKasir").addEventListener("click", () => {
+    // Old flow: edit the cart in kasir before saving
+    sessionStorage.setItem(
+      "checkoutQuotationData",
+      JSON.stringify(checkoutData),
+    );
+    window.location.href = "kasir.html?mode=checkout";
+  });
+  document
+    .getElementById("btnConfirmCheckout")
+    .addEventListener("click", () =>
+      processCheckoutQuotation(noPesanan, checkoutData),
+    );
+}
+
+/**
+ * Convert the quotation server-side and open the new invoice
+ */
+async function processCheckoutQuotation(noPesanan, checkoutData) {
+  const button = document.getElementById("btnConfirmCheckout");
+  button.disabled = true;
+  button.textContent = "Menyimpan...";
+  if (window.showGlobalLoader) window.showGlobalLoader();
+
+  try {
+    await loadCustomerLookup();
+    const city =
+      checkoutData.customer.city ||
+      getCityForCustomer(checkoutData.customer.nama, checkoutData.customer.noHp);
+    const result = await convertQuotation(noPesanan, {
+      status: document.getElementById("checkoutStatus").value,
+      paid: parseFloat(document.getElementById("checkoutPaid").value) || 0,
+      payment: document.getElementById("checkoutPayment").value,
+      city: city,
+    });
+
+    alert(
+      `Invoice ${result.id} berhasil disimpan dengan status ${result.status} di sheet INCOME!`,
+    );
+    await quotationService.clearCache();
+
+    const invoiceData = {
+      ...checkoutData,
+      info: {
+        ...checkoutData.info,
+        noPesanan: result.id,
+        tanggal: formatDateForSheet(result.date),
+        transaksi: result.status === "LUNAS" ? "Lunas" : result.status,
+        payment: document.getElementById("checkoutPayment").value,
+      },
+      customer: { ...checkoutData.customer, city: city },
+    };
+    sessionStorage.setItem("invoiceData", JSON.stringify(invoiceData));
+    window.location.href = "invoice.html";
+  } catch (error) {
+    alert("Gagal checkout quotation: " + error.message);
+    button.disabled = false;
+    button.textContent = "Checkout";
+  } finally {
+    if (window.hideGlobalLoader) window.hideGlobalLoader();
+  }
 }
 
 function viewQuotation(noPesanan) {
@@ -295,7 +374,7 @@ async function deleteQuotationAction(noPesanan) {
     const result = await deleteInvoice(QUOTATION_SHEET_NAME, noPesanan);
     if (result.success) {
       alert("Quotation berhasil dihapus.");
-      localStorage.removeItem(QUOTATION_CACHE_KEY);
+      await quotationService.clearCache();
       loadQuotationData();
     } else {
       throw new Error(result.error);
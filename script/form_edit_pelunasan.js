@@ -5,14 +5,12 @@
  */
 
 const PELUNASAN_SHEET_NAME = "DP/Pelunasan";
-const KUSTOMER_SHEET_NAME = "KOSTUMER";
-const PRODUK_SHEET_NAME = "PERSEDIAAN BARANG";
 
 // State
 let keranjangData = [];
 let nomorUrut = 1;
-let allCustomers = [];
-let allProducts = [];
+const customerSearch = createCustomerLookup();
+const productIndex = createProductSearchIndex();
 let selectedCustomer = { kota: "", channel: "" };
 
 let editOriginalOrderNo = "";
@@ -34,9 +32,11 @@ async function initEditPage() {
   const editData = JSON.parse(editDataString);
 
   // Step 1: Load cached data IMMEDIATELY (non-blocking sync operations)
-  loadCachedCustomers();
-  loadCachedProducts();
-  loadCachedKasir(editData.info.kasir);
+  await Promise.all([
+    loadCachedCustomers(),
+    loadCachedProducts(),
+    loadCachedKasir(editData.info.kasir),
+  ]);
 
   // Step 2: Setup and Populate UI immediately
   setupAutocomplete();
@@ -51,63 +51,33 @@ async function initEditPage() {
 }
 
 /**
- * Load customers from cache synchronously
+ * Load customers from the IndexedDB cache (DataServices.customer)
  */
-function loadCachedCustomers() {
-  try {
-    const cached = localStorage.getItem("larosapot_customer_cache");
-    if (cached) {
-      allCustomers = JSON.parse(cached);
-    }
-  } catch (e) {}
+async function loadCachedCustomers() {
+  const cached = await DataServices.customer.getCached();
+  if (cached && Array.isArray(cached.data)) customerSearch.build(cached.data);
 }
 
 /**
- * Load products from cache synchronously
+ * Load products from the IndexedDB cache (DataServices.product)
  */
-function loadCachedProducts() {
-  try {
-    const cached = localStorage.getItem("larosapot_product_cache");
-    if (cached) {
-      allProducts = JSON.parse(cached);
-    }
-  } catch (e) {}
+async function loadCachedProducts() {
+  const cached = await DataServices.product.getCached();
+  if (cached && Array.isArray(cached.data)) productIndex.build(cached.data);
 }
 
 /**
- * Load kasir dropdown from cache synchronously
+ * Load kasir dropdown from the IndexedDB cache (DataServices.users)
  */
-function loadCachedKasir(defaultKasir) {
+async function loadCachedKasir(defaultKasir) {
   const select = document.getElementById("kasir");
   if (!select) return;
 
-  try {
-    const cached = localStorage.getItem("larosapot_users_cache");
-    if (cached) {
-      const users = JSON.parse(cached);
-      select.innerHTML = "";
-      users.forEach((user) => {
-        const username = user.USERNAME || user.username || user.Username;
-        if (username) {
-          const option = document.createElement("option");
-          option.value = username;
-          option.textContent = username;
-          if (
-            defaultKasir &&
-            username.toLowerCase() === defaultKasir.toLowerCase()
-          ) {
-            option.selected = true;
-          }
-          select.appendChild(option);
-        }
-      });
-    } else if (defaultKasir) {
-      select.innerHTML = `<option value="${defaultKasir}" selected>${defaultKasir}</option>`;
-    }
-  } catch (e) {
-    if (defaultKasir) {
-      select.innerHTML = `<option value="${defaultKasir}" selected>${defaultKasir}</option>`;
-    }
+  const cached = await DataServices.users.getCached();
+  if (cached && Array.isArray(cached.data) && cached.data.length > 0) {
+    populateKasirSelect(select, cached.data, defaultKasir);
+  } else if (defaultKasir) {
+    select.innerHTML = `<option value="${defaultKasir}" selected>${defaultKasir}</option>`;
   }
 }
 
@@ -130,29 +100,8 @@ async function refreshKasirDropdown(defaultKasir) {
   if (!select) return;
 
   try {
-    const result = await fetchSheetData("USERS");
-    if (result && result.data && result.data.length > 0) {
-      localStorage.setItem(
-        "larosapot_users_cache",
-        JSON.stringify(result.data),
-      );
-      select.innerHTML = "";
-      result.data.forEach((user) => {
-        const username = user.USERNAME || user.username || user.Username;
-        if (username) {
-          const option = document.createElement("option");
-          option.value = username;
-          option.textContent = username;
-          if (
-            defaultKasir &&
-            username.toLowerCase() === defaultKasir.toLowerCase()
-          ) {
-            option.selected = true;
-          }
-          select.appendChild(option);
-        }
-      });
-    }
+    const users = await DataServices.users.refresh();
+    if (users.length > 0) populateKasirSelect(select, users, defaultKasir);
   } catch (error) {
     console.warn("Error refreshing kasir:", error);
   }
@@ -218,49 +167,29 @@ function populateForm(editData) {
 
 // ... Shared Logic ...
 
-// LocalStorage cache keys (shared with kasir.js)
-const CUSTOMER_CACHE_KEY = "larosapot_customer_cache";
-const PRODUCT_CACHE_KEY = "larosapot_product_cache";
-
+/**
+ * Load all customers for autocomplete suggestions
+ */
 async function loadCustomersForAutocomplete() {
-  // Load from cache first for instant UI
+  // The cached list is already loaded; download only if the sheet changed
   try {
-    const cached = localStorage.getItem(CUSTOMER_CACHE_KEY);
-    if (cached) allCustomers = JSON.parse(cached);
-  } catch (e) {}
-
-  // Fetch fresh data
-  try {
-    const result = await fetchSheetData(KUSTOMER_SHEET_NAME);
-    if (result.data) {
-      allCustomers = result.data;
-      try {
-        localStorage.setItem(CUSTOMER_CACHE_KEY, JSON.stringify(result.data));
-      } catch (e) {}
-    }
-  } catch (e) {
-    console.error(e);
+    const customers = await DataServices.customer.refresh();
+    if (customers.length > 0) customerSearch.build(customers);
+  } catch (error) {
+    console.error("Error loading customers:", error);
   }
 }
 
+/**
+ * Load all products for autocomplete suggestions
+ */
 async function loadProductsForAutocomplete() {
-  // Load from cache first
+  // The cached list is already loaded; download only if the sheet changed
   try {
-    const cached = localStorage.getItem(PRODUCT_CACHE_KEY);
-    if (cached) allProducts = JSON.parse(cached);
-  } catch (e) {}
-
-  // Fetch fresh data
-  try {
-    const result = await fetchSheetData(PRODUK_SHEET_NAME);
-    if (result.data) {
-      allProducts = result.data;
-      try {
-        localStorage.setItem(PRODUCT_CACHE_KEY, JSON.stringify(result.data));
-      } catch (e) {}
-    }
-  } catch (e) {
-    console.error(e);
+    const products = await DataServices.product.refresh();
+    if (products.length > 0) productIndex.build(products);
+  } catch (error) {
+    console.error("Error loading products:", error);
   }
 }
 
@@ -269,82 +198,24 @@ function setupAutocomplete() {
   const list = document.getElementById("suggestionList");
   if (!input || !list) return;
 
-  input.addEventListener("input", (e) => {
-    const val = e.target.value;
-    if (val.length < 2) {
-      list.classList.remove("show");
-      return;
-    }
-
-    const matches = allCustomers
-      .filter(
-        (c) =>
-          String(c["NO HP"] || "").includes(val) ||
-          String(c["NAMA PELANGGAN"] || "")
-            .toLowerCase()
-            .includes(val.toLowerCase()),
-      )
-      .slice(0, 10);
-
-    list.innerHTML = "";
-    matches.forEach((c) => {
-      const div = document.createElement("div");
-      div.className = "suggestion-item";
-      div.innerHTML = `
-        <div class="phone">${c["NO HP"]}</div>
-        <div class="name">${c["NAMA PELANGGAN"]}</div>
-      `;
-      div.onclick = () => {
-        document.getElementById("namaPelanggan").value = c["NAMA PELANGGAN"];
-        document.getElementById("noTelepon").value = c["NO HP"];
-        document.getElementById("alamatPelanggan").value = c["ALAMAT"];
-        selectedCustomer.kota = c["KOTA"];
-        selectedCustomer.channel = c["CHANNEL"];
-        list.classList.remove("show");
-      };
-      list.appendChild(div);
-    });
-    if (matches.length > 0) list.classList.add("show");
-    else list.classList.remove("show");
-  });
-
-  input.addEventListener("keydown", (e) => {
-    const items = list.getElementsByClassName("suggestion-item");
-    if (!list.classList.contains("show")) return;
-
-    if (e.key === "ArrowDown") {
-      e.preventDefault();
-      currentFocus++;
-      addActive(items);
-    } else if (e.key === "ArrowUp") {
-      e.preventDefault();
-      currentFocus--;
-      addActive(items);
-    } else if (e.key === "Enter") {
-      if (currentFocus > -1) {
-        e.preventDefault();
-        if (items[currentFocus]) items[currentFocus].click();
-      }
-    }
+  createAutocomplete({
+    input,
+    list,
+    search: (query, { limit }) => customerSearch.search(query, limit),
+    describe: (c) => ({
+      title: c["NO HP"] || "",
+      subtitle: c["NAMA PELANGGAN"] || "",
+    }),
+    onSelect: (c) => {
+      document.getElementById("namaPelanggan").value = c["NAMA PELANGGAN"];
+      document.getElementById("noTelepon").value = c["NO HP"];
+      document.getElementById("alamatPelanggan").value = c["ALAMAT"];
+      selectedCustomer.kota = c["KOTA"];
+      selectedCustomer.channel = c["CHANNEL"];
+    },
+    minLength: 2,
+    limit: 10,
   });
-
-  document.addEventListener("click", (e) => {
-    if (!e.target.closest(".autocomplete-container"))
-      list.classList.remove("show");
-  });
-}
-
-let currentFocus = -1;
-function addActive(x) {
-  if (!x) return false;
-  removeActive(x);
-  if (currentFocus >= x.length) currentFocus = 0;
-  if (currentFocus < 0) currentFocus = x.length - 1;
-  x[currentFocus].classList.add("active");
-  x[currentFocus].scrollIntoView({ behavior: "smooth", block: "nearest" });
-}
-function removeActive(x) {
-  for (let i = 0; i < x.length; i++) x[i].classList.remove("active");
 }
 
 function setupProductAutocomplete() {
@@ -352,88 +223,27 @@ function setupProductAutocomplete() {
   const list = document.getElementById("skuSuggestionList");
   if (!input || !list) return;
 
-  input.addEventListener("input", (e) => {
-    const val = e.target.value.toUpperCase();
-    if (val.length < 1) {
-      list.classList.remove("show");
-      return;
-    }
-
-    const matches = allProducts
-      .filter(
-        (p) =>
-          String(p["SKU"] || "").includes(val) ||
-          String(p["NAMA PRODUK"] || "")
-            .toUpperCase()
-            .includes(val),
-      )
-      .slice(0, 10);
-
-    list.innerHTML = "";
-    matches.forEach((p) => {
-      const div = document.createElement("div");
-      div.className = "suggestion-item";
-      div.innerHTML = `
-        <div class="phone">${p["SKU"]}</div>
-        <div class="name">${p["NAMA PRODUK"]} - Rp${(
-          parseFloat(p["HARGA JUAL"]) || 0
-        ).toLocaleString("id-ID")}</div>
-      `;
-      div.onclick = () => {
-        document.getElementById("noSku").value = p["SKU"];
-        document.getElementById("namaProduk").value = p["NAMA PRODUK"];
-        document.getElementById("satuan").value = p["SATUAN"];
-        document.getElementById("harga").value = p["HARGA JUAL"];
-        document.getElementById("noSku").dataset.kategori = p["KATEGORI"];
-        list.classList.remove("show");
-        document.getElementById("jumlah").focus();
-        hitungTotalHarga();
-      };
-      list.appendChild(div);
-    });
-    if (matches.length > 0) list.classList.add("show");
-  });
-
-  input.addEventListener("keydown", (e) => {
-    const items = list.getElementsByClassName("suggestion-item");
-    if (!list.classList.contains("show")) return;
-
-    if (e.key === "ArrowDown") {
-      e.preventDefault();
-      currentProductFocus++;
-      addActiveProduct(items);
-    } else if (e.key === "ArrowUp") {
-      e.preventDefault();
-      currentProductFocus--;
-      addActiveProduct(items);
-    } else if (e.key === "Enter") {
-      if (currentProductFocus > -1) {
-        e.preventDefault();
-        if (items[currentProductFocus]) items[currentProductFocus].click();
-      }
-    }
+  createAutocomplete({
+    input,
+    list,
+    search: (query, { limit }) => productIndex.search(query, limit),
+    describe: (p) => ({
+      title: p["SKU"] || "",
+      subtitle: `${p["NAMA PRODUK"] || ""} - Rp${(
+        parseFloat(p["HARGA JUAL"]) || 0
+      ).toLocaleString("id-ID")}`,
+    }),
+    onSelect: (p) => {
+      document.getElementById("noSku").value = p["SKU"];
+      document.getElementById("namaProduk").value = p["NAMA PRODUK"];
+      document.getElementById("satuan").value = p["SATUAN"];
+      document.getElementById("harga").value = p["HARGA JUAL"];
+      document.getElementById("noSku").dataset.kategori = p["KATEGORI"];
+      document.getElementById("jumlah").focus();
+      hitungTotalHarga();
+    },
+    limit: 10,
   });
-
-  document.addEventListener("click", (e) => {
-    if (!e.target.closest(".autocomplete-container"))
-      list.classList.remove("show");
-  });
-}
-
-let currentProductFocus = -1;
-function addActiveProduct(x) {
-  if (!x) return false;
-  removeActiveProduct(x);
-  if (currentProductFocus >= x.length) currentProductFocus = 0;
-  if (currentProductFocus < 0) currentProductFocus = x.length - 1;
-  x[currentProductFocus].classList.add("active");
-  x[currentProductFocus].scrollIntoView({
-    behavior: "smooth",
-    block: "nearest",
-  });
-}
-function removeActiveProduct(x) {
-  for (let i = 0; i < x.length; i++) x[i].classList.remove("active");
 }
 
 function setupEnterKeyListeners() {
@@ -2,8 +2,11 @@
  * Form Restock (Pembelian Barang) - Logic
  */
 
-let allVendors = [];
-let allProducts = [];
+const vendorIndex = createSearchIndex({
+  fields: ["NO HP", "NAMA VENDOR"],
+  key: "NO HP",
+});
+const productIndex = createProductSearchIndex();
 let keranjangData = [];
 let nomorUrut = 1;
 
@@ -162,95 +165,36 @@ async function updatePurchaseInvoiceNumber() {
  * Load Vendors from DataService
  */
 async function loadVendors() {
-  allVendors = await DataServices.vendor.loadData({
+  const vendors = await DataServices.vendor.loadData({
     onRender: () => {}, // Silent load
   });
+  vendorIndex.build(vendors);
 }
 
 /**
  * Load Products from DataService
  */
 async function loadProducts() {
-  allProducts = await DataServices.product.loadData({
+  const products = await DataServices.product.loadData({
     onRender: () => {}, // Silent load
   });
+  productIndex.build(products);
 }
 
 /**
- * Vendor Autocomplete
+ * Vendor Autocomplete (autocomplete.js), by phone or name
  */
-let currentVendorFocus = -1;
-
 function setupVendorAutocomplete() {
-  const input = document.getElementById("noHpVendor");
-  const list = document.getElementById("vendorSuggestionList");
-
-  input.addEventListener("input", (e) => {
-    const query = e.target.value.trim().toLowerCase();
-    currentVendorFocus = -1;
-    if (query.length < 2) {
-      list.classList.remove("show");
-      return;
-    }
-
-    const matches = allVendors.filter((v) => {
-      const phone = String(v["NO HP"] || "").toLowerCase();
-      const name = getValueFromKeys(
-        v,
-        ["NAMA\nVENDOR", "NAMA VENDOR"],
-        "",
-      ).toLowerCase();
-      return phone.includes(query) || name.includes(query);
-    });
-
-    list.innerHTML = "";
-    matches.forEach((v) => {
-      const name = getValueFromKeys(
-        v,
-        ["NAMA\nVENDOR", "NAMA VENDOR"],
-        v["VENDOR"] || "Vendor",
-      );
-      const item = document.createElement("div");
-      item.className = "suggestion-item";
-      item.innerHTML = `<strong>${v["NO HP"]}</strong> - ${name}`;
-      item.onclick = () => selectVendor(v);
-      list.appendChild(item);
-    });
-    list.classList.add("show");
-  });
-
-  input.addEventListener("keydown", (e) => {
-    const items = list.getElementsByClassName("suggestion-item");
-    if (!list.classList.contains("show")) return;
-
-    if (e.key === "ArrowDown") {
-      e.preventDefault();
-      currentVendorFocus++;
-      addActiveSuggestion(
-        items,
-        currentVendorFocus,
-        (idx) => (currentVendorFocus = idx),
-      );
-    } else if (e.key === "ArrowUp") {
-      e.preventDefault();
-      currentVendorFocus--;
-      addActiveSuggestion(
-        items,
-        currentVendorFocus,
-        (idx) => (currentVendorFocus = idx),
-      );
-    } else if (e.key === "Enter") {
-      if (currentVendorFocus > -1) {
-        e.preventDefault();
-        if (items[currentVendorFocus]) items[currentVendorFocus].click();
-      }
-    }
-  });
-
-  document.addEventListener("click", (e) => {
-    if (!e.target.closest(".autocomplete-container")) {
-      list.classList.remove("show");
-    }
+  createAutocomplete({
+    input: document.getElementById("noHpVendor"),
+    list: document.getElementById("vendorSuggestionList"),
+    search: (query, { limit }) => vendorIndex.search(query, limit),
+    describe: (v) => ({
+      title: v["NO HP"] || "",
+      subtitle: v["NAMA VENDOR"] || "Vendor",
+    }),
+    onSelect: selectVendor,
+    minLength: 2,
   });
 }
 
@@ -262,76 +206,21 @@ function selectVendor(v) {
   document.getElementById("alamatVendor").value = v["ALAMAT"] || "";
   document.getElementById("bankVendor").value = v["BANK"] || "";
   document.getElementById("rekeningVendor").value = v["REKENING"] || "";
-
-  document.getElementById("vendorSuggestionList").classList.remove("show");
 }
 
 /**
- * Product Autocomplete
+ * Product Autocomplete (autocomplete.js), by SKU or name
  */
-let currentProductFocus = -1;
-
 function setupProductAutocomplete() {
-  const input = document.getElementById("noSku");
-  const list = document.getElementById("skuSuggestionList");
-
-  input.addEventListener("input", (e) => {
-    const query = e.target.value.trim().toUpperCase();
-    currentProductFocus = -1;
-    if (query.length < 1) {
-      list.classList.remove("show");
-      return;
-    }
-
-    const matches = allProducts.filter((p) => {
-      const sku = String(p["SKU"] || "").toUpperCase();
-      const name = String(p["NAMA PRODUK"] || "").toUpperCase();
-      return sku.includes(query) || name.includes(query);
-    });
-
-    list.innerHTML = "";
-    matches.forEach((p) => {
-      const item = document.createElement("div");
-      item.className = "suggestion-item";
-      item.innerHTML = `<strong>${p["SKU"]}</strong> - ${p["NAMA PRODUK"]}`;
-      item.onclick = () => selectProduct(p);
-      list.appendChild(item);
-    });
-    list.classList.add("show");
-  });
-
-  input.addEventListener("keydown", (e) => {
-    const items = list.getElementsByClassName("suggestion-item");
-    if (!list.classList.contains("show")) return;
-
-    if (e.key === "ArrowDown") {
-      e.preventDefault();
-      currentProductFocus++;
-      addActiveSuggestion(
-        items,
-        currentProductFocus,
-        (idx) => (currentProductFocus = idx),
-      );
-    } else if (e.key === "ArrowUp") {
-      e.preventDefault();
-      currentProductFocus--;
-      addActiveSuggestion(
-        items,
-        currentProductFocus,
-        (idx) => (currentProductFocus = idx),
-      );
-    } else if (e.key === "Enter") {
-      if (currentProductFocus > -1) {
-        e.preventDefault();
-        if (items[currentProductFocus]) items[currentProductFocus].click();
-      }
-    }
-  });
-
-  document.addEventListener("click", (e) => {
-    if (!e.target.closest(".autocomplete-container")) {
-      list.classList.remove("show");
-    }
+  const productAutocomplete = createAutocomplete({
+    input: document.getElementById("noSku"),
+    list: document.getElementById("skuSuggestionList"),
+    search: (query, { limit }) => productIndex.search(query, limit),
+    describe: (p) => ({
+      title: p["SKU"] || "",
+      subtitle: p["NAMA PRODUK"] || "",
+    }),
+    onSelect: selectProduct,
   });
 
   // Enter key listeners for inputs
@@ -340,7 +229,7 @@ function setupProductAutocomplete() {
 
   [jumlahInput, hppInput].forEach((inp) => {
     inp.addEventListener("keydown", (e) => {
-      if (e.key === "Enter" && !list.classList.contains("show")) {
+      if (e.key === "Enter" && !productAutocomplete.isOpen()) {
         e.preventDefault();
         tambahKeKeranjang();
       }
@@ -348,29 +237,12 @@ function setupProductAutocomplete() {
   });
 }
 
-function addActiveSuggestion(items, index, setIndex) {
-  if (!items || items.length === 0) return;
-  removeActiveSuggestion(items);
-  if (index >= items.length) index = 0;
-  if (index < 0) index = items.length - 1;
-  setIndex(index);
-  items[index].classList.add("active");
-  items[index].scrollIntoView({ behavior: "smooth", block: "nearest" });
-}
-
-function removeActiveSuggestion(items) {
-  for (let i = 0; i < items.length; i++) {
-    items[i].classList.remove("active");
-  }
-}
-
 function selectProduct(p) {
   document.getElementById("noSku").value = p["SKU"] || "";
   document.getElementById("namaProduk").value = p["NAMA PRODUK"] || "";
   document.getElementById("satuan").value = p["SATUAN"] || "";
   document.getElementById("hpp").value = p["HPP"] || 0;
 
-  document.getElementById("skuSuggestionList").classList.remove("show");
   document.getElementById("jumlah").focus();
 }
 
@@ -651,9 +523,7 @@ async function saveRestock() {
     }
 
     // Clear RESTOCK cache to ensure history page is fresh
-    if (localStorage.getItem("restock_data_cache")) {
-      localStorage.removeItem("restock_data_cache");
-    }
+    await DataServices.restock.clearCache();
 
     // Store for invoice preview
     const previewData = { ...data };
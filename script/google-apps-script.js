@@ -15,6 +15,14 @@
 
 const SHEET_ID = "1Cvvc4tIIcSoC7Q8f5Agau3OgYOIo0sdgUOZ0vsKVL6g";
 
+// Daftar outlet: setiap outlet memakai spreadsheet sendiri dengan struktur sheet yang sama.
+// Request memilih outlet lewat parameter `outlet` (GET) / field `outlet` (POST);
+// tanpa parameter dipakai DEFAULT_OUTLET. Tambahkan outlet baru di sini dan di config.js.
+const OUTLETS = {
+  larosa: { name: "Larosa Pot", sheetId: SHEET_ID },
+};
+const DEFAULT_OUTLET = "larosa";
+
 // Konfigurasi baris header untuk setiap sheet
 // Sesuaikan angka ini dengan baris dimana header tabel Anda berada
 const SHEET_CONFIG = {
@@ -31,6 +39,189 @@ const SHEET_CONFIG = {
   COUNTERS: { headerRow: 1 },
 };
 
+// Storage engine per sheet (SHEET_CONFIG[sheet].engine):
+// - "spreadsheet" (default): SpreadsheetApp, satu panggilan per range
+// - "sheets-api": Advanced Sheets service; range yang ditulis dikumpulkan selama satu
+//   request dan dikirim sekali dalam satu batchUpdate (commitStorageWrites)
+//   Opsional: tambahkan `engine: "sheets-api"` pada sheet yang diinginkan setelah
+//   mengaktifkan Services > Google Sheets API di editor. Jika belum aktif, otomatis
+//   kembali ke "spreadsheet".
+const DEFAULT_STORAGE_ENGINE = "spreadsheet";
+
+// Konfigurasi index pencarian (action=search)
+// Index disimpan di sheet tersembunyi SEARCH_INDEX dan diperbarui setiap ada penulisan
+const SEARCH_INDEX_SHEET = "SEARCH_INDEX";
+const SEARCH_INDEX_CONFIG = {
+  INCOME: {
+    invoiceColumn: "NO INVOICE",
+    textColumns: ["NO INVOICE", "NAME", "CITY"],
+    phoneColumns: ["HP"],
+    itemColumn: "ITEM PRODUCT", // Format "[SKU] Nama Produk"
+  },
+};
+// Baris yang dibaca sekaligus saat mencari grup invoice di sekitar baris yang ditulis
+const SEARCH_INDEX_SCAN_CHUNK = 50;
+
+// Versi data per sheet (action=manifest), disimpan di Script Properties
+// Setiap penulisan mengganti versi sheet tersebut
+const SHEET_VERSION_PREFIX = "SHEET_VERSION:";
+
+// Sub-operasi yang tidak boleh dipakai di dalam action=batch
+const BATCH_EXCLUDED_ACTIONS = ["batch", "login", "convert-quotation"];
+
+// Antrian tugas: operasi batch dengan `defer: true` disimpan di sheet tersembunyi
+// TASK_QUEUE dan dijalankan oleh trigger waktu processTaskQueue.
+// Jalankan installTaskQueueTrigger() sekali dari editor Apps Script.
+const TASK_QUEUE_SHEET = "TASK_QUEUE";
+const TASK_QUEUE_HEADERS = [
+  "ID",
+  "CREATED",
+  "ACTION",
+  "PAYLOAD",
+  "ATTEMPTS",
+  "STATUS",
+  "NEXT RUN",
+  "LAST ERROR",
+];
+const TASK_QUEUE_BATCH_SIZE = 25; // tugas per eksekusi trigger
+const TASK_QUEUE_MAX_ATTEMPTS = 5; // setelah itu status menjadi "dead"
+const TASK_QUEUE_RETRY_DELAY_MS = 60000; // dikali 2 setiap percobaan gagal
+const TASK_QUEUE_TIME_BUDGET_MS = 240000; // berhenti sebelum batas 6 menit
+
+// Pemeliharaan terjadwal (runMaintenance): hapus baris/kolom kosong di akhir setiap sheet,
+// buang baris COUNTERS lama, dan bangun ulang index pencarian.
+// Jalankan installMaintenanceTrigger() sekali dari editor Apps Script.
+const MAINTENANCE_HOUR = 3; // jam (zona waktu script), di luar jam buka toko
+const MAINTENANCE_SPARE_ROWS = 20; // baris kosong yang disisakan untuk appendRow
+const MAINTENANCE_SCAN_CHUNK = 500; // baris per pembacaan saat mencari baris kosong
+const MAINTENANCE_TIME_BUDGET_MS = 300000; // berhenti sebelum batas 6 menit
+const COUNTERS_RETENTION_DAYS = 400; // tanggal lebih lama tidak lagi dipakai untuk ID baru
+
+// encoding=gzip (read/search): JSON yang lebih kecil dari ini tidak dikompres
+const GZIP_MIN_LENGTH = 2048;
+
+// Idempotency key (POST): hasil request yang sukses disimpan di CacheService
+// sehingga request ulang dengan key yang sama mengembalikan hasil yang sama
+const IDEMPOTENCY_PREFIX = "IDEMPOTENCY:";
+const IDEMPOTENCY_TTL_SECONDS = 21600; // 6 jam (maksimum CacheService)
+const IDEMPOTENCY_MAX_RESULT_LENGTH = 90000; // batas nilai CacheService 100KB
+// Penanda "sedang berjalan" selama request pertama diproses (batas eksekusi 6 menit)
+const IDEMPOTENCY_PENDING_TTL_SECONDS = 360;
+const IDEMPOTENCY_LOCK_TIMEOUT_MS = 10000;
+
+// State per eksekusi (satu request): outlet, spreadsheet, header, dan lock dipakai bersama
+let activeOutletId = DEFAULT_OUTLET;
+let activeSpreadsheet = null;
+const headerCache = {};
+let searchIndexRows = null; // "SHEET|INVOICE" -> baris di SEARCH_INDEX
+let pendingStorageWrites = []; // range engine "sheets-api" yang belum dikirim
+let pendingStorageSpreadsheet = null;
+let storageReadsStale = false; // perubahan SpreadsheetApp yang belum di-flush
+let heldScriptLock = null;
+let scriptLockDepth = 0;
+
+/**
+ * Route the rest of this execution to an outlet's spreadsheet
+ * @param {string} [outletId] - Key of OUTLETS; DEFAULT_OUTLET when empty
+ * @returns {object|null} - {error} for an unknown outlet, otherwise null
+ */
+function selectOutlet(outletId) {
+  const id = outletId || DEFAULT_OUTLET;
+  if (!OUTLETS[id]) {
+    return { error: "Unknown outlet: " + id };
+  }
+  if (id !== activeOutletId) {
+    commitStorageWrites();
+    activeOutletId = id;
+    activeSpreadsheet = null;
+    Object.keys(headerCache).forEach((key) => delete headerCache[key]);
+    searchIndexRows = null;
+  }
+  return null;
+}
+
+/**
+ * Prefix a Script Properties / CacheService key with the active outlet
+ * Keys of the default outlet stay unprefixed (same keys as before outlets existed)
+ */
+function outletKey(key) {
+  return activeOutletId === DEFAULT_OUTLET ? key : activeOutletId + ":" + key;
+}
+
+/**
+ * Public list of outlets (GET ?action=outlets)
+ */
+function listOutlets() {
+  return {
+    success: true,
+    defaultOutlet: DEFAULT_OUTLET,
+    outlets: Object.keys(OUTLETS).map((id) => ({
+      id: id,
+      name: OUTLETS[id].name,
+    })),
+  };
+}
+
+/**
+ * Spreadsheet handle shared by every function in this execution
+ */
+function getSpreadsheet() {
+  if (!activeSpreadsheet) {
+    activeSpreadsheet = SpreadsheetApp.openById(
+      OUTLETS[activeOutletId].sheetId,
+    );
+  }
+  return activeSpreadsheet;
+}
+
+/**
+ * Header row values of a sheet (from `column` to the last column), cached per execution
+ * @param {Spreadsheet} ss
+ * @param {string} sheetName
+ * @param {number} headerRow
+ * @param {number} [column=1]
+ * @returns {Array}
+ */
+function getHeaderValues(ss, sheetName, headerRow, column = 1) {
+  const key = sheetName + "|" + headerRow + "|" + column;
+  if (!headerCache[key]) {
+    headerCache[key] =
+      getStorageEngine(sheetName).read(ss, sheetName, [
+        { row: headerRow, column: column, numRows: 1 },
+      ])[0][0] || [];
+  }
+  return headerCache[key];
+}
+
+/**
+ * Script lock that can be taken again by nested calls in the same execution
+ * (e.g. a batch that runs getNextIncrementalId and updateProductCounter).
+ * Only the outermost waitLock/releaseLock pair touches LockService.
+ */
+function getScriptLock() {
+  let acquired = false;
+  return {
+    waitLock(timeoutMs) {
+      if (scriptLockDepth === 0) {
+        const lock = LockService.getScriptLock();
+        lock.waitLock(timeoutMs);
+        heldScriptLock = lock;
+      }
+      scriptLockDepth++;
+      acquired = true;
+    },
+    releaseLock() {
+      if (!acquired) return;
+      acquired = false;
+      scriptLockDepth--;
+      if (scriptLockDepth === 0 && heldScriptLock) {
+        heldScriptLock.releaseLock();
+        heldScriptLock = null;
+      }
+    },
+  };
+}
+
 function doGet(e) {
   try {
     // Basic parameter check
@@ -43,8 +234,43 @@ function doGet(e) {
     const sheet = e.parameter.sheet;
     const action = e.parameter.action || "read";
 
+    if (action === "outlets") {
+      return ContentService.createTextOutput(
+        JSON.stringify(listOutlets()),
+      ).setMimeType(ContentService.MimeType.JSON);
+    }
+
+    const outletError = selectOutlet(e.parameter.outlet);
+    if (outletError) {
+      return ContentService.createTextOutput(
+        JSON.stringify(outletError),
+      ).setMimeType(ContentService.MimeType.JSON);
+    }
+
     if (action === "read") {
-      return readSheet(sheet);
+      return readSheet(sheet, e.parameter.format, e.parameter.encoding);
+    }
+
+    if (action === "search") {
+      return searchSheet(
+        sheet,
+        e.parameter.q,
+        e.parameter.limit,
+        e.parameter.encoding,
+      );
+    }
+
+    if (action === "queue") {
+      return ContentService.createTextOutput(
+        JSON.stringify(getTaskQueueStatus()),
+      ).setMimeType(ContentService.MimeType.JSON);
+    }
+
+    if (action === "manifest") {
+      const sheets = e.parameter.sheets ? e.parameter.sheets.split(",") : [];
+      return ContentService.createTextOutput(
+        JSON.stringify(getDataManifest(sheets)),
+      ).setMimeType(ContentService.MimeType.JSON);
     }
 
     return ContentService.createTextOutput(
@@ -73,51 +299,12 @@ function doPost(e) {
       ).setMimeType(ContentService.MimeType.JSON);
     }
 
-    const sheet = data.sheet;
-    const action = data.action;
-    const rowData = data.data;
-    const rowIndex = data.rowIndex;
-    const uniqueColumn = data.uniqueColumn; // For unique constraint check
-
-    let result;
-
-    switch (action) {
-      case "add":
-        result = addRow(sheet, rowData, uniqueColumn);
-        break;
-      case "update":
-        result = updateRow(sheet, rowIndex, rowData);
-        break;
-      case "delete":
-        result = deleteRow(sheet, rowIndex);
-        break;
-      case "delete-invoice":
-        result = deleteInvoice(sheet, rowData.noPesanan);
-        break;
-      case "delete-restock":
-        result = deleteRestockWithStockCorrection(rowData.noPesanan);
-        break;
-      case "increment-transaction":
-        result = incrementCustomerTransaction(data.phoneNumber);
-        break;
-      case "increment-product-sold":
-        result = incrementProductSold(data.items);
-        break;
-      case "increment-product-restock":
-        result = incrementProductRestock(data.items);
-        break;
-      case "login":
-        result = authenticateUser(data.username, data.password);
-        break;
-      case "get-next-id":
-        result = getNextIncrementalId(data.type, data.date);
-        break;
-      case "peek-next-id":
-        result = peekNextId(data.type, data.date);
-        break;
-      default:
-        result = { error: "Invalid action" };
-    }
+    const outletError = selectOutlet(data.outlet);
+    const result = outletError
+      ? outletError
+      : data.idempotencyKey
+        ? runIdempotent(data)
+        : runPostAction(data);
 
     return ContentService.createTextOutput(JSON.stringify(result)).setMimeType(
       ContentService.MimeType.JSON,
@@ -133,6 +320,167 @@ function doPost(e) {
   }
 }
 
+/**
+ * Run a POST body: either a batch or a single action
+ * @param {object} data - Parsed request body
+ * @returns {object}
+ */
+function runPostAction(data) {
+  const result =
+    data.action === "batch"
+      ? runBatch(data.operations)
+      : dispatchAction(data);
+  try {
+    commitStorageWrites();
+  } catch (error) {
+    return { error: "Failed to save changes: " + error.toString() };
+  }
+  return result;
+}
+
+/**
+ * Run a POST body at most once per idempotency key
+ * The script lock is held only to check the key and mark it as running; the
+ * action itself runs outside it. A repeat that arrives while the first attempt
+ * is still running (or while the lock is contended) gets `{retry: true}`, which
+ * the client retries with the same key instead of reporting a failure.
+ * Only successful results are stored, so a failed request can be retried.
+ * @param {object} data - Parsed request body with `idempotencyKey`
+ * @returns {object} - The original result, with `replayed: true` for repeats
+ */
+function runIdempotent(data) {
+  const cache = CacheService.getScriptCache();
+  const cacheKey = IDEMPOTENCY_PREFIX + data.idempotencyKey;
+
+  const stored = cache.get(cacheKey);
+  if (stored) return replayIdempotent(stored);
+
+  const lock = getScriptLock();
+  try {
+    lock.waitLock(IDEMPOTENCY_LOCK_TIMEOUT_MS);
+  } catch (error) {
+    return { retry: true, message: "Server busy, try again" };
+  }
+  try {
+    const current = cache.get(cacheKey);
+    if (current) return replayIdempotent(current);
+    cache.put(
+      cacheKey,
+      JSON.stringify({ pending: true }),
+      IDEMPOTENCY_PENDING_TTL_SECONDS,
+    );
+  } finally {
+    lock.releaseLock();
+  }
+
+  let result;
+  try {
+    result = runPostAction(data);
+  } catch (error) {
+    cache.remove(cacheKey);
+    throw error;
+  }
+  if (result && !result.error) {
+    let value = JSON.stringify(result);
+    if (value.length > IDEMPOTENCY_MAX_RESULT_LENGTH) {
+      // Too large for CacheService: remember that it succeeded
+      value = JSON.stringify({
+        success: true,
+        message: "Request already processed",
+        version: result.version,
+      });
+    }
+    cache.put(cacheKey, value, IDEMPOTENCY_TTL_SECONDS);
+  } else {
+    cache.remove(cacheKey);
+  }
+  return result;
+}
+
+/**
+ * Answer a repeated idempotency key from its cache entry
+ * @param {string} stored - Cached JSON: a result or the {pending} marker
+ * @returns {object}
+ */
+function replayIdempotent(stored) {
+  const previous = JSON.parse(stored);
+  if (previous.pending) {
+    return { retry: true, message: "Request is still being processed" };
+  }
+  previous.replayed = true;
+  return previous;
+}
+
+/**
+ * Run a single POST action
+ * @param {object} data - Request body ({action, sheet, data, rowIndex, ...})
+ * @returns {object} - Action result
+ */
+function dispatchAction(data) {
+  const sheet = data.sheet;
+  const action = data.action;
+  const rowData = data.data;
+  const rowIndex = data.rowIndex;
+  const uniqueColumn = data.uniqueColumn; // For unique constraint check
+
+  let result;
+
+  switch (action) {
+    case "add":
+      result = addRow(sheet, rowData, uniqueColumn);
+      break;
+    case "update":
+      result = updateRow(sheet, rowIndex, rowData);
+      break;
+    case "delete":
+      result = deleteRow(sheet, rowIndex);
+      break;
+    case "delete-invoice":
+      result = deleteInvoice(sheet, rowData.noPesanan);
+      break;
+    case "convert-quotation":
+      result = convertQuotation(rowData.noPesanan, rowData);
+      break;
+    case "delete-restock":
+      result = deleteRestockWithStockCorrection(rowData.noPesanan);
+      break;
+    case "increment-transaction":
+      result = incrementCustomerTransaction(data.phoneNumber);
+      break;
+    case "increment-product-sold":
+      result = incrementProductSold(data.items);
+      break;
+    case "increment-product-restock":
+      result = incrementProductRestock(data.items);
+      break;
+    case "set-stok-lapang":
+      result = setProductStokLapang(data.items);
+      break;
+    case "upsert-products":
+      result = upsertProducts(data.products);
+      break;
+    case "login":
+      result = authenticateUser(data.username, data.password);
+      break;
+    case "get-next-id":
+      result = getNextIncrementalId(data.type, data.date);
+      break;
+    case "peek-next-id":
+      result = peekNextId(data.type, data.date);
+      break;
+    case "retry-dead-tasks":
+      result = retryDeadTasks(data.taskIds);
+      break;
+    case "rebuild-search-index":
+      result = rebuildSearchIndex(sheet);
+      break;
+    default:
+      result = { error: "Invalid action" };
+  }
+
+  return result;
+}
+
 /**
  * Authenticate user against USERS sheet
  * @param {string} username
@@ -141,7 +489,7 @@ function doPost(e) {
  */
 function authenticateUser(username, password) {
   try {
-    const ss = SpreadsheetApp.openById(SHEET_ID);
+    const ss = getSpreadsheet();
     const sheet = ss.getSheetByName("USERS");
 
     if (!sheet) {
@@ -196,9 +544,9 @@ function authenticateUser(username, password) {
   }
 }
 
-function readSheet(sheetName) {
+function readSheet(sheetName, format, encoding) {
   try {
-    const ss = SpreadsheetApp.openById(SHEET_ID);
+    const ss = getSpreadsheet();
     const sheet = ss.getSheetByName(sheetName);
 
     if (!sheet) {
@@ -212,41 +560,32 @@ function readSheet(sheetName) {
     const headerRow = config.headerRow;
     const startColumn = config.startColumn || 1; // Default to column A
 
-    const lastRow = sheet.getLastRow();
-    const lastCol = sheet.getLastColumn();
-    const numDataCols = lastCol - startColumn + 1;
+    // Header row and all data rows in a single read
+    const values = getStorageEngine(sheetName).read(ss, sheetName, [
+      { row: headerRow, column: startColumn },
+    ])[0];
 
-    if (lastRow < headerRow) {
+    if (values.length === 0) {
       return ContentService.createTextOutput(
         JSON.stringify({ success: true, headers: [], data: [] }),
       ).setMimeType(ContentService.MimeType.JSON);
     }
 
     // Get headers from the specified row and starting column
-    const headers = sheet
-      .getRange(headerRow, startColumn, 1, numDataCols)
-      .getValues()[0]
+    const headers = values[0]
       .map((h) => (typeof h === "string" ? h.replace(/\n/g, " ").trim() : h))
       .filter((h) => h !== "");
 
     // Get data starting from the row after headers
     const dataStartRow = headerRow + 1;
-    const numDataRows = lastRow - headerRow;
+    const dataValues = values.slice(1);
 
-    if (numDataRows <= 0) {
+    if (dataValues.length === 0) {
       return ContentService.createTextOutput(
         JSON.stringify({ success: true, headers: headers, data: [] }),
       ).setMimeType(ContentService.MimeType.JSON);
     }
 
-    const dataRange = sheet.getRange(
-      dataStartRow,
-      startColumn,
-      numDataRows,
-      numDataCols,
-    );
-    const dataValues = dataRange.getValues();
-
     const rows = dataValues
       .map((row, index) => {
         const obj = { _rowIndex: dataStartRow + index }; // Actual row number in sheet
@@ -265,13 +604,21 @@ function readSheet(sheetName) {
         );
       });
 
-    return ContentService.createTextOutput(
-      JSON.stringify({
+    if (format === "columnar") {
+      return createJsonOutput(
+        toColumnar(ss, headers.filter((h) => h), rows),
+        encoding,
+      );
+    }
+
+    return createJsonOutput(
+      {
         success: true,
         headers: headers.filter((h) => h),
         data: rows,
-      }),
-    ).setMimeType(ContentService.MimeType.JSON);
+      },
+      encoding,
+    );
   } catch (error) {
     return ContentService.createTextOutput(
       JSON.stringify({ error: error.toString() }),
@@ -280,12 +627,116 @@ function readSheet(sheetName) {
 }
 
 /**
- * Apply formatting to a newly inserted row
+ * JSON response, optionally gzip-compressed (encoding=gzip)
+ * Compressed responses are {encoding: "gzip", data: <base64 of gzipped JSON>};
+ * small payloads are sent as plain JSON because compression would not pay off.
+ * @param {object} payload
+ * @param {string} [encoding] - "gzip" to compress
+ */
+function createJsonOutput(payload, encoding) {
+  let content = JSON.stringify(payload);
+  if (encoding === "gzip" && content.length > GZIP_MIN_LENGTH) {
+    const compressed = Utilities.gzip(
+      Utilities.newBlob(content, "application/json"),
+    );
+    content = JSON.stringify({
+      encoding: "gzip",
+      data: Utilities.base64Encode(compressed.getBytes()),
+    });
+  }
+  return ContentService.createTextOutput(content).setMimeType(
+    ContentService.MimeType.JSON,
+  );
+}
+
+/**
+ * Encode row objects as one typed array per column (format=columnar)
+ * Types: "number" (null = empty), "date" (days since 1970-01-01 in the
+ * spreadsheet time zone, null = empty), "string", "any" (mixed, as in row format)
+ * @param {Spreadsheet} ss
+ * @param {string[]} headers
+ * @param {object[]} rows - Row objects from readSheet (with _rowIndex)
+ * @returns {object} - {success, format, headers, types, columns, rowIndex, tzOffsetMinutes}
+ */
+function toColumnar(ss, headers, rows) {
+  const tzOffsetMinutes = getTimeZoneOffsetMinutes(ss);
+  const offsetMs = tzOffsetMinutes * 60000;
+  // Duplicate headers collapse into one key in row objects, keep the same here
+  const keys = headers.filter((h, i) => headers.indexOf(h) === i);
+
+  const types = [];
+  const columns = keys.map((key) => {
+    const values = rows.map((row) => row[key]);
+    let type = null;
+    for (let i = 0; i < values.length; i++) {
+      const value = values[i];
+      if (value === "" || value === null || value === undefined) continue;
+      const valueType =
+        value instanceof Date
+          ? "date"
+          : typeof value === "number"
+            ? "number"
+            : typeof value === "string"
+              ? "string"
+              : "any";
+      if (type === null) type = valueType;
+      else if (type !== valueType) {
+        type = "any";
+        break;
+      }
+    }
+    type = type || "string";
+    types.push(type);
+
+    if (type === "number") {
+      return values.map((v) => (v === "" || v === undefined ? null : v));
+    }
+    if (type === "date") {
+      return values.map((v) =>
+        v instanceof Date ? (v.getTime() + offsetMs) / 86400000 : null,
+      );
+    }
+    return values;
+  });
+
+  return {
+    success: true,
+    format: "columnar",
+    headers: keys,
+    types: types,
+    columns: columns,
+    rowIndex: rows.map((row) => row._rowIndex),
+    tzOffsetMinutes: tzOffsetMinutes,
+  };
+}
+
+/**
+ * Current UTC offset of the spreadsheet time zone, in minutes (+0700 -> 420)
+ */
+function getTimeZoneOffsetMinutes(ss) {
+  const match = Utilities.formatDate(
+    new Date(),
+    ss.getSpreadsheetTimeZone(),
+    "Z",
+  ).match(/^([+-])(\d{2})(\d{2})$/);
+  if (!match) return 0;
+  const minutes = parseInt(match[2], 10) * 60 + parseInt(match[3], 10);
+  return match[1] === "-" ? -minutes : minutes;
+}
+
+/**
+ * Apply formatting to newly inserted row(s)
  * Background: transparent, Font: black, Size: 12, Alignment based on column type
  */
-function applyRowFormatting(sheet, rowNum, startColumn, headers) {
+function applyRowFormatting(
+  sheet,
+  rowNum,
+  startColumn,
+  headers,
+  numRows = 1,
+) {
   const numCols = headers.length;
-  const rowRange = sheet.getRange(rowNum, startColumn, 1, numCols);
+  const rowRange = sheet.getRange(rowNum, startColumn, numRows, numCols);
 
   // Reset formatting
   rowRange.setBackground(null);
@@ -299,7 +750,7 @@ function applyRowFormatting(sheet, rowNum, startColumn, headers) {
     const colIndex = headers.indexOf(colName);
     if (colIndex !== -1) {
       sheet
-        .getRange(rowNum, colIndex + startColumn)
+        .getRange(rowNum, colIndex + startColumn, numRows, 1)
         .setHorizontalAlignment("center");
     }
   });
@@ -328,7 +779,7 @@ function applyRowFormatting(sheet, rowNum, startColumn, headers) {
     const colIndex = headers.indexOf(colName);
     if (colIndex !== -1) {
       sheet
-        .getRange(rowNum, colIndex + startColumn)
+        .getRange(rowNum, colIndex + startColumn, numRows, 1)
         .setHorizontalAlignment("right");
     }
   });
@@ -353,7 +804,7 @@ function applyRowFormatting(sheet, rowNum, startColumn, headers) {
     const colIndex = headers.indexOf(colName);
     if (colIndex !== -1) {
       sheet
-        .getRange(rowNum, colIndex + startColumn)
+        .getRange(rowNum, colIndex + startColumn, numRows, 1)
         .setHorizontalAlignment("left");
     }
   });
@@ -361,7 +812,7 @@ function applyRowFormatting(sheet, rowNum, startColumn, headers) {
 
 function addRow(sheetName, rowData, uniqueColumn = null) {
   try {
-    const ss = SpreadsheetApp.openById(SHEET_ID);
+    const ss = getSpreadsheet();
     const sheet = ss.getSheetByName(sheetName);
 
     if (!sheet) {
@@ -372,16 +823,14 @@ function addRow(sheetName, rowData, uniqueColumn = null) {
     const headerRow = config.headerRow;
     const insertAtTop = config.insertAtTop || false;
     const startColumn = config.startColumn || 1; // Default to column A
+    const engine = getStorageEngine(sheetName);
 
-    const headers = sheet
-      .getRange(
-        headerRow,
-        startColumn,
-        1,
-        sheet.getLastColumn() - startColumn + 1,
-      )
-      .getValues()[0]
-      .filter((h) => h !== ""); // Remove empty headers
+    const headers = getHeaderValues(
+      ss,
+      sheetName,
+      headerRow,
+      startColumn,
+    ).filter((h) => h !== ""); // Remove empty headers
 
     // Check uniqueness if requested
     if (uniqueColumn) {
@@ -400,9 +849,14 @@ function addRow(sheetName, rowData, uniqueColumn = null) {
       const dataStartRow = headerRow + 1;
 
       if (lastRow >= dataStartRow) {
-        const columnValues = sheet
-          .getRange(dataStartRow, uniqueColIndex + 1, lastRow - headerRow, 1)
-          .getValues();
+        const columnValues = engine.read(ss, sheetName, [
+          {
+            row: dataStartRow,
+            column: uniqueColIndex + 1,
+            numRows: lastRow - headerRow,
+            numColumns: 1,
+          },
+        ])[0];
         const newValue = rowData[uniqueColumn];
 
         const exists = columnValues.some((row) => {
@@ -438,21 +892,25 @@ function addRow(sheetName, rowData, uniqueColumn = null) {
 
     if (insertAtTop) {
       // Insert at TOP: right after header row
-      sheet.insertRowAfter(headerRow);
-      const newRowRange = sheet.getRange(
-        dataStartRow,
-        startColumn,
-        1,
-        newRow.length,
-      );
-      newRowRange.setValues([newRow]);
+      engine.insertRowsAfter(ss, sheetName, headerRow, 1);
+      engine.write(ss, sheetName, [
+        { row: dataStartRow, column: startColumn, values: [newRow] },
+      ]);
 
       // Apply formatting using helper function
       applyRowFormatting(sheet, dataStartRow, startColumn, headers);
+      syncSearchIndex(
+        ss,
+        sheetName,
+        [searchInvoiceOf(sheetName, rowData)],
+        [dataStartRow],
+      );
+      bumpSheetVersion(sheetName);
 
       return {
         success: true,
         message: "Row inserted at top (row " + dataStartRow + ")",
+        rowIndex: dataStartRow,
       };
     } else {
       // Original behavior: append at bottom
@@ -460,26 +918,34 @@ function addRow(sheetName, rowData, uniqueColumn = null) {
 
       // If there's no data yet, insert after header
       if (lastRow < dataStartRow) {
-        sheet.insertRowAfter(headerRow);
-        const newRowRange = sheet.getRange(
-          dataStartRow,
-          startColumn,
-          1,
-          newRow.length,
-        );
-        newRowRange.setValues([newRow]);
+        engine.insertRowsAfter(ss, sheetName, headerRow, 1);
+        engine.write(ss, sheetName, [
+          { row: dataStartRow, column: startColumn, values: [newRow] },
+        ]);
         applyRowFormatting(sheet, dataStartRow, startColumn, headers);
-        return { success: true, message: "Row added at row " + dataStartRow };
+        syncSearchIndex(
+          ss,
+          sheetName,
+          [searchInvoiceOf(sheetName, rowData)],
+          [dataStartRow],
+        );
+        bumpSheetVersion(sheetName);
+        return {
+          success: true,
+          message: "Row added at row " + dataStartRow,
+          rowIndex: dataStartRow,
+        };
       }
 
       // Find last row with data by checking first column
-      const dataRange = sheet.getRange(
-        dataStartRow,
-        startColumn,
-        lastRow - headerRow,
-        1,
-      );
-      const dataValues = dataRange.getValues();
+      const dataValues = engine.read(ss, sheetName, [
+        {
+          row: dataStartRow,
+          column: startColumn,
+          numRows: lastRow - headerRow,
+          numColumns: 1,
+        },
+      ])[0];
 
       let lastDataRow = headerRow;
       for (let i = 0; i < dataValues.length; i++) {
@@ -489,24 +955,28 @@ function addRow(sheetName, rowData, uniqueColumn = null) {
       }
 
       // Insert a NEW row after the last data row
-      sheet.insertRowAfter(lastDataRow);
+      engine.insertRowsAfter(ss, sheetName, lastDataRow, 1);
       const insertRow = lastDataRow + 1;
 
       // Now set the values in the newly inserted row
-      const newRowRange = sheet.getRange(
-        insertRow,
-        startColumn,
-        1,
-        newRow.length,
-      );
-      newRowRange.setValues([newRow]);
+      engine.write(ss, sheetName, [
+        { row: insertRow, column: startColumn, values: [newRow] },
+      ]);
 
       // Apply formatting
       applyRowFormatting(sheet, insertRow, startColumn, headers);
+      syncSearchIndex(
+        ss,
+        sheetName,
+        [searchInvoiceOf(sheetName, rowData)],
+        [insertRow],
+      );
+      bumpSheetVersion(sheetName);
 
       return {
         success: true,
         message: "Row added successfully at row " + insertRow,
+        rowIndex: insertRow,
       };
     }
   } catch (error) {
@@ -516,7 +986,7 @@ function addRow(sheetName, rowData, uniqueColumn = null) {
 
 function updateRow(sheetName, rowIndex, rowData) {
   try {
-    const ss = SpreadsheetApp.openById(SHEET_ID);
+    const ss = getSpreadsheet();
     const sheet = ss.getSheetByName(sheetName);
 
     if (!sheet) {
@@ -525,19 +995,33 @@ function updateRow(sheetName, rowIndex, rowData) {
 
     const config = SHEET_CONFIG[sheetName] || { headerRow: 1 };
     const headerRow = config.headerRow;
+    const engine = getStorageEngine(sheetName);
+    const headers = getHeaderValues(ss, sheetName, headerRow);
 
-    const headers = sheet
-      .getRange(headerRow, 1, 1, sheet.getLastColumn())
-      .getValues()[0];
+    const ownerBefore = findOwningInvoice(ss, sheetName, rowIndex);
 
     // Only update the specific cells that are provided in rowData
     // This preserves formulas in other cells
+    const updates = [];
     Object.keys(rowData).forEach(function (key) {
       const colIndex = headers.indexOf(key);
       if (colIndex !== -1) {
-        sheet.getRange(rowIndex, colIndex + 1).setValue(rowData[key]);
+        updates.push({
+          row: rowIndex,
+          column: colIndex + 1,
+          values: [[rowData[key]]],
+        });
       }
     });
+    engine.write(ss, sheetName, updates);
+
+    syncSearchIndex(
+      ss,
+      sheetName,
+      [ownerBefore, findOwningInvoice(ss, sheetName, rowIndex)],
+      [rowIndex],
+    );
+    bumpSheetVersion(sheetName);
 
     return { success: true, message: "Row updated successfully" };
   } catch (error) {
@@ -547,14 +1031,18 @@ function updateRow(sheetName, rowIndex, rowData) {
 
 function deleteRow(sheetName, rowIndex) {
   try {
-    const ss = SpreadsheetApp.openById(SHEET_ID);
+    const ss = getSpreadsheet();
     const sheet = ss.getSheetByName(sheetName);
 
     if (!sheet) {
       return { error: "Sheet not found: " + sheetName };
     }
 
-    sheet.deleteRow(rowIndex);
+    const owner = findOwningInvoice(ss, sheetName, rowIndex);
+    getStorageEngine(sheetName).deleteRows(ss, sheetName, [rowIndex]);
+    // The rows next to the deleted one, if the group is still there
+    syncSearchIndex(ss, sheetName, [owner], [rowIndex - 1, rowIndex]);
+    bumpSheetVersion(sheetName);
 
     return { success: true, message: "Row deleted successfully" };
   } catch (error) {
@@ -564,98 +1052,109 @@ function deleteRow(sheetName, rowIndex) {
 
 function deleteInvoice(sheetName, noPesanan) {
   try {
-    const ss = SpreadsheetApp.openById(SHEET_ID);
+    const ss = getSpreadsheet();
     const sheet = ss.getSheetByName(sheetName);
 
     if (!sheet) {
       return { error: "Sheet not found: " + sheetName };
     }
 
-    const config = SHEET_CONFIG[sheetName] || { headerRow: 1 };
-    const headerRow = config.headerRow;
-
-    // Find invoice/order number column - different sheets use different column names
-    const headers = sheet
-      .getRange(headerRow, 1, 1, sheet.getLastColumn())
-      .getValues()[0];
+    const found = findInvoiceRows(ss, sheetName, noPesanan);
+    if (found.error) return found;
+    const rowsToDelete = found.rows;
+    getStorageEngine(sheetName).deleteRows(ss, sheetName, rowsToDelete);
+    syncSearchIndex(ss, sheetName, [String(noPesanan).trim()]);
+    if (rowsToDelete.length > 0) bumpSheetVersion(sheetName);
 
-    // Try multiple possible column names for invoice/order number
-    const possibleColumnNames = ["INVOICE", "NO'PESANAN", "NO PESANAN"];
-    let noPesananCol = -1;
-    let foundColumnName = "";
+    return {
+      success: true,
+      message: `Deleted ${rowsToDelete.length} rows for invoice ${noPesanan}`,
+    };
+  } catch (error) {
+    return { error: error.toString() };
+  }
+}
 
-    for (const colName of possibleColumnNames) {
-      const colIndex = headers.indexOf(colName);
-      if (colIndex !== -1) {
-        noPesananCol = colIndex;
-        foundColumnName = colName;
-        break;
-      }
-    }
+/**
+ * Find the rows of an invoice group (the numbered row plus the item rows below it)
+ * @param {Spreadsheet} ss
+ * @param {string} sheetName
+ * @param {string} noPesanan - The invoice number
+ * @returns {object} - {rows: number[]} (ascending) or {error: string}
+ */
+function findInvoiceRows(ss, sheetName, noPesanan) {
+  const sheet = ss.getSheetByName(sheetName);
+  const config = SHEET_CONFIG[sheetName] || { headerRow: 1 };
+  const headerRow = config.headerRow;
+
+  // Find invoice/order number column - different sheets use different column names
+  const headers = getHeaderValues(ss, sheetName, headerRow);
+
+  // Try multiple possible column names for invoice/order number
+  const possibleColumnNames = [
+    "INVOICE",
+    "NO INVOICE",
+    "NO'PESANAN",
+    "NO PESANAN",
+  ];
+  let noPesananCol = -1;
+  let foundColumnName = "";
 
-    if (noPesananCol === -1) {
-      return {
-        error:
-          "Column for order number not found. Tried: " +
-          possibleColumnNames.join(", "),
-      };
+  for (const colName of possibleColumnNames) {
+    const colIndex = headers.indexOf(colName);
+    if (colIndex !== -1) {
+      noPesananCol = colIndex;
+      foundColumnName = colName;
+      break;
     }
+  }
 
-    const lastRow = sheet.getLastRow();
-    const dataStartRow = headerRow + 1;
-
-    if (lastRow < dataStartRow) {
-      return { success: true, message: "No data to delete" };
-    }
+  if (noPesananCol === -1) {
+    return {
+      error:
+        "Column for order number not found. Tried: " +
+        possibleColumnNames.join(", "),
+    };
+  }
 
-    // Get all data
-    const dataRange = sheet.getRange(
-      dataStartRow,
-      1,
-      lastRow - headerRow,
-      sheet.getLastColumn(),
-    );
-    const dataValues = dataRange.getValues();
+  const lastRow = sheet.getLastRow();
+  const dataStartRow = headerRow + 1;
 
-    // Find rows belonging to this invoice
-    // Logic: Find the row with matching NO PESANAN, then include all subsequent rows
-    // that have EMPTY NO PESANAN (until we hit a row with a different NO PESANAN)
-    const rowsToDelete = [];
-    let isInTargetInvoice = false;
+  if (lastRow < dataStartRow) {
+    return { rows: [] };
+  }
 
-    for (let i = 0; i < dataValues.length; i++) {
-      const rowNoPesanan = String(dataValues[i][noPesananCol]).trim();
-
-      if (rowNoPesanan === String(noPesanan).trim()) {
-        // Found the start of target invoice
-        isInTargetInvoice = true;
-        rowsToDelete.push(dataStartRow + i);
-      } else if (isInTargetInvoice) {
-        // We're in the target invoice - check if this row belongs to it
-        if (rowNoPesanan === "" || rowNoPesanan === "undefined") {
-          // Empty NO PESANAN means it's a continuation of the previous invoice
-          rowsToDelete.push(dataStartRow + i);
-        } else {
-          // New invoice started, stop collecting
-          isInTargetInvoice = false;
-        }
+  // Get all data
+  const dataValues = getStorageEngine(sheetName).read(ss, sheetName, [
+    { row: dataStartRow, column: 1, numRows: lastRow - headerRow },
+  ])[0];
+
+  // Find rows belonging to this invoice
+  // Logic: Find the row with matching NO PESANAN, then include all subsequent rows
+  // that have EMPTY NO PESANAN (until we hit a row with a different NO PESANAN)
+  const invoiceRows = [];
+  let isInTargetInvoice = false;
+
+  for (let i = 0; i < dataValues.length; i++) {
+    const rowNoPesanan = String(dataValues[i][noPesananCol]).trim();
+
+    if (rowNoPesanan === String(noPesanan).trim()) {
+      // Found the start of target invoice
+      isInTargetInvoice = true;
+      invoiceRows.push(dataStartRow + i);
+    } else if (isInTargetInvoice) {
+      // We're in the target invoice - check if this row belongs to it
+      if (rowNoPesanan === "" || rowNoPesanan === "undefined") {
+        // Empty NO PESANAN means it's a continuation of the previous invoice
+        invoiceRows.push(dataStartRow + i);
+      } else {
+        // New invoice started, stop collecting
+        isInTargetInvoice = false;
       }
     }
-
-    // Delete rows from bottom to top to avoid index shifting issues
-    rowsToDelete.sort((a, b) => b - a);
-
-    for (const rowIndex of rowsToDelete) {
-      sheet.deleteRow(rowIndex);
-    }
-
-    return {
-      success: true,
-      message: `Deleted ${rowsToDelete.length} rows for invoice ${noPesanan}`,
-    };
-  } catch (error) {
-    return { error: error.toString() };
   }
+
+  return { rows: invoiceRows };
 }
 
 /**
@@ -663,11 +1162,11 @@ function deleteInvoice(sheetName, noPesanan) {
  * @param {string} invoiceNo
  */
 function deleteRestockWithStockCorrection(invoiceNo) {
-  const lock = LockService.getScriptLock();
+  const lock = getScriptLock();
   try {
     lock.waitLock(10000); // Wait up to 10 seconds
 
-    const ss = SpreadsheetApp.openById(SHEET_ID);
+    const ss = getSpreadsheet();
     const sheet = ss.getSheetByName("RESTOCK");
     if (!sheet) return { error: "Sheet RESTOCK not found" };
 
@@ -733,9 +1232,9 @@ function deleteRestockWithStockCorrection(invoiceNo) {
       return { error: "Failed to update stock: " + stockUpdateResult.error };
     }
 
-    // 3. Delete Rows (bottom to top)
-    rowsToDelete.sort((a, b) => b - a);
-    rowsToDelete.forEach((row) => sheet.deleteRow(row));
+    // 3. Delete Rows
+    getStorageEngine("RESTOCK").deleteRows(ss, "RESTOCK", rowsToDelete);
+    bumpSheetVersion("RESTOCK");
 
     return {
       success: true,
@@ -751,13 +1250,14 @@ function deleteRestockWithStockCorrection(invoiceNo) {
 /**
  * Increment customer transaction count by phone number
  * @param {string} phoneNumber - Customer phone number
+ * @param {number} [delta=1] - Amount to add (-1 undoes an increment)
  * @returns {object} - {success: boolean, message: string} or {error: string}
  */
-function incrementCustomerTransaction(phoneNumber) {
+function incrementCustomerTransaction(phoneNumber, delta = 1) {
   try {
     const sheetName = "KOSTUMER";
     const config = SHEET_CONFIG[sheetName];
-    const spreadsheet = SpreadsheetApp.openById(SHEET_ID);
+    const spreadsheet = getSpreadsheet();
     const sheet = spreadsheet.getSheetByName(sheetName);
 
     if (!sheet) {
@@ -765,9 +1265,8 @@ function incrementCustomerTransaction(phoneNumber) {
     }
 
     const headerRow = config.headerRow;
-    const headers = sheet
-      .getRange(headerRow, 1, 1, sheet.getLastColumn())
-      .getValues()[0];
+    const engine = getStorageEngine(sheetName);
+    const headers = getHeaderValues(spreadsheet, sheetName, headerRow);
 
     // Find NO HP column (case-insensitive)
     const phoneColIndex = headers.findIndex(
@@ -799,9 +1298,23 @@ function incrementCustomerTransaction(phoneNumber) {
       return { error: "No customer data found" };
     }
 
-    const phoneData = sheet
-      .getRange(dataStartRow, phoneColIndex + 1, lastRow - headerRow, 1)
-      .getValues();
+    // Phone and transaction columns in a single read
+    const columnData = engine.read(spreadsheet, sheetName, [
+      {
+        row: dataStartRow,
+        column: phoneColIndex + 1,
+        numRows: lastRow - headerRow,
+        numColumns: 1,
+      },
+      {
+        row: dataStartRow,
+        column: txColIndex + 1,
+        numRows: lastRow - headerRow,
+        numColumns: 1,
+      },
+    ]);
+    const phoneData = columnData[0];
+    const txData = columnData[1];
     const normalizedInput = String(phoneNumber).trim().toLowerCase();
 
     let customerRowIndex = -1;
@@ -818,14 +1331,15 @@ function incrementCustomerTransaction(phoneNumber) {
     }
 
     // Get current transaction count and increment
-    const currentValue = sheet
-      .getRange(customerRowIndex, txColIndex + 1)
-      .getValue();
+    const currentValue = txData[customerRowIndex - dataStartRow][0];
     const currentCount = parseInt(currentValue) || 0;
-    const newCount = currentCount + 1;
+    const newCount = currentCount + delta;
 
     // Update the cell
-    sheet.getRange(customerRowIndex, txColIndex + 1).setValue(newCount);
+    engine.write(spreadsheet, sheetName, [
+      { row: customerRowIndex, column: txColIndex + 1, values: [[newCount]] },
+    ]);
+    bumpSheetVersion(sheetName);
 
     return {
       success: true,
@@ -845,12 +1359,12 @@ function incrementCustomerTransaction(phoneNumber) {
  * @returns {object} - {success: true, id: "LR/INV/01/300126", count: 1}
  */
 function getNextIncrementalId(type, dateStr) {
-  const lock = LockService.getScriptLock();
+  const lock = getScriptLock();
   try {
     // Wait for up to 30 seconds for the lock
     lock.waitLock(30000);
 
-    const ss = SpreadsheetApp.openById(SHEET_ID);
+    const ss = getSpreadsheet();
     let sheet = ss.getSheetByName("COUNTERS");
 
     // Create COUNTERS sheet if it doesn't exist
@@ -886,6 +1400,7 @@ function getNextIncrementalId(type, dateStr) {
     } else {
       sheet.appendRow([dateStr, type, count]);
     }
+    bumpSheetVersion("COUNTERS");
 
     // Format ID: LR / TYPE / PADDED_COUNT / DDMMYY
     const dateParts = dateStr.split("-"); // YYYY, MM, DD
@@ -905,6 +1420,7 @@ function getNextIncrementalId(type, dateStr) {
       success: true,
       id: formattedId,
       count: count,
+      counterRow: rowIndex !== -1 ? rowIndex : sheet.getLastRow(),
     };
   } catch (error) {
     return { error: error.toString() };
@@ -921,7 +1437,7 @@ function getNextIncrementalId(type, dateStr) {
  */
 function peekNextId(type, dateStr) {
   try {
-    const ss = SpreadsheetApp.openById(SHEET_ID);
+    const ss = getSpreadsheet();
     let sheet = ss.getSheetByName("COUNTERS");
 
     // Default to 1 if sheet doesn't exist
@@ -1003,13 +1519,25 @@ function incrementProductRestock(items) {
   return updateProductCounter(items, "RESTOCK");
 }
 
+/**
+ * Set 'STOK LAPANG' (physical stock count) for many products at once
+ * Used by the bulk stock opname import; values replace the current count
+ * @param {Array} items - Array of {sku, jumlah} objects
+ * @returns {object} - Success (with notFound SKUs) or error message
+ */
+function setProductStokLapang(items) {
+  return updateProductCounter(items, "STOK LAPANG", "set");
+}
+
 /**
  * Generic function to update product counters
  * @param {Array} items - Array of {sku, jumlah} objects
  * @param {string} columnName - 'TERJUAL', 'RESTOCK', etc.
+ * @param {string} [mode="add"] - 'add' increments the column, 'set' replaces it
  */
-function updateProductCounter(items, columnName) {
-  const lock = LockService.getScriptLock();
+function updateProductCounter(items, columnName, mode) {
+  const setMode = mode === "set";
+  const lock = getScriptLock();
   try {
     lock.waitLock(30000);
 
@@ -1019,16 +1547,15 @@ function updateProductCounter(items, columnName) {
 
     const sheetName = "PERSEDIAAN BARANG";
     const config = SHEET_CONFIG[sheetName];
-    const ss = SpreadsheetApp.openById(SHEET_ID);
+    const ss = getSpreadsheet();
     const sheet = ss.getSheetByName(sheetName);
 
     if (!sheet) return { error: "Sheet " + sheetName + " not found" };
 
     const headerRow = config.headerRow;
     const lastRow = sheet.getLastRow();
-    const headers = sheet
-      .getRange(headerRow, 1, 1, sheet.getLastColumn())
-      .getValues()[0];
+    const engine = getStorageEngine(sheetName);
+    const headers = getHeaderValues(ss, sheetName, headerRow);
 
     const skuColIndex = headers.findIndex(function (h) {
       return h && String(h).toUpperCase().trim() === "SKU";
@@ -1044,37 +1571,2355 @@ function updateProductCounter(items, columnName) {
     if (lastRow <= headerRow)
       return { success: true, message: "No products to update" };
 
-    const skuData = sheet
-      .getRange(headerRow + 1, skuColIndex + 1, lastRow - headerRow, 1)
-      .getValues();
+    // SKU and target columns in a single read
+    const numRows = lastRow - headerRow;
+    const columnData = engine.read(ss, sheetName, [
+      { row: headerRow + 1, column: skuColIndex + 1, numRows, numColumns: 1 },
+      {
+        row: headerRow + 1,
+        column: targetColIndex + 1,
+        numRows,
+        numColumns: 1,
+      },
+    ]);
+    const skuData = columnData[0];
+    const targetData = columnData[1];
     const skuRowMap = new Map();
     skuData.forEach(function (row, i) {
       const sku = String(row[0]).trim().toUpperCase();
       if (sku) skuRowMap.set(sku, headerRow + 1 + i);
     });
 
+    // Accumulate per row so repeated SKUs in one request add up correctly
+    const newValues = new Map();
+    const notFound = [];
     let updatedCount = 0;
     items.forEach(function (item) {
       const sku = String(item.sku).trim().toUpperCase();
-      const qty = parseFloat(item.jumlah) || 0;
+      const qty = parseFloat(item.jumlah);
+
+      if (!skuRowMap.has(sku)) {
+        if (setMode) notFound.push(item.sku);
+        return;
+      }
 
-      if (skuRowMap.has(sku) && qty !== 0) {
-        const rowIndex = skuRowMap.get(sku);
-        const cell = sheet.getRange(rowIndex, targetColIndex + 1);
-        const currentValue = parseFloat(cell.getValue()) || 0;
-        cell.setValue(currentValue + qty);
+      const rowIndex = skuRowMap.get(sku);
+      if (setMode) {
+        if (isNaN(qty) || qty < 0) return;
+        newValues.set(rowIndex, qty);
+        updatedCount++;
+      } else if (qty) {
+        const currentValue = newValues.has(rowIndex)
+          ? newValues.get(rowIndex)
+          : parseFloat(targetData[rowIndex - headerRow - 1][0]) || 0;
+        newValues.set(rowIndex, currentValue + qty);
         updatedCount++;
       }
     });
 
-    return {
+    engine.write(
+      ss,
+      sheetName,
+      Array.from(newValues.entries()).map(([rowIndex, value]) => ({
+        row: rowIndex,
+        column: targetColIndex + 1,
+        values: [[value]],
+      })),
+    );
+    if (updatedCount > 0) bumpSheetVersion(sheetName);
+
+    const result = {
       success: true,
       message: "Updated " + columnName + " for " + updatedCount + " products",
       updated: updatedCount,
     };
+    if (setMode) result.notFound = notFound;
+    return result;
   } catch (e) {
     return { error: "Error updating " + columnName + ": " + e.toString() };
   } finally {
     lock.releaseLock();
   }
 }
+
+/**
+ * Insert or update many products keyed by SKU (e.g. a supplier price list)
+ * Existing SKUs get one batched write of their changed cells, new SKUs are
+ * inserted as one block after the last product. Formula columns are never
+ * written; new rows get the formulas of the first product row.
+ * @param {Array<object>} products - Objects with column headers as keys, SKU required
+ * @returns {object} - {success, inserted, updated, unchanged, failed, results,
+ *   headers, rows, version}; rows are the inserted and updated rows as stored,
+ *   with the values computed by the formula columns
+ *   results[i] = {sku, status: 'updated'|'unchanged'|'inserted'|'error', rowIndex?, changed?, error?}
+ */
+function upsertProducts(products) {
+  const lock = getScriptLock();
+  try {
+    lock.waitLock(30000);
+
+    if (!products || !Array.isArray(products) || products.length === 0) {
+      return { error: "No products provided" };
+    }
+
+    const sheetName = "PERSEDIAAN BARANG";
+    const config = SHEET_CONFIG[sheetName];
+    const ss = getSpreadsheet();
+    const sheet = ss.getSheetByName(sheetName);
+
+    if (!sheet) return { error: "Sheet " + sheetName + " not found" };
+
+    const headerRow = config.headerRow;
+    const startColumn = config.startColumn || 1;
+    const engine = getStorageEngine(sheetName);
+
+    // Header row and all product rows in a single read
+    const values = engine.read(ss, sheetName, [
+      { row: headerRow, column: startColumn },
+    ])[0];
+    const rawHeaders = (values[0] || []).filter((h) => h !== "");
+    const headers = rawHeaders.map((h) =>
+      String(h).replace(/\n/g, " ").trim().toUpperCase(),
+    );
+    const rows = values.slice(1);
+
+    const skuColIndex = headers.indexOf("SKU");
+    if (skuColIndex === -1) return { error: "Column 'SKU' not found" };
+
+    // Columns computed by formulas (STOK AKHIR, SELISIH, ...) must not be overwritten
+    const formulaColumns = new Set();
+    if (rows.length > 0) {
+      sheet
+        .getRange(headerRow + 1, startColumn, 1, headers.length)
+        .getFormulas()[0]
+        .forEach((formula, i) => {
+          if (formula) formulaColumns.add(i);
+        });
+    }
+
+    const skuRowMap = new Map();
+    let lastDataRow = headerRow;
+    rows.forEach((row, i) => {
+      const sku = String(row[skuColIndex]).trim().toUpperCase();
+      if (sku) {
+        skuRowMap.set(sku, i);
+        lastDataRow = headerRow + 1 + i;
+      }
+    });
+
+    const results = [];
+    const seen = new Set();
+    const changedCells = new Map(); // colIndex -> Map(rowOffset -> value)
+    const newRows = [];
+    const ignoredColumns = new Set();
+
+    products.forEach(function (product) {
+      const fields = {};
+      Object.keys(product || {}).forEach(function (key) {
+        const colIndex = headers.indexOf(
+          String(key).replace(/\n/g, " ").trim().toUpperCase(),
+        );
+        if (colIndex === -1 || formulaColumns.has(colIndex)) {
+          if (key !== "_rowIndex") ignoredColumns.add(key);
+          return;
+        }
+        fields[colIndex] = product[key];
+      });
+
+      const sku = String(fields[skuColIndex] || "").trim();
+      const skuKey = sku.toUpperCase();
+      if (!sku) {
+        results.push({ sku: "", status: "error", error: "SKU is required" });
+        return;
+      }
+      if (seen.has(skuKey)) {
+        results.push({
+          sku,
+          status: "error",
+          error: "Duplicate SKU in request",
+        });
+        return;
+      }
+      seen.add(skuKey);
+
+      if (!skuRowMap.has(skuKey)) {
+        newRows.push(
+          headers.map((h, i) => (formulaColumns.has(i) ? "" : fields[i] || "")),
+        );
+        results.push({ sku, status: "inserted" });
+        return;
+      }
+
+      const rowOffset = skuRowMap.get(skuKey);
+      const changed = [];
+      Object.keys(fields).forEach(function (colKey) {
+        const colIndex = Number(colKey);
+        if (colIndex === skuColIndex) return;
+        const value = fields[colIndex];
+        if (String(rows[rowOffset][colIndex]) === String(value)) return;
+        if (!changedCells.has(colIndex)) changedCells.set(colIndex, new Map());
+        changedCells.get(colIndex).set(rowOffset, value);
+        changed.push(rawHeaders[colIndex]);
+      });
+      results.push({
+        sku,
+        status: changed.length > 0 ? "updated" : "unchanged",
+        rowIndex: headerRow + 1 + rowOffset,
+        changed,
+      });
+    });
+
+    // One write per run of consecutive changed rows in each column
+    const updates = [];
+    changedCells.forEach(function (cells, colIndex) {
+      const offsets = Array.from(cells.keys()).sort((a, b) => a - b);
+      let run = null;
+      offsets.forEach(function (offset) {
+        if (run && offset === run.last + 1) {
+          run.values.push([cells.get(offset)]);
+          run.last = offset;
+        } else {
+          run = {
+            row: headerRow + 1 + offset,
+            column: startColumn + colIndex,
+            values: [[cells.get(offset)]],
+            last: offset,
+          };
+          updates.push(run);
+        }
+      });
+    });
+    engine.write(
+      ss,
+      sheetName,
+      updates.map((u) => ({ row: u.row, column: u.column, values: u.values })),
+    );
+
+    // New SKUs as one block after the last product: the value columns are
+    // written, the formula columns are copied down from the first product row
+    if (newRows.length > 0) {
+      const insertRow = lastDataRow + 1;
+      engine.insertRowsAfter(ss, sheetName, lastDataRow, newRows.length);
+      const blocks = [];
+      headers.forEach((h, i) => {
+        if (formulaColumns.has(i)) return;
+        const block = blocks[blocks.length - 1];
+        if (block && block.last === i - 1) block.last = i;
+        else blocks.push({ first: i, last: i });
+      });
+      engine.write(
+        ss,
+        sheetName,
+        blocks.map((block) => ({
+          row: insertRow,
+          column: startColumn + block.first,
+          values: newRows.map((row) => row.slice(block.first, block.last + 1)),
+        })),
+      );
+      formulaColumns.forEach((colIndex) => {
+        sheet
+          .getRange(headerRow + 1, startColumn + colIndex)
+          .copyTo(
+            sheet.getRange(insertRow, startColumn + colIndex, newRows.length),
+            SpreadsheetApp.CopyPasteType.PASTE_FORMULA,
+            false,
+          );
+      });
+      applyRowFormatting(
+        sheet,
+        insertRow,
+        startColumn,
+        rawHeaders,
+        newRows.length,
+      );
+      let next = insertRow;
+      results.forEach(function (result) {
+        if (result.status === "inserted") result.rowIndex = next++;
+      });
+    }
+
+    // Read the written rows back in one range, with their computed columns
+    const readHeaders = rawHeaders.map((h) =>
+      String(h).replace(/\n/g, " ").trim(),
+    );
+    const touched = results
+      .filter((r) => r.status === "inserted" || r.status === "updated")
+      .map((r) => r.rowIndex);
+    let writtenRows = [];
+    if (touched.length > 0) {
+      const first = Math.min.apply(null, touched);
+      const last = Math.max.apply(null, touched);
+      const wanted = new Set(touched);
+      writtenRows = rowsToObjects(
+        readHeaders,
+        engine.read(ss, sheetName, [
+          {
+            row: first,
+            column: startColumn,
+            numRows: last - first + 1,
+            numColumns: rawHeaders.length,
+          },
+        ])[0],
+        first,
+      ).filter((row) => wanted.has(row._rowIndex));
+    }
+
+    const count = (status) => results.filter((r) => r.status === status).length;
+    const summary = {
+      success: true,
+      inserted: count("inserted"),
+      updated: count("updated"),
+      unchanged: count("unchanged"),
+      failed: count("error"),
+      ignoredColumns: Array.from(ignoredColumns),
+      results,
+      headers: readHeaders,
+      rows: writtenRows,
+    };
+    if (summary.inserted > 0 || summary.updated > 0) {
+      summary.version = bumpSheetVersion(sheetName);
+    }
+    return summary;
+  } catch (e) {
+    return { error: "Error upserting products: " + e.toString() };
+  } finally {
+    lock.releaseLock();
+  }
+}
+
+// ==================== QUOTATION CHECKOUT ====================
+
+/**
+ * Convert a quotation into an INCOME invoice on the server
+ * The quotation rows are read, mapped to INCOME rows with a newly allocated invoice
+ * number and the payment fields, and the quotation is deleted - all as one batch
+ * under the script lock, so either the invoice exists or the quotation does.
+ * For a paid (LUNAS) invoice the customer/product counters are queued like kasir does.
+ *
+ * @param {string} noPesanan - Quotation number (NO PESANAN)
+ * @param {object} payment - {status: "LUNAS"|"DP", paid, payment, kasir, roPo, city,
+ *   date: "yyyy-MM-dd" (default today)}
+ * @returns {object} - {success, id, status, totalTagihan, totalPaid, remaining, results}
+ */
+function convertQuotation(noPesanan, payment) {
+  payment = payment || {};
+  const lock = getScriptLock();
+  try {
+    lock.waitLock(30000);
+    const ss = getSpreadsheet();
+    const sheetName = "QUOTATION";
+
+    const found = findInvoiceRows(ss, sheetName, noPesanan);
+    if (found.error) return found;
+    if (found.rows.length === 0) {
+      return { error: "Quotation not found: " + noPesanan };
+    }
+
+    const sheet = ss.getSheetByName(sheetName);
+    const config = SHEET_CONFIG[sheetName];
+    const headers = getNormalizedHeaders(sheet, config);
+    const firstRow = Math.min.apply(null, found.rows);
+    const lastRow = Math.max.apply(null, found.rows);
+    const quotationRows = rowsToObjects(
+      headers,
+      sheet
+        .getRange(
+          firstRow,
+          config.startColumn || 1,
+          lastRow - firstRow + 1,
+          headers.length,
+        )
+        .getValues(),
+      firstRow,
+    ).filter((row) => row.SKU || row.PRODUK);
+    if (quotationRows.length === 0) {
+      return { error: "Quotation has no items: " + noPesanan };
+    }
+
+    const main = quotationRows[0];
+    const timeZone = ss.getSpreadsheetTimeZone();
+    const date = payment.date ? new Date(payment.date) : new Date();
+    const isoDate = Utilities.formatDate(date, timeZone, "yyyy-MM-dd");
+
+    // Same payment rules as the kasir page
+    const totalTagihan = parseFloat(main["TOTAL TAGIHAN"]) || 0;
+    let status = payment.status === "DP" ? "DP" : "LUNAS";
+    let totalPaid =
+      status === "LUNAS" ? totalTagihan : parseFloat(payment.paid) || 0;
+    if (totalPaid >= totalTagihan) {
+      status = "LUNAS";
+      totalPaid = totalTagihan;
+    }
+    const remaining = totalTagihan - totalPaid;
+
+    const invoiceRows = quotationRows.map((row, index) => {
+      const item = {
+        CATEGORY: row.KATEGORI || "",
+        "ITEM PRODUCT": row.SKU
+          ? "[" + row.SKU + "] " + row.PRODUK
+          : row.PRODUK,
+        QTY: row.JUMLAH,
+        // Older quotations keep prices in the U HARGA / U TOTAL columns
+        "PRICE/ITEM": parseFloat(row.HARGA || row["U HARGA"]) || 0,
+        "ITEM*QTY": parseFloat(row.TOTAL || row["U TOTAL"]) || 0,
+      };
+      if (index > 0) return item;
+      return Object.assign(
+        {
+          DATE: Utilities.formatDate(date, timeZone, "dd-MMM-yyyy"),
+          CASHIER: payment.kasir || main.KASIR || "",
+          TRANSACTION: main.TRANSAKSI || "",
+          PAYMENT: payment.payment || main.PAYMENT || "",
+          "RO/PO": payment.roPo || "",
+          "DP/FP": status === "LUNAS" ? "FP" : "DP",
+          "NO INVOICE": { $ref: "0.id" },
+          NAME: main.PELANGGAN || main["NAMA PELANGGAN"] || "",
+          HP: main["NO HP"] || "",
+          CITY: payment.city || main.KOTA || "",
+          "SUBTOTAL ITEM": parseFloat(main["SUB TOTAL"] || main.SUBTOTAL) || 0,
+          PACKING: parseFloat(main.PACKING) || 0,
+          DELIVERY: parseFloat(main.ONGKIR || main["U ONGIR"]) || 0,
+          DISCOUNT: parseFloat(main.DISKON) || 0,
+          "GRAND TOTAL": totalTagihan,
+          "TOTAL DP/FP": totalPaid,
+          "REMAINING BALANCE": remaining,
+          STATUS: "Belum Dikirim",
+        },
+        item,
+      );
+    });
+
+    const operations = [{ action: "get-next-id", type: "INV", date: isoDate }];
+    // INCOME inserts at the top, so add the last item first
+    invoiceRows
+      .slice()
+      .reverse()
+      .forEach((row) => {
+        operations.push({ action: "add", sheet: "INCOME", data: row });
+      });
+    operations.push({
+      action: "delete-invoice",
+      sheet: sheetName,
+      data: { noPesanan: noPesanan },
+    });
+    if (status === "LUNAS") {
+      if (main["NO HP"]) {
+        operations.push({
+          action: "increment-transaction",
+          phoneNumber: main["NO HP"],
+          defer: true,
+          optional: true,
+        });
+      }
+      operations.push({
+        action: "increment-product-sold",
+        items: quotationRows
+          .filter((row) => row.SKU)
+          .map((row) => ({
+            sku: row.SKU,
+            jumlah: parseFloat(row.JUMLAH) || 0,
+          })),
+        defer: true,
+        optional: true,
+      });
+    }
+
+    const result = runBatch(operations);
+    if (result.error) return result;
+
+    return {
+      success: true,
+      message:
+        "Quotation " + noPesanan + " converted to " + result.results[0].id,
+      id: result.results[0].id,
+      date: isoDate,
+      status: status,
+      totalTagihan: totalTagihan,
+      totalPaid: totalPaid,
+      remaining: remaining,
+      results: result.results,
+    };
+  } catch (error) {
+    return { error: error.toString() };
+  } finally {
+    lock.releaseLock();
+  }
+}
+
+// ==================== BATCH ====================
+
+/**
+ * Run several POST actions in one request with a single lock and spreadsheet handle.
+ * All-or-nothing: when a required operation fails, the operations that already ran
+ * are compensated in reverse order.
+ *
+ * Request: {action: "batch", operations: [{action, sheet, data, ...}, ...]}
+ * - Each operation is the body of a normal single-action request.
+ * - A value {$ref: "<index>.<path>"} is replaced by that field of an earlier result,
+ *   e.g. {$ref: "0.id"} for the invoice number allocated by a get-next-id at index 0.
+ *   Other values, strings included, are passed on unchanged.
+ * - `optional: true` lets the batch continue when that operation fails.
+ * - `defer: true` does not run the operation now but adds it to TASK_QUEUE (in this
+ *   request, once the other operations succeeded); its result is {queued, taskId}.
+ *   Failing to queue an optional deferred operation does not fail the batch.
+ *
+ * @param {Array<object>} operations
+ * @returns {object} - {success: true, results} or
+ *   {error, failedIndex, results, rolledBack, rollbackErrors}
+ */
+function runBatch(operations) {
+  if (!operations || !Array.isArray(operations) || operations.length === 0) {
+    return { error: "No operations provided" };
+  }
+
+  const lock = getScriptLock();
+  const results = [];
+  const undoStack = [];
+  const deferred = [];
+  let failure = null;
+
+  try {
+    lock.waitLock(30000);
+    const ss = getSpreadsheet();
+
+    for (let i = 0; i < operations.length && !failure; i++) {
+      let op;
+      let result;
+      try {
+        op = resolveBatchReferences(operations[i], results);
+        if (!op || BATCH_EXCLUDED_ACTIONS.indexOf(op.action) !== -1) {
+          throw new Error("Action not allowed in batch: " + (op && op.action));
+        }
+        if (op.defer) {
+          // Queued after every required operation has succeeded
+          deferred.push({ index: i, op: op });
+          result = { success: true, queued: true };
+        } else {
+          const compensator = BATCH_COMPENSATORS[op.action] || {};
+          const saved = compensator.prepare
+            ? compensator.prepare(ss, op)
+            : null;
+          result = dispatchAction(op);
+          if (result && !result.error && compensator.undo) {
+            undoStack.push({ op, result, saved, undo: compensator.undo });
+          }
+        }
+      } catch (error) {
+        result = { error: error.toString() };
+      }
+
+      results.push(result);
+      if (result && result.error && !(op && op.optional)) {
+        failure = {
+          index: i,
+          message: `Operation ${i} (${op ? op.action : "?"}) failed: ${result.error}`,
+        };
+      }
+    }
+
+    if (!failure && deferred.length > 0) {
+      try {
+        const taskIds = enqueueTasks(
+          ss,
+          deferred.map((entry) => entry.op),
+        );
+        deferred.forEach((entry, n) => {
+          results[entry.index].taskId = taskIds[n];
+        });
+      } catch (error) {
+        // Optional deferred operations stay best-effort: the batch keeps its
+        // other writes and only their results report the error
+        const message =
+          "Failed to queue deferred operations: " + error.toString();
+        deferred.forEach((entry) => {
+          results[entry.index] = { error: message };
+        });
+        const required = deferred.find((entry) => !entry.op.optional);
+        if (required) failure = { index: required.index, message: message };
+      }
+    }
+
+    if (!failure) {
+      return { success: true, results };
+    }
+
+    const rollbackErrors = [];
+    while (undoStack.length > 0) {
+      const entry = undoStack.pop();
+      try {
+        const undoResult = entry.undo(ss, entry.op, entry.result, entry.saved);
+        if (undoResult && undoResult.error) {
+          rollbackErrors.push(entry.op.action + ": " + undoResult.error);
+        }
+      } catch (error) {
+        rollbackErrors.push(entry.op.action + ": " + error.toString());
+      }
+    }
+
+    return {
+      error: failure.message,
+      failedIndex: failure.index,
+      results,
+      rolledBack: rollbackErrors.length === 0,
+      rollbackErrors,
+    };
+  } catch (error) {
+    return { error: error.toString(), results };
+  } finally {
+    lock.releaseLock();
+  }
+}
+
+/**
+ * Replace {$ref: "<index>.<path>"} markers with values from earlier batch results
+ * Only an object whose single key is `$ref` is a marker, so user data that
+ * happens to look like a reference is stored as typed.
+ * @param {any} value - Operation (or part of it)
+ * @param {Array<object>} results - Results of the operations run so far
+ */
+function resolveBatchReferences(value, results) {
+  if (isBatchReference(value)) {
+    const match = value.$ref.match(/^(\d+)\.([\w.]+)$/);
+    if (!match) throw new Error("Invalid reference: " + value.$ref);
+    const index = parseInt(match[1]);
+    if (index >= results.length) {
+      throw new Error("Reference to a later operation: " + value.$ref);
+    }
+    let resolved = results[index];
+    match[2].split(".").forEach((key) => {
+      if (resolved !== null && resolved !== undefined) {
+        resolved = resolved[key];
+      }
+    });
+    if (resolved === undefined) {
+      throw new Error("Unresolved reference: " + value.$ref);
+    }
+    return resolved;
+  }
+  if (Array.isArray(value)) {
+    return value.map((item) => resolveBatchReferences(item, results));
+  }
+  if (value && typeof value === "object") {
+    const resolved = {};
+    Object.keys(value).forEach((key) => {
+      resolved[key] = resolveBatchReferences(value[key], results);
+    });
+    return resolved;
+  }
+  return value;
+}
+
+/**
+ * True for a batch reference marker: {$ref: "<index>.<path>"}
+ */
+function isBatchReference(value) {
+  return (
+    value !== null &&
+    typeof value === "object" &&
+    !Array.isArray(value) &&
+    Object.keys(value).length === 1 &&
+    typeof value.$ref === "string"
+  );
+}
+
+/**
+ * Per-action compensation for runBatch
+ * prepare(ss, op) runs before the action and returns what undo needs;
+ * undo(ss, op, result, saved) reverts a successful action.
+ */
+const BATCH_COMPENSATORS = {
+  add: {
+    undo: (ss, op, result) => deleteRow(op.sheet, result.rowIndex),
+  },
+  update: {
+    prepare: (ss, op) =>
+      captureRowFields(ss, op.sheet, op.rowIndex, Object.keys(op.data || {})),
+    undo: (ss, op, result, saved) => updateRow(op.sheet, op.rowIndex, saved),
+  },
+  delete: {
+    prepare: (ss, op) => captureRows(ss, op.sheet, [op.rowIndex]),
+    undo: (ss, op, result, saved) => restoreRows(ss, op.sheet, saved),
+  },
+  "delete-invoice": {
+    prepare: (ss, op) =>
+      captureRows(
+        ss,
+        op.sheet,
+        findInvoiceRows(ss, op.sheet, op.data.noPesanan).rows || [],
+      ),
+    undo: (ss, op, result, saved) => restoreRows(ss, op.sheet, saved),
+  },
+  "delete-restock": {
+    prepare: (ss) => ({
+      RESTOCK: captureSheet(ss, "RESTOCK"),
+      "PERSEDIAAN BARANG": captureSheet(ss, "PERSEDIAAN BARANG"),
+    }),
+    undo: (ss, op, result, saved) => {
+      restoreSheet(ss, "RESTOCK", saved.RESTOCK);
+      return restoreSheet(ss, "PERSEDIAAN BARANG", saved["PERSEDIAAN BARANG"]);
+    },
+  },
+  "increment-transaction": {
+    undo: (ss, op) => incrementCustomerTransaction(op.phoneNumber, -1),
+  },
+  "increment-product-sold": {
+    undo: (ss, op) => updateProductCounter(negateItems(op.items), "TERJUAL"),
+  },
+  "increment-product-restock": {
+    undo: (ss, op) => updateProductCounter(negateItems(op.items), "RESTOCK"),
+  },
+  "set-stok-lapang": {
+    prepare: (ss) => captureSheet(ss, "PERSEDIAAN BARANG"),
+    undo: (ss, op, result, saved) =>
+      restoreSheet(ss, "PERSEDIAAN BARANG", saved),
+  },
+  "upsert-products": {
+    prepare: (ss) => captureSheet(ss, "PERSEDIAAN BARANG"),
+    undo: (ss, op, result, saved) =>
+      restoreSheet(ss, "PERSEDIAAN BARANG", saved),
+  },
+  "get-next-id": {
+    undo: (ss, op, result) => {
+      ss.getSheetByName("COUNTERS")
+        .getRange(result.counterRow, 3)
+        .setValue(result.count - 1);
+      bumpSheetVersion("COUNTERS");
+      return { success: true };
+    },
+  },
+};
+
+function negateItems(items) {
+  return (items || []).map((item) => ({
+    sku: item.sku,
+    jumlah: -(parseFloat(item.jumlah) || 0),
+  }));
+}
+
+/**
+ * Current cell contents (formula if any, otherwise value) of whole rows
+ * @returns {Array<{rowIndex: number, values: Array}>}
+ */
+function captureRows(ss, sheetName, rowIndexes) {
+  const sheet = ss.getSheetByName(sheetName);
+  if (!sheet || rowIndexes.length === 0) return [];
+  commitStorageWrites(sheetName);
+
+  const first = Math.min.apply(null, rowIndexes);
+  const last = Math.max.apply(null, rowIndexes);
+  const range = sheet.getRange(
+    first,
+    1,
+    last - first + 1,
+    Math.max(sheet.getLastColumn(), 1),
+  );
+  const values = range.getValues();
+  const formulas = range.getFormulas();
+
+  return rowIndexes.map((rowIndex) => {
+    const i = rowIndex - first;
+    return {
+      rowIndex: rowIndex,
+      values: values[i].map((value, j) => formulas[i][j] || value),
+    };
+  });
+}
+
+/**
+ * Re-insert rows captured by captureRows at their original positions
+ */
+function restoreRows(ss, sheetName, captured) {
+  const sheet = ss.getSheetByName(sheetName);
+  if (!sheet || !captured || captured.length === 0) return { success: true };
+  commitStorageWrites(sheetName);
+
+  captured
+    .slice()
+    .sort((a, b) => a.rowIndex - b.rowIndex)
+    .forEach((row) => {
+      sheet.insertRowAfter(row.rowIndex - 1);
+      sheet
+        .getRange(row.rowIndex, 1, 1, row.values.length)
+        .setValues([row.values]);
+    });
+
+  syncSearchIndex(
+    ss,
+    sheetName,
+    [findOwningInvoice(ss, sheetName, captured[0].rowIndex)],
+    [captured[0].rowIndex],
+  );
+  bumpSheetVersion(sheetName);
+  return { success: true };
+}
+
+/**
+ * Previous contents of some columns of a row, keyed by header (for updateRow)
+ */
+function captureRowFields(ss, sheetName, rowIndex, keys) {
+  const config = SHEET_CONFIG[sheetName] || { headerRow: 1 };
+  const headers = getHeaderValues(ss, sheetName, config.headerRow);
+  const row = captureRows(ss, sheetName, [rowIndex])[0];
+  const saved = {};
+  keys.forEach((key) => {
+    const colIndex = headers.indexOf(key);
+    if (row && colIndex !== -1) saved[key] = row.values[colIndex];
+  });
+  return saved;
+}
+
+/**
+ * All data rows of a sheet, for actions that touch many rows
+ */
+function captureSheet(ss, sheetName) {
+  const sheet = ss.getSheetByName(sheetName);
+  const config = SHEET_CONFIG[sheetName] || { headerRow: 1 };
+  const rowIndexes = [];
+  for (let row = config.headerRow + 1; row <= sheet.getLastRow(); row++) {
+    rowIndexes.push(row);
+  }
+  return captureRows(ss, sheetName, rowIndexes);
+}
+
+/**
+ * Put a sheet's data rows back to a captureSheet snapshot
+ * Extra rows at the end are removed, missing rows are added back
+ */
+function restoreSheet(ss, sheetName, snapshot) {
+  commitStorageWrites(sheetName);
+  const sheet = ss.getSheetByName(sheetName);
+  const config = SHEET_CONFIG[sheetName] || { headerRow: 1 };
+  const dataStartRow = config.headerRow + 1;
+  const currentRows = Math.max(sheet.getLastRow() - config.headerRow, 0);
+  const diff = currentRows - snapshot.length;
+
+  if (diff > 0) {
+    sheet.deleteRows(dataStartRow + snapshot.length, diff);
+  } else if (diff < 0) {
+    sheet.insertRowsAfter(config.headerRow + currentRows, -diff);
+  }
+
+  if (snapshot.length > 0) {
+    const width = snapshot[0].values.length;
+    sheet
+      .getRange(dataStartRow, 1, snapshot.length, width)
+      .setValues(snapshot.map((row) => row.values));
+  }
+  bumpSheetVersion(sheetName);
+  return { success: true };
+}
+
+// ==================== TASK QUEUE ====================
+
+/**
+ * Get (or create) the hidden TASK_QUEUE sheet
+ */
+function getTaskQueueSheet(ss) {
+  let queueSheet = ss.getSheetByName(TASK_QUEUE_SHEET);
+  if (!queueSheet) {
+    queueSheet = ss.insertSheet(TASK_QUEUE_SHEET);
+    queueSheet.appendRow(TASK_QUEUE_HEADERS);
+    queueSheet.hideSheet();
+  }
+  return queueSheet;
+}
+
+/**
+ * Append POST actions to the queue in one write
+ * @param {Spreadsheet} ss
+ * @param {Array<object>} operations - Bodies of single-action requests
+ * @returns {string[]} - Task IDs, in the same order
+ */
+function enqueueTasks(ss, operations) {
+  const queueSheet = getTaskQueueSheet(ss);
+  const now = new Date();
+  const rows = operations.map((op) => {
+    const payload = Object.assign({}, op);
+    delete payload.defer;
+    delete payload.optional;
+    return [
+      Utilities.getUuid(),
+      now,
+      payload.action,
+      JSON.stringify(payload),
+      0,
+      "pending",
+      now,
+      "",
+    ];
+  });
+
+  queueSheet
+    .getRange(queueSheet.getLastRow() + 1, 1, rows.length, rows[0].length)
+    .setValues(rows);
+  return rows.map((row) => row[0]);
+}
+
+/**
+ * Read every queued task (pending and dead)
+ * @returns {Array<{rowIndex: number, id: string, created: Date, action: string,
+ *   payload: string, attempts: number, status: string, nextRun: Date, lastError: string}>}
+ */
+function readTaskQueue(ss) {
+  const queueSheet = ss.getSheetByName(TASK_QUEUE_SHEET);
+  if (!queueSheet || queueSheet.getLastRow() < 2) return [];
+
+  return queueSheet
+    .getRange(2, 1, queueSheet.getLastRow() - 1, TASK_QUEUE_HEADERS.length)
+    .getValues()
+    .map((row, i) => ({
+      rowIndex: i + 2,
+      id: row[0],
+      created: row[1],
+      action: row[2],
+      payload: row[3],
+      attempts: Number(row[4]) || 0,
+      status: row[5],
+      nextRun: row[6],
+      lastError: row[7],
+    }))
+    .filter((task) => task.id !== "");
+}
+
+/**
+ * Time-driven trigger worker: run due tasks of every outlet in FIFO order
+ * Each task runs under the script lock together with the update of its queue row,
+ * so a task is never applied without being removed from the queue.
+ * A failed task is retried with exponential backoff; after TASK_QUEUE_MAX_ATTEMPTS
+ * it stays in the sheet with status "dead" (dead letter) until retried by hand.
+ * @returns {object} - {success, processed, failed, dead}
+ */
+function processTaskQueue() {
+  const startedAt = Date.now();
+  const summary = { success: true, processed: 0, failed: 0, dead: 0 };
+
+  Object.keys(OUTLETS).forEach((outletId) => {
+    if (Date.now() - startedAt > TASK_QUEUE_TIME_BUDGET_MS) return;
+    try {
+      selectOutlet(outletId);
+      drainTaskQueue(startedAt, summary);
+    } catch (error) {
+      console.error("Task queue of outlet " + outletId + " failed: " + error);
+    }
+  });
+
+  return summary;
+}
+
+/**
+ * Run the due tasks of the active outlet, adding the outcome to `summary`
+ * @param {number} startedAt - Start of this trigger run (ms)
+ * @param {object} summary - {processed, failed, dead} counters
+ */
+function drainTaskQueue(startedAt, summary) {
+  const ss = getSpreadsheet();
+  const due = readTaskQueue(ss)
+    .filter(
+      (task) =>
+        task.status === "pending" &&
+        new Date(task.nextRun).getTime() <= startedAt,
+    )
+    .slice(0, TASK_QUEUE_BATCH_SIZE);
+
+  for (let i = 0; i < due.length; i++) {
+    if (Date.now() - startedAt > TASK_QUEUE_TIME_BUDGET_MS) break;
+    const task = due[i];
+
+    const lock = getScriptLock();
+    try {
+      lock.waitLock(30000);
+
+      // Rows may have moved (or been handled by an overlapping run) since
+      // the queue was read
+      const queueSheet = ss.getSheetByName(TASK_QUEUE_SHEET);
+      const current = readTaskQueue(ss).find((entry) => entry.id === task.id);
+      if (
+        !current ||
+        current.status !== "pending" ||
+        current.attempts !== task.attempts
+      ) {
+        continue;
+      }
+      const rowIndex = current.rowIndex;
+
+      let result;
+      try {
+        result = dispatchAction(JSON.parse(task.payload));
+        commitStorageWrites();
+      } catch (error) {
+        result = { error: error.toString() };
+      }
+
+      if (result && !result.error) {
+        queueSheet.deleteRow(rowIndex);
+        summary.processed++;
+        continue;
+      }
+
+      const attempts = task.attempts + 1;
+      const dead = attempts >= TASK_QUEUE_MAX_ATTEMPTS;
+      queueSheet
+        .getRange(rowIndex, 5, 1, 4)
+        .setValues([
+          [
+            attempts,
+            dead ? "dead" : "pending",
+            new Date(
+              Date.now() +
+                TASK_QUEUE_RETRY_DELAY_MS * Math.pow(2, attempts - 1),
+            ),
+            String((result && result.error) || "No result"),
+          ],
+        ]);
+      if (dead) {
+        summary.dead++;
+        console.error(
+          "Task " + task.id + " moved to dead letter: " + result.error,
+        );
+      } else {
+        summary.failed++;
+      }
+    } catch (error) {
+      console.error("Task " + task.id + " could not be processed: " + error);
+    } finally {
+      lock.releaseLock();
+    }
+  }
+}
+
+/**
+ * Queue depth for monitoring (GET ?action=queue)
+ * @returns {object} - {success, pending, due, dead, oldestPending, deadLetters}
+ */
+function getTaskQueueStatus() {
+  try {
+    const now = Date.now();
+    const tasks = readTaskQueue(getSpreadsheet());
+    const pending = tasks.filter((task) => task.status === "pending");
+    const dead = tasks.filter((task) => task.status === "dead");
+
+    return {
+      success: true,
+      pending: pending.length,
+      due: pending.filter((task) => new Date(task.nextRun).getTime() <= now)
+        .length,
+      dead: dead.length,
+      oldestPending: pending.length > 0 ? pending[0].created : null,
+      deadLetters: dead.map((task) => ({
+        id: task.id,
+        action: task.action,
+        attempts: task.attempts,
+        lastError: task.lastError,
+        payload: task.payload,
+      })),
+    };
+  } catch (error) {
+    return { error: error.toString() };
+  }
+}
+
+/**
+ * Put dead tasks back in the queue (POST action: "retry-dead-tasks")
+ * @param {string[]} [taskIds] - Only these tasks; all dead tasks when omitted
+ * @returns {object} - {success, requeued}
+ */
+function retryDeadTasks(taskIds) {
+  const lock = getScriptLock();
+  try {
+    lock.waitLock(30000);
+    const ss = getSpreadsheet();
+    const queueSheet = ss.getSheetByName(TASK_QUEUE_SHEET);
+    let requeued = 0;
+
+    readTaskQueue(ss).forEach((task) => {
+      if (task.status !== "dead") return;
+      if (taskIds && taskIds.indexOf(task.id) === -1) return;
+      queueSheet
+        .getRange(task.rowIndex, 5, 1, 3)
+        .setValues([[0, "pending", new Date()]]);
+      requeued++;
+    });
+
+    return { success: true, requeued: requeued };
+  } catch (error) {
+    return { error: error.toString() };
+  } finally {
+    lock.releaseLock();
+  }
+}
+
+/**
+ * Install the time-driven trigger for processTaskQueue (run once from the editor)
+ */
+function installTaskQueueTrigger() {
+  ScriptApp.getProjectTriggers().forEach((trigger) => {
+    if (trigger.getHandlerFunction() === "processTaskQueue") {
+      ScriptApp.deleteTrigger(trigger);
+    }
+  });
+  ScriptApp.newTrigger("processTaskQueue").timeBased().everyMinutes(1).create();
+}
+
+// ==================== MAINTENANCE ====================
+
+/**
+ * Scheduled maintenance, run daily by the trigger from installMaintenanceTrigger.
+ * For every outlet it prunes old COUNTERS rows, rebuilds the search index and
+ * trims trailing empty rows/columns of every sheet. Each step takes the script
+ * lock on its own, so requests from the shop only wait for one step at a time.
+ * @returns {object} - {success, ms, outlets: {outletId: report}}
+ */
+function runMaintenance() {
+  const startedAt = Date.now();
+  const summary = { success: true, ms: 0, outlets: {} };
+
+  Object.keys(OUTLETS).forEach((outletId) => {
+    if (Date.now() - startedAt > MAINTENANCE_TIME_BUDGET_MS) {
+      console.warn("Maintenance time budget used up, skipping " + outletId);
+      return;
+    }
+    try {
+      selectOutlet(outletId);
+      summary.outlets[outletId] = maintainSpreadsheet(startedAt);
+    } catch (error) {
+      summary.success = false;
+      summary.outlets[outletId] = { error: error.toString() };
+      console.error("Maintenance of outlet " + outletId + " failed: " + error);
+    }
+  });
+
+  summary.ms = Date.now() - startedAt;
+  console.log("Maintenance finished: " + JSON.stringify(summary));
+  return summary;
+}
+
+/**
+ * Maintain the spreadsheet of the active outlet
+ * @param {number} startedAt - Start of this trigger run (ms)
+ * @returns {object} - {cellsBefore, cellsAfter, countersPruned, searchIndex, sheets}
+ */
+function maintainSpreadsheet(startedAt) {
+  const ss = getSpreadsheet();
+  const report = {
+    cellsBefore: 0,
+    cellsAfter: 0,
+    countersPruned: 0,
+    searchIndex: {},
+    sheets: [],
+  };
+
+  // Pruning and reindexing leave cleared rows behind, so they run before trimming
+  const pruned = runMaintenanceStep("prune COUNTERS", () => pruneCounters(ss));
+  report.countersPruned = pruned.removed || 0;
+
+  Object.keys(SEARCH_INDEX_CONFIG).forEach((sheetName) => {
+    const rebuilt = runMaintenanceStep("reindex " + sheetName, () =>
+      rebuildSearchIndex(sheetName, ss),
+    );
+    report.searchIndex[sheetName] = rebuilt.error
+      ? { error: rebuilt.error }
+      : { indexed: rebuilt.indexed, ms: rebuilt.ms };
+  });
+
+  ss.getSheets().forEach((sheet) => {
+    if (Date.now() - startedAt > MAINTENANCE_TIME_BUDGET_MS) return;
+    const trimmed = runMaintenanceStep("trim " + sheet.getName(), () =>
+      trimSheet(sheet),
+    );
+    if (trimmed.error) {
+      report.sheets.push({ sheet: sheet.getName(), error: trimmed.error });
+      return;
+    }
+    report.cellsBefore += trimmed.cellsBefore;
+    report.cellsAfter += trimmed.cellsAfter;
+    report.sheets.push(trimmed);
+  });
+
+  return report;
+}
+
+/**
+ * Run one maintenance step under the script lock, timing and logging it
+ * @param {string} label - Step name for the log
+ * @param {Function} step - Returns a result object
+ * @returns {object} - The step result with `ms`, or {error}
+ */
+function runMaintenanceStep(label, step) {
+  const started = Date.now();
+  const lock = getScriptLock();
+  let result;
+  try {
+    lock.waitLock(30000);
+    result = step() || {};
+  } catch (error) {
+    result = { error: error.toString() };
+  } finally {
+    lock.releaseLock();
+  }
+
+  result.ms = Date.now() - started;
+  if (result.error) {
+    console.error("Maintenance " + label + " failed: " + result.error);
+  } else {
+    console.log(
+      "Maintenance " +
+        label +
+        " (" +
+        result.ms +
+        " ms): " +
+        JSON.stringify(result),
+    );
+  }
+  return result;
+}
+
+/**
+ * True when every cell of a row or column is blank: no formula, and a value
+ * that is empty or whitespace
+ * @param {Array} values
+ * @param {string[]} formulas - Same cells, from getFormulas()
+ * @returns {boolean}
+ */
+function isBlankLine(values, formulas) {
+  for (let i = 0; i < values.length; i++) {
+    if (formulas[i] !== "" || String(values[i]).trim() !== "") return false;
+  }
+  return true;
+}
+
+/**
+ * Delete trailing rows and columns that hold no data.
+ * Rows with only whitespace count as empty, but a cell with a formula never
+ * does (it may evaluate to "" today); a few spare rows stay so an appendRow
+ * running at the same time never lands in a deleted row.
+ * @param {Sheet} sheet
+ * @returns {object} - {sheet, rowsRemoved, columnsRemoved, cellsBefore, cellsAfter}
+ */
+function trimSheet(sheet) {
+  const sheetName = sheet.getName();
+  const maxRows = sheet.getMaxRows();
+  const maxColumns = sheet.getMaxColumns();
+  let lastRow = sheet.getLastRow();
+  let lastColumn = sheet.getLastColumn();
+
+  // Whitespace-only rows at the bottom still count for getLastRow()
+  let blankRows = 0;
+  if (lastRow > 0 && lastColumn > 0) {
+    let scanEnd = lastRow;
+    while (scanEnd > 0) {
+      const scanStart = Math.max(1, scanEnd - MAINTENANCE_SCAN_CHUNK + 1);
+      const range = sheet.getRange(
+        scanStart,
+        1,
+        scanEnd - scanStart + 1,
+        lastColumn,
+      );
+      const values = range.getValues();
+      const formulas = range.getFormulas();
+      let i = values.length - 1;
+      while (i >= 0 && isBlankLine(values[i], formulas[i])) i--;
+      if (i >= 0) {
+        lastRow = scanStart + i;
+        break;
+      }
+      scanEnd = scanStart - 1;
+      lastRow = scanEnd;
+    }
+    blankRows = sheet.getLastRow() - lastRow;
+    if (blankRows > 0) {
+      sheet.getRange(lastRow + 1, 1, blankRows, lastColumn).clearContent();
+    }
+  }
+
+  // Same for whitespace-only columns at the right
+  while (lastColumn > 1 && lastRow > 0) {
+    const range = sheet.getRange(1, lastColumn, lastRow, 1);
+    const values = range.getValues().map((row) => row[0]);
+    const formulas = range.getFormulas().map((row) => row[0]);
+    if (!isBlankLine(values, formulas)) break;
+    range.clearContent();
+    lastColumn--;
+  }
+
+  // A sheet must keep at least one non-frozen row and column
+  const keepRows =
+    Math.max(lastRow, sheet.getFrozenRows()) + MAINTENANCE_SPARE_ROWS;
+  const keepColumns = Math.max(lastColumn, sheet.getFrozenColumns() + 1, 1);
+  const rowsRemoved = Math.max(0, maxRows - keepRows);
+  const columnsRemoved = Math.max(0, maxColumns - keepColumns);
+
+  if (rowsRemoved > 0) sheet.deleteRows(keepRows + 1, rowsRemoved);
+  if (columnsRemoved > 0) {
+    sheet.deleteColumns(keepColumns + 1, columnsRemoved);
+    Object.keys(headerCache).forEach((key) => {
+      if (key.indexOf(sheetName + "|") === 0) delete headerCache[key];
+    });
+  }
+  if (blankRows > 0) bumpSheetVersion(sheetName);
+
+  return {
+    sheet: sheetName,
+    rowsRemoved: rowsRemoved,
+    columnsRemoved: columnsRemoved,
+    cellsBefore: maxRows * maxColumns,
+    cellsAfter: (maxRows - rowsRemoved) * (maxColumns - columnsRemoved),
+  };
+}
+
+/**
+ * Remove COUNTERS rows older than COUNTERS_RETENTION_DAYS.
+ * getNextIncrementalId scans the whole sheet, so old dates only slow it down.
+ * @param {Spreadsheet} ss
+ * @returns {object} - {success, removed, kept}
+ */
+function pruneCounters(ss) {
+  const sheet = ss.getSheetByName("COUNTERS");
+  if (!sheet || sheet.getLastRow() < 2) {
+    return { success: true, removed: 0, kept: 0 };
+  }
+
+  const timeZone = ss.getSpreadsheetTimeZone();
+  const cutoff = Utilities.formatDate(
+    new Date(Date.now() - COUNTERS_RETENTION_DAYS * 86400000),
+    timeZone,
+    "yyyy-MM-dd",
+  );
+  const range = sheet.getRange(2, 1, sheet.getLastRow() - 1, 3);
+  const rows = range.getValues();
+  const kept = rows.filter((row) => {
+    if (String(row[0]).trim() === "") return false;
+    const date =
+      row[0] instanceof Date
+        ? Utilities.formatDate(row[0], timeZone, "yyyy-MM-dd")
+        : String(row[0]);
+    // Keep anything that is not a plain YYYY-MM-DD date
+    return !/^\d{4}-\d{2}-\d{2}$/.test(date) || date >= cutoff;
+  });
+
+  const removed = rows.length - kept.length;
+  if (removed > 0) {
+    range.clearContent();
+    if (kept.length > 0) {
+      sheet.getRange(2, 1, kept.length, 3).setValues(kept);
+    }
+    bumpSheetVersion("COUNTERS");
+  }
+
+  return { success: true, removed: removed, kept: kept.length };
+}
+
+/**
+ * Install the daily trigger for runMaintenance (run once from the editor)
+ */
+function installMaintenanceTrigger() {
+  ScriptApp.getProjectTriggers().forEach((trigger) => {
+    if (trigger.getHandlerFunction() === "runMaintenance") {
+      ScriptApp.deleteTrigger(trigger);
+    }
+  });
+  ScriptApp.newTrigger("runMaintenance")
+    .timeBased()
+    .everyDays(1)
+    .atHour(MAINTENANCE_HOUR)
+    .create();
+}
+
+// ==================== STORAGE ENGINES ====================
+
+/**
+ * Storage engines read and write cell values and insert/delete rows. Formatting
+ * and formulas always go through SpreadsheetApp.
+ *
+ * read(ss, sheetName, specs) -> Array of 2D value arrays, one per spec
+ *   spec: {row, column, numRows?, numColumns?} (omitted = up to the last row/column)
+ * write(ss, sheetName, updates)
+ *   update: {row, column, values: 2D array}
+ * insertRowsAfter(ss, sheetName, row, count)
+ * deleteRows(ss, sheetName, rows) - any order; deleted bottom to top
+ *
+ * "sheets-api" queues its writes until commitStorageWrites (end of the request,
+ * or before its next read or row insert/delete). Code that reads or restructures
+ * rows through SpreadsheetApp directly (search index, batch snapshots) calls
+ * commitStorageWrites first.
+ */
+const STORAGE_ENGINES = {
+  spreadsheet: {
+    read(ss, sheetName, specs) {
+      const sheet = ss.getSheetByName(sheetName);
+      let lastRow = null;
+      let lastColumn = null;
+      return specs.map((spec) => {
+        if (!spec.numRows && lastRow === null) lastRow = sheet.getLastRow();
+        if (!spec.numColumns && lastColumn === null) {
+          lastColumn = sheet.getLastColumn();
+        }
+        const numRows = spec.numRows || lastRow - spec.row + 1;
+        const numColumns = spec.numColumns || lastColumn - spec.column + 1;
+        if (numRows <= 0 || numColumns <= 0) return [];
+        return sheet
+          .getRange(spec.row, spec.column, numRows, numColumns)
+          .getValues();
+      });
+    },
+
+    write(ss, sheetName, updates) {
+      const sheet = ss.getSheetByName(sheetName);
+      updates.forEach((update) => {
+        sheet
+          .getRange(
+            update.row,
+            update.column,
+            update.values.length,
+            update.values[0].length,
+          )
+          .setValues(update.values);
+      });
+    },
+
+    insertRowsAfter(ss, sheetName, row, count) {
+      ss.getSheetByName(sheetName).insertRowsAfter(row, count);
+    },
+
+    deleteRows(ss, sheetName, rows) {
+      const sheet = ss.getSheetByName(sheetName);
+      rows
+        .slice()
+        .sort((a, b) => b - a)
+        .forEach((row) => sheet.deleteRow(row));
+    },
+  },
+
+  "sheets-api": {
+    read(ss, sheetName, specs) {
+      if (specs.length === 0) return [];
+      // Queued writes and pending SpreadsheetApp changes must be visible
+      commitStorageWrites(sheetName);
+      flushStaleStorage();
+      const response = Sheets.Spreadsheets.Values.batchGet(ss.getId(), {
+        ranges: specs.map((spec) => toA1Range(sheetName, spec)),
+        valueRenderOption: "UNFORMATTED_VALUE",
+        dateTimeRenderOption: "SERIAL_NUMBER",
+      });
+      const dateColumns = getDateColumns(ss, sheetName);
+      return response.valueRanges.map((valueRange, i) =>
+        normalizeApiValues(valueRange.values || [], specs[i], dateColumns),
+      );
+    },
+
+    write(ss, sheetName, updates) {
+      if (updates.length === 0) return;
+      const timeZone = ss.getSpreadsheetTimeZone();
+      pendingStorageSpreadsheet = ss;
+      updates.forEach((update) => {
+        pendingStorageWrites.push({
+          sheetName: sheetName,
+          range: toA1Range(sheetName, {
+            row: update.row,
+            column: update.column,
+            numRows: update.values.length,
+            numColumns: update.values[0].length,
+          }),
+          values: update.values.map((row) =>
+            row.map((value) => toApiValue(value, timeZone)),
+          ),
+        });
+      });
+    },
+
+    // Queued ranges address rows by number, so they are sent before rows move
+    insertRowsAfter(ss, sheetName, row, count) {
+      commitStorageWrites(sheetName);
+      STORAGE_ENGINES.spreadsheet.insertRowsAfter(ss, sheetName, row, count);
+      storageReadsStale = true;
+    },
+
+    deleteRows(ss, sheetName, rows) {
+      commitStorageWrites(sheetName);
+      STORAGE_ENGINES.spreadsheet.deleteRows(ss, sheetName, rows);
+      storageReadsStale = true;
+    },
+  },
+};
+
+/**
+ * Send the writes the "sheets-api" engine queued in this execution, in one
+ * batchUpdate. No-op for the spreadsheet engine, which writes immediately.
+ * @param {string} [sheetName] - Only send when this sheet has queued writes
+ */
+function commitStorageWrites(sheetName) {
+  const pending = sheetName
+    ? pendingStorageWrites.some((write) => write.sheetName === sheetName)
+    : pendingStorageWrites.length > 0;
+  if (!pending) return;
+  const data = pendingStorageWrites.map((write) => ({
+    range: write.range,
+    values: write.values,
+  }));
+  const ss = pendingStorageSpreadsheet;
+  pendingStorageWrites = [];
+  pendingStorageSpreadsheet = null;
+  // Inserted rows must exist before the API addresses them
+  flushStaleStorage();
+  Sheets.Spreadsheets.Values.batchUpdate(
+    { valueInputOption: "USER_ENTERED", data: data },
+    ss.getId(),
+  );
+}
+
+/**
+ * SpreadsheetApp.flush(), once per batch of SpreadsheetApp changes
+ */
+function flushStaleStorage() {
+  if (!storageReadsStale) return;
+  SpreadsheetApp.flush();
+  storageReadsStale = false;
+}
+
+/**
+ * Get the storage engine configured for a sheet
+ * Falls back to SpreadsheetApp when the Advanced Sheets service is not enabled
+ */
+function getStorageEngine(sheetName) {
+  const config = SHEET_CONFIG[sheetName] || {};
+  const name = config.engine || DEFAULT_STORAGE_ENGINE;
+  if (name === "sheets-api" && typeof Sheets === "undefined") {
+    return STORAGE_ENGINES.spreadsheet;
+  }
+  return STORAGE_ENGINES[name] || STORAGE_ENGINES.spreadsheet;
+}
+
+/**
+ * Convert a column number to its letter (1 -> A, 28 -> AB)
+ */
+function columnToLetter(column) {
+  let letter = "";
+  while (column > 0) {
+    const mod = (column - 1) % 26;
+    letter = String.fromCharCode(65 + mod) + letter;
+    column = Math.floor((column - 1) / 26);
+  }
+  return letter;
+}
+
+/**
+ * Build an A1 range for a read/write spec
+ * Open-ended specs use A1 open ranges ("B7:D", "6:10") or the whole sheet
+ */
+function toA1Range(sheetName, spec) {
+  const quoted = "'" + sheetName.replace(/'/g, "''") + "'";
+  const startCol = columnToLetter(spec.column);
+  const endRow = spec.numRows ? spec.row + spec.numRows - 1 : "";
+
+  if (spec.numColumns) {
+    const endCol = columnToLetter(spec.column + spec.numColumns - 1);
+    return `${quoted}!${startCol}${spec.row}:${endCol}${endRow}`;
+  }
+  if (spec.numRows) {
+    // Whole rows; columns before spec.column are dropped in normalizeApiValues
+    return `${quoted}!${spec.row}:${endRow}`;
+  }
+  return quoted;
+}
+
+/**
+ * Make API values look like Range.getValues(): rectangular, "" for empty cells,
+ * Date objects for date-formatted columns
+ */
+function normalizeApiValues(values, spec, dateColumns) {
+  // Whole-row and whole-sheet ranges start at column A / row 1
+  const colOffset = spec.numColumns ? 0 : spec.column - 1;
+  const rowOffset = !spec.numColumns && !spec.numRows ? spec.row - 1 : 0;
+  const rows = values.slice(rowOffset).map((row) => row.slice(colOffset));
+
+  const width =
+    spec.numColumns || rows.reduce((max, row) => Math.max(max, row.length), 0);
+  const height = spec.numRows || rows.length;
+  if (width === 0 || height === 0) return [];
+
+  const result = [];
+  for (let r = 0; r < height; r++) {
+    const source = rows[r] || [];
+    const row = [];
+    for (let c = 0; c < width; c++) {
+      let value = source[c];
+      if (value === undefined || value === null) value = "";
+      if (typeof value === "number" && dateColumns.has(spec.column + c)) {
+        value = serialToDate(value);
+      }
+      row.push(value);
+    }
+    result.push(row);
+  }
+  return result;
+}
+
+/**
+ * Convert a Sheets serial number into a Date in the script time zone
+ */
+function serialToDate(serial) {
+  const wallTime = new Date(Math.round((serial - 25569) * 86400000));
+  return new Date(
+    wallTime.getUTCFullYear(),
+    wallTime.getUTCMonth(),
+    wallTime.getUTCDate(),
+    wallTime.getUTCHours(),
+    wallTime.getUTCMinutes(),
+    wallTime.getUTCSeconds(),
+  );
+}
+
+function toApiValue(value, timeZone) {
+  if (value instanceof Date) {
+    return Utilities.formatDate(value, timeZone, "yyyy-MM-dd HH:mm:ss");
+  }
+  return value === null || value === undefined ? "" : value;
+}
+
+/**
+ * True when a number format shows a date (has a day or year token)
+ * Quoted literals ("days"), [...] sections ([Red], [$Rp]), escaped characters
+ * and _/* padding characters are not tokens and are ignored.
+ * @param {string} format - e.g. "dd/mm/yyyy", "[Red]#,##0"
+ * @returns {boolean}
+ */
+function isDateNumberFormat(format) {
+  const tokens = String(format || "")
+    .replace(/"[^"]*"/g, "")
+    .replace(/\[[^\]]*\]/g, "")
+    .replace(/\\./g, "")
+    .replace(/[_*]./g, "");
+  return /[dy]/i.test(tokens);
+}
+
+/**
+ * Columns (1-based) whose first data row has a date number format
+ * Cached for 6 hours so only the first API read pays for the lookup
+ */
+function getDateColumns(ss, sheetName) {
+  const cache = CacheService.getScriptCache();
+  const cacheKey = outletKey("DATE_COLUMNS:" + sheetName);
+  const cached = cache.get(cacheKey);
+  if (cached) return new Set(JSON.parse(cached));
+
+  const sheet = ss.getSheetByName(sheetName);
+  const config = SHEET_CONFIG[sheetName] || { headerRow: 1 };
+  const lastColumn = sheet.getLastColumn();
+  const columns = [];
+  if (lastColumn > 0) {
+    sheet
+      .getRange(config.headerRow + 1, 1, 1, lastColumn)
+      .getNumberFormats()[0]
+      .forEach((format, i) => {
+        if (isDateNumberFormat(format)) columns.push(i + 1);
+      });
+  }
+  cache.put(cacheKey, JSON.stringify(columns), 21600);
+  return new Set(columns);
+}
+
+/**
+ * Time both storage engines on the same sheet (run from the Apps Script editor)
+ * @param {string} [sheetName="INCOME"]
+ * @param {number} [iterations=3]
+ */
+function benchmarkStorageEngines(sheetName, iterations) {
+  sheetName = sheetName || "INCOME";
+  iterations = iterations || 3;
+  const ss = getSpreadsheet();
+  const config = SHEET_CONFIG[sheetName] || { headerRow: 1 };
+  const results = {};
+
+  Object.keys(STORAGE_ENGINES).forEach((name) => {
+    if (name === "sheets-api" && typeof Sheets === "undefined") return;
+    const engine = STORAGE_ENGINES[name];
+    const start = Date.now();
+    let rows = 0;
+    for (let i = 0; i < iterations; i++) {
+      rows = engine.read(ss, sheetName, [
+        { row: config.headerRow, column: config.startColumn || 1 },
+      ])[0].length;
+    }
+    results[name] = {
+      rows: rows,
+      avgReadMs: Math.round((Date.now() - start) / iterations),
+    };
+  });
+
+  console.log(JSON.stringify(results));
+  return results;
+}
+
+// ==================== DATA VERSIONS ====================
+
+/**
+ * Give a sheet a new data version. Called by every mutation.
+ * @param {string} sheetName
+ */
+function bumpSheetVersion(sheetName) {
+  // The mutation may have SpreadsheetApp changes the Sheets API cannot see yet
+  storageReadsStale = true;
+  try {
+    const version =
+      Date.now().toString(36) +
+      "-" +
+      Math.floor(Math.random() * 1e6).toString(36);
+    PropertiesService.getScriptProperties().setProperty(
+      outletKey(SHEET_VERSION_PREFIX + sheetName),
+      version,
+    );
+    return version;
+  } catch (error) {
+    console.error("Failed to bump version of " + sheetName + ": " + error);
+    return null;
+  }
+}
+
+/**
+ * Return the current data version of every known sheet.
+ * Sheets without a version yet get one, so clients can start matching.
+ * @param {string[]} [extraSheets] - Sheet names outside SHEET_CONFIG to include
+ * @returns {object} - {success: true, versions: {sheetName: version}}
+ */
+function getDataManifest(extraSheets) {
+  try {
+    const properties = PropertiesService.getScriptProperties().getProperties();
+    const prefix = outletKey(SHEET_VERSION_PREFIX);
+    const versions = {};
+    Object.keys(properties).forEach((key) => {
+      if (key.indexOf(prefix) === 0) {
+        versions[key.substring(prefix.length)] = properties[key];
+      }
+    });
+
+    const wanted = Object.keys(SHEET_CONFIG).concat(extraSheets || []);
+    const missing = wanted.filter((name) => name && !versions[name]);
+    if (missing.length > 0) {
+      const ss = getSpreadsheet();
+      missing.forEach((name) => {
+        if (!ss.getSheetByName(name)) return;
+        const version = bumpSheetVersion(name);
+        if (version) versions[name] = version;
+      });
+    }
+
+    return { success: true, versions: versions };
+  } catch (error) {
+    return { error: error.toString() };
+  }
+}
+
+/**
+ * Simple trigger: edits made directly in Google Sheets also change the version
+ */
+function onEdit(e) {
+  if (e && e.range) {
+    const spreadsheetId = e.source.getId();
+    const outletId = Object.keys(OUTLETS).find(
+      (id) => OUTLETS[id].sheetId === spreadsheetId,
+    );
+    if (outletId) selectOutlet(outletId);
+    bumpSheetVersion(e.range.getSheet().getName());
+  }
+}
+
+// ==================== SEARCH INDEX ====================
+
+/**
+ * Get (or create) the hidden SEARCH_INDEX sheet
+ * Columns: SHEET, INVOICE, TOKENS, UPDATED
+ */
+function getSearchIndexSheet(ss) {
+  let indexSheet = ss.getSheetByName(SEARCH_INDEX_SHEET);
+  if (!indexSheet) {
+    indexSheet = ss.insertSheet(SEARCH_INDEX_SHEET);
+    indexSheet.appendRow(["SHEET", "INVOICE", "TOKENS", "UPDATED"]);
+    indexSheet.hideSheet();
+  }
+  return indexSheet;
+}
+
+/**
+ * Read headers of a sheet, normalized the same way as readSheet
+ * (newlines replaced by spaces). Empty headers are kept to preserve positions.
+ */
+function getNormalizedHeaders(sheet, config) {
+  const startColumn = config.startColumn || 1;
+  const numCols = sheet.getLastColumn() - startColumn + 1;
+  if (numCols <= 0) return [];
+  return sheet
+    .getRange(config.headerRow, startColumn, 1, numCols)
+    .getValues()[0]
+    .map((h) => (typeof h === "string" ? h.replace(/\n/g, " ").trim() : h));
+}
+
+/**
+ * Split a value into lowercase search tokens (letters and digits of any script).
+ * "LR/INV/01/300126" -> ["lr/inv/01/300126", "lr", "inv", "01", "300126"]
+ * "Café Señor" -> ["café", "señor"]
+ */
+function tokenizeSearchValue(value, tokens) {
+  const text = String(value || "")
+    .toLowerCase()
+    .trim();
+  if (!text) return;
+  if (!/\s/.test(text)) tokens.add(text);
+  text.split(/[^\p{L}\p{N}]+/u).forEach((part) => {
+    if (part) tokens.add(part);
+  });
+}
+
+/**
+ * Add phone tokens in every format the user may type (08xx, 628xx)
+ */
+function tokenizePhoneValue(value, tokens) {
+  const digits = String(value || "").replace(/\D/g, "");
+  if (!digits) return;
+  tokens.add(digits);
+  if (digits.startsWith("0")) tokens.add("62" + digits.substring(1));
+  else if (digits.startsWith("62")) tokens.add("0" + digits.substring(2));
+  else tokens.add("62" + digits);
+}
+
+/**
+ * Build the token list of one invoice group
+ * @param {object} indexConfig - Entry of SEARCH_INDEX_CONFIG
+ * @param {Array} headers - Normalized headers
+ * @param {Array[]} rows - Raw row values of the group (first row holds the invoice info)
+ * @returns {string} Space separated tokens
+ */
+function buildSearchTokens(indexConfig, headers, rows) {
+  const tokens = new Set();
+  const mainRow = rows[0];
+
+  indexConfig.textColumns.forEach((colName) => {
+    const colIndex = headers.indexOf(colName);
+    if (colIndex !== -1) tokenizeSearchValue(mainRow[colIndex], tokens);
+  });
+
+  indexConfig.phoneColumns.forEach((colName) => {
+    const colIndex = headers.indexOf(colName);
+    if (colIndex !== -1) tokenizePhoneValue(mainRow[colIndex], tokens);
+  });
+
+  const itemIndex = headers.indexOf(indexConfig.itemColumn);
+  if (itemIndex !== -1) {
+    rows.forEach((row) => {
+      const match = String(row[itemIndex] || "").match(/^\[([^\]]+)\]/);
+      if (match) tokenizeSearchValue(match[1], tokens);
+    });
+  }
+
+  return Array.from(tokens).join(" ");
+}
+
+/**
+ * Locate invoice groups (header row + continuation rows) in a sheet
+ * @param {Sheet} sheet - Source sheet
+ * @param {object} config - SHEET_CONFIG entry
+ * @param {number} invoiceColIndex - Index of the invoice column in the headers
+ * @param {Set|null} wanted - Invoice numbers to locate, or null for all
+ * @returns {Array<{invoice: string, start: number, count: number}>} In sheet order
+ */
+function locateInvoiceGroups(sheet, config, invoiceColIndex, wanted) {
+  const startColumn = config.startColumn || 1;
+  const dataStartRow = config.headerRow + 1;
+  const lastRow = sheet.getLastRow();
+  if (lastRow < dataStartRow) return [];
+
+  const values = sheet
+    .getRange(
+      dataStartRow,
+      startColumn + invoiceColIndex,
+      lastRow - config.headerRow,
+      1,
+    )
+    .getValues();
+
+  const groups = [];
+  let current = null;
+  for (let i = 0; i < values.length; i++) {
+    const invoiceNo = String(values[i][0]).trim();
+    if (invoiceNo !== "") {
+      current = null;
+      if (!wanted || wanted.has(invoiceNo)) {
+        current = { invoice: invoiceNo, start: dataStartRow + i, count: 0 };
+        groups.push(current);
+      }
+    }
+    if (current) current.count++;
+  }
+  return groups;
+}
+
+/**
+ * Row holding the invoice number of the group a row belongs to, read upwards
+ * in chunks from that row
+ * @param {Sheet} sheet
+ * @param {object} config - SHEET_CONFIG entry
+ * @param {number} invoiceColIndex - Index of the invoice column in the headers
+ * @param {number} rowIndex
+ * @returns {{invoice: string, start: number}|null} null above the first invoice
+ */
+function findInvoiceStart(sheet, config, invoiceColIndex, rowIndex) {
+  const column = (config.startColumn || 1) + invoiceColIndex;
+  const dataStartRow = config.headerRow + 1;
+  for (let last = rowIndex; last >= dataStartRow; ) {
+    const first = Math.max(dataStartRow, last - SEARCH_INDEX_SCAN_CHUNK + 1);
+    const values = sheet
+      .getRange(first, column, last - first + 1, 1)
+      .getValues();
+    for (let i = values.length - 1; i >= 0; i--) {
+      const invoiceNo = String(values[i][0]).trim();
+      if (invoiceNo !== "") return { invoice: invoiceNo, start: first + i };
+    }
+    last = first - 1;
+  }
+  return null;
+}
+
+/**
+ * Locate the invoice group a row belongs to, reading only the rows around it
+ * instead of the whole invoice column (see locateInvoiceGroups)
+ * @param {Sheet} sheet
+ * @param {object} config - SHEET_CONFIG entry
+ * @param {number} invoiceColIndex - Index of the invoice column in the headers
+ * @param {number} rowIndex - Any row of the group, e.g. the row just written
+ * @returns {{invoice: string, start: number, count: number}|null}
+ */
+function locateInvoiceGroupAt(sheet, config, invoiceColIndex, rowIndex) {
+  const lastRow = sheet.getLastRow();
+  if (rowIndex > lastRow) return null;
+  const group = findInvoiceStart(sheet, config, invoiceColIndex, rowIndex);
+  if (!group) return null;
+
+  // The group ends above the next invoice number (or at the last row)
+  const column = (config.startColumn || 1) + invoiceColIndex;
+  let end = lastRow;
+  for (let first = group.start + 1; first <= end; ) {
+    const count = Math.min(SEARCH_INDEX_SCAN_CHUNK, lastRow - first + 1);
+    const values = sheet.getRange(first, column, count, 1).getValues();
+    const next = values.findIndex((row) => String(row[0]).trim() !== "");
+    if (next !== -1) end = first + next - 1;
+    first += count;
+  }
+  group.count = end - group.start + 1;
+  return group;
+}
+
+/**
+ * Convert raw row values into row objects (same shape as readSheet)
+ */
+function rowsToObjects(headers, values, firstRow) {
+  return values
+    .map((row, index) => {
+      const obj = { _rowIndex: firstRow + index };
+      headers.forEach((header, i) => {
+        if (header) obj[header] = row[i];
+      });
+      return obj;
+    })
+    .filter((row) =>
+      Object.keys(row).some(
+        (key) => key !== "_rowIndex" && row[key] !== "" && row[key] !== null,
+      ),
+    );
+}
+
+/**
+ * Rebuild the search index entry of a single invoice.
+ * Removes the entry when the invoice no longer exists.
+ * @param {Spreadsheet} ss
+ * @param {string} sheetName
+ * @param {string} invoiceNo
+ * @param {number[]} [rowHints] - Rows the write touched; the group is looked
+ *   up around them first, and the whole invoice column is read only when none
+ *   of them belongs to the invoice
+ */
+function reindexInvoice(ss, sheetName, invoiceNo, rowHints = []) {
+  const indexConfig = SEARCH_INDEX_CONFIG[sheetName];
+  if (!indexConfig || !invoiceNo) return;
+
+  const sheet = ss.getSheetByName(sheetName);
+  const config = SHEET_CONFIG[sheetName] || { headerRow: 1 };
+  const headers = getNormalizedHeaders(sheet, config);
+  const invoiceColIndex = headers.indexOf(indexConfig.invoiceColumn);
+  if (invoiceColIndex === -1) return;
+
+  const key = String(invoiceNo).trim();
+  let group = null;
+  rowHints.some((row) => {
+    const found = locateInvoiceGroupAt(sheet, config, invoiceColIndex, row);
+    if (found && found.invoice === key) group = found;
+    return group;
+  });
+  if (!group) {
+    group = locateInvoiceGroups(
+      sheet,
+      config,
+      invoiceColIndex,
+      new Set([key]),
+    )[0];
+  }
+
+  if (!group) {
+    removeSearchIndexEntry(ss, sheetName, key);
+    return;
+  }
+
+  const rows = sheet
+    .getRange(
+      group.start,
+      config.startColumn || 1,
+      group.count,
+      headers.length,
+    )
+    .getValues();
+  const tokens = buildSearchTokens(indexConfig, headers, rows);
+
+  const indexSheet = getSearchIndexSheet(ss);
+  const entry = [sheetName, key, tokens, new Date()];
+  const existingRow = findSearchIndexRow(indexSheet, sheetName, key);
+  if (existingRow !== -1) {
+    indexSheet.getRange(existingRow, 1, 1, entry.length).setValues([entry]);
+  } else {
+    // Newest entries on top, matching the INCOME sheet order
+    indexSheet.insertRowAfter(1);
+    indexSheet.getRange(2, 1, 1, entry.length).setValues([entry]);
+    shiftSearchIndexRows(2, 1);
+    searchIndexRows[sheetName + "|" + key] = 2;
+  }
+}
+
+/**
+ * Row of every index entry, read once per execution and kept in step with
+ * the inserts and deletes below, so a batch that writes many invoices scans
+ * the SEARCH_INDEX key columns only once
+ * @param {Sheet} indexSheet
+ * @returns {Object<string, number>} "SHEET|INVOICE" -> row
+ */
+function getSearchIndexRows(indexSheet) {
+  if (searchIndexRows) return searchIndexRows;
+  searchIndexRows = {};
+  const lastRow = indexSheet.getLastRow();
+  if (lastRow < 2) return searchIndexRows;
+  indexSheet
+    .getRange(2, 1, lastRow - 1, 2)
+    .getValues()
+    .forEach((row, i) => {
+      const key = row[0] + "|" + String(row[1]);
+      if (!(key in searchIndexRows)) searchIndexRows[key] = i + 2;
+    });
+  return searchIndexRows;
+}
+
+/**
+ * Move the cached rows at or below `fromRow` after rows were inserted
+ * (delta > 0) or deleted (delta < 0) there
+ */
+function shiftSearchIndexRows(fromRow, delta) {
+  if (!searchIndexRows) return;
+  Object.keys(searchIndexRows).forEach((key) => {
+    if (searchIndexRows[key] >= fromRow) searchIndexRows[key] += delta;
+  });
+}
+
+/**
+ * Find the row of an index entry, or -1
+ */
+function findSearchIndexRow(indexSheet, sheetName, invoiceNo) {
+  const row = getSearchIndexRows(indexSheet)[sheetName + "|" + invoiceNo];
+  return row === undefined ? -1 : row;
+}
+
+function removeSearchIndexEntry(ss, sheetName, invoiceNo) {
+  if (!SEARCH_INDEX_CONFIG[sheetName]) return;
+  const indexSheet = getSearchIndexSheet(ss);
+  const key = String(invoiceNo).trim();
+  const row = findSearchIndexRow(indexSheet, sheetName, key);
+  if (row === -1) return;
+  indexSheet.deleteRow(row);
+  delete searchIndexRows[sheetName + "|" + key];
+  shiftSearchIndexRows(row + 1, -1);
+}
+
+/**
+ * Find the invoice that owns a given sheet row (the nearest invoice number at or above it)
+ */
+function findOwningInvoice(ss, sheetName, rowIndex) {
+  const indexConfig = SEARCH_INDEX_CONFIG[sheetName];
+  if (!indexConfig) return null;
+
+  commitStorageWrites(sheetName);
+  try {
+    const sheet = ss.getSheetByName(sheetName);
+    const config = SHEET_CONFIG[sheetName] || { headerRow: 1 };
+    const headers = getNormalizedHeaders(sheet, config);
+    const invoiceColIndex = headers.indexOf(indexConfig.invoiceColumn);
+    if (invoiceColIndex === -1) return null;
+
+    const group = findInvoiceStart(sheet, config, invoiceColIndex, rowIndex);
+    if (group) return group.invoice;
+  } catch (error) {
+    console.error("Search index lookup failed: " + error.toString());
+  }
+  return null;
+}
+
+/**
+ * Invoice number carried by a row written through addRow (item rows carry none)
+ */
+function searchInvoiceOf(sheetName, rowData) {
+  const indexConfig = SEARCH_INDEX_CONFIG[sheetName];
+  if (!indexConfig || !rowData) return null;
+  const invoiceNo = rowData[indexConfig.invoiceColumn];
+  return invoiceNo ? String(invoiceNo).trim() : null;
+}
+
+/**
+ * Keep the index in sync after a write. Index failures never fail the write itself.
+ * @param {Spreadsheet} ss
+ * @param {string} sheetName
+ * @param {Array<string|null>} invoiceNos - Invoices whose entries must be refreshed
+ * @param {number[]} [rowHints] - Rows the write touched (see reindexInvoice)
+ */
+function syncSearchIndex(ss, sheetName, invoiceNos, rowHints) {
+  if (!SEARCH_INDEX_CONFIG[sheetName]) return;
+  // The index reads the sheet through SpreadsheetApp
+  commitStorageWrites(sheetName);
+  try {
+    new Set(invoiceNos.filter((no) => no)).forEach((no) =>
+      reindexInvoice(ss, sheetName, no, rowHints),
+    );
+  } catch (error) {
+    console.error("Search index update failed: " + error.toString());
+  }
+}
+
+/**
+ * Rebuild the whole index of a sheet in a single write
+ * @param {string} sheetName - Sheet listed in SEARCH_INDEX_CONFIG
+ * @returns {object} - {success, message, indexed}
+ */
+function rebuildSearchIndex(sheetName, ss) {
+  const rebuilt = writeSearchIndex(sheetName, ss);
+  if (rebuilt.error) return rebuilt;
+  return {
+    success: true,
+    message: "Search index rebuilt for " + rebuilt.entries.length + " invoices",
+    indexed: rebuilt.entries.length,
+  };
+}
+
+/**
+ * Rebuild the index of a sheet and return its new entries
+ * @param {string} sheetName - Sheet listed in SEARCH_INDEX_CONFIG
+ * @returns {object} - {entries: [sheet, invoice, tokens, updated][]} or {error}
+ */
+function writeSearchIndex(sheetName, ss) {
+  try {
+    const indexConfig = SEARCH_INDEX_CONFIG[sheetName];
+    if (!indexConfig) {
+      return { error: "Search index not configured for sheet: " + sheetName };
+    }
+
+    ss = ss || getSpreadsheet();
+    const sheet = ss.getSheetByName(sheetName);
+    if (!sheet) return { error: "Sheet not found: " + sheetName };
+
+    const config = SHEET_CONFIG[sheetName] || { headerRow: 1 };
+    const headers = getNormalizedHeaders(sheet, config);
+    const invoiceColIndex = headers.indexOf(indexConfig.invoiceColumn);
+    if (invoiceColIndex === -1) {
+      return { error: "Column not found: " + indexConfig.invoiceColumn };
+    }
+
+    const groups = locateInvoiceGroups(sheet, config, invoiceColIndex, null);
+    const dataStartRow = config.headerRow + 1;
+    const lastRow = sheet.getLastRow();
+    const allValues =
+      lastRow >= dataStartRow
+        ? sheet
+            .getRange(
+              dataStartRow,
+              config.startColumn || 1,
+              lastRow - config.headerRow,
+              headers.length,
+            )
+            .getValues()
+        : [];
+
+    const now = new Date();
+    const entries = groups.map((group) => {
+      const offset = group.start - dataStartRow;
+      const rows = allValues.slice(offset, offset + group.count);
+      return [
+        sheetName,
+        group.invoice,
+        buildSearchTokens(indexConfig, headers, rows),
+        now,
+      ];
+    });
+
+    // Keep entries of other sheets, replace this sheet's entries
+    const indexSheet = getSearchIndexSheet(ss);
+    const indexLastRow = indexSheet.getLastRow();
+    const others =
+      indexLastRow >= 2
+        ? indexSheet
+            .getRange(2, 1, indexLastRow - 1, 4)
+            .getValues()
+            .filter((row) => row[0] !== sheetName && row[0] !== "")
+        : [];
+    const allEntries = entries.concat(others);
+
+    if (indexLastRow >= 2) {
+      indexSheet.getRange(2, 1, indexLastRow - 1, 4).clearContent();
+    }
+    if (allEntries.length > 0) {
+      indexSheet.getRange(2, 1, allEntries.length, 4).setValues(allEntries);
+    }
+    searchIndexRows = null;
+
+    return { entries: entries };
+  } catch (error) {
+    return { error: error.toString() };
+  }
+}
+
+/**
+ * Score an index entry against the query keywords.
+ * Every keyword must match a token (AND logic, same as the riwayat page filter).
+ * Exact token = 3, token prefix = 2, substring = 1.
+ */
+function scoreSearchTokens(tokens, keywords) {
+  let score = 0;
+  for (const keyword of keywords) {
+    let best = 0;
+    for (const token of tokens) {
+      if (token === keyword) {
+        best = 3;
+        break;
+      }
+      if (best < 2 && token.startsWith(keyword)) best = 2;
+      else if (best < 1 && token.includes(keyword)) best = 1;
+    }
+    if (best === 0) return 0;
+    score += best;
+  }
+  return score;
+}
+
+/**
+ * Search a sheet through its token index and return ranked invoice groups
+ * @param {string} sheetName - Sheet listed in SEARCH_INDEX_CONFIG
+ * @param {string} query - Space separated keywords
+ * @param {number|string} limit - Max groups to return (default 50, max 200)
+ * @param {string} [encoding] - "gzip" to compress the response
+ */
+function searchSheet(sheetName, query, limit, encoding) {
+  try {
+    const indexConfig = SEARCH_INDEX_CONFIG[sheetName];
+    if (!indexConfig) {
+      return ContentService.createTextOutput(
+        JSON.stringify({
+          error: "Search index not configured for sheet: " + sheetName,
+        }),
+      ).setMimeType(ContentService.MimeType.JSON);
+    }
+
+    const keywords = String(query || "")
+      .toLowerCase()
+      .trim()
+      .split(/\s+/)
+      .filter((kw) => kw);
+    const maxGroups = Math.min(Math.max(parseInt(limit) || 50, 1), 200);
+
+    if (keywords.length === 0) {
+      return ContentService.createTextOutput(
+        JSON.stringify({ success: true, total: 0, groups: [] }),
+      ).setMimeType(ContentService.MimeType.JSON);
+    }
+
+    const ss = getSpreadsheet();
+    const sheet = ss.getSheetByName(sheetName);
+    if (!sheet) {
+      return ContentService.createTextOutput(
+        JSON.stringify({ error: "Sheet not found: " + sheetName }),
+      ).setMimeType(ContentService.MimeType.JSON);
+    }
+
+    // Load index entries; build the index on first use
+    const indexSheet = getSearchIndexSheet(ss);
+    const indexLastRow = indexSheet.getLastRow();
+    let entries =
+      indexLastRow >= 2
+        ? indexSheet
+            .getRange(2, 1, indexLastRow - 1, 3)
+            .getValues()
+            .filter((row) => row[0] === sheetName)
+        : [];
+    if (entries.length === 0) {
+      const rebuilt = writeSearchIndex(sheetName, ss);
+      if (rebuilt.error) throw new Error(rebuilt.error);
+      entries = rebuilt.entries;
+    }
+
+    const matches = [];
+    entries.forEach((entry, position) => {
+      const tokens = String(entry[2]).split(" ");
+      const score = scoreSearchTokens(tokens, keywords);
+      if (score > 0) {
+        matches.push({ invoice: String(entry[1]), score, position });
+      }
+    });
+    // Highest score first, newest first on ties
+    matches.sort((a, b) => b.score - a.score || a.position - b.position);
+    const top = matches.slice(0, maxGroups);
+
+    // Read only the matching invoice groups
+    const config = SHEET_CONFIG[sheetName] || { headerRow: 1 };
+    const headers = getNormalizedHeaders(sheet, config);
+    const invoiceColIndex = headers.indexOf(indexConfig.invoiceColumn);
+    const located = {};
+    locateInvoiceGroups(
+      sheet,
+      config,
+      invoiceColIndex,
+      new Set(top.map((m) => m.invoice)),
+    ).forEach((group) => {
+      if (!located[group.invoice]) located[group.invoice] = group;
+    });
+
+    const groups = top
+      .filter((m) => located[m.invoice])
+      .map((m) => {
+        const group = located[m.invoice];
+        const values = sheet
+          .getRange(
+            group.start,
+            config.startColumn || 1,
+            group.count,
+            headers.length,
+          )
+          .getValues();
+        return {
+          invoice: m.invoice,
+          score: m.score,
+          rows: rowsToObjects(headers, values, group.start),
+        };
+      });
+
+    return createJsonOutput(
+      {
+        success: true,
+        total: matches.length,
+        groups: groups,
+      },
+      encoding,
+    );
+  } catch (error) {
+    return ContentService.createTextOutput(
+      JSON.stringify({ error: error.toString() }),
+    ).setMimeType(ContentService.MimeType.JSON);
+  }
+}
@@ -0,0 +1,108 @@
+/**
+ * Row Grouping
+ * Turns the rows of a transaction sheet into {map, order}: rows per invoice
+ * number, and the invoice numbers in display order. Rows must already have
+ * canonical field names (normalizeSheetRows in schema.js). Loaded by the list
+ * pages and by data-worker.js, so it must not touch the DOM.
+ */
+
+/**
+ * Group rows by an order-number field
+ * Rows with an empty number continue the group above them (the item rows of
+ * a multi-item order). The field is a canonical name (schema.js), so no
+ * other spellings are probed.
+ * @param {object[]} data - Rows from normalizeSheetRows
+ * @param {string} field - Order-number field
+ * @param {Function} [include] - Row filter; skipped rows do not end a group
+ * @returns {{map: Object<string, object[]>, order: string[]}}
+ */
+function groupRowsByOrder(data, field, include) {
+  const groups = {};
+  const orderedGroups = [];
+  let currentOrderNo = null;
+
+  data.forEach((row) => {
+    if (include && !include(row)) return;
+
+    const noPesanan = row[field];
+    if (noPesanan) {
+      currentOrderNo = noPesanan;
+      if (!groups[currentOrderNo]) {
+        groups[currentOrderNo] = [];
+        orderedGroups.push(currentOrderNo);
+      }
+    }
+
+    if (currentOrderNo) {
+      groups[currentOrderNo].push(row);
+    }
+  });
+
+  return { map: groups, order: orderedGroups };
+}
+
+/**
+ * Group INCOME rows of fully paid (FP) invoices by invoice number
+ * @param {object[]} data - INCOME rows
+ * @returns {{map: Object<string, object[]>, order: string[]}}
+ */
+function groupInvoicesByOrder(data) {
+  return groupRowsByOrder(data, "NO INVOICE", (row) => row["DP/FP"] === "FP");
+}
+
+/**
+ * Group INCOME rows of down-payment (DP) invoices by invoice number
+ * @param {object[]} data - INCOME rows
+ * @returns {{map: Object<string, object[]>, order: string[]}}
+ */
+function groupPelunasanByOrder(data) {
+  return groupRowsByOrder(data, "NO INVOICE", (row) => row["DP/FP"] === "DP");
+}
+
+/**
+ * Group QUOTATION rows by order number
+ * @param {object[]} data - QUOTATION rows
+ * @returns {{map: Object<string, object[]>, order: string[]}}
+ */
+function groupQuotationsByOrder(data) {
+  return groupRowsByOrder(data, "NO PESANAN");
+}
+
+/**
+ * Group RESTOCK rows by invoice, newest first
+ * Every RESTOCK row carries its invoice; rows without one are skipped.
+ * @param {object[]} data - RESTOCK rows
+ * @returns {{map: Object<string, object[]>, order: string[]}}
+ */
+function groupRestocksByInvoice(data) {
+  const groups = {};
+  const orderedGroups = [];
+
+  data.forEach((row) => {
+    const invoiceNo = row["INVOICE"];
+    if (!invoiceNo) return;
+
+    if (!groups[invoiceNo]) {
+      groups[invoiceNo] = [];
+      orderedGroups.push(invoiceNo);
+    }
+    groups[invoiceNo].push(row);
+  });
+
+  // Sort by date (descending) if TANGGAL exists
+  orderedGroups.sort((a, b) => {
+    const dateA = new Date(groups[a][0]["TANGGAL"]);
+    const dateB = new Date(groups[b][0]["TANGGAL"]);
+    return dateB - dateA;
+  });
+
+  return { map: groups, order: orderedGroups };
+}
+
+// Grouping per data service, by name, so a worker can be told which to run
+const DATA_GROUPERS = {
+  invoice: groupInvoicesByOrder,
+  pelunasan: groupPelunasanByOrder,
+  quotation: groupQuotationsByOrder,
+  restock: groupRestocksByInvoice,
+};
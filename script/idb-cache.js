@@ -4,11 +4,74 @@
  */
 
 const DB_NAME = "LarosapotCache";
-const DB_VERSION = 1;
+const DB_VERSION = 6;
 const STORE_NAME = "dataCache";
+const OUTBOX_STORE_NAME = "outbox"; // Write requests waiting to be sent (sheets-api.js)
+const META_STORE_NAME = "cacheMeta"; // Size, access time and hit counts per key
+
+// Evict when the origin uses this share of its quota, down to the lower share
+const CACHE_QUOTA_HIGH = 0.8;
+const CACHE_QUOTA_LOW = 0.6;
+
+const MINUTE = 60 * 1000;
+const DEFAULT_CACHE_TTL = 5 * MINUTE;
+
+// Every cache key in use. ttl decides `valid` in getCachedData; entries with a
+// lower priority are evicted first. `records` names the sheet whose record
+// store belongs to the key. Keys not listed here are purged on startup.
+const CACHE_POLICIES = {
+  produk_data_cache_v3: {
+    ttl: 5 * MINUTE,
+    priority: 5,
+    records: "PERSEDIAAN BARANG",
+  },
+  kustomer_data_cache_v3: { ttl: 5 * MINUTE, priority: 5, records: "KOSTUMER" },
+  users_data_cache_v2: { ttl: 30 * MINUTE, priority: 4 },
+  vendor_data_cache_v3: { ttl: 10 * MINUTE, priority: 3 },
+  riwayat_data_cache_v3: { ttl: 5 * MINUTE, priority: 2, records: "INCOME" },
+  pelunasan_data_cache_v3: { ttl: 5 * MINUTE, priority: 2, records: "INCOME" },
+  quotation_data_cache_v3: { ttl: 5 * MINUTE, priority: 2 },
+  restock_data_cache_v3: { ttl: 5 * MINUTE, priority: 2, records: "RESTOCK" },
+  dashboard_data_cache: { ttl: 5 * MINUTE, priority: 1 },
+  dashboard_data_cache_all: { ttl: 5 * MINUTE, priority: 1 },
+};
+
+// One object store per entity, one record per sheet row. Records are keyed by
+// [outlet, row]; every index is [outlet, field] so queries stay in one outlet.
+// `groupField` is an index whose empty cells take the value of the row above:
+// the item rows of a multi-item invoice leave the invoice number blank.
+const RECORD_STORES = {
+  INCOME: {
+    store: "transactions",
+    fields: { invoice: ["NO INVOICE"], phone: ["HP"], date: ["DATE"] },
+    groupField: "invoice",
+  },
+  RESTOCK: {
+    store: "restocks",
+    fields: { invoice: ["INVOICE"], date: ["TANGGAL"] },
+  },
+  "PERSEDIAAN BARANG": {
+    store: "products",
+    fields: { sku: ["SKU"] },
+  },
+  KOSTUMER: {
+    store: "customers",
+    fields: { phone: ["NO HP"] },
+  },
+};
 
 let dbInstance = null;
 
+/**
+ * Stored key of a cache entry: every outlet has its own namespace
+ * @param {string} key - Cache key used by callers (e.g. 'produk_data_cache_v3')
+ * @param {string} [outletId] - Defaults to the active outlet (config.js)
+ * @returns {string}
+ */
+function outletCacheKey(key, outletId = getActiveOutletId()) {
+  return `outlet:${outletId}/${key}`;
+}
+
 /**
  * Initialize IndexedDB
  */
@@ -26,9 +89,20 @@ function initDB() {
       reject(request.error);
     };
 
+    // Another tab still has the previous version open
+    request.onblocked = () => {
+      console.warn("IndexedDB upgrade blocked: close other Larosa tabs");
+    };
+
     request.onsuccess = () => {
       dbInstance = request.result;
+      // Let a newer version in another tab upgrade; the next call reopens
+      dbInstance.onversionchange = () => {
+        dbInstance.close();
+        dbInstance = null;
+      };
       resolve(dbInstance);
+      purgeUnknownCacheKeys();
     };
 
     request.onupgradeneeded = (event) => {
@@ -36,43 +110,115 @@ function initDB() {
       if (!db.objectStoreNames.contains(STORE_NAME)) {
         db.createObjectStore(STORE_NAME, { keyPath: "key" });
       }
+      if (!db.objectStoreNames.contains(META_STORE_NAME)) {
+        db.createObjectStore(META_STORE_NAME, { keyPath: "key" });
+      }
+      // Auto-increment ids keep the outbox in the order requests were made
+      if (!db.objectStoreNames.contains(OUTBOX_STORE_NAME)) {
+        db.createObjectStore(OUTBOX_STORE_NAME, {
+          keyPath: "id",
+          autoIncrement: true,
+        });
+      }
+      // Record stores of earlier versions that no page fills any more
+      const recordStores = Object.values(RECORD_STORES).map(
+        ({ store }) => store,
+      );
+      const known = [STORE_NAME, META_STORE_NAME, OUTBOX_STORE_NAME];
+      Array.from(db.objectStoreNames).forEach((name) => {
+        if (!known.includes(name) && !recordStores.includes(name)) {
+          db.deleteObjectStore(name);
+        }
+      });
+      Object.values(RECORD_STORES).forEach(({ store, fields }) => {
+        if (db.objectStoreNames.contains(store)) return;
+        const recordStore = db.createObjectStore(store, {
+          keyPath: ["outlet", "row"],
+        });
+        Object.keys(fields).forEach((field) => {
+          recordStore.createIndex(field, ["outlet", field]);
+        });
+      });
     };
   });
 }
 
+/**
+ * Run one transaction over the cache and cache meta stores
+ * @param {string} mode - "readonly" or "readwrite"
+ * @param {Function} run - Receives (dataStore, metaStore), may return a request
+ * @returns {Promise<any>} Request result; rejects with the transaction error
+ */
+async function cacheRequest(mode, run) {
+  const db = await initDB();
+  return new Promise((resolve, reject) => {
+    const transaction = db.transaction([STORE_NAME, META_STORE_NAME], mode);
+    const request = run(
+      transaction.objectStore(STORE_NAME),
+      transaction.objectStore(META_STORE_NAME),
+    );
+    transaction.oncomplete = () =>
+      resolve(request ? request.result : undefined);
+    transaction.onerror = () => reject(transaction.error);
+    transaction.onabort = () => reject(transaction.error);
+  });
+}
+
+/**
+ * Read-modify-write the meta entry of a stored key, in the caller's transaction
+ * @param {IDBObjectStore} metaStore
+ * @param {string} storedKey
+ * @param {Function} update - Receives the current meta, returns the new one
+ */
+function updateCacheMeta(metaStore, storedKey, update) {
+  const request = metaStore.get(storedKey);
+  request.onsuccess = () => {
+    const meta = request.result || {
+      key: storedKey,
+      size: 0,
+      timestamp: null,
+      lastAccess: null,
+      hits: 0,
+      misses: 0,
+    };
+    metaStore.put(update(meta));
+  };
+}
+
 /**
  * Get cached data from IndexedDB
+ * Counts a hit when the entry is still within its TTL, otherwise a miss.
  * @param {String} key - Cache key
+ * @param {string} [outletId] - Outlet namespace (defaults to the active outlet)
  * @returns {Promise<any>} Cached data or null
  */
-async function getCachedData(key) {
+async function getCachedData(key, outletId) {
+  const storedKey = outletCacheKey(key, outletId);
+  const policy = getCachePolicy(key);
+  const ttl = policy ? policy.ttl : DEFAULT_CACHE_TTL;
   try {
-    const db = await initDB();
-    return new Promise((resolve, reject) => {
-      const transaction = db.transaction([STORE_NAME], "readonly");
-      const store = transaction.objectStore(STORE_NAME);
-      const request = store.get(key);
-
+    let cached = null;
+    await cacheRequest("readwrite", (store, metaStore) => {
+      const request = store.get(storedKey);
       request.onsuccess = () => {
         const result = request.result;
         if (result && result.data) {
-          // Check if cache is still valid (5 minutes)
-          const CACHE_DURATION = 5 * 60 * 1000;
-          if (Date.now() - result.timestamp < CACHE_DURATION) {
-            resolve({ data: result.data, valid: true });
-          } else {
-            resolve({ data: result.data, valid: false });
-          }
-        } else {
-          resolve(null);
+          cached = {
+            data: result.data,
+            valid: Date.now() - result.timestamp < ttl,
+            version: result.version || null,
+            timestamp: result.timestamp,
+          };
         }
-      };
-
-      request.onerror = () => {
-        console.error("Error getting cached data:", request.error);
-        resolve(null);
+        updateCacheMeta(metaStore, storedKey, (meta) => ({
+          ...meta,
+          lastAccess: cached ? Date.now() : meta.lastAccess,
+          hits: meta.hits + (cached && cached.valid ? 1 : 0),
+          misses: meta.misses + (cached && cached.valid ? 0 : 1),
+        }));
       };
     });
+    return cached;
   } catch (error) {
     console.error("IndexedDB getCachedData error:", error);
     return null;
@@ -81,31 +227,43 @@ async function getCachedData(key) {
 
 /**
  * Save data to IndexedDB cache
+ * When the browser reports the quota is full, lower-priority entries are
+ * evicted and the write is tried once more.
  * @param {string} key - Cache key
  * @param {any} data - Data to cache
+ * @param {string} [version] - Server data version (from the manifest) of this data
+ * @param {string} [outletId] - Outlet namespace (defaults to the active outlet)
  */
-async function setCachedData(key, data) {
-  try {
-    const db = await initDB();
-    return new Promise((resolve, reject) => {
-      const transaction = db.transaction([STORE_NAME], "readwrite");
-      const store = transaction.objectStore(STORE_NAME);
-      const request = store.put({
-        key: key,
-        data: data,
-        timestamp: Date.now(),
-      });
-
-      request.onsuccess = () => {
-        console.log(`Cache saved: ${key}`);
-        resolve(true);
-      };
-
-      request.onerror = () => {
-        console.error("Error saving cache:", request.error);
-        resolve(false);
-      };
+async function setCachedData(key, data, version = null, outletId) {
+  const storedKey = outletCacheKey(key, outletId);
+  const size = estimateCacheSize(data);
+  if (!getCachePolicy(key)) {
+    console.warn(`No cache policy for ${key}; it is purged on the next load`);
+  }
+  const write = () =>
+    cacheRequest("readwrite", (store, metaStore) => {
+      const now = Date.now();
+      store.put({ key: storedKey, data, version, timestamp: now });
+      updateCacheMeta(metaStore, storedKey, (meta) => ({
+        ...meta,
+        size,
+        timestamp: now,
+        lastAccess: now,
+      }));
     });
+
+  try {
+    try {
+      await write();
+    } catch (error) {
+      if (!error || error.name !== "QuotaExceededError") throw error;
+      console.warn(`Cache quota exceeded saving ${key}, evicting`);
+      await evictCacheEntries(size, storedKey);
+      await write();
+    }
+    console.log(`Cache saved: ${key}`);
+    enforceCacheQuota(storedKey);
+    return true;
   } catch (error) {
     console.error("IndexedDB setCachedData error:", error);
     return false;
@@ -115,18 +273,16 @@ async function setCachedData(key, data) {
 /**
  * Clear specific cache key
  * @param {string} key - Cache key to clear
+ * @param {string} [outletId] - Outlet namespace (defaults to the active outlet)
  */
-async function clearCachedData(key) {
+async function clearCachedData(key, outletId) {
+  const storedKey = outletCacheKey(key, outletId);
   try {
-    const db = await initDB();
-    return new Promise((resolve) => {
-      const transaction = db.transaction([STORE_NAME], "readwrite");
-      const store = transaction.objectStore(STORE_NAME);
-      const request = store.delete(key);
-
-      request.onsuccess = () => resolve(true);
-      request.onerror = () => resolve(false);
+    await cacheRequest("readwrite", (store, metaStore) => {
+      store.delete(storedKey);
+      metaStore.delete(storedKey);
     });
+    return true;
   } catch (error) {
     console.error("IndexedDB clearCachedData error:", error);
     return false;
@@ -134,32 +290,478 @@ async function clearCachedData(key) {
 }
 
 /**
- * Clear all cache
+ * Clear all cache (every outlet), including the record stores
  */
 async function clearAllCache() {
   try {
     const db = await initDB();
-    return new Promise((resolve) => {
-      const transaction = db.transaction([STORE_NAME], "readwrite");
-      const store = transaction.objectStore(STORE_NAME);
-      const request = store.clear();
-
-      request.onsuccess = () => {
-        console.log("All cache cleared");
-        resolve(true);
-      };
-      request.onerror = () => resolve(false);
+    const stores = [
+      STORE_NAME,
+      META_STORE_NAME,
+      ...Object.values(RECORD_STORES).map(({ store }) => store),
+    ];
+    await new Promise((resolve, reject) => {
+      const transaction = db.transaction(stores, "readwrite");
+      stores.forEach((name) => transaction.objectStore(name).clear());
+      transaction.oncomplete = resolve;
+      transaction.onerror = () => reject(transaction.error);
+      transaction.onabort = () => reject(transaction.error);
     });
+    console.log("All cache cleared");
+    return true;
   } catch (error) {
     console.error("IndexedDB clearAllCache error:", error);
     return false;
   }
 }
 
+// ==================== CACHE POLICY ====================
+
+/**
+ * Policy of a cache key
+ * @param {string} key - Cache key without the outlet prefix
+ * @returns {{ttl: number, priority: number, records?: string}|null} null for
+ *   keys no page uses any more
+ */
+function getCachePolicy(key) {
+  return CACHE_POLICIES[key] || null;
+}
+
+/**
+ * Split a stored key into outlet and cache key
+ * @param {string} storedKey - "outlet:<id>/<key>"
+ * @returns {{outletId: string, key: string}|null} null for keys from before
+ *   the per-outlet namespace
+ */
+function parseCacheKey(storedKey) {
+  const match = /^outlet:([^/]+)\/(.+)$/.exec(storedKey);
+  return match ? { outletId: match[1], key: match[2] } : null;
+}
+
+/**
+ * Approximate size of a cache entry in bytes (its JSON length)
+ * @param {any} data
+ * @returns {number}
+ */
+function estimateCacheSize(data) {
+  try {
+    return JSON.stringify(data).length;
+  } catch (error) {
+    return 0;
+  }
+}
+
+/**
+ * Delete stored keys together with their meta and, for record-backed keys,
+ * the outlet's records
+ * @param {string[]} storedKeys
+ */
+async function deleteCacheEntries(storedKeys) {
+  if (storedKeys.length === 0) return;
+  await cacheRequest("readwrite", (store, metaStore) => {
+    storedKeys.forEach((storedKey) => {
+      store.delete(storedKey);
+      metaStore.delete(storedKey);
+    });
+  });
+  await Promise.all(
+    storedKeys.map((storedKey) => {
+      const parsed = parseCacheKey(storedKey);
+      const policy = parsed && getCachePolicy(parsed.key);
+      if (!policy || !policy.records) return null;
+      return clearRecords(policy.records, parsed.outletId);
+    }),
+  );
+}
+
+/**
+ * Evict entries until about `bytes` are freed
+ * Lowest priority goes first; within a priority, the least recently used.
+ * @param {number} bytes
+ * @param {string} [keepKey] - Stored key that must stay (the one being written)
+ * @returns {Promise<string[]>} Evicted stored keys
+ */
+async function evictCacheEntries(bytes, keepKey) {
+  const metas = await cacheRequest("readonly", (store, metaStore) =>
+    metaStore.getAll(),
+  );
+  const priorityOf = (meta) => {
+    const parsed = parseCacheKey(meta.key);
+    const policy = parsed && getCachePolicy(parsed.key);
+    return policy ? policy.priority : 0;
+  };
+  const candidates = metas
+    .filter((meta) => meta.key !== keepKey && meta.size > 0)
+    .sort(
+      (a, b) =>
+        priorityOf(a) - priorityOf(b) ||
+        (a.lastAccess || 0) - (b.lastAccess || 0),
+    );
+
+  const evicted = [];
+  let freed = 0;
+  for (const meta of candidates) {
+    if (freed >= bytes) break;
+    evicted.push(meta.key);
+    freed += meta.size;
+  }
+  await deleteCacheEntries(evicted);
+  if (evicted.length > 0) {
+    console.log(`Cache evicted (${freed} bytes):`, evicted);
+  }
+  return evicted;
+}
+
+/**
+ * Evict when the origin uses more than CACHE_QUOTA_HIGH of its quota, down
+ * to CACHE_QUOTA_LOW
+ * @param {string} [keepKey] - Stored key that must stay
+ */
+async function enforceCacheQuota(keepKey) {
+  if (!navigator.storage || !navigator.storage.estimate) return;
+  try {
+    const { usage, quota } = await navigator.storage.estimate();
+    if (!quota || usage < quota * CACHE_QUOTA_HIGH) return;
+    await evictCacheEntries(usage - quota * CACHE_QUOTA_LOW, keepKey);
+  } catch (error) {
+    console.error("IndexedDB enforceCacheQuota error:", error);
+  }
+}
+
+/**
+ * Remove entries no page reads any more: keys without the outlet prefix,
+ * keys without a policy (older cache versions) and outlets no longer in
+ * config.js
+ * Runs once per page, after the database is opened.
+ */
+async function purgeUnknownCacheKeys() {
+  try {
+    const [keys, metaKeys] = await Promise.all([
+      cacheRequest("readonly", (store) => store.getAllKeys()),
+      cacheRequest("readonly", (store, metaStore) => metaStore.getAllKeys()),
+    ]);
+    const outletIds = new Set(OUTLETS.map((outlet) => outlet.id));
+    const unknown = [...new Set([...keys, ...metaKeys])].filter((storedKey) => {
+      const parsed = parseCacheKey(storedKey);
+      return (
+        !parsed ||
+        !getCachePolicy(parsed.key) ||
+        !outletIds.has(parsed.outletId)
+      );
+    });
+    await deleteCacheEntries(unknown);
+    if (unknown.length > 0) {
+      console.log("Purged unknown cache keys:", unknown);
+    }
+  } catch (error) {
+    console.error("IndexedDB purgeUnknownCacheKeys error:", error);
+  }
+}
+
+/**
+ * Size, age and hit rate of every cache entry, plus the origin's storage
+ * estimate
+ * @returns {Promise<object>} {usage, quota, entries}; usage/quota are null
+ *   without navigator.storage
+ */
+async function getCacheStats() {
+  const metas = await cacheRequest("readonly", (store, metaStore) =>
+    metaStore.getAll(),
+  );
+  const estimate =
+    navigator.storage && navigator.storage.estimate
+      ? await navigator.storage.estimate().catch(() => ({}))
+      : {};
+  const now = Date.now();
+  const entries = metas.map((meta) => {
+    const parsed = parseCacheKey(meta.key) || { outletId: null, key: meta.key };
+    const policy = getCachePolicy(parsed.key) || {};
+    const lookups = meta.hits + meta.misses;
+    return {
+      key: parsed.key,
+      outlet: parsed.outletId,
+      size: meta.size,
+      age: meta.timestamp ? now - meta.timestamp : null,
+      lastAccess: meta.lastAccess,
+      hits: meta.hits,
+      misses: meta.misses,
+      hitRate: lookups > 0 ? meta.hits / lookups : null,
+      ttl: policy.ttl || null,
+      priority: policy.priority || null,
+    };
+  });
+  return {
+    usage: estimate.usage ?? null,
+    quota: estimate.quota ?? null,
+    entries,
+  };
+}
+
+// ==================== OUTBOX ====================
+
+/**
+ * Run one request against the outbox store
+ * Unlike the cache helpers, errors are thrown: a write that could not be stored
+ * must not be reported as saved.
+ * @param {string} mode - "readonly" or "readwrite"
+ * @param {Function} makeRequest - Receives the object store, returns an IDBRequest
+ * @returns {Promise<any>} Request result
+ */
+async function outboxRequest(mode, makeRequest) {
+  const db = await initDB();
+  return new Promise((resolve, reject) => {
+    const transaction = db.transaction([OUTBOX_STORE_NAME], mode);
+    const request = makeRequest(transaction.objectStore(OUTBOX_STORE_NAME));
+    transaction.oncomplete = () => resolve(request.result);
+    transaction.onerror = () => reject(transaction.error);
+    transaction.onabort = () => reject(transaction.error);
+  });
+}
+
+/**
+ * Store a new outbox entry
+ * @param {object} entry - Entry without id
+ * @returns {Promise<number>} Assigned id
+ */
+function addOutboxEntry(entry) {
+  return outboxRequest("readwrite", (store) => store.add(entry));
+}
+
+/**
+ * All outbox entries, oldest first
+ * @returns {Promise<object[]>}
+ */
+function getOutboxEntries() {
+  return outboxRequest("readonly", (store) => store.getAll());
+}
+
+/**
+ * Replace an outbox entry (matched by id)
+ * @param {object} entry
+ */
+function updateOutboxEntry(entry) {
+  return outboxRequest("readwrite", (store) => store.put(entry));
+}
+
+/**
+ * Remove an outbox entry
+ * @param {number} id
+ */
+function removeOutboxEntry(id) {
+  return outboxRequest("readwrite", (store) => store.delete(id));
+}
+
+// ==================== RECORDS ====================
+
+/**
+ * Record store config of a sheet
+ * @param {string} sheetName
+ * @returns {{store: string, fields: object}}
+ */
+function getRecordStore(sheetName) {
+  const config = RECORD_STORES[sheetName];
+  if (!config) throw new Error(`No record store for sheet: ${sheetName}`);
+  return config;
+}
+
+/**
+ * Index key of a date cell: local YYYY-MM-DD, so string order is date order
+ * @param {any} value - ISO string, Date or "DD/MM/YYYY"
+ * @returns {string} "" when the value is not a date
+ */
+function toRecordDate(value) {
+  if (!value) return "";
+  if (typeof value === "string" && /^\d{4}-\d{2}-\d{2}$/.test(value)) {
+    return value;
+  }
+  const dmy =
+    typeof value === "string" &&
+    value.match(/^(\d{1,2})[/-](\d{1,2})[/-](\d{4})$/);
+  const date = dmy
+    ? new Date(Number(dmy[3]), Number(dmy[2]) - 1, Number(dmy[1]))
+    : new Date(value);
+  if (isNaN(date.getTime())) return "";
+  const month = String(date.getMonth() + 1).padStart(2, "0");
+  const day = String(date.getDate()).padStart(2, "0");
+  return `${date.getFullYear()}-${month}-${day}`;
+}
+
+/**
+ * Wrap a sheet row (from fetchSheetData, with _rowIndex) as a stored record
+ * Index fields are always strings: IndexedDB skips records whose index key
+ * is missing, and "" keeps them queryable as "no value".
+ * @param {object} fields - Index field -> candidate column names
+ * @param {object} row
+ * @param {string} outletId
+ * @returns {object}
+ */
+function toRecord(fields, row, outletId) {
+  if (!row || row._rowIndex === undefined) {
+    throw new Error("Record rows need a _rowIndex");
+  }
+  const record = { outlet: outletId, row: Number(row._rowIndex), data: row };
+  Object.entries(fields).forEach(([field, columns]) => {
+    const column = columns.find(
+      (name) =>
+        row[name] !== undefined && row[name] !== null && row[name] !== "",
+    );
+    const value = column ? row[column] : "";
+    record[field] =
+      field === "date" ? toRecordDate(value) : String(value).trim();
+  });
+  return record;
+}
+
+/**
+ * Run a transaction against a sheet's record store
+ * Like the outbox, failures are thrown rather than reported as empty results.
+ * @param {string} sheetName
+ * @param {string} mode - "readonly" or "readwrite"
+ * @param {Function} run - Receives (store, config), may return an IDBRequest
+ * @returns {Promise<any>} Request result
+ */
+async function recordRequest(sheetName, mode, run) {
+  const config = getRecordStore(sheetName);
+  const db = await initDB();
+  return new Promise((resolve, reject) => {
+    const transaction = db.transaction([config.store], mode);
+    const request = run(transaction.objectStore(config.store), config);
+    transaction.oncomplete = () =>
+      resolve(request ? request.result : undefined);
+    transaction.onerror = () => reject(transaction.error);
+    transaction.onabort = () => reject(transaction.error);
+  });
+}
+
+/**
+ * Key range of one outlet's records
+ * @param {string} outletId
+ * @returns {IDBKeyRange}
+ */
+function outletRecordRange(outletId) {
+  return IDBKeyRange.bound([outletId, -Infinity], [outletId, Infinity]);
+}
+
+/**
+ * Replace every stored record of a sheet with freshly fetched rows
+ * @param {string} sheetName
+ * @param {object[]} rows - Rows from fetchSheetData
+ * @param {string} [outletId] - Defaults to the active outlet
+ */
+function replaceRecords(sheetName, rows, outletId = getActiveOutletId()) {
+  return recordRequest(sheetName, "readwrite", (store, config) => {
+    store.delete(outletRecordRange(outletId));
+    let group = "";
+    rows.forEach((row) => {
+      const record = toRecord(config.fields, row, outletId);
+      if (config.groupField) {
+        group = record[config.groupField] || group;
+        record[config.groupField] = group;
+      }
+      store.put(record);
+    });
+  });
+}
+
+/**
+ * Insert or update single rows without touching the rest of the sheet
+ * A partial row is merged into the stored one with the same _rowIndex.
+ * @param {string} sheetName
+ * @param {object|object[]} rows - Rows (or partial rows) with _rowIndex
+ * @param {string} [outletId] - Defaults to the active outlet
+ */
+function putRecords(sheetName, rows, outletId = getActiveOutletId()) {
+  const list = Array.isArray(rows) ? rows : [rows];
+  return recordRequest(sheetName, "readwrite", (store, { fields }) => {
+    list.forEach((row) => {
+      const request = store.get([outletId, Number(row._rowIndex)]);
+      request.onsuccess = () => {
+        const stored = request.result ? request.result.data : {};
+        store.put(toRecord(fields, { ...stored, ...row }, outletId));
+      };
+    });
+  });
+}
+
+/**
+ * Remove stored rows
+ * Rows below a deleted sheet row move up, so after a sheet delete the caller
+ * should reload the records instead.
+ * @param {string} sheetName
+ * @param {number|number[]} rowIndexes
+ * @param {string} [outletId] - Defaults to the active outlet
+ */
+function deleteRecords(sheetName, rowIndexes, outletId = getActiveOutletId()) {
+  const list = Array.isArray(rowIndexes) ? rowIndexes : [rowIndexes];
+  return recordRequest(sheetName, "readwrite", (store) => {
+    list.forEach((rowIndex) => store.delete([outletId, Number(rowIndex)]));
+  });
+}
+
+/**
+ * Stored rows of a sheet, in sheet order or matched through an index
+ * @param {string} sheetName
+ * @param {object} [query]
+ * @param {string} [query.index] - "sku", "phone", "invoice" or "date"
+ * @param {string} [query.equals] - Exact index value
+ * @param {string} [query.from] - Lower bound (inclusive), e.g. "2025-01-01"
+ * @param {string} [query.to] - Upper bound (inclusive)
+ * @param {number} [query.limit]
+ * @param {string} [outletId] - Defaults to the active outlet
+ * @returns {Promise<object[]>} Rows as returned by fetchSheetData
+ */
+async function queryRecords(
+  sheetName,
+  query = {},
+  outletId = getActiveOutletId(),
+) {
+  const { index, equals, from, to, limit } = query;
+  const records = await recordRequest(sheetName, "readonly", (store) => {
+    if (!index) return store.getAll(outletRecordRange(outletId), limit);
+    const range =
+      equals !== undefined
+        ? IDBKeyRange.only([outletId, String(equals)])
+        : IDBKeyRange.bound(
+            [outletId, from !== undefined ? String(from) : ""],
+            [outletId, to !== undefined ? String(to) : "\uffff"],
+          );
+    return store.index(index).getAll(range, limit);
+  });
+  return records.map((record) => record.data);
+}
+
+/**
+ * Remove every stored record of a sheet
+ * @param {string} sheetName
+ * @param {string} [outletId] - Defaults to the active outlet
+ */
+function clearRecords(sheetName, outletId = getActiveOutletId()) {
+  return recordRequest(sheetName, "readwrite", (store) =>
+    store.delete(outletRecordRange(outletId)),
+  );
+}
+
 // Export for global use
+window.IDBRecords = {
+  has: (sheetName) => Boolean(RECORD_STORES[sheetName]),
+  replaceAll: replaceRecords,
+  put: putRecords,
+  delete: deleteRecords,
+  query: queryRecords,
+  clear: clearRecords,
+};
+
+window.IDBOutbox = {
+  add: addOutboxEntry,
+  getAll: getOutboxEntries,
+  update: updateOutboxEntry,
+  remove: removeOutboxEntry,
+};
+
 window.IDBCache = {
   get: getCachedData,
   set: setCachedData,
   clear: clearCachedData,
   clearAll: clearAllCache,
+  stats: getCacheStats,
 };
@@ -1,6 +1,8 @@
 const ITEMS_PER_PAGE = 20;
 
-document.addEventListener("DOMContentLoaded", () => {
+document.addEventListener("DOMContentLoaded", async () => {
+  // The city fallback (getCityForCustomer) reads the cached customer list
+  await window.Utils.loadCustomerLookup();
   loadInvoiceData();
 });
 
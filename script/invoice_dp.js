@@ -1,4 +1,6 @@
-document.addEventListener("DOMContentLoaded", () => {
+document.addEventListener("DOMContentLoaded", async () => {
+  // The city fallback (getCityForCustomer) reads the cached customer list
+  await window.Utils.loadCustomerLookup();
   loadInvoiceData();
 });
 
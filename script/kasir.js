@@ -5,7 +5,6 @@
 
 const INVOICE_SHEET_NAME = "INVOICE";
 const PELUNASAN_SHEET_NAME = "DP/Pelunasan";
-const KUSTOMER_SHEET_NAME = "KOSTUMER";
 const QUOTATION_SHEET_NAME = "QUOTATION";
 
 // Cart data
@@ -13,14 +12,10 @@ let keranjangData = [];
 let nomorUrut = 1;
 
 // Customer data cache for autocomplete
-let allCustomers = [];
+const customerSearch = createCustomerLookup();
 let isLoadingCustomers = false;
 let selectedCustomer = { kota: "", channel: "" };
 
-// LocalStorage cache keys
-const CUSTOMER_CACHE_KEY = "larosapot_customer_cache";
-const PRODUCT_CACHE_KEY = "larosapot_product_cache";
-
 // Invoice counter storage key (stores {date: 'YYYY-MM-DD', count: number})
 const INVOICE_COUNTER_KEY = "larosapot_invoice_counter";
 
@@ -65,10 +60,12 @@ async function initKasirPage() {
   // Generate invoice number
   updateInvoiceNumber();
 
-  // Load cached data IMMEDIATELY (non-blocking sync operations)
-  loadCachedCustomers();
-  loadCachedProducts();
-  loadCachedKasir();
+  // Load cached data first (IndexedDB, no network)
+  await Promise.all([
+    loadCachedCustomers(),
+    loadCachedProducts(),
+    loadCachedKasir(),
+  ]);
 
   // Setup autocomplete event listeners IMMEDIATELY (uses cached data)
   setupAutocomplete();
@@ -94,33 +91,25 @@ async function initKasirPage() {
 }
 
 /**
- * Load customers from cache synchronously
+ * Load customers from the IndexedDB cache (DataServices.customer)
  */
-function loadCachedCustomers() {
-  try {
-    const cached = localStorage.getItem(CUSTOMER_CACHE_KEY);
-    if (cached) {
-      allCustomers = JSON.parse(cached);
-    }
-  } catch (e) {}
+async function loadCachedCustomers() {
+  const cached = await DataServices.customer.getCached();
+  if (cached && Array.isArray(cached.data)) customerSearch.build(cached.data);
 }
 
 /**
- * Load products from cache synchronously
+ * Load products from the IndexedDB cache (DataServices.product)
  */
-function loadCachedProducts() {
-  try {
-    const cached = localStorage.getItem(PRODUCT_CACHE_KEY);
-    if (cached) {
-      allProducts = JSON.parse(cached);
-    }
-  } catch (e) {}
+async function loadCachedProducts() {
+  const cached = await DataServices.product.getCached();
+  if (cached && Array.isArray(cached.data)) productIndex.build(cached.data);
 }
 
 /**
- * Load kasir dropdown from cache synchronously
+ * Load kasir dropdown from the IndexedDB cache (DataServices.users)
  */
-function loadCachedKasir() {
+async function loadCachedKasir() {
   const select = document.getElementById("kasir");
   if (!select) return;
 
@@ -130,33 +119,11 @@ function loadCachedKasir() {
     if (user) defaultValue = user.username;
   }
 
-  try {
-    const cached = localStorage.getItem("larosapot_users_cache");
-    if (cached) {
-      const users = JSON.parse(cached);
-      select.innerHTML = "";
-      users.forEach((user) => {
-        const username = user.USERNAME || user.username || user.Username;
-        if (username) {
-          const option = document.createElement("option");
-          option.value = username;
-          option.textContent = username;
-          if (
-            defaultValue &&
-            username.toLowerCase() === defaultValue.toLowerCase()
-          ) {
-            option.selected = true;
-          }
-          select.appendChild(option);
-        }
-      });
-    } else if (defaultValue) {
-      select.innerHTML = `<option value="${defaultValue}" selected>${defaultValue}</option>`;
-    }
-  } catch (e) {
-    if (defaultValue) {
-      select.innerHTML = `<option value="${defaultValue}" selected>${defaultValue}</option>`;
-    }
+  const cached = await DataServices.users.getCached();
+  if (cached && Array.isArray(cached.data) && cached.data.length > 0) {
+    populateKasirSelect(select, cached.data, defaultValue);
+  } else if (defaultValue) {
+    select.innerHTML = `<option value="${defaultValue}" selected>${defaultValue}</option>`;
   }
 }
 
@@ -186,29 +153,8 @@ async function refreshKasirDropdown() {
   }
 
   try {
-    const result = await fetchSheetData("USERS");
-    if (result && result.data && result.data.length > 0) {
-      localStorage.setItem(
-        "larosapot_users_cache",
-        JSON.stringify(result.data),
-      );
-      select.innerHTML = "";
-      result.data.forEach((user) => {
-        const username = user.USERNAME || user.username || user.Username;
-        if (username) {
-          const option = document.createElement("option");
-          option.value = username;
-          option.textContent = username;
-          if (
-            defaultValue &&
-            username.toLowerCase() === defaultValue.toLowerCase()
-          ) {
-            option.selected = true;
-          }
-          select.appendChild(option);
-        }
-      });
-    }
+    const users = await DataServices.users.refresh();
+    if (users.length > 0) populateKasirSelect(select, users, defaultValue);
   } catch (error) {
     console.warn("Error refreshing kasir:", error);
   }
@@ -289,81 +235,33 @@ async function updateInvoiceNumber() {
  * Load all customers for autocomplete suggestions
  */
 async function loadCustomersForAutocomplete() {
-  // Step 1: Load from cache immediately for instant UI
-  try {
-    const cached = localStorage.getItem(CUSTOMER_CACHE_KEY);
-    if (cached) {
-      allCustomers = JSON.parse(cached);
-      console.log(
-        "Loaded",
-        allCustomers.length,
-        "customers from cache (instant)",
-      );
-    }
-  } catch (e) {
-    console.error("Error loading customer cache:", e);
-  }
-
-  // Step 2: Fetch fresh data in background and update cache
+  // The cached list is already loaded; download only if the sheet changed
   try {
-    const result = await fetchSheetData(KUSTOMER_SHEET_NAME);
-    if (result.data && result.data.length > 0) {
-      allCustomers = result.data;
-      // Update cache
-      try {
-        localStorage.setItem(CUSTOMER_CACHE_KEY, JSON.stringify(result.data));
-      } catch (cacheError) {
-        console.warn("Could not cache customer data:", cacheError);
-      }
-      console.log("Refreshed", allCustomers.length, "customers from server");
-    }
+    const customers = await DataServices.customer.refresh();
+    if (customers.length > 0) customerSearch.build(customers);
   } catch (error) {
     console.error("Error loading customers:", error);
   }
 }
 
-// Product data cache for autocomplete
-let allProducts = [];
-const PRODUK_SHEET_NAME = "PERSEDIAAN BARANG";
+// Product search index for autocomplete (search-index.js)
+const productIndex = createProductSearchIndex();
 
 /**
  * Load all products for autocomplete suggestions
  */
 async function loadProductsForAutocomplete() {
-  // Step 1: Load from cache immediately
-  try {
-    const cached = localStorage.getItem(PRODUCT_CACHE_KEY);
-    if (cached) {
-      allProducts = JSON.parse(cached);
-      console.log(
-        "Loaded",
-        allProducts.length,
-        "products from cache (instant)",
-      );
-    }
-  } catch (e) {
-    console.error("Error loading product cache:", e);
-  }
-
-  // Step 2: Fetch fresh data in background
+  // The cached list is already loaded; download only if the sheet changed
   try {
-    const result = await fetchSheetData(PRODUK_SHEET_NAME);
-    if (result.data && result.data.length > 0) {
-      allProducts = result.data;
-      try {
-        localStorage.setItem(PRODUCT_CACHE_KEY, JSON.stringify(result.data));
-      } catch (cacheError) {
-        console.warn("Could not cache product data:", cacheError);
-      }
-      console.log("Refreshed", allProducts.length, "products from server");
-    }
+    const products = await DataServices.product.refresh();
+    if (products.length > 0) productIndex.build(products);
   } catch (error) {
     console.error("Error loading products:", error);
   }
 }
 
 /**
- * Setup product autocomplete event listeners
+ * Setup product autocomplete (autocomplete.js), searching by SKU or name
  */
 function setupProductAutocomplete() {
   const skuInput = document.getElementById("noSku");
@@ -371,141 +269,30 @@ function setupProductAutocomplete() {
 
   if (!skuInput || !suggestionList) return;
 
-  let debounceTimer;
-
-  skuInput.addEventListener("input", (e) => {
-    clearTimeout(debounceTimer);
-    debounceTimer = setTimeout(() => {
-      showProductSuggestions(e.target.value);
-    }, 100); // Reduced from 200ms for faster response
-  });
-
-  skuInput.addEventListener("focus", () => {
-    if (skuInput.value.trim().length >= 1) {
-      showProductSuggestions(skuInput.value);
-    }
-  });
-
-  document.addEventListener("click", (e) => {
-    if (
-      !e.target.closest("#noSku") &&
-      !e.target.closest("#skuSuggestionList")
-    ) {
-      hideProductSuggestions();
-    }
-  });
-
-  // Keyboard navigation for SKU
-  skuInput.addEventListener("keydown", function (e) {
-    let list = document.getElementById("skuSuggestionList");
-    if (!list || !list.classList.contains("show")) return;
-
-    let items = list.getElementsByClassName("suggestion-item");
-    if (e.key === "ArrowDown") {
-      e.preventDefault();
-      currentProductFocus++;
-      addActiveProduct(items);
-    } else if (e.key === "ArrowUp") {
-      e.preventDefault();
-      currentProductFocus--;
-      addActiveProduct(items);
-    } else if (e.key === "Enter") {
-      if (currentProductFocus > -1) {
-        e.preventDefault();
-        if (items[currentProductFocus]) items[currentProductFocus].click();
-      }
-    }
-  });
-}
-
-let currentProductFocus = -1;
-
-function addActiveProduct(x) {
-  if (!x) return false;
-  removeActiveProduct(x);
-  if (currentProductFocus >= x.length) currentProductFocus = 0;
-  if (currentProductFocus < 0) currentProductFocus = x.length - 1;
-  x[currentProductFocus].classList.add("active");
-
-  // Scroll to active item
-  x[currentProductFocus].scrollIntoView({
-    behavior: "smooth",
-    block: "nearest",
+  createAutocomplete({
+    input: skuInput,
+    list: suggestionList,
+    search: (query, { limit }) => productIndex.search(query, limit),
+    describe: (product) => ({
+      title: product["SKU"] || "",
+      subtitle: `${product["NAMA PRODUK"] || ""} - Rp${(
+        parseFloat(product["HARGA JUAL"]) || 0
+      ).toLocaleString("id-ID")}`,
+    }),
+    onSelect: (product) =>
+      selectProduct(
+        product["SKU"] || "",
+        product["NAMA PRODUK"] || "",
+        product["SATUAN"] || "Pcs",
+        parseFloat(product["HARGA JUAL"]) || 0,
+        product["KATEGORI"] || "",
+      ),
+    delay: 100,
+    emptyMessage: "Produk tidak ditemukan",
+    searchOnFocus: true,
   });
 }
 
-function removeActiveProduct(x) {
-  for (let i = 0; i < x.length; i++) {
-    x[i].classList.remove("active");
-  }
-}
-
-/**
- * Show product suggestions based on SKU input
- */
-function showProductSuggestions(query) {
-  const suggestionList = document.getElementById("skuSuggestionList");
-  if (!suggestionList) return;
-
-  currentProductFocus = -1; // Reset focus
-  query = query.trim().toUpperCase();
-
-  if (query.length < 1) {
-    hideProductSuggestions();
-    return;
-  }
-
-  // Filter products by SKU or name
-  const matches = allProducts.filter((p) => {
-    const sku = String(p["SKU"] || "").toUpperCase();
-    const nama = String(p["NAMA PRODUK"] || "").toUpperCase();
-    return sku.includes(query) || nama.includes(query);
-  });
-
-  suggestionList.innerHTML = "";
-
-  if (matches.length === 0) {
-    suggestionList.innerHTML = `
-      <div class="suggestion-item no-result">
-        Produk tidak ditemukan
-      </div>
-    `;
-  } else {
-    matches.forEach((product) => {
-      const sku = product["SKU"] || "";
-      const nama = product["NAMA PRODUK"] || "";
-      const satuan = product["SATUAN"] || "Pcs";
-      const harga = parseFloat(product["HARGA JUAL"]) || 0;
-      const kategori = product["KATEGORI"] || "";
-
-      const item = document.createElement("div");
-      item.className = "suggestion-item";
-      item.innerHTML = `
-        <div class="phone">${sku}</div>
-        <div class="name">${nama} - Rp${harga.toLocaleString("id-ID")}</div>
-      `;
-
-      item.addEventListener("click", () => {
-        selectProduct(sku, nama, satuan, harga, kategori);
-      });
-
-      suggestionList.appendChild(item);
-    });
-  }
-
-  suggestionList.classList.add("show");
-}
-
-/**
- * Hide product suggestions dropdown
- */
-function hideProductSuggestions() {
-  const suggestionList = document.getElementById("skuSuggestionList");
-  if (suggestionList) {
-    suggestionList.classList.remove("show");
-  }
-}
-
 /**
  * Select a product from suggestions
  */
@@ -518,8 +305,6 @@ function selectProduct(sku, nama, satuan, harga, kategori = "") {
   // Store category in dataset for later use
   document.getElementById("noSku").dataset.kategori = kategori;
 
-  hideProductSuggestions();
-
   // Recalculate total if jumlah already has a value
   hitungTotalHarga();
 
@@ -528,7 +313,7 @@ function selectProduct(sku, nama, satuan, harga, kategori = "") {
 }
 
 /**
- * Setup autocomplete event listeners
+ * Setup customer autocomplete (autocomplete.js), searching by phone prefix
  */
 function setupAutocomplete() {
   const noTeleponInput = document.getElementById("noTelepon");
@@ -536,173 +321,27 @@ function setupAutocomplete() {
 
   if (!noTeleponInput || !suggestionList) return;
 
-  // Debounce timer
-  let debounceTimer;
-
-  // On input, show suggestions
-  noTeleponInput.addEventListener("input", (e) => {
-    clearTimeout(debounceTimer);
-    debounceTimer = setTimeout(() => {
-      showSuggestions(e.target.value);
-    }, 100); // Reduced from 200ms for faster response
-  });
-
-  // On focus, show suggestions if there's input
-  noTeleponInput.addEventListener("focus", () => {
-    if (noTeleponInput.value.trim().length >= 2) {
-      showSuggestions(noTeleponInput.value);
-    }
-  });
-
-  // Keyboard navigation for Customer
-  noTeleponInput.addEventListener("keydown", function (e) {
-    let list = document.getElementById("suggestionList");
-    if (!list || !list.classList.contains("show")) return;
-
-    let items = list.getElementsByClassName("suggestion-item");
-    if (e.key === "ArrowDown") {
-      e.preventDefault();
-      currentFocus++;
-      addActive(items);
-    } else if (e.key === "ArrowUp") {
-      e.preventDefault();
-      currentFocus--;
-      addActive(items);
-    } else if (e.key === "Enter") {
-      if (currentFocus > -1) {
-        e.preventDefault();
-        if (items[currentFocus]) items[currentFocus].click();
-      }
-    }
+  createAutocomplete({
+    input: noTeleponInput,
+    list: suggestionList,
+    search: (query, { limit }) => customerSearch.byPhone(query, limit),
+    describe: (customer) => ({
+      title: customer["NO HP"] || "",
+      subtitle: customer["NAMA PELANGGAN"] || "",
+    }),
+    onSelect: (customer) =>
+      selectCustomer(
+        customer["NO HP"] || "",
+        customer["NAMA PELANGGAN"] || "",
+        customer["ALAMAT"] || "",
+        customer["KOTA"] || "",
+        customer["CHANNEL"] || "",
+      ),
+    minLength: 2,
+    delay: 100,
+    emptyMessage: "Pelanggan tidak ditemukan",
+    searchOnFocus: true,
   });
-
-  // Hide suggestions when clicking outside
-  document.addEventListener("click", (e) => {
-    if (!e.target.closest(".autocomplete-container")) {
-      hideSuggestions();
-    }
-  });
-}
-
-let currentFocus = -1;
-
-function addActive(x) {
-  if (!x) return false;
-  removeActive(x);
-  if (currentFocus >= x.length) currentFocus = 0;
-  if (currentFocus < 0) currentFocus = x.length - 1;
-  x[currentFocus].classList.add("active");
-
-  // Scroll to active item
-  x[currentFocus].scrollIntoView({
-    behavior: "smooth",
-    block: "nearest",
-  });
-}
-
-function removeActive(x) {
-  for (let i = 0; i < x.length; i++) {
-    x[i].classList.remove("active");
-  }
-}
-
-/**
- * Format phone number for comparison (normalize to 62xxx format)
- */
-function normalizePhone(phone) {
-  if (!phone) return "";
-  phone = phone.toString().trim();
-
-  // Remove + and spaces
-  phone = phone.replace(/[\s+]/g, "");
-
-  // Remove leading 0 and add 62
-  if (phone.startsWith("0")) {
-    phone = "62" + phone.substring(1);
-  }
-  // If no country code, add 62
-  else if (!phone.startsWith("62")) {
-    phone = "62" + phone;
-  }
-
-  return phone;
-}
-
-/**
- * Show customer suggestions based on input
- */
-function showSuggestions(query) {
-  const suggestionList = document.getElementById("suggestionList");
-  if (!suggestionList) return;
-
-  currentFocus = -1; // Reset focus
-  query = query.trim();
-
-  // Need at least 2 characters
-  if (query.length < 2) {
-    hideSuggestions();
-    return;
-  }
-
-  const normalizedQuery = normalizePhone(query);
-
-  // Filter customers by phone number
-  const matches = allCustomers.filter((c) => {
-    const phone = String(c["NO HP"] || c["NO\nHP"] || c["No HP"] || "");
-    const normalizedPhone = normalizePhone(phone);
-    return normalizedPhone.includes(normalizedQuery) || phone.includes(query);
-  });
-
-  // Clear and populate suggestions
-  suggestionList.innerHTML = "";
-
-  if (matches.length === 0) {
-    suggestionList.innerHTML = `
-      <div class="suggestion-item no-result">
-        Pelanggan tidak ditemukan
-      </div>
-    `;
-  } else {
-    // Limit to 10 results
-    matches.forEach((customer) => {
-      const phone =
-        customer["NO HP"] || customer["NO\nHP"] || customer["No HP"] || "";
-      const nama =
-        customer["NAMA PELANGGAN"] ||
-        customer["NAMA\nPELANGGAN"] ||
-        customer["Nama Pelanggan"] ||
-        "";
-      const alamat = customer["ALAMAT"] || customer["Alamat"] || "";
-
-      const city = customer["KOTA"] || customer["Kota"] || "";
-      const channel = customer["CHANNEL"] || customer["Channel"] || "";
-
-      const item = document.createElement("div");
-      item.className = "suggestion-item";
-      item.innerHTML = `
-        <div class="phone">${phone}</div>
-        <div class="name">${nama}</div>
-      `;
-
-      item.addEventListener("click", () => {
-        selectCustomer(phone, nama, alamat, city, channel);
-      });
-
-      suggestionList.appendChild(item);
-    });
-  }
-
-  suggestionList.classList.add("show");
-}
-
-/**
- * Hide suggestions dropdown
- */
-function hideSuggestions() {
-  const suggestionList = document.getElementById("suggestionList");
-  if (suggestionList) {
-    suggestionList.classList.remove("show");
-  }
 }
 
 // Store selected customer details: already declared globally
@@ -718,8 +357,6 @@ function selectCustomer(phone, nama, alamat, kota = "", channel = "") {
   // Store extra details
   selectedCustomer.kota = kota;
   selectedCustomer.channel = channel;
-
-  hideSuggestions();
 }
 
 /**
@@ -1027,34 +664,30 @@ async function saveInvoice(status) {
       btnLunas.textContent = "Menyimpan...";
     }
 
+    // Every write of this checkout goes into one batch request so the server
+    // can apply it atomically (all-or-nothing) under a single lock
+    const operations = [];
+
     // Determine Deletion Target (if Edit Mode)
     if (isEditMode && editOriginalOrderNo) {
-      const deleteSheet = editOriginSheet || INVOICE_SHEET_NAME;
-      const deleteResult = await deleteInvoice(
-        deleteSheet,
-        editOriginalOrderNo,
-      );
-
-      if (!deleteResult.success) {
-        throw new Error(
-          `Gagal menghapus invoice lama dari ${deleteSheet}: ` +
-            deleteResult.error,
-        );
-      }
+      operations.push({
+        action: "delete-invoice",
+        sheet: editOriginSheet || INVOICE_SHEET_NAME,
+        data: { noPesanan: editOriginalOrderNo },
+      });
     }
 
-    // Get the actual (incremented) invoice number NOW, right before saving
+    // Get the actual (incremented) invoice number inside the batch, right before saving
     // This ensures the counter only increments when we actually save
     let finalNoPesanan = noPesanan;
+    let invoiceNoValue = noPesanan;
+    let idOperationIndex = -1;
     if (!isEditMode && !isCheckoutMode) {
       // Only get new ID for new invoices, not edits or checkouts
-      const idResult = await DataServices.getNextId("INV", tanggal);
-      if (idResult.success) {
-        finalNoPesanan = idResult.id;
-        document.getElementById("noPesanan").value = finalNoPesanan;
-      } else {
-        throw new Error("Gagal mendapatkan nomor invoice: " + idResult.error);
-      }
+      idOperationIndex = operations.length;
+      operations.push({ action: "get-next-id", type: "INV", date: tanggal });
+      // Resolved by the server to the allocated ID
+      invoiceNoValue = { $ref: `${idOperationIndex}.id` };
     }
 
     // Determine Save Target (Always INCOME now)
@@ -1095,7 +728,7 @@ async function saveInvoice(status) {
           PAYMENT: payment,
           "RO/PO": roPo,
           "DP/FP": dpFpStatus,
-          "NO INVOICE": finalNoPesanan,
+          "NO INVOICE": invoiceNoValue,
           NAME: namaPelanggan,
           HP: noTelepon,
           CITY: selectedCustomer.kota || "",
@@ -1151,96 +784,110 @@ async function saveInvoice(status) {
       rows.push(rowData);
     });
 
+    // Shown in riwayat while the checkout waits in the outbox (offline)
+    const pendingNoPesanan = `${noPesanan} (pending)`;
+    const previewRows = rows.map((row) => ({
+      ...row,
+      "NO INVOICE": row["NO INVOICE"] ? pendingNoPesanan : "",
+    }));
+
     for (const row of rows.reverse()) {
-      const result = await addSheetRow(targetSheetName, row);
-      if (!result.success) {
-        throw new Error(result.error || "Gagal menyimpan data");
-      }
+      operations.push({ action: "add", sheet: targetSheetName, data: row });
     }
 
     // Increment Transaction Logic (Only if LUNAS)
     // Logic update: Only increment if it wasn't ALREADY LUNAS.
     // If we are editing a LUNAS invoice, we shouldn't increment again.
-    // But currently we can't easily track old status.
     // Exception: If origin was DATA_PELUNASAN (DP), and now LUNAS, then Increment.
-    // If origin was DATA_INVOICE (LUNAS), and now LUNAS, don't increment?
-    // User request: "kustomer ingin membayar... data dp yang ada di riwayat... menuju halaman kasir... lalu datanya diupdate"
-    // So usually we are converting DP -> LUNAS.
-    // Let's assume we increment if status is LUNAS. (Ideally backend handles idempotency)
-    // Backend increments if we call it.
-    if (
+    // Deferred: the counters are not needed for the receipt, so the server
+    // queues them and a background trigger applies them (with retries).
+    // Optional: like before, a failed counter update never undoes the sale.
+    const countsAsSale =
       status === "LUNAS" &&
-      noTelepon &&
-      (!isEditMode || editOriginSheet === PELUNASAN_SHEET_NAME)
-    ) {
-      try {
-        await incrementCustomerTransaction(noTelepon);
-        console.log("Customer transaction count incremented for:", noTelepon);
-      } catch (e) {
-        console.error("Failed to increment customer transaction:", e);
-      }
+      (!isEditMode || editOriginSheet === PELUNASAN_SHEET_NAME);
+    if (countsAsSale && noTelepon) {
+      operations.push({
+        action: "increment-transaction",
+        phoneNumber: noTelepon,
+        defer: true,
+        optional: true,
+      });
     }
 
     // Increment Product Sold Count (Only for new LUNAS or DP->LUNAS)
-    if (
-      status === "LUNAS" &&
-      (!isEditMode || editOriginSheet === PELUNASAN_SHEET_NAME)
-    ) {
-      try {
-        const soldItems = keranjangData.map((item) => ({
+    if (countsAsSale) {
+      operations.push({
+        action: "increment-product-sold",
+        items: keranjangData.map((item) => ({
           sku: item.sku,
           jumlah: item.jumlah,
-        }));
-        await incrementProductSold(soldItems);
-        console.log("Product sold count incremented");
-      } catch (e) {
-        console.error("Failed to increment product sold count:", e);
-      }
+        })),
+        defer: true,
+        optional: true,
+      });
     }
 
     // If this was a checkout from quotation, delete the original quotation
-    console.log("Checkout mode check:", {
-      isCheckoutMode,
-      checkoutQuotationNo,
-    });
+    // Not deferred: the quotation must disappear at once so it cannot be
+    // checked out twice
+    let quotationOperationIndex = -1;
     if (isCheckoutMode && checkoutQuotationNo) {
-      try {
-        console.log("Attempting to delete quotation:", checkoutQuotationNo);
-        const deleteResult = await deleteInvoice(
-          QUOTATION_SHEET_NAME,
-          checkoutQuotationNo,
-        );
-        console.log("Delete result:", deleteResult);
-        if (deleteResult.success) {
-          console.log("Quotation deleted successfully:", checkoutQuotationNo);
-        } else {
-          console.warn("Failed to delete quotation:", deleteResult.error);
-          alert("Warning: Quotation tidak terhapus: " + deleteResult.error);
-        }
-      } catch (e) {
-        console.error("Error deleting quotation:", e);
-        alert("Error deleting quotation: " + e.message);
-        // Don't block the flow - invoice was saved successfully
+      quotationOperationIndex = operations.length;
+      operations.push({
+        action: "delete-invoice",
+        sheet: QUOTATION_SHEET_NAME,
+        data: { noPesanan: checkoutQuotationNo },
+        optional: true,
+      });
+    }
+
+    // Durable: if the server cannot be reached the checkout stays in the
+    // outbox and is sent automatically once the connection is back
+    const batchResult = await runBatchOperations(operations, {
+      durable: true,
+      preview:
+        idOperationIndex !== -1
+          ? { sheet: targetSheetName, rows: previewRows }
+          : null,
+    });
+
+    if (batchResult.queued) {
+      finalNoPesanan = idOperationIndex !== -1 ? pendingNoPesanan : noPesanan;
+    } else if (idOperationIndex !== -1) {
+      finalNoPesanan = batchResult.results[idOperationIndex].id;
+      document.getElementById("noPesanan").value = finalNoPesanan;
+    }
+
+    if (quotationOperationIndex !== -1 && !batchResult.queued) {
+      const deleteResult = batchResult.results[quotationOperationIndex];
+      if (deleteResult.success) {
+        console.log("Quotation deleted successfully:", checkoutQuotationNo);
+      } else {
+        console.warn("Failed to delete quotation:", deleteResult.error);
+        alert("Warning: Quotation tidak terhapus: " + deleteResult.error);
       }
       // Reset checkout mode state
       isCheckoutMode = false;
       checkoutQuotationNo = "";
 
       // Clear quotation cache so Data Quotation page shows fresh data
-      localStorage.removeItem("quotation_data_cache");
-      localStorage.removeItem("quotation_cache_timestamp");
-    } else {
-      console.log("Not in checkout mode or no quotation number");
+      await DataServices.quotation.clearCache();
     }
 
-    alert(
-      `Invoice ${noPesanan} berhasil disimpan dengan status ${status} di sheet ${targetSheetName}!`,
-    );
+    if (batchResult.queued) {
+      alert(
+        `Koneksi ke server terputus. Invoice ${finalNoPesanan} disimpan di perangkat ini dan akan dikirim otomatis saat koneksi kembali.`,
+      );
+    } else {
+      alert(
+        `Invoice ${finalNoPesanan} berhasil disimpan dengan status ${status} di sheet ${targetSheetName}!`,
+      );
+    }
 
     // Prepare data for invoice page (use raw variables before reset)
     const invoiceData = {
       info: {
-        noPesanan: noPesanan,
+        noPesanan: finalNoPesanan,
         tanggal: formattedDate,
         kasir: kasir,
         transaksi: status === "LUNAS" ? "Lunas" : status, // Or customize
@@ -29,54 +29,21 @@ async function loadCustomers() {
   });
 }
 
-function renderCustomerTable(customers) {
-  const tbody = document.getElementById("kustomerTableBody");
-  if (!tbody) return;
-
-  customersData = customers;
-
-  if (customers.length > 0) {
-    console.log("Customer data keys:", Object.keys(customers[0]));
-  }
-
-  tbody.innerHTML = customers
-    .map(
-      (customer) => `
-        <tr data-row-index="${customer._rowIndex}">
+// Windowed renderer for the customer list (virtual-table.js)
+const customerTable = createVirtualTable({
+  tbody: document.getElementById("kustomerTableBody"),
+  colSpan: 8,
+  keyOf: (customer) => customer._rowIndex,
+  renderRow: (customer) => `
             <td class="text-left">${formatDisplayDate(
-              getValueFromKeys(customer, ["TANGGAL", "Tanggal"], ""),
-            )}</td>
-            <td class="text-left">${getValueFromKeys(
-              customer,
-              ["NAMA PELANGGAN", "NAMA\nPELANGGAN", "Nama Pelanggan", "NAMA"],
-              "",
-            )}</td>
-            <td class="text-left">${getValueFromKeys(
-              customer,
-              ["NO HP", "No HP", "NO\nHP"],
-              "",
-            )}</td>
-            <td class="text-left">${getValueFromKeys(
-              customer,
-              ["ALAMAT", "Alamat"],
-              "",
-            )}</td>
-            <td class="text-left">${getValueFromKeys(
-              customer,
-              ["KOTA", "Kota"],
-              "",
-            )}</td>
-            <td class="text-left">${getValueFromKeys(
-              customer,
-              ["CHANNEL", "Channel"],
-              "",
-            )}</td>
-            <td class="text-center">${getValueFromKeys(
-              customer,
-              ["JUMLAH TRANSAKSI", "JUMLAH\nTRANSAKSI", "Jumlah Transaksi"],
-              0,
-              true,
+              customer["TANGGAL"] || "",
             )}</td>
+            <td class="text-left">${customer["NAMA PELANGGAN"] || ""}</td>
+            <td class="text-left">${customer["NO HP"] || ""}</td>
+            <td class="text-left">${customer["ALAMAT"] || ""}</td>
+            <td class="text-left">${customer["KOTA"] || ""}</td>
+            <td class="text-left">${customer["CHANNEL"] || ""}</td>
+            <td class="text-center">${customer["JUMLAH TRANSAKSI"] || 0}</td>
             <td class="text-center">
                 <div class="action-buttons">
                     <button class="btn-edit" onclick="editCustomer(${
@@ -87,10 +54,12 @@ function renderCustomerTable(customers) {
                     })">Delete</button>
                 </div>
             </td>
-        </tr>
     `,
-    )
-    .join("");
+});
+
+function renderCustomerTable(customers) {
+  customersData = customers;
+  customerTable.setItems(customers);
 }
 
 function setupKustomerEventListeners() {
@@ -186,11 +155,7 @@ async function addCustomer(formData) {
 
   // Frontend validation: Check for duplicate phone number
   const existingCustomer = customersData.find((c) => {
-    const existingPhone = getValueFromKeys(
-      c,
-      ["NO HP", "NO\\nHP", "No HP"],
-      "",
-    );
+    const existingPhone = c["NO HP"] || "";
     return (
       String(existingPhone).trim().toLowerCase() ===
       String(newPhoneNumber).trim().toLowerCase()
@@ -219,7 +184,7 @@ async function addCustomer(formData) {
   const tempRowIndex = Date.now();
   const newCustomer = { ...data, _rowIndex: tempRowIndex };
   customersData.push(newCustomer);
-  await customerService.updateCache(customersData);
+  await customerService.putRecord(newCustomer);
   renderCustomerTable(customersData);
   closeCustomerModal();
 
@@ -235,7 +200,7 @@ async function addCustomer(formData) {
   } catch (error) {
     // Rollback on error
     customersData = customersData.filter((c) => c._rowIndex !== tempRowIndex);
-    await customerService.updateCache(customersData);
+    await customerService.deleteRecord(tempRowIndex);
     renderCustomerTable(customersData);
 
     let msg = error.message;
@@ -254,16 +219,12 @@ async function editCustomer(rowIndex) {
     return;
   }
 
-  const tanggal = getValueFromKeys(customer, ["TANGGAL", "Tanggal"], "");
-  const nama = getValueFromKeys(
-    customer,
-    ["NAMA PELANGGAN", "NAMA\nPELANGGAN", "Nama Pelanggan"],
-    "",
-  );
-  const noHp = getValueFromKeys(customer, ["NO HP", "NO\nHP", "No HP"], "");
-  const alamat = getValueFromKeys(customer, ["ALAMAT", "Alamat"], "");
-  const kota = getValueFromKeys(customer, ["KOTA", "Kota"], "");
-  const channel = getValueFromKeys(customer, ["CHANNEL", "Channel"], "");
+  const tanggal = customer["TANGGAL"] || "";
+  const nama = customer["NAMA PELANGGAN"] || "";
+  const noHp = customer["NO HP"] || "";
+  const alamat = customer["ALAMAT"] || "";
+  const kota = customer["KOTA"] || "";
+  const channel = customer["CHANNEL"] || "";
 
   // Format date for input
   let dateValue = "";
@@ -397,7 +358,7 @@ async function updateCustomer(formData) {
   // Optimistic update
   if (customerIndex !== -1) {
     customersData[customerIndex] = { ...customersData[customerIndex], ...data };
-    await customerService.updateCache(customersData);
+    await customerService.putRecord(customersData[customerIndex]);
     renderCustomerTable(customersData);
   }
   closeCustomerModal();
@@ -418,7 +379,7 @@ async function updateCustomer(formData) {
     // Rollback
     if (originalData && customerIndex !== -1) {
       customersData[customerIndex] = originalData;
-      await customerService.updateCache(customersData);
+      await customerService.putRecord(originalData);
       renderCustomerTable(customersData);
     }
     alert("Gagal mengupdate pelanggan: " + error.message);
@@ -439,7 +400,7 @@ async function deleteCustomer(rowIndex) {
 
   // Optimistic update
   customersData = customersData.filter((c) => c._rowIndex !== rowIndex);
-  await customerService.updateCache(customersData);
+  await customerService.deleteRecord(rowIndex);
   renderCustomerTable(customersData);
 
   // Sync to Google Sheets
@@ -455,7 +416,7 @@ async function deleteCustomer(rowIndex) {
     // Rollback
     if (deletedCustomer) {
       customersData.splice(deletedIndex, 0, deletedCustomer);
-      await customerService.updateCache(customersData);
+      await customerService.putRecord(deletedCustomer);
       renderCustomerTable(customersData);
     }
     alert("Gagal menghapus pelanggan: " + error.message);
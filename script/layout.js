@@ -43,6 +43,18 @@ function injectLayout() {
   const path = window.location.pathname;
   const page = path.split("/").pop() || "index.html";
 
+  // Outlet switcher, only when more than one outlet is configured (config.js)
+  const activeOutlet = getActiveOutletId();
+  const outletSwitcherHTML =
+    OUTLETS.length > 1
+      ? `<select class="outlet-switcher" onchange="switchOutlet(this.value)">${OUTLETS.map(
+          (outlet) =>
+            `<option value="${outlet.id}" ${
+              outlet.id === activeOutlet ? "selected" : ""
+            }>${outlet.name}</option>`,
+        ).join("")}</select>`
+      : "";
+
   const sidebarHTML = `
     <div class="sidebar">
         <div class="logo-section">
@@ -50,6 +62,8 @@ function injectLayout() {
                 <img src="asset/image/larosa-logo.png" alt="Larosa Pot" style="width: 100%; height: 100%; object-fit: contain;">
             </div>
             <div class="brand-name">LAROSAPOT</div>
+            ${outletSwitcherHTML}
+            <div class="outbox-status" hidden></div>
         </div>
         
         <div class="nav-menu">
@@ -154,12 +168,32 @@ function injectLayout() {
   }
 }
 
+// Outbox status (sheets-api.js): writes saved on this device but not sent yet
+window.addEventListener("outboxchange", (event) => {
+  const badge = document.querySelector(".outbox-status");
+  if (!badge) return;
+  const { pending, failed, lastError } = event.detail;
+  const parts = [];
+  if (pending > 0) parts.push(`${pending} menunggu sinkron`);
+  if (failed > 0) parts.push(`${failed} gagal dikirim`);
+  badge.hidden = parts.length === 0;
+  badge.textContent = parts.join(" · ");
+  badge.classList.toggle("failed", failed > 0);
+  badge.title = lastError || "";
+});
+
 // Global Loader Control
 window.showGlobalLoader = function () {
   const loader = document.querySelector(".global-loader");
   if (loader) loader.classList.add("visible");
 };
 
+// Switch outlet and reload so every page reads the new outlet's data
+window.switchOutlet = function (outletId) {
+  setActiveOutlet(outletId);
+  window.location.reload();
+};
+
 // Sidebar Toggle Logic
 window.toggleSubmenu = function (header) {
   const menuItem = header.parentElement;
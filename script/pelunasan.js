@@ -20,7 +20,6 @@ async function loadPelunasanData() {
   groupedInvoices = await pelunasanService.loadGroupedData({
     tbody: tableBody,
     onRender: renderTable,
-    groupFn: groupDataByOrder,
   });
 
   setupSearch();
@@ -41,8 +40,8 @@ function setupSearch() {
     const filteredOrder = groupedInvoices.order.filter((noPesanan) => {
       const rows = groupedInvoices.map[noPesanan];
       const mainRow = rows[0];
-      const nama = (mainRow["NAMA PELANGGAN"] || "").toLowerCase();
-      const kota = (mainRow["KOTA"] || "").toLowerCase();
+      const nama = String(mainRow["NAME"] || "").toLowerCase();
+      const kota = String(mainRow["CITY"] || "").toLowerCase();
       const searchSource = `${noPesanan.toLowerCase()} ${nama} ${kota}`;
 
       return keywords.every((kw) => searchSource.includes(kw));
@@ -52,112 +51,73 @@ function setupSearch() {
   });
 }
 
-function groupDataByOrder(data) {
-  const groups = {};
-  const orderedGroups = [];
-  let currentOrderNo = null;
-
-  const invoiceKeys = [
-    "NO INVOICE",
-    "INVOICE",
-    "NO PESANAN",
-    "NO\nPESANAN",
-    "INVOICE\n",
-    "invoice",
-  ];
-
-  data.forEach((row) => {
-    // Filter for DP only
-    if (row["DP/FP"] !== "DP") return;
-
-    let noPesanan = null;
-    for (const key of invoiceKeys) {
-      if (row[key]) {
-        noPesanan = row[key];
-        break;
-      }
-    }
-
-    if (!noPesanan) {
-      const keys = Object.keys(row);
-      for (const key of keys) {
-        if (
-          key.toUpperCase().includes("INVOICE") ||
-          key.toUpperCase().includes("PESANAN")
-        ) {
-          if (row[key]) {
-            noPesanan = row[key];
-            break;
-          }
-        }
-      }
-    }
-
-    if (noPesanan) {
-      currentOrderNo = noPesanan;
-      if (!groups[currentOrderNo]) {
-        groups[currentOrderNo] = [];
-        orderedGroups.push(currentOrderNo);
-      }
-    }
-    if (currentOrderNo) {
-      groups[currentOrderNo].push(row);
-    }
-  });
-
-  return { map: groups, order: orderedGroups };
-}
+// Windowed renderer for the settlement list (virtual-table.js)
+const pelunasanTable = createVirtualTable({
+  tbody: document.getElementById("riwayatTableBody"),
+  colSpan: 6,
+  keyOf: (entry) => entry.noPesanan,
+  renderRow: (entry) => renderPelunasanRow(entry.noPesanan, entry.rows),
+  emptyMessage: "Tidak ada transaksi yang perlu dilunasi.",
+});
 
 function renderTable(groupedData) {
-  const tableBody = document.querySelector("tbody");
-  tableBody.innerHTML = "";
-
   const { map, order } = groupedData;
+  pelunasanTable.setItems(
+    order.map((noPesanan) => ({ noPesanan, rows: map[noPesanan] })),
+  );
+}
 
-  if (order.length === 0) {
-    showTableMessage(tableBody, "Tidak ada transaksi yang perlu dilunasi.", 6);
-    return;
-  }
+/**
+ * Cells of one invoice waiting for settlement
+ * @param {string} noPesanan
+ * @param {Object[]} invoiceRows - Item rows
+ * @returns {string} HTML
+ */
+function renderPelunasanRow(noPesanan, invoiceRows) {
+  const mainRow = invoiceRows[0];
 
-  order.forEach((noPesanan) => {
-    const invoiceRows = map[noPesanan];
-    const mainRow = invoiceRows[0];
+  // New keys: DATE, NAME, REMAINING BALANCE
+  const tanggal = mainRow["DATE"];
+  const nama = mainRow["NAME"];
+  let sisaTagihan = mainRow["REMAINING BALANCE"] || 0;
 
-    // New keys: DATE, NAME, REMAINING BALANCE
-    const tanggal = mainRow["DATE"];
-    const nama = mainRow["NAME"];
-    let sisaTagihan = mainRow["REMAINING BALANCE"] || 0;
+  if (typeof sisaTagihan === "string") {
+    sisaTagihan = parseFloat(sisaTagihan.replace(/[^\d.-]/g, "")) || 0;
+  }
 
-    if (typeof sisaTagihan === "string") {
-      sisaTagihan = parseFloat(sisaTagihan.replace(/[^\d.-]/g, "")) || 0;
-    }
+  const formattedSisa = sisaTagihan.toLocaleString("id-ID");
+
+  return `
+    <td>${formatDisplayDate(tanggal)}</td>
+    <td>${noPesanan}</td>
+    <td>${nama}</td>
+    <td><span class="badge status-dp">DP</span></td>
+    <td>
+       <div style="font-weight:bold;">Rp${formattedSisa}</div>
+    </td>
+    <td>
+      <div class="action-buttons">
+        <button class="btn-lihat" onclick="viewInvoicePelunasan('${noPesanan}')">Lihat</button>
+        <button class="btn-edit" onclick="editInvoicePelunasan('${noPesanan}')" style="background-color: #ff9800;">Edit</button>
+        <button class="btn-delete" onclick="deleteInvoiceAction('${noPesanan}')" style="background-color: #f44336; color: white; border: none; padding: 5px 10px; border-radius: 4px; cursor: pointer;">Hapus</button>
+        <button class="btn-lihat" style="background-color: #4CAF50;" onclick="bayarInvoice('${noPesanan}')">Pelunasan</button>
+      </div>
+    </td>
+  `;
+}
 
-    const formattedSisa = sisaTagihan.toLocaleString("id-ID");
-
-    const tr = document.createElement("tr");
-    tr.innerHTML = `
-      <td>${formatDisplayDate(tanggal)}</td>
-      <td>${noPesanan}</td>
-      <td>${nama}</td>
-      <td><span class="badge status-dp">DP</span></td>
-      <td>
-         <div style="font-weight:bold;">Rp${formattedSisa}</div>
-      </td>
-      <td>
-        <div class="action-buttons">
-          <button class="btn-lihat" onclick="viewInvoicePelunasan('${noPesanan}')">Lihat</button>
-          <button class="btn-edit" onclick="editInvoicePelunasan('${noPesanan}')" style="background-color: #ff9800;">Edit</button>
-          <button class="btn-delete" onclick="deleteInvoiceAction('${noPesanan}')" style="background-color: #f44336; color: white; border: none; padding: 5px 10px; border-radius: 4px; cursor: pointer;">Hapus</button>
-          <button class="btn-lihat" style="background-color: #4CAF50;" onclick="bayarInvoice('${noPesanan}')">Pelunasan</button>
-        </div>
-      </td>
-    `;
-    tableBody.appendChild(tr);
-  });
+/**
+ * Rows of a DP invoice, read through the record store's invoice index
+ * @param {string} noPesanan
+ * @returns {Promise<object[]|undefined>}
+ */
+async function getInvoiceRows(noPesanan) {
+  const rows = await pelunasanService.findGroup(noPesanan);
+  return rows || groupedInvoices.map[noPesanan];
 }
 
-function bayarInvoice(noPesanan) {
-  const invoiceRows = groupedInvoices.map[noPesanan];
+async function bayarInvoice(noPesanan) {
+  const invoiceRows = await getInvoiceRows(noPesanan);
   if (!invoiceRows) return;
 
   const mainRow = invoiceRows[0];
@@ -202,8 +162,8 @@ function bayarInvoice(noPesanan) {
   window.location.href = "form_pelunasan.html";
 }
 
-function viewInvoicePelunasan(noPesanan) {
-  const invoiceRows = groupedInvoices.map[noPesanan];
+async function viewInvoicePelunasan(noPesanan) {
+  const invoiceRows = await getInvoiceRows(noPesanan);
   if (!invoiceRows) return;
 
   const mainRow = invoiceRows[0];
@@ -258,8 +218,8 @@ function viewInvoicePelunasan(noPesanan) {
   window.location.href = "invoice_dp.html";
 }
 
-function editInvoicePelunasan(noPesanan) {
-  const invoiceRows = groupedInvoices.map[noPesanan];
+async function editInvoicePelunasan(noPesanan) {
+  const invoiceRows = await getInvoiceRows(noPesanan);
   if (!invoiceRows) return;
 
   const mainRow = invoiceRows[0];
@@ -51,7 +51,7 @@ function populateCategoryFilter() {
   const categoryMap = new Map();
 
   productsData.forEach((p) => {
-    const rawCategory = getValueFromKeys(p, ["KETAGORI", "KATEGORI"], "");
+    const rawCategory = p["KATEGORI"] || "";
     if (rawCategory) {
       // Use trimmed and uppercased version as key to detect duplicates
       const normalizedKey = rawCategory.toString().trim().toUpperCase();
@@ -80,9 +80,7 @@ function applyFiltersAndRender() {
   filteredData = productsData.filter((product) => {
     const sku = (product["SKU"] || "").toLowerCase();
     const name = (product["NAMA PRODUK"] || "").toLowerCase();
-    const category = getValueFromKeys(product, ["KETAGORI", "KATEGORI"], "")
-      .toString()
-      .trim();
+    const category = (product["KATEGORI"] || "").toString().trim();
 
     const matchesSearch =
       searchQuery === "" ||
@@ -127,7 +125,7 @@ function renderPaginatedTable() {
         <tr data-row-index="${product._rowIndex}">
             <td>${product["SKU"] || ""}</td>
             <td>${product["NAMA PRODUK"] || ""}</td>
-            <td>${getValueFromKeys(product, ["KETAGORI", "KATEGORI"], "")}</td>
+            <td>${product["KATEGORI"] || ""}</td>
             <td>${product["SATUAN"] || ""}</td>
             <td>${product["STOK AWAL"] || 0}</td>
             <td>${product["RESTOCK"] || 0}</td>
@@ -306,9 +304,7 @@ function showAddProductModal() {
   // Get unique categories for dropdown
   const categoryMap = new Map();
   productsData.forEach((p) => {
-    const cat = getValueFromKeys(p, ["KETAGORI", "KATEGORI"], "")
-      .toString()
-      .trim();
+    const cat = (p["KATEGORI"] || "").toString().trim();
     if (cat) {
       categoryMap.set(cat.toUpperCase(), cat);
     }
@@ -462,20 +458,12 @@ async function showEditProductModal(rowIndex) {
   // Get unique categories for dropdown
   const categoryMap = new Map();
   productsData.forEach((p) => {
-    const cat = getValueFromKeys(p, ["KETAGORI", "KATEGORI"], "")
-      .toString()
-      .trim();
+    const cat = (p["KATEGORI"] || "").toString().trim();
     if (cat) categoryMap.set(cat.toUpperCase(), cat);
   });
   const categories = Array.from(categoryMap.values()).sort();
 
-  const currentCategory = getValueFromKeys(
-    product,
-    ["KETAGORI", "KATEGORI"],
-    "",
-  )
-    .toString()
-    .trim();
+  const currentCategory = (product["KATEGORI"] || "").toString().trim();
 
   const modalHTML = `
         <div id="productModal" class="modal">
@@ -712,3 +700,448 @@ async function processStokLapang(rowIndex) {
     saveBtn.textContent = "Update Stok Lapangan";
   }
 }
+
+// Bulk Stock Opname Logic
+// Parsed opname rows waiting to be committed ({sku, jumlah})
+let opnameItems = [];
+
+function showStokOpnameModal() {
+  opnameItems = [];
+
+  const modalHTML = `
+        <div id="productModal" class="modal">
+            <div class="modal-content modal-opname">
+                <h2 style="border-bottom-color: #9c27b0;">Stok Opname</h2>
+                <div class="form-group">
+                    <label>Upload CSV (SKU, Stok Lapangan)</label>
+                    <input type="file" id="opnameFile" accept=".csv,.txt">
+                </div>
+                <div class="form-group">
+                    <label>Atau tempel data di sini</label>
+                    <textarea id="opnameText" rows="6" placeholder="SKU,STOK LAPANG&#10;PRD-001,25&#10;PRD-002,10"></textarea>
+                </div>
+                <div id="opnamePreview" class="opname-preview"></div>
+                <div class="modal-buttons">
+                    <button type="button" class="btn-batal" onclick="previewStokOpname()">Pratinjau</button>
+                    <button type="button" class="btn-simpan" id="btnSimpanOpname" style="background-color: #9c27b0;" onclick="processStokOpname()" disabled>Simpan Semua</button>
+                    <button type="button" class="btn-batal" onclick="closeModal()">Batal</button>
+                </div>
+            </div>
+        </div>
+    `;
+
+  document.body.insertAdjacentHTML("beforeend", modalHTML);
+
+  const textArea = document.getElementById("opnameText");
+  document.getElementById("opnameFile").addEventListener("change", (e) => {
+    const file = e.target.files[0];
+    if (!file) return;
+    const reader = new FileReader();
+    reader.onload = () => {
+      textArea.value = reader.result;
+      previewStokOpname();
+    };
+    reader.readAsText(file);
+  });
+
+  // Any edit invalidates the previous preview
+  textArea.addEventListener("input", () => {
+    opnameItems = [];
+    document.getElementById("btnSimpanOpname").disabled = true;
+  });
+  textArea.focus();
+}
+
+/**
+ * Split CSV text into trimmed cells (comma, semicolon or tab separated)
+ * @param {string} text - CSV content
+ * @returns {string[][]} One array of cells per non-empty line
+ */
+function parseCsvLines(text) {
+  const lines = text.split(/\r?\n/).filter((line) => line.trim() !== "");
+  if (lines.length === 0) return [];
+
+  const delimiter = ["\t", ";", ","].find((d) => lines[0].includes(d)) || ",";
+  return lines.map((line) =>
+    line.split(delimiter).map((cell) => cell.trim().replace(/^"|"$/g, "")),
+  );
+}
+
+/**
+ * Parse "SKU, count" lines
+ * A header row is detected when its count column is not a number
+ * @param {string} text - CSV content
+ * @returns {{rows: Array<{sku: string, jumlah: number}>, errors: string[]}}
+ */
+function parseStokOpnameCsv(text) {
+  const lines = parseCsvLines(text);
+  const rows = [];
+  const errors = [];
+  if (lines.length === 0) return { rows, errors };
+
+  let skuCol = 0;
+  let qtyCol = 1;
+  const first = lines[0];
+  if (first.length > 1 && isNaN(parseFloat(first[first.length - 1]))) {
+    const upper = first.map((cell) => cell.toUpperCase());
+    const skuIndex = upper.findIndex((cell) => cell === "SKU");
+    const qtyIndex = upper.findIndex((cell) =>
+      /LAPANG|STOK|JUMLAH|QTY/.test(cell),
+    );
+    if (skuIndex !== -1) skuCol = skuIndex;
+    if (qtyIndex !== -1) qtyCol = qtyIndex;
+    lines.shift();
+  }
+
+  // Later lines win when a SKU is counted twice
+  const bySku = new Map();
+  lines.forEach((cells, i) => {
+    const sku = (cells[skuCol] || "").trim();
+    const rawQty = (cells[qtyCol] || "").replace(/\s/g, "");
+    const jumlah = Number(rawQty);
+
+    if (!sku) {
+      errors.push(`Baris ${i + 1}: SKU kosong`);
+    } else if (rawQty === "" || isNaN(jumlah) || jumlah < 0) {
+      errors.push(`Baris ${i + 1}: jumlah tidak valid untuk ${sku}`);
+    } else {
+      bySku.set(sku.toUpperCase(), { sku, jumlah });
+    }
+  });
+
+  bySku.forEach((row) => rows.push(row));
+  return { rows, errors };
+}
+
+/**
+ * Compute SELISIH (stok lapangan - stok akhir) against the cached product list
+ */
+function previewStokOpname() {
+  const preview = document.getElementById("opnamePreview");
+  const saveBtn = document.getElementById("btnSimpanOpname");
+  const { rows, errors } = parseStokOpnameCsv(
+    document.getElementById("opnameText").value,
+  );
+
+  const productBySku = new Map();
+  productsData.forEach((p) => {
+    const sku = (p["SKU"] || "").toString().trim().toUpperCase();
+    if (sku) productBySku.set(sku, p);
+  });
+
+  const notFound = [];
+  let changed = 0;
+  let totalSelisih = 0;
+  opnameItems = [];
+
+  const tableRows = rows
+    .map((row) => {
+      const product = productBySku.get(row.sku.toUpperCase());
+      if (!product) {
+        notFound.push(row.sku);
+        return `
+            <tr class="opname-missing">
+                <td>${row.sku}</td>
+                <td colspan="4">SKU tidak ditemukan</td>
+            </tr>`;
+      }
+
+      const stokAkhir = parseFloat(product["STOK AKHIR"]) || 0;
+      const selisih = row.jumlah - stokAkhir;
+      if (row.jumlah !== (parseFloat(product["STOK LAPANG"]) || 0)) changed++;
+      totalSelisih += selisih;
+      opnameItems.push({ sku: product["SKU"], jumlah: row.jumlah });
+
+      const selisihClass =
+        selisih < 0 ? "opname-minus" : selisih > 0 ? "opname-plus" : "";
+      return `
+            <tr>
+                <td>${product["SKU"]}</td>
+                <td>${product["NAMA PRODUK"] || ""}</td>
+                <td>${stokAkhir}</td>
+                <td>${row.jumlah}</td>
+                <td class="${selisihClass}">${selisih}</td>
+            </tr>`;
+    })
+    .join("");
+
+  preview.innerHTML = `
+        <div class="opname-summary">
+            ${opnameItems.length} produk, ${changed} berubah, total selisih ${totalSelisih}
+            ${notFound.length ? `<br>${notFound.length} SKU tidak ditemukan` : ""}
+            ${errors.length ? `<br>${errors.join("<br>")}` : ""}
+        </div>
+        ${
+          rows.length
+            ? `<div class="opname-table-wrapper">
+            <table>
+                <thead>
+                    <tr>
+                        <th>SKU</th>
+                        <th>NAMA PRODUK</th>
+                        <th>STOK AKHIR</th>
+                        <th>STOK LAPANGAN</th>
+                        <th>SELISIH</th>
+                    </tr>
+                </thead>
+                <tbody>${tableRows}</tbody>
+            </table>
+        </div>`
+            : ""
+        }
+    `;
+
+  saveBtn.disabled = opnameItems.length === 0;
+}
+
+/**
+ * Commit every previewed count in a single server write
+ */
+async function processStokOpname() {
+  if (opnameItems.length === 0) return;
+
+  const saveBtn = document.getElementById("btnSimpanOpname");
+  saveBtn.disabled = true;
+  saveBtn.textContent = "Menyimpan...";
+
+  try {
+    const result = await setProductStokLapang(opnameItems);
+    if (result.success) {
+      let message = `Stok lapangan ${result.updated} produk berhasil diupdate!`;
+      if (result.notFound && result.notFound.length > 0) {
+        message += `\nSKU tidak ditemukan: ${result.notFound.join(", ")}`;
+      }
+      alert(message);
+      closeModal();
+      await window.IDBCache.clear(productService.cacheKey);
+      loadProducts();
+    }
+  } catch (error) {
+    alert("Gagal menyimpan stok opname: " + error.message);
+    saveBtn.disabled = false;
+    saveBtn.textContent = "Simpan Semua";
+  }
+}
+
+// Bulk Price List / Catalog Import Logic
+// Parsed products waiting to be upserted (objects keyed by sheet header)
+let importProducts = [];
+
+function showImportProdukModal() {
+  importProducts = [];
+
+  const modalHTML = `
+        <div id="productModal" class="modal">
+            <div class="modal-content modal-opname">
+                <h2 class="modal-edit-header">Import Daftar Harga</h2>
+                <div class="form-group">
+                    <label>Upload CSV (baris pertama = header, wajib ada kolom SKU)</label>
+                    <input type="file" id="importFile" accept=".csv,.txt">
+                </div>
+                <div class="form-group">
+                    <label>Atau tempel data di sini</label>
+                    <textarea id="importText" rows="6" placeholder="SKU,HPP,HARGA JUAL&#10;PRD-001,15000,20000&#10;PRD-002,8000,12000"></textarea>
+                </div>
+                <div id="importPreview" class="opname-preview"></div>
+                <div class="modal-buttons">
+                    <button type="button" class="btn-batal" onclick="previewImportProduk()">Pratinjau</button>
+                    <button type="button" class="btn-simpan btn-update" id="btnSimpanImport" onclick="processImportProduk()" disabled>Simpan Semua</button>
+                    <button type="button" class="btn-batal" onclick="closeModal()">Batal</button>
+                </div>
+            </div>
+        </div>
+    `;
+
+  document.body.insertAdjacentHTML("beforeend", modalHTML);
+
+  const textArea = document.getElementById("importText");
+  document.getElementById("importFile").addEventListener("change", (e) => {
+    const file = e.target.files[0];
+    if (!file) return;
+    const reader = new FileReader();
+    reader.onload = () => {
+      textArea.value = reader.result;
+      previewImportProduk();
+    };
+    reader.readAsText(file);
+  });
+
+  textArea.addEventListener("input", () => {
+    importProducts = [];
+    document.getElementById("btnSimpanImport").disabled = true;
+  });
+  textArea.focus();
+}
+
+/**
+ * Parse a price list CSV into product objects keyed by the sheet's headers
+ * Header names are matched case-insensitively against the loaded products
+ * @param {string} text - CSV content with a header row
+ * @returns {{products: object[], unknownColumns: string[]}}
+ */
+function parseImportProdukCsv(text) {
+  const lines = parseCsvLines(text);
+  if (lines.length < 2) return { products: [], unknownColumns: [] };
+
+  const knownKeys = new Map();
+  productsData.forEach((p) => {
+    Object.keys(p).forEach((key) => {
+      if (key !== "_rowIndex") knownKeys.set(key.toUpperCase(), key);
+    });
+  });
+  ["SKU", "NAMA PRODUK", "KATEGORI", "SATUAN", "HPP", "HARGA JUAL"].forEach(
+    (key) => {
+      if (!knownKeys.has(key)) knownKeys.set(key, key);
+    },
+  );
+
+  const unknownColumns = [];
+  const columns = lines[0].map((header) => {
+    const key = knownKeys.get(header.toUpperCase());
+    if (!key) unknownColumns.push(header);
+    return key || null;
+  });
+
+  const products = lines.slice(1).map((cells) => {
+    const product = {};
+    columns.forEach((key, i) => {
+      if (!key || cells[i] === undefined || cells[i] === "") return;
+      const value = cells[i];
+      product[key] =
+        key !== "SKU" && !isNaN(Number(value)) ? Number(value) : value;
+    });
+    return product;
+  });
+
+  return { products, unknownColumns };
+}
+
+function previewImportProduk() {
+  const preview = document.getElementById("importPreview");
+  const saveBtn = document.getElementById("btnSimpanImport");
+  const { products, unknownColumns } = parseImportProdukCsv(
+    document.getElementById("importText").value,
+  );
+
+  const productBySku = new Map();
+  productsData.forEach((p) => {
+    const sku = (p["SKU"] || "").toString().trim().toUpperCase();
+    if (sku) productBySku.set(sku, p);
+  });
+
+  importProducts = products.filter((p) => p["SKU"]);
+  const missingSku = products.length - importProducts.length;
+  let newCount = 0;
+
+  const tableRows = importProducts
+    .map((p) => {
+      const existing = productBySku.get(String(p["SKU"]).toUpperCase());
+      if (!existing) newCount++;
+      const priceCell = (key) => {
+        if (p[key] === undefined) return `<td>-</td>`;
+        const old = existing ? existing[key] || 0 : null;
+        const diff = old === null ? "" : p[key] - old;
+        const diffClass =
+          diff < 0 ? "opname-minus" : diff > 0 ? "opname-plus" : "";
+        return `<td>${formatCurrency(p[key])}${
+          diff ? ` <span class="${diffClass}">(${diff > 0 ? "+" : ""}${diff})</span>` : ""
+        }</td>`;
+      };
+      return `
+            <tr>
+                <td>${p["SKU"]}</td>
+                <td>${p["NAMA PRODUK"] || (existing && existing["NAMA PRODUK"]) || ""}</td>
+                <td>${existing ? "Update" : "Baru"}</td>
+                ${priceCell("HPP")}
+                ${priceCell("HARGA JUAL")}
+            </tr>`;
+    })
+    .join("");
+
+  preview.innerHTML = `
+        <div class="opname-summary">
+            ${importProducts.length} produk (${importProducts.length - newCount} update, ${newCount} baru)
+            ${missingSku ? `<br>${missingSku} baris tanpa SKU dilewati` : ""}
+            ${unknownColumns.length ? `<br>Kolom tidak dikenal: ${unknownColumns.join(", ")}` : ""}
+        </div>
+        ${
+          importProducts.length
+            ? `<div class="opname-table-wrapper">
+            <table>
+                <thead>
+                    <tr>
+                        <th>SKU</th>
+                        <th>NAMA PRODUK</th>
+                        <th>STATUS</th>
+                        <th>HPP</th>
+                        <th>HARGA JUAL</th>
+                    </tr>
+                </thead>
+                <tbody>${tableRows}</tbody>
+            </table>
+        </div>`
+            : ""
+        }
+    `;
+
+  saveBtn.disabled = importProducts.length === 0;
+}
+
+/**
+ * Send the whole price list in one request, then patch the local cache
+ */
+async function processImportProduk() {
+  if (importProducts.length === 0) return;
+
+  const saveBtn = document.getElementById("btnSimpanImport");
+  saveBtn.disabled = true;
+  saveBtn.textContent = "Menyimpan...";
+
+  try {
+    const result = await upsertProducts(importProducts);
+    if (result.success) {
+      await applyUpsertResult(result);
+
+      let message = `${result.updated} produk diupdate, ${result.inserted} produk baru, ${result.unchanged} tidak berubah.`;
+      const failed = result.results.filter((r) => r.status === "error");
+      if (failed.length > 0) {
+        message += `\nGagal: ${failed.map((r) => `${r.sku || "(tanpa SKU)"} - ${r.error}`).join(", ")}`;
+      }
+      if (result.ignoredColumns && result.ignoredColumns.length > 0) {
+        message += `\nKolom diabaikan: ${result.ignoredColumns.join(", ")}`;
+      }
+      alert(message);
+      closeModal();
+    }
+  } catch (error) {
+    alert("Gagal import daftar harga: " + error.message);
+    saveBtn.disabled = false;
+    saveBtn.textContent = "Simpan Semua";
+  }
+}
+
+/**
+ * Apply the rows the server wrote (with their formula columns) to productsData
+ * and the IndexedDB cache, so the page does not need to reload the whole sheet
+ * @param {object} result - upsert-products response
+ */
+async function applyUpsertResult(result) {
+  const rows = normalizeSheetRows(
+    productService.sheetName,
+    result.rows || [],
+    result.headers,
+  );
+  const byRow = new Map();
+  productsData.forEach((p, i) => byRow.set(p._rowIndex, i));
+
+  rows.forEach((row) => {
+    if (byRow.has(row._rowIndex)) productsData[byRow.get(row._rowIndex)] = row;
+    else productsData.push(row);
+  });
+
+  // Saved without the server version: other changes since the last load are
+  // not in productsData, so the next load still fetches the sheet
+  await productService.updateCache(productsData);
+  populateCategoryFilter();
+  applyFiltersAndRender();
+}
@@ -4,24 +4,23 @@
  */
 
 const QUOTATION_SHEET_NAME = "QUOTATION";
-const KUSTOMER_SHEET_NAME = "KOSTUMER";
-const PRODUK_SHEET_NAME = "PERSEDIAAN BARANG";
 
 // Cart data
 let keranjangData = [];
 let nomorUrut = 1;
 
 // Customer data cache for autocomplete
-let allCustomers = [];
+const customerSearch = createCustomerLookup();
+const productIndex = createProductSearchIndex();
 let selectedCustomer = { kota: "", channel: "" };
 
-// LocalStorage cache keys
-const CUSTOMER_CACHE_KEY = "larosapot_customer_cache";
-const PRODUCT_CACHE_KEY = "larosapot_product_cache";
-
 // Quotation counter storage key
 const QUOTATION_COUNTER_KEY = "larosapot_quotation_counter";
 
+// Idempotency key of the quotation number being allocated ({date, key}),
+// kept until the quotation is saved so a retried save reuses the number
+let quotationIdRequest = null;
+
 // Edit Mode State (Simplified for Quotation)
 let isEditMode = false;
 let editOriginalOrderNo = "";
@@ -54,10 +53,12 @@ async function initQuotationPage() {
 
   updateQuotationNumber();
 
-  // Load cached data IMMEDIATELY (non-blocking sync operations)
-  loadCachedCustomers();
-  loadCachedProducts();
-  loadCachedKasir();
+  // Load cached data first (IndexedDB, no network)
+  await Promise.all([
+    loadCachedCustomers(),
+    loadCachedProducts(),
+    loadCachedKasir(),
+  ]);
 
   // Setup UI immediately - it will use cached data
   setupAutocomplete();
@@ -74,33 +75,25 @@ async function initQuotationPage() {
 }
 
 /**
- * Load customers from cache synchronously
+ * Load customers from the IndexedDB cache (DataServices.customer)
  */
-function loadCachedCustomers() {
-  try {
-    const cached = localStorage.getItem(CUSTOMER_CACHE_KEY);
-    if (cached) {
-      allCustomers = JSON.parse(cached);
-    }
-  } catch (e) {}
+async function loadCachedCustomers() {
+  const cached = await DataServices.customer.getCached();
+  if (cached && Array.isArray(cached.data)) customerSearch.build(cached.data);
 }
 
 /**
- * Load products from cache synchronously
+ * Load products from the IndexedDB cache (DataServices.product)
  */
-function loadCachedProducts() {
-  try {
-    const cached = localStorage.getItem(PRODUCT_CACHE_KEY);
-    if (cached) {
-      allProducts = JSON.parse(cached);
-    }
-  } catch (e) {}
+async function loadCachedProducts() {
+  const cached = await DataServices.product.getCached();
+  if (cached && Array.isArray(cached.data)) productIndex.build(cached.data);
 }
 
 /**
- * Load kasir dropdown from cache synchronously
+ * Load kasir dropdown from the IndexedDB cache (DataServices.users)
  */
-function loadCachedKasir() {
+async function loadCachedKasir() {
   const select = document.getElementById("kasir");
   if (!select) return;
 
@@ -110,33 +103,11 @@ function loadCachedKasir() {
     if (user) defaultValue = user.username;
   }
 
-  try {
-    const cached = localStorage.getItem("larosapot_users_cache");
-    if (cached) {
-      const users = JSON.parse(cached);
-      select.innerHTML = "";
-      users.forEach((user) => {
-        const username = user.USERNAME || user.username || user.Username;
-        if (username) {
-          const option = document.createElement("option");
-          option.value = username;
-          option.textContent = username;
-          if (
-            defaultValue &&
-            username.toLowerCase() === defaultValue.toLowerCase()
-          ) {
-            option.selected = true;
-          }
-          select.appendChild(option);
-        }
-      });
-    } else if (defaultValue) {
-      select.innerHTML = `<option value="${defaultValue}" selected>${defaultValue}</option>`;
-    }
-  } catch (e) {
-    if (defaultValue) {
-      select.innerHTML = `<option value="${defaultValue}" selected>${defaultValue}</option>`;
-    }
+  const cached = await DataServices.users.getCached();
+  if (cached && Array.isArray(cached.data) && cached.data.length > 0) {
+    populateKasirSelect(select, cached.data, defaultValue);
+  } else if (defaultValue) {
+    select.innerHTML = `<option value="${defaultValue}" selected>${defaultValue}</option>`;
   }
 }
 
@@ -166,29 +137,8 @@ async function refreshKasirDropdown() {
   }
 
   try {
-    const result = await fetchSheetData("USERS");
-    if (result && result.data && result.data.length > 0) {
-      localStorage.setItem(
-        "larosapot_users_cache",
-        JSON.stringify(result.data),
-      );
-      select.innerHTML = "";
-      result.data.forEach((user) => {
-        const username = user.USERNAME || user.username || user.Username;
-        if (username) {
-          const option = document.createElement("option");
-          option.value = username;
-          option.textContent = username;
-          if (
-            defaultValue &&
-            username.toLowerCase() === defaultValue.toLowerCase()
-          ) {
-            option.selected = true;
-          }
-          select.appendChild(option);
-        }
-      });
-    }
+    const users = await DataServices.users.refresh();
+    if (users.length > 0) populateKasirSelect(select, users, defaultValue);
   } catch (error) {
     console.warn("Error refreshing kasir:", error);
   }
@@ -250,159 +200,58 @@ async function updateQuotationNumber() {
   }
 }
 
+/**
+ * Load all customers for autocomplete suggestions
+ */
 async function loadCustomersForAutocomplete() {
-  // Step 1: Load from cache immediately
+  // The cached list is already loaded; download only if the sheet changed
   try {
-    const cached = localStorage.getItem(CUSTOMER_CACHE_KEY);
-    if (cached) {
-      allCustomers = JSON.parse(cached);
-    }
-  } catch (e) {}
-
-  // Step 2: Fetch fresh data in background
-  try {
-    const result = await fetchSheetData(KUSTOMER_SHEET_NAME);
-    if (result.data && result.data.length > 0) {
-      allCustomers = result.data;
-      localStorage.setItem(CUSTOMER_CACHE_KEY, JSON.stringify(result.data));
-    }
+    const customers = await DataServices.customer.refresh();
+    if (customers.length > 0) customerSearch.build(customers);
   } catch (error) {
     console.error("Error loading customers:", error);
   }
 }
 
+/**
+ * Load all products for autocomplete suggestions
+ */
 async function loadProductsForAutocomplete() {
-  // Step 1: Load from cache immediately
-  try {
-    const cached = localStorage.getItem(PRODUCT_CACHE_KEY);
-    if (cached) {
-      allProducts = JSON.parse(cached);
-    }
-  } catch (e) {}
-
-  // Step 2: Fetch fresh data in background
+  // The cached list is already loaded; download only if the sheet changed
   try {
-    const result = await fetchSheetData(PRODUK_SHEET_NAME);
-    if (result.data && result.data.length > 0) {
-      allProducts = result.data;
-      localStorage.setItem(PRODUCT_CACHE_KEY, JSON.stringify(result.data));
-    }
+    const products = await DataServices.product.refresh();
+    if (products.length > 0) productIndex.build(products);
   } catch (error) {
     console.error("Error loading products:", error);
   }
 }
 
-// ... Autocomplete functions (setupProductAutocomplete, showProductSuggestions, etc.) ...
-// Copying standard autocomplete logic from kasir.js to ensure functionality
-// To save space, I will implement them identically.
-
 function setupProductAutocomplete() {
   const skuInput = document.getElementById("noSku");
   const suggestionList = document.getElementById("skuSuggestionList");
   if (!skuInput || !suggestionList) return;
-  let debounceTimer;
-  skuInput.addEventListener("input", (e) => {
-    clearTimeout(debounceTimer);
-    debounceTimer = setTimeout(
-      () => showProductSuggestions(e.target.value),
-      100,
-    );
-  });
-  skuInput.addEventListener("focus", () => {
-    if (skuInput.value.trim().length >= 1)
-      showProductSuggestions(skuInput.value);
-  });
-  document.addEventListener("click", (e) => {
-    if (!e.target.closest("#noSku") && !e.target.closest("#skuSuggestionList"))
-      hideProductSuggestions();
-  });
-
-  // Keyboard navigation for SKU
-  skuInput.addEventListener("keydown", function (e) {
-    let list = document.getElementById("skuSuggestionList");
-    if (!list || !list.classList.contains("show")) return;
-
-    let items = list.getElementsByClassName("suggestion-item");
-    if (e.key === "ArrowDown") {
-      e.preventDefault();
-      currentProductFocus++;
-      addActiveProduct(items);
-    } else if (e.key === "ArrowUp") {
-      e.preventDefault();
-      currentProductFocus--;
-      addActiveProduct(items);
-    } else if (e.key === "Enter") {
-      if (currentProductFocus > -1) {
-        e.preventDefault();
-        if (items[currentProductFocus]) items[currentProductFocus].click();
-      }
-    }
-  });
-}
-
-let currentProductFocus = -1;
-
-function addActiveProduct(x) {
-  if (!x) return false;
-  removeActiveProduct(x);
-  if (currentProductFocus >= x.length) currentProductFocus = 0;
-  if (currentProductFocus < 0) currentProductFocus = x.length - 1;
-  x[currentProductFocus].classList.add("active");
-
-  // Scroll to active item
-  x[currentProductFocus].scrollIntoView({
-    behavior: "smooth",
-    block: "nearest",
-  });
-}
-
-function removeActiveProduct(x) {
-  for (let i = 0; i < x.length; i++) {
-    x[i].classList.remove("active");
-  }
-}
-
-function showProductSuggestions(query) {
-  const suggestionList = document.getElementById("skuSuggestionList");
-  if (!suggestionList) return;
-  currentProductFocus = -1; // Reset focus
-  query = query.trim().toUpperCase();
-  if (query.length < 1) {
-    hideProductSuggestions();
-    return;
-  }
-  const matches = allProducts.filter((p) => {
-    const sku = String(p["SKU"] || "").toUpperCase();
-    const nama = String(p["NAMA PRODUK"] || "").toUpperCase();
-    return sku.includes(query) || nama.includes(query);
+  createAutocomplete({
+    input: skuInput,
+    list: suggestionList,
+    search: (query, { limit }) => productIndex.search(query, limit),
+    describe: (product) => ({
+      title: product["SKU"] || "",
+      subtitle: `${product["NAMA PRODUK"] || ""} - Rp${(
+        parseFloat(product["HARGA JUAL"]) || 0
+      ).toLocaleString("id-ID")}`,
+    }),
+    onSelect: (product) =>
+      selectProduct(
+        product["SKU"] || "",
+        product["NAMA PRODUK"] || "",
+        product["SATUAN"] || "Pcs",
+        parseFloat(product["HARGA JUAL"]) || 0,
+        product["KATEGORI"] || "",
+      ),
+    delay: 100,
+    emptyMessage: "Produk tidak ditemukan",
+    searchOnFocus: true,
   });
-  suggestionList.innerHTML = "";
-  if (matches.length === 0) {
-    suggestionList.innerHTML = `<div class="suggestion-item no-result">Produk tidak ditemukan</div>`;
-  } else {
-    matches.forEach((product) => {
-      const sku = product["SKU"] || "";
-      const nama = product["NAMA PRODUK"] || "";
-      const satuan = product["SATUAN"] || "Pcs";
-      const harga = parseFloat(product["HARGA JUAL"]) || 0;
-      const kategori = product["KATEGORI"] || "";
-      const item = document.createElement("div");
-      item.className = "suggestion-item";
-      item.innerHTML = `<div class="phone">${sku}</div><div class="name">${nama} - Rp${harga.toLocaleString(
-        "id-ID",
-      )}</div>`;
-      item.addEventListener("click", () =>
-        selectProduct(sku, nama, satuan, harga, kategori),
-      );
-      suggestionList.appendChild(item);
-    });
-  }
-  suggestionList.classList.add("show");
-}
-
-function hideProductSuggestions() {
-  const suggestionList = document.getElementById("skuSuggestionList");
-  if (suggestionList) suggestionList.classList.remove("show");
 }
 
 function selectProduct(sku, nama, satuan, harga, kategori = "") {
@@ -411,122 +260,35 @@ function selectProduct(sku, nama, satuan, harga, kategori = "") {
   document.getElementById("satuan").value = satuan;
   document.getElementById("harga").value = harga;
   document.getElementById("noSku").dataset.kategori = kategori;
-  hideProductSuggestions();
   hitungTotalHarga();
   document.getElementById("jumlah").focus();
 }
 
 function setupAutocomplete() {
   const noTeleponInput = document.getElementById("noTelepon");
-  if (!noTeleponInput) return;
-  let debounceTimer;
-  noTeleponInput.addEventListener("input", (e) => {
-    clearTimeout(debounceTimer);
-    debounceTimer = setTimeout(() => showSuggestions(e.target.value), 100);
-  });
-  noTeleponInput.addEventListener("focus", () => {
-    if (noTeleponInput.value.trim().length >= 2)
-      showSuggestions(noTeleponInput.value);
-  });
-  document.addEventListener("click", (e) => {
-    if (!e.target.closest(".autocomplete-container")) hideSuggestions();
-  });
-
-  // Keyboard navigation for Customer
-  noTeleponInput.addEventListener("keydown", function (e) {
-    let list = document.getElementById("suggestionList");
-    if (!list || !list.classList.contains("show")) return;
-
-    let items = list.getElementsByClassName("suggestion-item");
-    if (e.key === "ArrowDown") {
-      e.preventDefault();
-      currentFocus++;
-      addActive(items);
-    } else if (e.key === "ArrowUp") {
-      e.preventDefault();
-      currentFocus--;
-      addActive(items);
-    } else if (e.key === "Enter") {
-      if (currentFocus > -1) {
-        e.preventDefault();
-        if (items[currentFocus]) items[currentFocus].click();
-      }
-    }
-  });
-}
-
-let currentFocus = -1;
-
-function addActive(x) {
-  if (!x) return false;
-  removeActive(x);
-  if (currentFocus >= x.length) currentFocus = 0;
-  if (currentFocus < 0) currentFocus = x.length - 1;
-  x[currentFocus].classList.add("active");
-
-  // Scroll to active item
-  x[currentFocus].scrollIntoView({
-    behavior: "smooth",
-    block: "nearest",
-  });
-}
-
-function removeActive(x) {
-  for (let i = 0; i < x.length; i++) {
-    x[i].classList.remove("active");
-  }
-}
-
-function normalizePhone(phone) {
-  if (!phone) return "";
-  phone = phone.toString().trim().replace(/[\s+]/g, "");
-  if (phone.startsWith("0")) phone = "62" + phone.substring(1);
-  else if (!phone.startsWith("62")) phone = "62" + phone;
-  return phone;
-}
-
-function showSuggestions(query) {
   const suggestionList = document.getElementById("suggestionList");
-  if (!suggestionList) return;
-  currentFocus = -1; // Reset focus
-  query = query.trim();
-  if (query.length < 2) {
-    hideSuggestions();
-    return;
-  }
-  const normalizedQuery = normalizePhone(query);
-  const matches = allCustomers.filter((c) => {
-    const phone = String(c["NO HP"] || c["NO\nHP"] || c["No HP"] || "");
-    return (
-      normalizePhone(phone).includes(normalizedQuery) || phone.includes(query)
-    );
+  if (!noTeleponInput || !suggestionList) return;
+  createAutocomplete({
+    input: noTeleponInput,
+    list: suggestionList,
+    search: (query, { limit }) => customerSearch.byPhone(query, limit),
+    describe: (customer) => ({
+      title: customer["NO HP"] || "",
+      subtitle: customer["NAMA PELANGGAN"] || "",
+    }),
+    onSelect: (customer) =>
+      selectCustomer(
+        customer["NO HP"] || "",
+        customer["NAMA PELANGGAN"] || "",
+        customer["ALAMAT"] || "",
+        customer["KOTA"] || "",
+        customer["CHANNEL"] || "",
+      ),
+    minLength: 2,
+    delay: 100,
+    emptyMessage: "Pelanggan tidak ditemukan",
+    searchOnFocus: true,
   });
-  suggestionList.innerHTML = "";
-  if (matches.length === 0) {
-    suggestionList.innerHTML = `<div class="suggestion-item no-result">Pelanggan tidak ditemukan</div>`;
-  } else {
-    matches.forEach((customer) => {
-      const phone = customer["NO HP"] || customer["NO\nHP"] || "";
-      const nama =
-        customer["NAMA PELANGGAN"] || customer["NAMA\nPELANGGAN"] || "";
-      const alamat = customer["ALAMAT"] || customer["Alamat"] || "";
-      const city = customer["KOTA"] || customer["Kota"] || "";
-      const channel = customer["CHANNEL"] || customer["Channel"] || "";
-      const item = document.createElement("div");
-      item.className = "suggestion-item";
-      item.innerHTML = `<div class="phone">${phone}</div><div class="name">${nama}</div>`;
-      item.addEventListener("click", () =>
-        selectCustomer(phone, nama, alamat, city, channel),
-      );
-      suggestionList.appendChild(item);
-    });
-  }
-  suggestionList.classList.add("show");
-}
-
-function hideSuggestions() {
-  const suggestionList = document.getElementById("suggestionList");
-  if (suggestionList) suggestionList.classList.remove("show");
 }
 
 function selectCustomer(phone, nama, alamat, kota = "", channel = "") {
@@ -535,7 +297,6 @@ function selectCustomer(phone, nama, alamat, kota = "", channel = "") {
   document.getElementById("alamatPelanggan").value = alamat;
   selectedCustomer.kota = kota;
   selectedCustomer.channel = channel;
-  hideSuggestions();
 }
 
 function hitungTotalHarga() {
@@ -732,7 +493,14 @@ async function saveQuotation() {
     // Get the actual (incremented) quotation number NOW, right before saving
     let finalNoPesanan = noPesanan;
     if (!isEditMode) {
-      const idResult = await DataServices.getNextId("QT", tanggal);
+      if (!quotationIdRequest || quotationIdRequest.date !== tanggal) {
+        quotationIdRequest = { date: tanggal, key: createIdempotencyKey() };
+      }
+      const idResult = await DataServices.getNextId(
+        "QT",
+        tanggal,
+        quotationIdRequest.key,
+      );
       if (idResult.success) {
         finalNoPesanan = idResult.id;
         document.getElementById("noPesanan").value = finalNoPesanan;
@@ -799,6 +567,7 @@ async function saveQuotation() {
       }
     }
 
+    quotationIdRequest = null;
     alert(`Quotation ${noPesanan} berhasil disimpan!`);
     resetQuotationForm();
   } catch (error) {
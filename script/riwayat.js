@@ -10,164 +10,192 @@ const invoiceService = DataServices.invoice;
 // Global variable to store grouped data for actions
 let groupedInvoices = {};
 
+// Max invoice groups requested from the server search index
+const SEARCH_RESULT_LIMIT = 50;
+
 document.addEventListener("DOMContentLoaded", () => {
   loadRiwayatData();
 });
 
+// Checkouts waiting in the outbox (saved while offline), shown above the list
+let pendingInvoices = { map: {}, order: [] };
+
 async function loadRiwayatData() {
   const tableBody = document.querySelector("tbody");
   if (!tableBody) return;
 
+  pendingInvoices = groupInvoicesByOrder(
+    await getOutboxPreviewRows(invoiceService.sheetName),
+  );
   groupedInvoices = await invoiceService.loadGroupedData({
     tbody: tableBody,
     onRender: renderTable,
-    groupFn: groupDataByOrder,
   });
 
   setupSearch();
 }
 
+// Reload once a pending checkout has been sent
+let lastPendingCount = null;
+window.addEventListener("outboxchange", (event) => {
+  const pending = event.detail.pending;
+  if (lastPendingCount !== null && pending < lastPendingCount) {
+    loadRiwayatData();
+  }
+  lastPendingCount = pending;
+});
+
 function setupSearch() {
   const searchInput = document.getElementById("searchInput");
-  if (!searchInput) return;
+  if (!searchInput || searchInput.dataset.searchBound) return;
+  searchInput.dataset.searchBound = "true";
+
+  let debounceTimer;
 
   searchInput.addEventListener("input", (e) => {
     const searchTerm = e.target.value.toLowerCase().trim();
+    clearTimeout(debounceTimer);
+
     if (!searchTerm) {
       renderTable({ map: groupedInvoices.map, order: groupedInvoices.order });
       return;
     }
 
-    const keywords = searchTerm.split(/\s+/);
-    const filteredOrder = groupedInvoices.order.filter((noPesanan) => {
-      const rows = groupedInvoices.map[noPesanan];
-      const mainRow = rows[0];
-      const nama = getValueFromKeys(
-        mainRow,
-        ["NAMA PELANGGAN", "Nama Pelanggan"],
-        "",
-      ).toLowerCase();
-      const kota = getValueFromKeys(
-        mainRow,
-        ["Kota", "KOTA"],
-        "",
-      ).toLowerCase();
-      const searchSource = `${noPesanan.toLowerCase()} ${nama} ${kota}`;
-
-      // All keywords must be found in the combined source string (AND logic)
-      return keywords.every((kw) => searchSource.includes(kw));
-    });
-
-    renderTable({ map: groupedInvoices.map, order: filteredOrder });
+    // Step 1: Filter what is already cached for instant feedback
+    const localOrder = filterLocalInvoices(searchTerm);
+    renderTable({ map: groupedInvoices.map, order: localOrder });
+
+    // Step 2: Ask the server index, which covers the full history
+    if (searchTerm.length < 2) return;
+    debounceTimer = setTimeout(async () => {
+      try {
+        const result = await searchSheetData(
+          invoiceService.sheetName,
+          searchTerm,
+          SEARCH_RESULT_LIMIT,
+        );
+        // Ignore stale responses if the user kept typing
+        if (searchInput.value.toLowerCase().trim() !== searchTerm) return;
+
+        const serverGroups = groupInvoicesByOrder(
+          normalizeSheetRows(
+            invoiceService.sheetName,
+            result.groups.flatMap((group) => group.rows),
+          ),
+        );
+        Object.assign(groupedInvoices.map, serverGroups.map);
+
+        // Server ranking first, then local matches the index has not returned
+        const order = serverGroups.order.concat(
+          localOrder.filter((no) => !serverGroups.map[no]),
+        );
+        renderTable({ map: groupedInvoices.map, order: order });
+      } catch (error) {
+        console.warn("Server search failed, showing local results:", error);
+      }
+    }, 300);
   });
 }
 
-function groupDataByOrder(data) {
-  const groups = {};
-  const orderedGroups = [];
-  let currentOrderNo = null;
-
-  const invoiceKeys = [
-    "NO INVOICE",
-    "NO'PESANAN",
-    "NO PESANAN",
-    "INVOICE",
-    "NO\nPESANAN",
-    "INVOICE\n",
-    "invoice",
-  ];
-
-  data.forEach((row) => {
-    // Filter for FP (Lunas) only
-    if (row["DP/FP"] !== "FP") return;
-
-    let noPesanan = null;
-
-    // Try known keys
-    for (const key of invoiceKeys) {
-      if (row[key]) {
-        noPesanan = row[key];
-        break;
-      }
-    }
-
-    // Fallback: fuzzy search
-    if (!noPesanan) {
-      const keys = Object.keys(row);
-      for (const key of keys) {
-        const upperKey = key.toUpperCase();
-        if (
-          (upperKey.includes("INVOICE") || upperKey.includes("PESANAN")) &&
-          row[key]
-        ) {
-          noPesanan = row[key];
-          break;
-        }
-      }
-    }
+/**
+ * Filter cached invoices by keywords (AND logic)
+ * @param {string} searchTerm - Lowercased search term
+ * @returns {string[]} Matching invoice numbers
+ */
+function filterLocalInvoices(searchTerm) {
+  const keywords = searchTerm.split(/\s+/);
+  return groupedInvoices.order.filter((noPesanan) => {
+    const rows = groupedInvoices.map[noPesanan];
+    const mainRow = rows[0];
+    const nama = String(mainRow["NAME"] || "").toLowerCase();
+    const kota = String(mainRow["CITY"] || "").toLowerCase();
+    const searchSource = `${noPesanan.toLowerCase()} ${nama} ${kota}`;
+
+    // All keywords must be found in the combined source string (AND logic)
+    return keywords.every((kw) => searchSource.includes(kw));
+  });
+}
 
-    if (noPesanan) {
-      currentOrderNo = noPesanan;
-      if (!groups[currentOrderNo]) {
-        groups[currentOrderNo] = [];
-        orderedGroups.push(currentOrderNo);
-      }
-    }
+// Windowed renderer for the invoice list (virtual-table.js)
+const invoiceTable = createVirtualTable({
+  tbody: document.getElementById("riwayatTableBody"),
+  colSpan: 5,
+  keyOf: (entry) => entry.noPesanan,
+  renderRow: (entry, index) =>
+    renderInvoiceRow(entry.noPesanan, entry.rows, index),
+});
 
-    if (currentOrderNo) {
-      groups[currentOrderNo].push(row);
-    }
-  });
+function renderTable(groupedData) {
+  const map = { ...groupedData.map, ...pendingInvoices.map };
+  const order = pendingInvoices.order.concat(groupedData.order);
+  invoiceTable.setItems(
+    order.map((noPesanan) => ({ noPesanan, rows: map[noPesanan] })),
+  );
+}
 
-  return { map: groups, order: orderedGroups };
+/**
+ * Cells of one invoice row
+ * @param {string} noPesanan - Invoice number
+ * @param {Object[]} invoiceRows - Item rows of the invoice
+ * @param {number} index - Position in the list
+ * @returns {string} HTML
+ */
+function renderInvoiceRow(noPesanan, invoiceRows, index) {
+  const mainRow = invoiceRows[0];
+  const isPending = mainRow._outboxId !== undefined;
+
+  // New Keys: DATE, NAME, GRAND TOTAL
+  const tanggal = mainRow["DATE"];
+  const nama = mainRow["NAME"] || "";
+  const itemsCount = invoiceRows.length;
+  let totalTagihan = mainRow["GRAND TOTAL"] || 0;
+
+  const formattedTotal = parseFloat(totalTagihan).toLocaleString("id-ID");
+
+  return `
+    <td>${index + 1}.</td>
+    <td>${noPesanan}</td>
+    <td>
+      <div style="font-weight:bold;">${nama}</div>
+      <div style="font-size: 0.8em; color: gray;">${formatDisplayDate(
+        tanggal,
+      )}</div>
+    </td>
+    <td>
+       <div style="font-weight:bold;">Rp${formattedTotal}</div>
+       <div style="font-size: 0.8em; color: gray;">${itemsCount} Items</div>
+    </td>
+    <td>
+      ${
+        isPending
+          ? `<span class="outbox-badge ${mainRow._outboxStatus}">${
+              mainRow._outboxStatus === "failed"
+                ? "Gagal dikirim"
+                : "Menunggu sinkron"
+            }</span>`
+          : `<div class="action-buttons">
+        <button class="btn-lihat" onclick="viewInvoice('${noPesanan}')">Lihat</button>
+        <button class="btn-edit" onclick="editInvoice('${noPesanan}')">Edit</button>
+        <button class="btn-hapus" onclick="deleteInvoiceAction('${noPesanan}')">Hapus</button>
+      </div>`
+      }
+    </td>
+  `;
 }
 
-function renderTable(groupedData) {
-  const tableBody = document.querySelector("tbody");
-  tableBody.innerHTML = "";
-
-  const { map, order } = groupedData;
-
-  order.forEach((noPesanan, index) => {
-    const invoiceRows = map[noPesanan];
-    const mainRow = invoiceRows[0];
-
-    // New Keys: DATE, NAME, GRAND TOTAL
-    const tanggal = mainRow["DATE"];
-    const nama = mainRow["NAME"] || "";
-    const itemsCount = invoiceRows.length;
-    let totalTagihan = mainRow["GRAND TOTAL"] || 0;
-
-    const formattedTotal = parseFloat(totalTagihan).toLocaleString("id-ID");
-
-    const tr = document.createElement("tr");
-    tr.innerHTML = `
-      <td>${index + 1}.</td>
-      <td>${noPesanan}</td>
-      <td>
-        <div style="font-weight:bold;">${nama}</div>
-        <div style="font-size: 0.8em; color: gray;">${formatDisplayDate(
-          tanggal,
-        )}</div>
-      </td>
-      <td>
-         <div style="font-weight:bold;">Rp${formattedTotal}</div>
-         <div style="font-size: 0.8em; color: gray;">${itemsCount} Items</div>
-      </td>
-      <td>
-        <div class="action-buttons">
-          <button class="btn-lihat" onclick="viewInvoice('${noPesanan}')">Lihat</button>
-          <button class="btn-edit" onclick="editInvoice('${noPesanan}')">Edit</button>
-          <button class="btn-hapus" onclick="deleteInvoiceAction('${noPesanan}')">Hapus</button>
-        </div>
-      </td>
-    `;
-    tableBody.appendChild(tr);
-  });
+/**
+ * Rows of an invoice, read through the record store's invoice index
+ * Falls back to the loaded list, which also holds server search results.
+ * @param {string} noPesanan
+ * @returns {Promise<object[]|undefined>}
+ */
+async function getInvoiceRows(noPesanan) {
+  const rows = await invoiceService.findGroup(noPesanan);
+  return rows || groupedInvoices.map[noPesanan];
 }
 
-function viewInvoice(noPesanan) {
-  const invoiceRows = groupedInvoices.map[noPesanan];
+async function viewInvoice(noPesanan) {
+  const invoiceRows = await getInvoiceRows(noPesanan);
   if (!invoiceRows) return;
 
   const mainRow = invoiceRows[0];
@@ -212,8 +240,8 @@ function viewInvoice(noPesanan) {
   window.location.href = "invoice.html";
 }
 
-function editInvoice(noPesanan) {
-  const invoiceRows = groupedInvoices.map[noPesanan];
+async function editInvoice(noPesanan) {
+  const invoiceRows = await getInvoiceRows(noPesanan);
   if (!invoiceRows) return;
 
   const mainRow = invoiceRows[0];
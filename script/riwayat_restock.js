@@ -19,7 +19,6 @@ async function loadRestockData() {
   groupedRestocks = await restockService.loadGroupedData({
     tbody: tableBody,
     onRender: renderTable,
-    groupFn: groupDataByInvoice,
   });
 
   setupSearch();
@@ -52,72 +51,70 @@ function setupSearch() {
   });
 }
 
-function groupDataByInvoice(data) {
-  const groups = {};
-  const orderedGroups = [];
-
-  data.forEach((row) => {
-    const invoiceNo = row["INVOICE"];
-    if (!invoiceNo) return;
-
-    if (!groups[invoiceNo]) {
-      groups[invoiceNo] = [];
-      orderedGroups.push(invoiceNo);
-    }
-    groups[invoiceNo].push(row);
-  });
-
-  // Sort by date (descending) if TANGGAL exists
-  orderedGroups.sort((a, b) => {
-    const dateA = new Date(groups[a][0]["TANGGAL"]);
-    const dateB = new Date(groups[b][0]["TANGGAL"]);
-    return dateB - dateA;
-  });
+// Windowed renderer for the restock list (virtual-table.js)
+const restockTable = createVirtualTable({
+  tbody: document.getElementById("restockTableBody"),
+  colSpan: 5,
+  keyOf: (entry) => entry.invoiceNo,
+  renderRow: (entry, index) =>
+    renderRestockRow(entry.invoiceNo, entry.rows, index),
+});
 
-  return { map: groups, order: orderedGroups };
+function renderTable(groupedData) {
+  const { map, order } = groupedData;
+  restockTable.setItems(
+    order.map((invoiceNo) => ({ invoiceNo, rows: map[invoiceNo] })),
+  );
 }
 
-function renderTable(groupedData) {
-  const tableBody = document.getElementById("restockTableBody");
-  tableBody.innerHTML = "";
+/**
+ * Cells of one restock invoice
+ * @param {string} invoiceNo
+ * @param {Object[]} rows - Item rows
+ * @param {number} index - Position in the list
+ * @returns {string} HTML
+ */
+function renderRestockRow(invoiceNo, rows, index) {
+  const mainRow = rows[0];
 
-  const { map, order } = groupedData;
+  const tanggal = mainRow["TANGGAL"];
+  const vendor = mainRow["VENDOR"] || "";
+  const totalTagihan = parseFloat(mainRow["TOTAL TAGIHAN"]) || 0;
+  const itemsCount = rows.length;
+
+  return `
+    <td>${index + 1}.</td>
+    <td>
+      <div style="font-weight:bold;">${vendor}</div>
+      <div style="font-size: 0.8em; color: gray;">${formatDisplayDate(tanggal)}</div>
+    </td>
+    <td>${invoiceNo}</td>
+    <td>
+      <div style="font-weight:bold;">${formatCurrency(totalTagihan)}</div>
+      <div style="font-size: 0.8em; color: gray;">${itemsCount} Items</div>
+    </td>
+    <td>
+      <div class="action-buttons">
+        <button class="btn-lihat" onclick="viewRestockInvoice('${invoiceNo}')">Lihat</button>
+        <button class="btn-edit" onclick="editRestockAction('${invoiceNo}')">Edit</button>
+        <button class="btn-hapus" onclick="deleteRestockAction('${invoiceNo}')">Hapus</button>
+      </div>
+    </td>
+  `;
+}
 
-  order.forEach((invoiceNo, index) => {
-    const rows = map[invoiceNo];
-    const mainRow = rows[0];
-
-    const tanggal = mainRow["TANGGAL"];
-    const vendor = mainRow["VENDOR"] || "";
-    const totalTagihan = parseFloat(mainRow["TOTAL TAGIHAN"]) || 0;
-    const itemsCount = rows.length;
-
-    const tr = document.createElement("tr");
-    tr.innerHTML = `
-      <td>${index + 1}.</td>
-      <td>
-        <div style="font-weight:bold;">${vendor}</div>
-        <div style="font-size: 0.8em; color: gray;">${formatDisplayDate(tanggal)}</div>
-      </td>
-      <td>${invoiceNo}</td>
-      <td>
-        <div style="font-weight:bold;">${formatCurrency(totalTagihan)}</div>
-        <div style="font-size: 0.8em; color: gray;">${itemsCount} Items</div>
-      </td>
-      <td>
-        <div class="action-buttons">
-          <button class="btn-lihat" onclick="viewRestockInvoice('${invoiceNo}')">Lihat</button>
-          <button class="btn-edit" onclick="editRestockAction('${invoiceNo}')">Edit</button>
-          <button class="btn-hapus" onclick="deleteRestockAction('${invoiceNo}')">Hapus</button>
-        </div>
-      </td>
-    `;
-    tableBody.appendChild(tr);
-  });
+/**
+ * Rows of a restock invoice, read through the record store's invoice index
+ * @param {string} invoiceNo
+ * @returns {Promise<object[]|undefined>}
+ */
+async function getRestockRows(invoiceNo) {
+  const rows = await restockService.findGroup(invoiceNo);
+  return rows || groupedRestocks.map[invoiceNo];
 }
 
-function viewRestockInvoice(invoiceNo) {
-  const rows = groupedRestocks.map[invoiceNo];
+async function viewRestockInvoice(invoiceNo) {
+  const rows = await getRestockRows(invoiceNo);
   if (!rows) return;
 
   const mainRow = rows[0];
@@ -184,8 +181,8 @@ async function deleteRestockAction(invoiceNo) {
   }
 }
 
-function editRestockAction(invoiceNo) {
-  const rows = groupedRestocks.map[invoiceNo];
+async function editRestockAction(invoiceNo) {
+  const rows = await getRestockRows(invoiceNo);
   if (!rows) return;
 
   const mainRow = rows[0];
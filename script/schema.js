@@ -0,0 +1,143 @@
+/**
+ * Sheet Schemas
+ * Canonical field names per sheet. The sheets of different outlets (and older
+ * copies) spell some headers differently ("Nama Pelanggan", "KETAGORI",
+ * "NO'PESANAN"). normalizeSheetRows maps the headers once per read, and every
+ * row is rebuilt with the canonical names in the same key order, so pages read
+ * row["NAMA PELANGGAN"] directly instead of probing alternatives per row.
+ * No DOM access: data-worker.js loads it too.
+ */
+
+// Canonical name -> other spellings. Headers are compared in upper case with
+// whitespace collapsed; a RegExp is a last resort, tried once per header set.
+const SHEET_SCHEMAS = {
+  KOSTUMER: {
+    TANGGAL: [],
+    "NAMA PELANGGAN": ["NAMA"],
+    "NO HP": [],
+    ALAMAT: [],
+    KOTA: [],
+    CHANNEL: [],
+    "JUMLAH TRANSAKSI": [],
+  },
+  "PERSEDIAAN BARANG": {
+    SKU: [],
+    KATEGORI: ["KETAGORI"],
+    "NAMA PRODUK": [],
+  },
+  VENDOR: {
+    "NAMA VENDOR": ["VENDOR"],
+    KATEGORI: [],
+    "NO HP": [],
+    ALAMAT: [],
+    KOTA: [],
+  },
+  INCOME: {
+    DATE: ["TANGGAL"],
+    "NO INVOICE": ["NO'PESANAN", "NO PESANAN", "INVOICE", /INVOICE|PESANAN/],
+    NAME: ["NAMA PELANGGAN", "PELANGGAN"],
+    HP: ["NO HP"],
+    CITY: ["KOTA"],
+  },
+  QUOTATION: {
+    TANGGAL: [],
+    "NO PESANAN": ["NO'PESANAN", "INVOICE", /PESANAN|INVOICE/],
+    PELANGGAN: ["NAMA PELANGGAN"],
+    "NO HP": [],
+    ALAMAT: [],
+    KOTA: [],
+  },
+  RESTOCK: {
+    TANGGAL: [],
+    INVOICE: ["NO INVOICE", "NO PESANAN"],
+    VENDOR: [],
+  },
+};
+
+/**
+ * Comparison form of a header
+ * @param {string} header
+ * @returns {string}
+ */
+function schemaHeaderKey(header) {
+  return String(header).replace(/\s+/g, " ").trim().toUpperCase();
+}
+
+const schemaFieldMaps = {}; // sheet + headers -> fields (getSchemaFields)
+
+/**
+ * Field name of every header of a sheet read
+ * Exact (case/whitespace-insensitive) matches are taken first, then the
+ * spellings in order, then the patterns; a field is given to one header only.
+ * Headers that match nothing keep their name.
+ * @param {string} sheetName
+ * @param {string[]} headers
+ * @returns {string[]|null} null when the headers are already canonical
+ */
+function getSchemaFields(sheetName, headers) {
+  const schema = SHEET_SCHEMAS[sheetName];
+  if (!schema) return null;
+
+  const memoKey = `${sheetName}\u0000${headers.join("\u0000")}`;
+  if (memoKey in schemaFieldMaps) return schemaFieldMaps[memoKey];
+
+  const fields = headers.slice();
+  const keys = headers.map(schemaHeaderKey);
+  const claimed = new Set(); // header positions
+  const assigned = new Set(); // field names
+  const claim = (field, index) => {
+    fields[index] = field;
+    claimed.add(index);
+    assigned.add(field);
+  };
+  const matches = (alias, key) =>
+    alias instanceof RegExp ? alias.test(key) : key === schemaHeaderKey(alias);
+
+  const canonical = Object.keys(schema);
+  canonical.forEach((field) => {
+    const index = keys.indexOf(schemaHeaderKey(field));
+    if (index !== -1) claim(field, index);
+  });
+  canonical.forEach((field) => {
+    if (assigned.has(field)) return;
+    for (const alias of schema[field]) {
+      const index = keys.findIndex(
+        (key, i) => !claimed.has(i) && matches(alias, key),
+      );
+      if (index !== -1) {
+        claim(field, index);
+        return;
+      }
+    }
+  });
+
+  const unchanged = fields.every((field, i) => field === headers[i]);
+  schemaFieldMaps[memoKey] = unchanged ? null : fields;
+  return schemaFieldMaps[memoKey];
+}
+
+/**
+ * Rows of a sheet read with canonical field names
+ * Rows come back unchanged (same array) when the headers are already
+ * canonical; otherwise every row is rebuilt with one shared key order.
+ * @param {string} sheetName
+ * @param {object[]} rows - Rows from fetchSheetData (with _rowIndex)
+ * @param {string[]} [headers] - Sheet headers; defaults to the first row's keys
+ * @returns {object[]}
+ */
+function normalizeSheetRows(sheetName, rows, headers) {
+  if (!Array.isArray(rows) || rows.length === 0) return rows;
+  const sourceHeaders =
+    headers ||
+    Object.keys(rows[0]).filter((key) => !key.startsWith("_"));
+  const fields = getSchemaFields(sheetName, sourceHeaders);
+  if (!fields) return rows;
+
+  return rows.map((source) => {
+    const row = { _rowIndex: source._rowIndex };
+    for (let c = 0; c < sourceHeaders.length; c++) {
+      row[fields[c]] = source[sourceHeaders[c]];
+    }
+    return row;
+  });
+}
@@ -0,0 +1,337 @@
+/**
+ * Search Index
+ * In-memory indexes for the autocompletes, built once when a list loads.
+ * Products: texts are normalized once (upper case, whitespace collapsed) and
+ * every trigram points to the entries containing it, so a keystroke intersects
+ * a few posting sets instead of upper-casing every product. Customers: a digit
+ * trie over normalized phone numbers and a prefix trie over names, so a lookup
+ * costs the length of the query. Results are ranked and capped.
+ */
+
+const SEARCH_GRAM_SIZE = 3;
+const SEARCH_RESULT_LIMIT = 20;
+
+// Fields searched by the product autocompletes, in ranking order
+const PRODUCT_SEARCH_FIELDS = ["SKU", "NAMA PRODUK"];
+
+/**
+ * Upper-case a value and collapse its whitespace
+ * @param {*} value
+ * @returns {string}
+ */
+function normalizeSearchText(value) {
+  return String(value ?? "")
+    .toUpperCase()
+    .replace(/\s+/g, " ")
+    .trim();
+}
+
+/**
+ * Distinct trigrams of a normalized text
+ * @param {string} text
+ * @returns {Set<string>}
+ */
+function searchGramsOf(text) {
+  const grams = new Set();
+  for (let i = 0; i + SEARCH_GRAM_SIZE <= text.length; i++) {
+    grams.add(text.slice(i, i + SEARCH_GRAM_SIZE));
+  }
+  return grams;
+}
+
+/**
+ * Rank of a match inside one field; lower is better, -1 when absent.
+ * 0 exact, 1 prefix, 2 start of a word, 3 anywhere else.
+ * @param {string} text - Normalized field value
+ * @param {string} query - Normalized query
+ * @returns {number}
+ */
+function searchMatchRank(text, query) {
+  const position = text.indexOf(query);
+  if (position === -1) return -1;
+  if (position === 0) return text.length === query.length ? 0 : 1;
+  if (text[position - 1] === " ") return 2;
+  return text.indexOf(" " + query) !== -1 ? 2 : 3;
+}
+
+/**
+ * Create a search index over a list of rows
+ * @param {Object} config
+ * @param {string[]} config.fields - Fields to search, in ranking order
+ * @param {string} [config.key] - Field identifying a row, for put/remove
+ * @returns {Object} Index with build, put, remove and search
+ */
+function createSearchIndex(config) {
+  const { fields, key = null } = config;
+
+  let entries = []; // id -> {row, texts} or null once removed
+  let grams = new Map(); // trigram -> Set of ids
+  let ids = new Map(); // key value -> id
+
+  function addEntry(row) {
+    const id = entries.length;
+    const texts = fields.map((field) => normalizeSearchText(row[field]));
+    entries.push({ row, texts });
+    texts.forEach((text) => {
+      searchGramsOf(text).forEach((gram) => {
+        let posting = grams.get(gram);
+        if (!posting) grams.set(gram, (posting = new Set()));
+        posting.add(id);
+      });
+    });
+    if (key) ids.set(normalizeSearchText(row[key]), id);
+  }
+
+  function removeEntry(id) {
+    const entry = entries[id];
+    if (!entry) return;
+    entry.texts.forEach((text) => {
+      searchGramsOf(text).forEach((gram) => {
+        const posting = grams.get(gram);
+        if (!posting) return;
+        posting.delete(id);
+        if (posting.size === 0) grams.delete(gram);
+      });
+    });
+    entries[id] = null;
+  }
+
+  /**
+   * Ids that may contain the query: every trigram of the query must be
+   * present. Queries shorter than a trigram check every entry.
+   * @param {string} query - Normalized query
+   * @returns {Iterable<number>}
+   */
+  function candidatesFor(query) {
+    if (query.length < SEARCH_GRAM_SIZE) return entries.keys();
+
+    const postings = [];
+    for (const gram of searchGramsOf(query)) {
+      const posting = grams.get(gram);
+      if (!posting) return [];
+      postings.push(posting);
+    }
+    postings.sort((a, b) => a.size - b.size);
+    const [smallest, ...rest] = postings;
+    const candidates = [];
+    smallest.forEach((id) => {
+      if (rest.every((posting) => posting.has(id))) candidates.push(id);
+    });
+    return candidates;
+  }
+
+  /**
+   * Replace the indexed rows
+   * @param {Object[]} rows
+   */
+  function build(rows) {
+    entries = [];
+    grams = new Map();
+    ids = new Map();
+    (rows || []).forEach(addEntry);
+  }
+
+  /**
+   * Add a row, replacing the row with the same key
+   * @param {Object} row
+   */
+  function put(row) {
+    if (key) remove(row[key]);
+    addEntry(row);
+  }
+
+  /**
+   * Remove the row with this key value
+   * @param {*} value
+   */
+  function remove(value) {
+    const normalized = normalizeSearchText(value);
+    if (!ids.has(normalized)) return;
+    removeEntry(ids.get(normalized));
+    ids.delete(normalized);
+  }
+
+  /**
+   * Best matches for a query: exact, then prefix, then word start, then
+   * anywhere; earlier fields first, then list order
+   * @param {string} query
+   * @param {number} [limit] - Maximum number of rows
+   * @returns {Object[]} Matching rows
+   */
+  function search(query, limit = SEARCH_RESULT_LIMIT) {
+    const normalized = normalizeSearchText(query);
+    if (!normalized) return [];
+
+    const ranked = []; // [score, id], kept sorted and at most `limit` long
+    for (const id of candidatesFor(normalized)) {
+      const entry = entries[id];
+      if (!entry) continue;
+
+      let score = -1;
+      for (let field = 0; field < entry.texts.length; field++) {
+        const rank = searchMatchRank(entry.texts[field], normalized);
+        if (rank === -1) continue;
+        const fieldScore = rank * fields.length + field;
+        if (score === -1 || fieldScore < score) score = fieldScore;
+      }
+      if (score === -1) continue;
+      if (ranked.length === limit && score >= ranked[limit - 1][0]) continue;
+
+      let at = ranked.length;
+      while (at > 0 && ranked[at - 1][0] > score) at--;
+      ranked.splice(at, 0, [score, id]);
+      if (ranked.length > limit) ranked.pop();
+    }
+    return ranked.map(([, id]) => entries[id].row);
+  }
+
+  return { build, put, remove, search };
+}
+
+/**
+ * Index for the SKU/name product autocompletes
+ * @returns {Object} Search index keyed by SKU
+ */
+function createProductSearchIndex() {
+  return createSearchIndex({ fields: PRODUCT_SEARCH_FIELDS, key: "SKU" });
+}
+
+/**
+ * Normalize a phone number to the 62xxx form used for comparison
+ * @param {*} phone
+ * @returns {string}
+ */
+function normalizePhone(phone) {
+  if (!phone) return "";
+  phone = phone.toString().trim().replace(/[\s+]/g, "");
+  if (phone.startsWith("0")) phone = "62" + phone.substring(1);
+  else if (!phone.startsWith("62")) phone = "62" + phone;
+  return phone;
+}
+
+/**
+ * Create a prefix trie. Every node keeps the first `capacity` ids inserted
+ * below it, so a lookup walks the prefix and returns them as they are.
+ * @param {number} capacity - Ids kept per node
+ * @returns {Object} Trie with insert and lookup
+ */
+function createPrefixTrie(capacity) {
+  const root = { children: new Map(), ids: [] };
+
+  /**
+   * @param {string} key
+   * @param {number} id - Ids must be inserted in ascending order
+   */
+  function insert(key, id) {
+    let node = root;
+    for (const ch of key) {
+      let child = node.children.get(ch);
+      if (!child) {
+        child = { children: new Map(), ids: [] };
+        node.children.set(ch, child);
+      }
+      node = child;
+      // The same id arrives again for other words sharing this prefix
+      if (node.ids.length < capacity && node.ids[node.ids.length - 1] !== id) {
+        node.ids.push(id);
+      }
+    }
+  }
+
+  /**
+   * @param {string} prefix
+   * @returns {number[]} Ids under the prefix, in insertion order
+   */
+  function lookup(prefix) {
+    let node = root;
+    for (const ch of prefix) {
+      node = node.children.get(ch);
+      if (!node) return [];
+    }
+    return node.ids;
+  }
+
+  return { insert, lookup };
+}
+
+/**
+ * Create the customer lookup for the phone/name autocompletes: a digit trie
+ * over normalized phone numbers and a prefix trie over the name from each of
+ * its words. Customers keep their sheet order (newest first).
+ * @param {number} [limit] - Most customers a lookup can return
+ * @returns {Object} Lookup with build, byPhone, byName and search
+ */
+function createCustomerLookup(limit = SEARCH_RESULT_LIMIT) {
+  let customers = [];
+  let phones = createPrefixTrie(limit);
+  let names = createPrefixTrie(limit);
+
+  /**
+   * Replace the indexed customers
+   * @param {Object[]} rows - KOSTUMER rows (canonical fields, schema.js)
+   */
+  function build(rows) {
+    customers = rows || [];
+    phones = createPrefixTrie(limit);
+    names = createPrefixTrie(limit);
+    customers.forEach((customer, id) => {
+      const digits = normalizePhone(customer["NO HP"]).replace(/\D/g, "");
+      if (digits) phones.insert(digits, id);
+
+      const name = normalizeSearchText(customer["NAMA PELANGGAN"]);
+      if (!name) return;
+      // From every word start, so "budiman 12" finds "Budi Budiman 12"
+      for (let i = 0; i < name.length; i++) {
+        if (i === 0 || name[i - 1] === " ") names.insert(name.slice(i), id);
+      }
+    });
+  }
+
+  /**
+   * Customers whose phone number starts with the query (0812, 62812, 812)
+   * @param {string} query
+   * @param {number} [count]
+   * @returns {Object[]}
+   */
+  function byPhone(query, count = limit) {
+    if (!/\d/.test(query)) return [];
+    const digits = normalizePhone(query).replace(/\D/g, "");
+    return phones
+      .lookup(digits)
+      .slice(0, count)
+      .map((id) => customers[id]);
+  }
+
+  /**
+   * Customers whose name has a word starting with the query
+   * @param {string} query
+   * @param {number} [count]
+   * @returns {Object[]}
+   */
+  function byName(query, count = limit) {
+    const prefix = normalizeSearchText(query);
+    if (!prefix) return [];
+    return names
+      .lookup(prefix)
+      .slice(0, count)
+      .map((id) => customers[id]);
+  }
+
+  /**
+   * Phone matches first, then name matches
+   * @param {string} query
+   * @param {number} [count]
+   * @returns {Object[]}
+   */
+  function search(query, count = limit) {
+    const matches = byPhone(query, count);
+    byName(query, count).forEach((customer) => {
+      if (matches.length < count && !matches.includes(customer)) {
+        matches.push(customer);
+      }
+    });
+    return matches;
+  }
+
+  return { build, byPhone, byName, search };
+}
@@ -0,0 +1,100 @@
+/**
+ * Sheet Reader
+ * Read URLs and response decoding, shared by sheets-api.js and data-worker.js
+ * (no DOM access, so it also runs inside a worker)
+ */
+
+/**
+ * GET URL for an outlet (see OUTLETS in config.js)
+ * @param {string} outletId
+ * @param {string} query - Query string without the leading "?"
+ * @returns {string}
+ */
+function outletRequestUrl(outletId, query) {
+  return `${getOutletApiUrl(outletId)}?outlet=${encodeURIComponent(outletId)}&${query}`;
+}
+
+// Ask for gzip-compressed reads only when the browser can decompress them;
+// otherwise the server sends plain JSON
+const READ_ENCODING_PARAM =
+  typeof DecompressionStream === "function" ? "&encoding=gzip" : "";
+
+/**
+ * Parse a GET response, decompressing {encoding: "gzip", data: base64} bodies
+ * @param {Response} response
+ * @returns {Promise<object>}
+ */
+async function parseReadResponse(response) {
+  const result = await response.json();
+  if (result.encoding !== "gzip") return result;
+
+  const binary = atob(result.data);
+  const bytes = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i++) {
+    bytes[i] = binary.charCodeAt(i);
+  }
+  const stream = new Blob([bytes])
+    .stream()
+    .pipeThrough(new DecompressionStream("gzip"));
+  return JSON.parse(await new Response(stream).text());
+}
+
+/**
+ * URL of a full sheet read in columnar format
+ * @param {string} sheetName
+ * @param {string} outletId
+ * @returns {string}
+ */
+function sheetReadUrl(sheetName, outletId) {
+  return outletRequestUrl(
+    outletId,
+    `sheet=${encodeURIComponent(sheetName)}&action=read&format=columnar${READ_ENCODING_PARAM}`,
+  );
+}
+
+/**
+ * Turn a columnar read response ({headers, types, columns, rowIndex}) back into
+ * the row format ({headers, data: [{_rowIndex, HEADER: value}]})
+ * `data` is an array view: each row object is built the first time its index
+ * is read, so callers that look at a few rows never decode the rest. The view
+ * cannot be structured-cloned; copy it (Array.from) before posting or storing.
+ * @param {object} result - Columnar response from action=read&format=columnar
+ * @returns {{headers: string[], data: object[]}}
+ */
+function decodeColumnarResult(result) {
+  const { headers, types, columns, rowIndex } = result;
+  const offsetMs = (result.tzOffsetMinutes || 0) * 60000;
+
+  const decodeValue = (type, value) => {
+    if (value === null || value === undefined) return "";
+    if (type === "date") {
+      // Same ISO string the row format produces for Date cells
+      return new Date(Math.round(value * 86400000) - offsetMs).toISOString();
+    }
+    return value;
+  };
+
+  const buildRow = (r) => {
+    const row = { _rowIndex: rowIndex[r] };
+    for (let c = 0; c < headers.length; c++) {
+      row[headers[c]] = decodeValue(types[c], columns[c][r]);
+    }
+    return row;
+  };
+
+  // null marks a row not built yet (holes would be skipped by forEach/map)
+  const rows = new Array(rowIndex.length).fill(null);
+  const data = new Proxy(rows, {
+    get(target, prop, receiver) {
+      if (typeof prop === "string" && target[prop] === null) {
+        const r = Number(prop);
+        if (Number.isInteger(r) && r >= 0 && r < target.length) {
+          target[r] = buildRow(r);
+        }
+      }
+      return Reflect.get(target, prop, receiver);
+    },
+  });
+
+  return { success: true, headers: headers, data: data };
+}
@@ -3,26 +3,69 @@
  * Handles communication with Google Apps Script Web App
  */
 
-// Use centralized API URL from config.js
-const SHEETS_API_URL = API_URL;
+// API URL and active outlet come from config.js (getOutletApiUrl, getActiveOutletId);
+// read URLs and response decoding from sheet-reader.js
+
+// Sheet reads per outlet: concurrent callers share one request and the result
+// is reused for a few seconds, so a page never reads the same sheet twice at once
+const SHEET_READ_MAX_AGE = 3000;
+let sheetReadRequests = {};
 
 /**
  * Fetch data from a Google Sheet
+ * Identical calls in flight (or finished within SHEET_READ_MAX_AGE) get the
+ * same result object; treat it as read-only.
  * @param {string} sheetName - Name of the sheet (e.g., 'PERSEDIAAN BARANG', 'KOSTUMER')
+ * @param {string} [outletId] - Outlet to read from (defaults to the active outlet)
+ * @returns {Promise<{headers: string[], data: object[]}>}
+ */
+function fetchSheetData(sheetName, outletId = getActiveOutletId()) {
+  const key = `${outletId}/${sheetName}`;
+  const cached = sheetReadRequests[key];
+  // fetchedAt stays null while the request is in flight
+  if (
+    cached &&
+    (cached.fetchedAt === null ||
+      Date.now() - cached.fetchedAt < SHEET_READ_MAX_AGE)
+  ) {
+    return cached.request;
+  }
+
+  const entry = { request: null, fetchedAt: null };
+  entry.request = requestSheetData(sheetName, outletId).then(
+    (result) => {
+      entry.fetchedAt = Date.now();
+      return result;
+    },
+    (error) => {
+      // Failed reads are not reused
+      if (sheetReadRequests[key] === entry) delete sheetReadRequests[key];
+      throw error;
+    },
+  );
+  sheetReadRequests[key] = entry;
+  return entry.request;
+}
+
+/**
+ * Send one read request (see fetchSheetData)
+ * @param {string} sheetName
+ * @param {string} outletId
  * @returns {Promise<{headers: string[], data: object[]}>}
  */
-async function fetchSheetData(sheetName) {
+async function requestSheetData(sheetName, outletId) {
   try {
-    const response = await fetch(
-      `${SHEETS_API_URL}?sheet=${encodeURIComponent(sheetName)}&action=read`,
-    );
-    const result = await response.json();
+    const response = await fetch(sheetReadUrl(sheetName, outletId));
+    const result = await parseReadResponse(response);
 
     if (result.error) {
       console.error("Error fetching data:", result.error);
       throw new Error(result.error);
     }
 
+    if (result.format === "columnar") {
+      return decodeColumnarResult(result);
+    }
     return result;
   } catch (error) {
     console.error("Failed to fetch sheet data:", error);
@@ -30,6 +73,524 @@ async function fetchSheetData(sheetName) {
   }
 }
 
+// Data manifest (per-sheet write versions) per outlet, shared by every loader on the page
+const MANIFEST_MAX_AGE = 5000;
+let manifestRequests = {};
+
+/**
+ * Fetch the per-sheet data versions from the server
+ * Concurrent callers share one request; the result is reused for a few seconds
+ * @param {string[]} [extraSheets] - Sheets outside SHEET_CONFIG (e.g. dashboard sheets)
+ * @param {string} [outletId] - Outlet to ask (defaults to the active outlet)
+ * @returns {Promise<{versions: Object<string, string>}|null>} null when unavailable
+ */
+function fetchDataManifest(extraSheets = [], outletId = getActiveOutletId()) {
+  const cached = manifestRequests[outletId];
+  if (cached && Date.now() - cached.fetchedAt < MANIFEST_MAX_AGE) {
+    return cached.request;
+  }
+
+  const sheetsParam = extraSheets.length
+    ? `&sheets=${encodeURIComponent(extraSheets.join(","))}`
+    : "";
+  const request = fetch(
+    outletRequestUrl(outletId, `action=manifest${sheetsParam}`),
+  )
+    .then((response) => response.json())
+    .then((result) => (result.error ? null : result))
+    .catch((error) => {
+      console.warn("Failed to fetch data manifest:", error);
+      return null;
+    });
+  manifestRequests[outletId] = { request: request, fetchedAt: Date.now() };
+  return request;
+}
+
+/**
+ * Forget the cached manifests and sheet reads (called after every successful write)
+ */
+function invalidateDataManifest() {
+  manifestRequests = {};
+  sheetReadRequests = {};
+}
+
+// Write requests: every POST carries an idempotency key, so a request that
+// timed out or lost its connection can be sent again without writing twice
+const POST_TIMEOUT_MS = 45000;
+const POST_MAX_RETRIES = 3;
+const POST_RETRY_DELAY_MS = 1000;
+// {retry: true}: the server is still running an earlier attempt with the same
+// key (or its lock is busy); asked again for about two minutes
+const POST_BUSY_MAX_RETRIES = 10;
+const POST_BUSY_MAX_DELAY_MS = 16000;
+
+// Outbox: every write is stored in IndexedDB (IDBOutbox, idb-cache.js) before it
+// is sent, and entries are sent in the order they were made. Consecutive entries
+// that were never sent go out together as one batch request; an entry that was
+// sent on its own is only ever resent on its own, with its own key.
+const OUTBOX_BATCH_SIZE = 20;
+const OUTBOX_RETRY_INTERVAL_MS = 30000; // background retry of waiting entries
+const OUTBOX_ORPHAN_MS = 5 * 60 * 1000; // entries of a closed tab are sent after this
+const OUTBOX_UNBATCHED_ACTIONS = ["batch", "login", "convert-quotation"];
+const OUTBOX_TAB_ID = createIdempotencyKey();
+const outboxWaiters = {}; // entry id -> {resolve, reject} of the waiting caller
+let outboxFlush = null;
+let outboxFlushRequested = false;
+
+/**
+ * Generate a unique idempotency key for one write request
+ * @returns {string}
+ */
+function createIdempotencyKey() {
+  if (window.crypto && typeof window.crypto.randomUUID === "function") {
+    return window.crypto.randomUUID();
+  }
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+}
+
+/**
+ * Send a write action to the Apps Script backend through the outbox
+ * The request is stored in IndexedDB first, so it survives a closed tab, and is
+ * sent in order with the other waiting writes. The same idempotency key is
+ * reused on every retry; the server returns the stored result for a key it has
+ * already processed instead of running it again.
+ * Errors reported by the action itself (`result.error`) are returned, not retried.
+ * When the server cannot be reached:
+ * - by default the entry is dropped and the error is thrown
+ * - with `durable: true` the entry stays in the outbox, is retried in the
+ *   background and `{success: true, queued: true, outboxId}` is returned
+ * @param {object} payload - Request body ({action, sheet, data, ...})
+ * @param {object} [options]
+ * @param {boolean} [options.durable=false] - Keep the write when offline
+ * @param {object} [options.preview] - {sheet, rows} shown as pending while queued
+ * @returns {Promise<object>} - Parsed server response
+ */
+async function postSheetAction(payload, options = {}) {
+  const entry = {
+    outlet: payload.outlet || getActiveOutletId(),
+    idempotencyKey: payload.idempotencyKey || createIdempotencyKey(),
+    payload: payload,
+    durable: !!options.durable,
+    preview: options.preview || null,
+    tabId: OUTBOX_TAB_ID,
+    status: "pending",
+    attempts: 0,
+    lastError: null,
+    batchKey: null,
+    createdAt: Date.now(),
+  };
+
+  try {
+    entry.id = await window.IDBOutbox.add(entry);
+  } catch (error) {
+    // No IndexedDB (private mode, old browser): send directly
+    console.warn("Outbox unavailable, sending directly:", error);
+    const result = await sendSheetAction(
+      payload,
+      entry.outlet,
+      entry.idempotencyKey,
+    );
+    if (!result.error) invalidateDataManifest();
+    return result;
+  }
+
+  if (entry.durable && !navigator.onLine) {
+    notifyOutboxChange();
+    return { success: true, queued: true, outboxId: entry.id };
+  }
+
+  const settled = new Promise((resolve, reject) => {
+    outboxWaiters[entry.id] = { resolve, reject };
+  });
+  flushOutbox();
+  return settled;
+}
+
+/**
+ * POST one request, retrying network errors, timeouts and 5xx/429 responses
+ * with backoff, and `{retry: true}` answers for longer (same key every time)
+ * @param {object} payload - Request body ({action, sheet, data, ...})
+ * @param {string} outletId
+ * @param {string} idempotencyKey - Same key on every attempt
+ * @returns {Promise<object>} - Parsed server response
+ */
+async function sendSheetAction(payload, outletId, idempotencyKey) {
+  const body = JSON.stringify({
+    ...payload,
+    outlet: outletId,
+    idempotencyKey: idempotencyKey,
+  });
+
+  let busy = 0;
+  for (let attempt = 0; ; attempt++) {
+    const controller = new AbortController();
+    const timer = setTimeout(() => controller.abort(), POST_TIMEOUT_MS);
+    let result;
+    try {
+      const response = await fetch(getOutletApiUrl(outletId), {
+        method: "POST",
+        headers: {
+          "Content-Type": "text/plain", // Important for CORS with Apps Script
+        },
+        body: body,
+        signal: controller.signal,
+      });
+
+      if (response.status >= 500 || response.status === 429) {
+        throw new Error(`HTTP ${response.status}`);
+      }
+
+      result = await response.json();
+    } catch (error) {
+      if (attempt >= POST_MAX_RETRIES) throw error;
+      console.warn(
+        `Retrying ${payload.action} (attempt ${attempt + 2}):`,
+        error.message,
+      );
+      await new Promise((resolve) =>
+        setTimeout(resolve, POST_RETRY_DELAY_MS * 2 ** attempt),
+      );
+      continue;
+    } finally {
+      clearTimeout(timer);
+    }
+
+    if (!result.retry) return result;
+    if (++busy > POST_BUSY_MAX_RETRIES) {
+      throw new Error(result.message || "Server busy");
+    }
+    attempt--; // busy answers have their own limit
+    console.warn(`${payload.action} still being processed, asking again`);
+    await new Promise((resolve) =>
+      setTimeout(
+        resolve,
+        Math.min(POST_RETRY_DELAY_MS * 2 ** busy, POST_BUSY_MAX_DELAY_MS),
+      ),
+    );
+  }
+}
+
+/**
+ * Send every waiting outbox entry, oldest first
+ * Calls made while a flush is running are picked up by that flush.
+ * @returns {Promise<void>}
+ */
+function flushOutbox() {
+  outboxFlushRequested = true;
+  if (!outboxFlush) {
+    outboxFlush = (async () => {
+      while (outboxFlushRequested) {
+        outboxFlushRequested = false;
+        // One tab at a time, so two tabs never put the same entry in different batches
+        if (navigator.locks) {
+          await navigator.locks.request("larosapot-outbox", drainOutbox);
+        } else {
+          await drainOutbox();
+        }
+      }
+    })()
+      .catch((error) => console.error("Outbox flush failed:", error))
+      .finally(() => {
+        outboxFlush = null;
+        notifyOutboxChange();
+      });
+  }
+  return outboxFlush;
+}
+
+/**
+ * Entries this tab may send: its own, durable ones and those of closed tabs
+ * @returns {Promise<object[]>}
+ */
+async function getSendableOutboxEntries() {
+  const entries = await window.IDBOutbox.getAll();
+  return entries.filter(
+    (entry) =>
+      entry.status === "pending" &&
+      (entry.durable ||
+        entry.tabId === OUTBOX_TAB_ID ||
+        Date.now() - entry.createdAt > OUTBOX_ORPHAN_MS),
+  );
+}
+
+/**
+ * Send outbox entries group by group until none are left or the server is
+ * unreachable
+ */
+async function drainOutbox() {
+  for (;;) {
+    const entries = await getSendableOutboxEntries();
+    if (entries.length === 0) return;
+
+    const group = pickOutboxGroup(entries);
+    // Saved before sending: a retry must resend exactly this batch and key,
+    // and an entry sent once may reach the server, so it is never regrouped
+    const batchKey =
+      group.length > 1 && !group[0].batchKey ? createIdempotencyKey() : null;
+    for (const entry of group) {
+      if (batchKey) entry.batchKey = batchKey;
+      entry.attempts++;
+      await window.IDBOutbox.update(entry);
+    }
+
+    let results;
+    try {
+      results = await sendOutboxGroup(group);
+    } catch (error) {
+      await holdUnreachableEntries(entries, error);
+      return;
+    }
+
+    for (let i = 0; i < group.length; i++) {
+      if (results[i] === null) {
+        // Rolled back with the batch: resent alone under its own key
+        group[i].batchKey = null;
+        await window.IDBOutbox.update(group[i]);
+      } else {
+        await settleOutboxEntry(group[i], results[i] || { error: "No result" });
+      }
+    }
+  }
+}
+
+/**
+ * Whether an entry may join a batch: never sent, and no key chosen by the
+ * caller (the batch is sent under its own key, not the entries' keys)
+ * @param {object} entry
+ * @returns {boolean}
+ */
+function isBatchableOutboxEntry(entry) {
+  return (
+    entry.attempts === 0 &&
+    !entry.batchKey &&
+    !entry.payload.idempotencyKey &&
+    !OUTBOX_UNBATCHED_ACTIONS.includes(entry.payload.action)
+  );
+}
+
+/**
+ * The entries to send in one request: a batch that was already formed, or the
+ * oldest entry plus the batchable entries right after it
+ * @param {object[]} entries - Sendable entries, oldest first
+ * @returns {object[]}
+ */
+function pickOutboxGroup(entries) {
+  const first = entries[0];
+  if (first.batchKey) {
+    return entries.filter((entry) => entry.batchKey === first.batchKey);
+  }
+  const group = [first];
+  if (!isBatchableOutboxEntry(first)) return group;
+
+  for (const entry of entries.slice(1)) {
+    if (
+      group.length >= OUTBOX_BATCH_SIZE ||
+      entry.outlet !== first.outlet ||
+      !isBatchableOutboxEntry(entry)
+    ) {
+      break;
+    }
+    group.push(entry);
+  }
+  return group;
+}
+
+/**
+ * Send a group of entries, one request for the whole group
+ * Operations keep the caller's `optional` flag. When a required operation
+ * fails and the server rolled the batch back, that entry gets the error and
+ * the others get null: they did not happen and are sent again on their own.
+ * @param {object[]} group
+ * @returns {Promise<Array<object|null>>} One result per entry
+ */
+async function sendOutboxGroup(group) {
+  const first = group[0];
+  if (!first.batchKey) {
+    return [
+      await sendSheetAction(first.payload, first.outlet, first.idempotencyKey),
+    ];
+  }
+
+  const result = await sendSheetAction(
+    {
+      action: "batch",
+      operations: group.map((entry) => {
+        const { outlet, ...operation } = entry.payload;
+        return operation;
+      }),
+    },
+    first.outlet,
+    first.batchKey,
+  );
+  if (result.error && result.rolledBack && result.failedIndex !== undefined) {
+    return group.map((entry, i) =>
+      i === result.failedIndex ? { error: result.error } : null,
+    );
+  }
+  if (result.error) return group.map(() => ({ error: result.error }));
+  return result.results;
+}
+
+/**
+ * Record the server's answer for an entry and hand it to the waiting caller
+ * Answered entries leave the outbox, except durable entries the server rejected
+ * after their caller stopped waiting: they stay as "failed" so the rejection is
+ * visible (getOutboxStatus).
+ * @param {object} entry
+ * @param {object} result - Server response for this entry
+ */
+async function settleOutboxEntry(entry, result) {
+  const waiter = outboxWaiters[entry.id];
+  if (result.error && entry.durable && !waiter) {
+    entry.status = "failed";
+    entry.lastError = String(result.error);
+    await window.IDBOutbox.update(entry);
+  } else {
+    await window.IDBOutbox.remove(entry.id);
+  }
+  if (!result.error) invalidateDataManifest();
+
+  if (waiter) {
+    delete outboxWaiters[entry.id];
+    waiter.resolve(result);
+  }
+}
+
+/**
+ * The server could not be reached: durable entries wait for the next retry,
+ * this tab's other entries are dropped and their callers get the error
+ * @param {object[]} entries - Sendable entries
+ * @param {Error} error
+ */
+async function holdUnreachableEntries(entries, error) {
+  console.warn("Server unreachable, outbox kept for later:", error.message);
+  for (const entry of entries) {
+    const waiter = outboxWaiters[entry.id];
+    if (entry.durable) {
+      entry.lastError = error.message;
+      await window.IDBOutbox.update(entry);
+      if (waiter) {
+        waiter.resolve({ success: true, queued: true, outboxId: entry.id });
+      }
+    } else if (waiter) {
+      await window.IDBOutbox.remove(entry.id);
+      waiter.reject(error);
+    } else {
+      continue;
+    }
+    delete outboxWaiters[entry.id];
+  }
+}
+
+/**
+ * Outbox summary for status displays
+ * @returns {Promise<{pending: number, failed: number, oldest: number|null, lastError: string|null}>}
+ */
+async function getOutboxStatus() {
+  const entries = window.IDBOutbox ? await window.IDBOutbox.getAll() : [];
+  const pending = entries.filter((entry) => entry.status === "pending");
+  const failed = entries.filter((entry) => entry.status === "failed");
+  const withError = entries.filter((entry) => entry.lastError);
+  return {
+    pending: pending.length,
+    failed: failed.length,
+    oldest: pending.length > 0 ? pending[0].createdAt : null,
+    lastError:
+      withError.length > 0 ? withError[withError.length - 1].lastError : null,
+  };
+}
+
+/**
+ * Rows of queued writes that carry a preview, for showing them as pending
+ * @param {string} sheetName
+ * @returns {Promise<object[]>} Preview rows, oldest write first
+ */
+async function getOutboxPreviewRows(sheetName) {
+  if (!window.IDBOutbox) return [];
+  try {
+    const entries = await window.IDBOutbox.getAll();
+    return entries
+      .filter(
+        (entry) =>
+          entry.preview &&
+          entry.preview.sheet === sheetName &&
+          entry.outlet === getActiveOutletId(),
+      )
+      .flatMap((entry) =>
+        entry.preview.rows.map((row) => ({
+          ...row,
+          _outboxId: entry.id,
+          _outboxStatus: entry.status,
+        })),
+      );
+  } catch (error) {
+    console.warn("Could not read outbox previews:", error);
+    return [];
+  }
+}
+
+/**
+ * Send rejected (failed) outbox entries again
+ */
+async function retryFailedOutboxEntries() {
+  const entries = await window.IDBOutbox.getAll();
+  for (const entry of entries) {
+    if (entry.status !== "failed") continue;
+    entry.status = "pending";
+    await window.IDBOutbox.update(entry);
+  }
+  return flushOutbox();
+}
+
+/**
+ * Tell the page (layout.js status badge, riwayat) that the outbox changed
+ */
+async function notifyOutboxChange() {
+  try {
+    const status = await getOutboxStatus();
+    window.dispatchEvent(new CustomEvent("outboxchange", { detail: status }));
+  } catch (error) {
+    console.warn("Could not read outbox status:", error);
+  }
+}
+
+// Send what earlier pages left behind, and keep retrying while writes wait
+window.addEventListener("load", () => flushOutbox());
+window.addEventListener("online", () => flushOutbox());
+setInterval(() => {
+  if (navigator.onLine && !outboxFlush) flushOutbox();
+}, OUTBOX_RETRY_INTERVAL_MS);
+
+/**
+ * Search a sheet through the server-side token index
+ * Only the matching invoice groups are downloaded
+ * @param {string} sheetName - Name of the sheet (e.g., 'INCOME')
+ * @param {string} query - Keywords (invoice number, name, phone, city, SKU)
+ * @param {number} [limit=50] - Max invoice groups to return
+ * @returns {Promise<{total: number, groups: Array<{invoice: string, score: number, rows: object[]}>}>}
+ */
+async function searchSheetData(sheetName, query, limit = 50) {
+  try {
+    const response = await fetch(
+      outletRequestUrl(
+        getActiveOutletId(),
+        `sheet=${encodeURIComponent(sheetName)}&action=search&q=${encodeURIComponent(query)}&limit=${limit}${READ_ENCODING_PARAM}`,
+      ),
+    );
+    const result = await parseReadResponse(response);
+
+    if (result.error) {
+      console.error("Error searching data:", result.error);
+      throw new Error(result.error);
+    }
+
+    return result;
+  } catch (error) {
+    console.error("Failed to search sheet data:", error);
+    throw error;
+  }
+}
+
 /**
  * Add a new row to a Google Sheet
  * @param {string} sheetName - Name of the sheet
@@ -49,15 +610,7 @@ async function addSheetRow(sheetName, rowData, uniqueColumn = null) {
       payload.uniqueColumn = uniqueColumn;
     }
 
-    const response = await fetch(SHEETS_API_URL, {
-      method: "POST",
-      headers: {
-        "Content-Type": "text/plain", // Important for CORS with Apps Script
-      },
-      body: JSON.stringify(payload),
-    });
-
-    const result = await response.json();
+    const result = await postSheetAction(payload);
 
     if (result.error) {
       if (result.error.includes("Duplicate entry")) {
@@ -83,21 +636,13 @@ async function addSheetRow(sheetName, rowData, uniqueColumn = null) {
  */
 async function updateSheetRow(sheetName, rowIndex, rowData) {
   try {
-    const response = await fetch(SHEETS_API_URL, {
-      method: "POST",
-      headers: {
-        "Content-Type": "text/plain",
-      },
-      body: JSON.stringify({
-        sheet: sheetName,
-        action: "update",
-        rowIndex: rowIndex,
-        data: rowData,
-      }),
+    const result = await postSheetAction({
+      sheet: sheetName,
+      action: "update",
+      rowIndex: rowIndex,
+      data: rowData,
     });
 
-    const result = await response.json();
-
     if (result.error) {
       console.error("Error updating row:", result.error);
       throw new Error(result.error);
@@ -118,20 +663,12 @@ async function updateSheetRow(sheetName, rowIndex, rowData) {
  */
 async function deleteSheetRow(sheetName, rowIndex) {
   try {
-    const response = await fetch(SHEETS_API_URL, {
-      method: "POST",
-      headers: {
-        "Content-Type": "text/plain",
-      },
-      body: JSON.stringify({
-        sheet: sheetName,
-        action: "delete",
-        rowIndex: rowIndex,
-      }),
+    const result = await postSheetAction({
+      sheet: sheetName,
+      action: "delete",
+      rowIndex: rowIndex,
     });
 
-    const result = await response.json();
-
     if (result.error) {
       console.error("Error deleting row:", result.error);
       throw new Error(result.error);
@@ -152,22 +689,14 @@ async function deleteSheetRow(sheetName, rowIndex) {
  */
 async function deleteInvoice(sheetName, noPesanan) {
   try {
-    const response = await fetch(SHEETS_API_URL, {
-      method: "POST",
-      headers: {
-        "Content-Type": "text/plain",
+    const result = await postSheetAction({
+      sheet: sheetName,
+      action: "delete-invoice",
+      data: {
+        noPesanan: noPesanan,
       },
-      body: JSON.stringify({
-        sheet: sheetName,
-        action: "delete-invoice",
-        data: {
-          noPesanan: noPesanan,
-        },
-      }),
     });
 
-    const result = await response.json();
-
     if (result.error) {
       console.error("Error deleting invoice:", result.error);
       throw new Error(result.error);
@@ -180,6 +709,37 @@ async function deleteInvoice(sheetName, noPesanan) {
   }
 }
 
+/**
+ * Convert a quotation into an invoice on the server (one locked operation)
+ * The server copies the quotation rows into INCOME with a new invoice number and
+ * deletes the quotation; a failure leaves both sheets unchanged.
+ * @param {string} noPesanan - Quotation number
+ * @param {object} payment - {status: 'LUNAS'|'DP', paid?, payment?, kasir?, roPo?, city?, date?}
+ * @returns {Promise<{success: boolean, id: string, status: string, totalTagihan: number, totalPaid: number, remaining: number}>}
+ */
+async function convertQuotation(noPesanan, payment) {
+  try {
+    const result = await postSheetAction({
+      sheet: "QUOTATION",
+      action: "convert-quotation",
+      data: {
+        ...payment,
+        noPesanan: noPesanan,
+      },
+    });
+
+    if (result.error) {
+      console.error("Error converting quotation:", result.error);
+      throw new Error(result.error);
+    }
+
+    return result;
+  } catch (error) {
+    console.error("Failed to convert quotation:", error);
+    throw error;
+  }
+}
+
 /**
  * Delete restock invoice and trigger stock correction in backend
  * @param {string} noPesanan - The invoice number to delete
@@ -187,22 +747,14 @@ async function deleteInvoice(sheetName, noPesanan) {
  */
 async function deleteRestockAndCorrectStock(noPesanan) {
   try {
-    const response = await fetch(SHEETS_API_URL, {
-      method: "POST",
-      headers: {
-        "Content-Type": "text/plain",
+    const result = await postSheetAction({
+      sheet: "RESTOCK", // Sheet name is fixed for this action
+      action: "delete-restock",
+      data: {
+        noPesanan: noPesanan,
       },
-      body: JSON.stringify({
-        sheet: "RESTOCK", // Sheet name is fixed for this action
-        action: "delete-restock",
-        data: {
-          noPesanan: noPesanan,
-        },
-      }),
     });
 
-    const result = await response.json();
-
     if (result.error) {
       console.error("Error deleting restock:", result.error);
       throw new Error(result.error);
@@ -222,19 +774,11 @@ async function deleteRestockAndCorrectStock(noPesanan) {
  */
 async function incrementCustomerTransaction(phoneNumber) {
   try {
-    const response = await fetch(SHEETS_API_URL, {
-      method: "POST",
-      headers: {
-        "Content-Type": "text/plain",
-      },
-      body: JSON.stringify({
-        action: "increment-transaction",
-        phoneNumber: phoneNumber,
-      }),
+    const result = await postSheetAction({
+      action: "increment-transaction",
+      phoneNumber: phoneNumber,
     });
 
-    const result = await response.json();
-
     if (result.error) {
       console.error("Error incrementing transaction:", result.error);
       return result;
@@ -254,19 +798,11 @@ async function incrementCustomerTransaction(phoneNumber) {
  */
 async function incrementProductSold(items) {
   try {
-    const response = await fetch(SHEETS_API_URL, {
-      method: "POST",
-      headers: {
-        "Content-Type": "text/plain",
-      },
-      body: JSON.stringify({
-        action: "increment-product-sold",
-        items: items,
-      }),
+    const result = await postSheetAction({
+      action: "increment-product-sold",
+      items: items,
     });
 
-    const result = await response.json();
-
     if (result.error) {
       console.error("Error incrementing product sold count:", result.error);
       return result;
@@ -286,19 +822,11 @@ async function incrementProductSold(items) {
  */
 async function incrementProductRestock(items) {
   try {
-    const response = await fetch(SHEETS_API_URL, {
-      method: "POST",
-      headers: {
-        "Content-Type": "text/plain",
-      },
-      body: JSON.stringify({
-        action: "increment-product-restock",
-        items: items,
-      }),
+    const result = await postSheetAction({
+      action: "increment-product-restock",
+      items: items,
     });
 
-    const result = await response.json();
-
     if (result.error) {
       console.error("Error incrementing product restock count:", result.error);
       return result;
@@ -310,3 +838,84 @@ async function incrementProductRestock(items) {
     return { error: error.message };
   }
 }
+
+/**
+ * Set 'STOK LAPANG' for many products in one request (bulk stock opname)
+ * @param {Array} items - Array of {sku, jumlah} objects (jumlah = counted stock)
+ * @returns {Promise<{success: boolean, message: string, updated: number, notFound: string[]}>}
+ */
+async function setProductStokLapang(items) {
+  try {
+    const result = await postSheetAction({
+      action: "set-stok-lapang",
+      items: items,
+    });
+
+    if (result.error) {
+      console.error("Error setting stok lapang:", result.error);
+      throw new Error(result.error);
+    }
+
+    return result;
+  } catch (error) {
+    console.error("Failed to set stok lapang:", error);
+    throw error;
+  }
+}
+
+/**
+ * Insert or update many products keyed by SKU in one request
+ * @param {Array<object>} products - Objects with column headers as keys (SKU required)
+ * @returns {Promise<{success: boolean, inserted: number, updated: number, unchanged: number, failed: number, ignoredColumns: string[], results: Array<{sku: string, status: string, rowIndex?: number, error?: string}>, version?: string}>}
+ */
+async function upsertProducts(products) {
+  try {
+    const result = await postSheetAction({
+      action: "upsert-products",
+      products: products,
+    });
+
+    if (result.error) {
+      console.error("Error upserting products:", result.error);
+      throw new Error(result.error);
+    }
+
+    return result;
+  } catch (error) {
+    console.error("Failed to upsert products:", error);
+    throw error;
+  }
+}
+
+/**
+ * Run several write actions in one request, all-or-nothing
+ * Each operation is the body of a single-action request ({action, sheet, data, ...}).
+ * A value {$ref: "<index>.<path>"} is replaced by the server with that field of
+ * an earlier result (e.g. {$ref: "0.id"} for the ID from a get-next-id at
+ * index 0). Plain strings are never treated as references.
+ * Operations marked `optional: true` may fail without rolling back the batch.
+ * @param {Array<object>} operations
+ * @param {object} [options] - Outbox options (see postSheetAction)
+ * @returns {Promise<{success: boolean, results: object[], queued?: boolean}>}
+ */
+async function runBatchOperations(operations, options = {}) {
+  try {
+    const result = await postSheetAction(
+      {
+        action: "batch",
+        operations: operations,
+      },
+      options,
+    );
+
+    if (result.error) {
+      console.error("Error running batch:", result.error, result);
+      throw new Error(result.error);
+    }
+
+    return result;
+  } catch (error) {
+    console.error("Failed to run batch:", error);
+    throw error;
+  }
+}
@@ -201,8 +201,55 @@ function getValueFromKeys(
 
 // ==================== TABLE HELPERS ====================
 
+// name/phone -> customer maps for getCityForCustomer, rebuilt only when a
+// different customer list is set
+const customerLookup = {
+  customers: null,
+  byName: new Map(),
+  byPhone: new Map(),
+};
+
+/**
+ * Index a customer list by lowercase name and by phone
+ * The first customer wins when a name or phone appears twice.
+ * @param {object[]} customers - KOSTUMER rows (canonical fields, schema.js)
+ */
+function setCustomerLookup(customers) {
+  if (!Array.isArray(customers) || customers === customerLookup.customers) {
+    return;
+  }
+  const byName = new Map();
+  const byPhone = new Map();
+  customers.forEach((c) => {
+    const cName = String(c["NAMA PELANGGAN"] || "")
+      .toLowerCase()
+      .trim();
+    const cPhone = String(c["NO HP"] || "").trim();
+    if (cName && !byName.has(cName)) byName.set(cName, c);
+    if (cPhone && !byPhone.has(cPhone)) byPhone.set(cPhone, c);
+  });
+  customerLookup.customers = customers;
+  customerLookup.byName = byName;
+  customerLookup.byPhone = byPhone;
+}
+
+/**
+ * Load the cached customer list (DataServices.customer) into the lookup
+ * Call once before rendering anything that uses getCityForCustomer.
+ */
+async function loadCustomerLookup() {
+  if (customerLookup.customers || typeof DataServices === "undefined") return;
+  try {
+    const cached = await DataServices.customer.getCached();
+    if (cached && Array.isArray(cached.data)) setCustomerLookup(cached.data);
+  } catch (e) {
+    console.warn("Customer lookup unavailable:", e);
+  }
+}
+
 /**
  * Resolves a customer's city from the customer database if missing
+ * Uses the maps from setCustomerLookup/loadCustomerLookup (no list scan).
  * @param {string} name - Customer name
  * @param {string} phone - Customer phone
  * @returns {string} Customer city or empty string
@@ -210,47 +257,13 @@ function getValueFromKeys(
 function getCityForCustomer(name, phone) {
   if (!name && !phone) return "";
 
-  try {
-    let customers = [];
-    const cacheKeys = ["larosapot_customer_cache", "kustomer_data_cache"];
-    for (const key of cacheKeys) {
-      const cached = localStorage.getItem(key);
-      if (cached) {
-        try {
-          customers = JSON.parse(cached);
-          if (Array.isArray(customers) && customers.length > 0) break;
-        } catch (e) {}
-      }
-    }
+  const searchName = (name || "").toString().toLowerCase().trim();
+  const searchPhone = (phone || "").toString().trim();
+  const match =
+    (searchName && customerLookup.byName.get(searchName)) ||
+    (searchPhone && customerLookup.byPhone.get(searchPhone));
 
-    if (!Array.isArray(customers) || customers.length === 0) return "";
-
-    const searchName = (name || "").toString().toLowerCase().trim();
-    const searchPhone = (phone || "").toString().trim();
-
-    const match = customers.find((c) => {
-      const cName = getValueFromKeys(
-        c,
-        ["NAMA PELANGGAN", "NAMA\nPELANGGAN", "Nama Pelanggan"],
-        "",
-      )
-        .toString()
-        .toLowerCase()
-        .trim();
-      const cPhone = getValueFromKeys(c, ["NO HP", "NO\nHP", "No HP"], "")
-        .toString()
-        .trim();
-      return (
-        (searchName && cName === searchName) ||
-        (searchPhone && cPhone === searchPhone)
-      );
-    });
-
-    if (match) return getValueFromKeys(match, ["KOTA", "Kota"], "");
-  } catch (e) {
-    console.warn("City lookup error:", e);
-  }
-  return "";
+  return match ? match["KOTA"] || "" : "";
 }
 
 /**
@@ -267,8 +280,6 @@ function showTableMessage(tbody, message, colSpan = 8, isError = false) {
   tbody.innerHTML = `<tr><td colspan="${colSpan}" style="${style}">${message}</td></tr>`;
 }
 
-const USERS_CACHE_KEY = "larosapot_users_cache";
-
 /**
  * Load kasir list from USERS sheet and populate a select element
  * Uses cache-first strategy for instant loading
@@ -285,30 +296,19 @@ async function loadKasirDropdown(elementId, defaultValue) {
     if (user) defaultValue = user.username;
   }
 
-  // Step 1: Populate from cache IMMEDIATELY (non-blocking)
-  try {
-    const cached = localStorage.getItem(USERS_CACHE_KEY);
-    if (cached) {
-      const users = JSON.parse(cached);
-      populateKasirSelect(select, users, defaultValue);
-    } else if (defaultValue) {
-      // No cache, but we have a default - show it immediately
-      select.innerHTML = `<option value="${defaultValue}" selected>${defaultValue}</option>`;
-    }
-  } catch (e) {
-    console.warn("Error loading kasir cache:", e);
-    if (defaultValue) {
-      select.innerHTML = `<option value="${defaultValue}" selected>${defaultValue}</option>`;
-    }
+  // Step 1: Populate from the IndexedDB cache
+  const cached = await DataServices.users.getCached();
+  if (cached && Array.isArray(cached.data) && cached.data.length > 0) {
+    populateKasirSelect(select, cached.data, defaultValue);
+  } else if (defaultValue) {
+    // No cache, but we have a default - show it immediately
+    select.innerHTML = `<option value="${defaultValue}" selected>${defaultValue}</option>`;
   }
 
   // Step 2: Fetch fresh data in background and update cache
   try {
-    const result = await fetchSheetData("USERS");
-    if (result && result.data && result.data.length > 0) {
-      localStorage.setItem(USERS_CACHE_KEY, JSON.stringify(result.data));
-      populateKasirSelect(select, result.data, defaultValue);
-    }
+    const users = await DataServices.users.refresh();
+    if (users.length > 0) populateKasirSelect(select, users, defaultValue);
   } catch (error) {
     console.error("Error refreshing kasir dropdown:", error);
     // Cache already shown, so no action needed
@@ -350,5 +350,7 @@ window.Utils = {
   getValueFromKeys,
   showTableMessage,
   getCityForCustomer,
+  setCustomerLookup,
+  loadCustomerLookup,
   loadKasirDropdown,
 };
@@ -29,51 +29,52 @@ async function loadVendors() {
   });
 }
 
+// Windowed renderer for the vendor list (virtual-table.js)
+const vendorTable = createVirtualTable({
+  tbody: document.getElementById("vendorTableBody"),
+  colSpan: 9,
+  keyOf: (vendor) => vendor._rowIndex,
+  renderRow: renderVendorRow,
+  emptyMessage: "Tidak ada data vendor",
+});
+
 // Render vendor table
 function renderVendorTable(data) {
-  const tbody = document.getElementById("vendorTableBody");
-  if (!tbody) return;
-
-  if (!data || data.length === 0) {
-    showTableMessage(tbody, "Tidak ada data vendor", 9);
-    return;
-  }
+  vendorTable.setItems(data);
+}
 
-  tbody.innerHTML = data
-    .map((vendor, index) => {
-      const namaVendor = getValueFromKeys(
-        vendor,
-        ["NAMA\nVENDOR", "NAMA VENDOR"],
-        "-"
-      );
-      const kategori = vendor["KATEGORI"] || "-";
-      const noHp = vendor["NO HP"] || "-";
-      const alamat = vendor["ALAMAT"] || "-";
-      const kota = vendor["KOTA"] || "-";
-      const bank = vendor["BANK"] || "-";
-      const atasNama = vendor["ATAS NAMA"] || "-";
-      const rekening = vendor["REKENING"] || "-";
-
-      return `
-        <tr data-index="${index}">
-          <td>${namaVendor}</td>
-          <td>${kategori}</td>
-          <td>${noHp}</td>
-          <td>${alamat}</td>
-          <td>${kota}</td>
-          <td>${bank}</td>
-          <td>${atasNama}</td>
-          <td>${rekening}</td>
-          <td>
-            <div class="action-buttons">
-              <button class="btn-edit" onclick="editVendor(${index})">Edit</button>
-              <button class="btn-delete" onclick="deleteVendor(${index})">Hapus</button>
-            </div>
-          </td>
-        </tr>
-      `;
-    })
-    .join("");
+/**
+ * Cells of one vendor row
+ * @param {object} vendor - VENDOR row
+ * @param {number} index - Position in vendorData (used by edit/delete)
+ * @returns {string} HTML
+ */
+function renderVendorRow(vendor, index) {
+  const namaVendor = vendor["NAMA VENDOR"] || "-";
+  const kategori = vendor["KATEGORI"] || "-";
+  const noHp = vendor["NO HP"] || "-";
+  const alamat = vendor["ALAMAT"] || "-";
+  const kota = vendor["KOTA"] || "-";
+  const bank = vendor["BANK"] || "-";
+  const atasNama = vendor["ATAS NAMA"] || "-";
+  const rekening = vendor["REKENING"] || "-";
+
+  return `
+    <td>${namaVendor}</td>
+    <td>${kategori}</td>
+    <td>${noHp}</td>
+    <td>${alamat}</td>
+    <td>${kota}</td>
+    <td>${bank}</td>
+    <td>${atasNama}</td>
+    <td>${rekening}</td>
+    <td>
+      <div class="action-buttons">
+        <button class="btn-edit" onclick="editVendor(${index})">Edit</button>
+        <button class="btn-delete" onclick="deleteVendor(${index})">Hapus</button>
+      </div>
+    </td>
+  `;
 }
 
 // Event listeners
@@ -0,0 +1,162 @@
+/**
+ * Virtual Table
+ * Windowed <tbody> renderer for the list pages. Only the rows near the
+ * viewport are in the DOM; two spacer rows stand in for the rest, so a long
+ * history scrolls and filters without building thousands of rows. Rows are
+ * keyed: on a new list (refresh, search) a row that is still visible keeps its
+ * element and is only rewritten when its HTML changed, and rows scrolled out
+ * of view are reused for the ones scrolled in.
+ */
+
+const VIRTUAL_TABLE_ROW_HEIGHT = 60; // px, until the real rows are measured
+const VIRTUAL_TABLE_OVERSCAN = 10; // extra rows rendered above and below
+
+/**
+ * Create a windowed renderer for a table body. The page scrolls the window.
+ * @param {Object} config
+ * @param {HTMLElement} config.tbody
+ * @param {number} config.colSpan - Number of columns, for spacers and messages
+ * @param {Function} config.keyOf - (item, index) => key identifying the row
+ * @param {Function} config.renderRow - (item, index) => inner HTML of the <tr>
+ * @param {string} [config.emptyMessage] - Shown when there are no items
+ * @returns {Object} Table with setItems and refresh
+ */
+function createVirtualTable(config) {
+  const { tbody, colSpan, keyOf, renderRow, emptyMessage = "" } = config;
+
+  let items = [];
+  let rowHeight = VIRTUAL_TABLE_ROW_HEIGHT;
+  let rendered = new Map(); // key -> {tr, html}
+  const spare = []; // rows scrolled out of view, reused before creating new
+  let frame = null;
+
+  function createSpacer() {
+    const tr = document.createElement("tr");
+    tr.setAttribute("aria-hidden", "true");
+    const td = document.createElement("td");
+    td.colSpan = colSpan;
+    td.style.padding = "0";
+    td.style.border = "0";
+    tr.appendChild(td);
+    return tr;
+  }
+
+  const topSpacer = createSpacer();
+  const bottomSpacer = createSpacer();
+
+  function setSpacerHeight(spacer, height) {
+    spacer.style.display = height > 0 ? "" : "none";
+    spacer.firstChild.style.height = `${height}px`;
+  }
+
+  /**
+   * Put the spacers back if something else (a loading or error message)
+   * replaced the body since the last render
+   */
+  function attach() {
+    if (topSpacer.parentNode === tbody) return;
+    tbody.replaceChildren(topSpacer, bottomSpacer);
+    rendered = new Map();
+    spare.length = 0;
+  }
+
+  /**
+   * Items overlapping the viewport, plus the overscan
+   * @returns {number[]} [first, last) item indexes
+   */
+  function visibleRange() {
+    const offset = tbody.getBoundingClientRect().top;
+    const first = Math.floor(-offset / rowHeight) - VIRTUAL_TABLE_OVERSCAN;
+    const last =
+      Math.ceil((window.innerHeight - offset) / rowHeight) +
+      VIRTUAL_TABLE_OVERSCAN;
+    const clamp = (n) => Math.max(0, Math.min(items.length, n));
+    return [clamp(first), clamp(Math.max(last, first + 1))];
+  }
+
+  /**
+   * Average height of the rendered rows; rows may wrap on small screens
+   * @returns {number}
+   */
+  function measureRowHeight() {
+    let total = 0;
+    rendered.forEach((row) => {
+      total += row.tr.offsetHeight;
+    });
+    return rendered.size > 0 ? total / rendered.size : rowHeight;
+  }
+
+  function render() {
+    frame = null;
+    if (!tbody) return;
+
+    if (items.length === 0) {
+      rendered = new Map();
+      if (emptyMessage) showTableMessage(tbody, emptyMessage, colSpan);
+      else tbody.replaceChildren();
+      return;
+    }
+
+    attach();
+    const [first, last] = visibleRange();
+    const visible = new Map();
+    let next = topSpacer.nextSibling;
+
+    for (let index = first; index < last; index++) {
+      const item = items[index];
+      let key = String(keyOf(item, index));
+      if (visible.has(key)) key += `#${index}`; // duplicate key in the list
+      let row = rendered.get(key);
+      if (row) {
+        rendered.delete(key);
+      } else {
+        row = { tr: spare.pop() || document.createElement("tr"), html: null };
+        row.tr.dataset.key = key;
+      }
+
+      const html = renderRow(item, index);
+      if (row.html !== html) {
+        row.tr.innerHTML = html;
+        row.html = html;
+      }
+      if (row.tr === next) next = next.nextSibling;
+      else tbody.insertBefore(row.tr, next);
+      visible.set(key, row);
+    }
+
+    rendered.forEach((row) => {
+      row.tr.remove();
+      if (spare.length < last - first) spare.push(row.tr);
+    });
+    rendered = visible;
+
+    setSpacerHeight(topSpacer, first * rowHeight);
+    setSpacerHeight(bottomSpacer, (items.length - last) * rowHeight);
+
+    // Re-window once if the estimate was off by more than 10%
+    const measured = measureRowHeight();
+    if (Math.abs(measured - rowHeight) > rowHeight * 0.1) {
+      rowHeight = measured;
+      schedule();
+    }
+  }
+
+  function schedule() {
+    if (frame === null) frame = requestAnimationFrame(render);
+  }
+
+  /**
+   * Show a new list; rows already on screen are matched by key
+   * @param {Array} list
+   */
+  function setItems(list) {
+    items = list || [];
+    if (frame !== null) cancelAnimationFrame(frame);
+    render();
+  }
+
+  window.addEventListener("scroll", schedule, { passive: true });
+  window.addEventListener("resize", schedule);
+
+  return { setItems, refresh: schedule };
+}
@@ -0,0 +1,177 @@
+/**
+ * Service Worker - App Shell Cache
+ * Pages, scripts, styles and images are answered from the cache and refreshed
+ * in the background (stale-while-revalidate), so page switches and cold starts
+ * do not wait for the network, and the app opens offline. Spreadsheet data is
+ * not cached here; that is IndexedDB's job (idb-cache.js).
+ *
+ * Bump CACHE_VERSION on every deploy: the new worker downloads the whole shell
+ * again and deletes the caches of older versions once it takes over.
+ */
+
+const CACHE_VERSION = "v6";
+const CACHE_PREFIX = "larosapot-shell-";
+const CACHE_NAME = CACHE_PREFIX + CACHE_VERSION;
+
+// Everything a page needs to start. Add new pages and scripts here.
+const APP_SHELL = [
+  "./",
+  "dashboard.html",
+  "data_quotation.html",
+  "form_edit_invoice.html",
+  "form_edit_pelunasan.html",
+  "form_edit_quotation.html",
+  "form_pelunasan.html",
+  "form_restock.html",
+  "index.html",
+  "invoice.html",
+  "invoice_dp.html",
+  "invoice_pembelian.html",
+  "kasir.html",
+  "kustomer.html",
+  "pelunasan.html",
+  "produk.html",
+  "quotation.html",
+  "quotation_view.html",
+  "riwayat.html",
+  "riwayat_restock.html",
+  "vendor.html",
+  "script/auth.js",
+  "script/autocomplete.js",
+  "script/config.js",
+  "script/dashboard.js",
+  "script/data-service.js",
+  "script/data-worker.js",
+  "script/data_quotation.js",
+  "script/form_edit_invoice.js",
+  "script/form_edit_pelunasan.js",
+  "script/form_edit_quotation.js",
+  "script/form_pelunasan.js",
+  "script/form_restock.js",
+  "script/grouping.js",
+  "script/idb-cache.js",
+  "script/invoice.js",
+  "script/invoice_dp.js",
+  "script/kasir.js",
+  "script/kustomer.js",
+  "script/layout.js",
+  "script/pelunasan.js",
+  "script/produk.js",
+  "script/quotation.js",
+  "script/quotation_view.js",
+  "script/riwayat.js",
+  "script/riwayat_restock.js",
+  "script/schema.js",
+  "script/search-index.js",
+  "script/sheet-reader.js",
+  "script/sheets-api.js",
+  "script/utils.js",
+  "script/vendor.js",
+  "script/virtual-table.js",
+  "style/dashboard.css",
+  "style/invoice.css",
+  "style/kasir.css",
+  "style/kustomer.css",
+  "style/layout.css",
+  "style/login.css",
+  "style/produk.css",
+  "style/riwayat.css",
+  "asset/image/larosa-logo.ico",
+  "asset/image/larosa-logo.png",
+];
+
+// Third-party libraries served from this origin. Precached with the shell,
+// but a file that is not deployed yet does not block the install.
+const VENDOR_FILES = ["asset/vendor/chart.umd.min.js"];
+
+// Third-party files the pages load; cached the same way, on first use
+const RUNTIME_HOSTS = [
+  "cdn.jsdelivr.net", // Chart.js fallback (dashboard.html)
+  "fonts.googleapis.com", // Poppins (login.css)
+  "fonts.gstatic.com",
+];
+
+self.addEventListener("install", (event) => {
+  event.waitUntil(
+    (async () => {
+      const cache = await caches.open(CACHE_NAME);
+      // Bypass the HTTP cache so a new version never precaches stale files
+      await cache.addAll(
+        APP_SHELL.map((url) => new Request(url, { cache: "reload" })),
+      );
+      await Promise.all(
+        VENDOR_FILES.map((url) =>
+          cache.add(new Request(url, { cache: "reload" })).catch((error) => {
+            console.warn(`${url} not precached:`, error);
+          }),
+        ),
+      );
+      await self.skipWaiting();
+    })(),
+  );
+});
+
+self.addEventListener("activate", (event) => {
+  event.waitUntil(
+    (async () => {
+      const names = await caches.keys();
+      await Promise.all(
+        names
+          .filter(
+            (name) => name.startsWith(CACHE_PREFIX) && name !== CACHE_NAME,
+          )
+          .map((name) => caches.delete(name)),
+      );
+      await self.clients.claim();
+    })(),
+  );
+});
+
+self.addEventListener("fetch", (event) => {
+  const request = event.request;
+  if (request.method !== "GET") return;
+
+  const url = new URL(request.url);
+  const sameOrigin = url.origin === self.location.origin;
+  // Apps Script calls and anything else go straight to the network
+  if (!sameOrigin && !RUNTIME_HOSTS.includes(url.hostname)) return;
+
+  event.respondWith(staleWhileRevalidate(event, cacheKeyOf(url, sameOrigin)));
+});
+
+/**
+ * Cache key of a request
+ * Own files are stored without their query string: `style/kasir.css?v=3` and
+ * `invoice.html?no=...` are the same files as without it.
+ * @param {URL} url
+ * @param {boolean} sameOrigin
+ * @returns {string}
+ */
+function cacheKeyOf(url, sameOrigin) {
+  return sameOrigin ? url.origin + url.pathname : url.href;
+}
+
+/**
+ * Answer from the cache when possible and refresh the entry from the network
+ * @param {FetchEvent} event
+ * @param {string} key - Cache key (see cacheKeyOf)
+ * @returns {Promise<Response>}
+ */
+async function staleWhileRevalidate(event, key) {
+  const cache = await caches.open(CACHE_NAME);
+  const cached = await cache.match(key);
+
+  const network = fetch(event.request);
+  // Keep the worker alive until the cache is updated
+  event.waitUntil(
+    network
+      .then((response) => {
+        // Redirected responses cannot answer a navigation later
+        if (response.ok && !response.redirected) {
+          return cache.put(key, response.clone());
+        }
+      })
+      .catch(() => {}),
+  );
+  return cached || network;
+}